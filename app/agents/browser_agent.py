@@ -2,11 +2,11 @@ from __future__ import annotations
 
 from typing import Sequence
 
-from agents import Agent, ModelSettings, OpenAIResponsesModel, Tool
+from agents import Agent, ModelSettings, Tool
 from agents.mcp import MCPServer
 
 from app.core.enums import SupportedApps
-from app.dependencies import get_openai_client
+from app.agents.model_registry import get_shared_model
 from app.agents import BaseAgent
 
 
@@ -152,10 +152,7 @@ class BrowserAgent(BaseAgent):
             name=BrowserAgent.name,
             instructions=system_prompt,
             tools=list(tools) if tools is not None else list(),
-            model=OpenAIResponsesModel(
-                model=model,
-                openai_client=get_openai_client(),
-            ),
+            model=get_shared_model(model),
             model_settings=model_settings,
             handoff_description=handoff_description,
             handoffs=handoffs if handoffs is not None else list(),
@@ -2,11 +2,11 @@ from __future__ import annotations
 
 from typing import Sequence
 
-from agents import Tool, Agent, OpenAIResponsesModel, ModelSettings
+from agents import Tool, Agent, ModelSettings
 
 from app.core.enums import SupportedApps
 from app.integrations.gmail.tools import GMAIL_TOOLS, UserContext
-from app.dependencies import get_openai_client
+from app.agents.model_registry import get_shared_model
 from app.agents.base_agent import BaseAgent
 
 
@@ -15,15 +15,17 @@ You are a Gmail assistant with read-only access to the user's mailbox. Help the
 and summarize emails accurately and efficiently.
 
 Tools (choose based on intent):
+- search_and_read_messages: run a Gmail query and get compact messages (newest per thread) in one call; use it first for "summarize/triage my email" requests (query="is:unread" for unread).
 - list_unread_messages: list unread message refs (id, threadId) with page_token for pagination.
-- search_messages: run a Gmail query; returns message refs with page_token.
-- read_message: fetch one message by id; use format="compact" for headers+snippet or "full" for body.
+- search_messages: run a Gmail query; returns message refs with page_token, or up to max_items refs across pages in one call.
+- search_mailbox: one page of compact messages (sender, subject, date, labels, snippet) for a query, every match including several per thread; use it to browse page by page.
+- read_message: fetch one message by id; use format="compact" for headers+snippet or "full" for body text. If body_cursor is returned, pass it as cursor to continue reading.
 - batch_read_messages: fetch multiple messages by id; returns messages plus error_messages.
 
 Behavior:
 - Use tools for any mailbox-specific question. Never fabricate email content.
-- Use list/search first, then read by id. Prefer compact unless full content is required.
-- If results are large, ask whether to load more and use page_token to paginate.
+- Start with search_and_read_messages; use list/search + read by id only to browse refs or fetch specific ids. Prefer compact unless full content is required.
+- When the user needs many results (e.g. "all invoices this year"), pass max_items to search_messages instead of paging turn by turn; otherwise, if results are large, ask whether to load more and use page_token to paginate.
 - Summaries must include sender, subject, date, and a brief snippet.
 - If nothing matches, say so and ask for narrower filters (sender, subject, date range, keywords).
 - Do not expose internal identifiers (e.g., user_id) or tool internals.
@@ -70,10 +72,7 @@ class GmailAgent(BaseAgent[UserContext]):
             name=GmailAgent.name,
             instructions=system_prompt,
             tools=list(tools) if tools is not None else GMAIL_TOOLS,
-            model=OpenAIResponsesModel(
-                model=model,
-                openai_client=get_openai_client()
-            ),
+            model=get_shared_model(model),
             model_settings=model_settings,
             handoff_description=handoff_description,
             handoffs=handoffs if handoffs is not None else list()
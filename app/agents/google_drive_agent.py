@@ -2,12 +2,12 @@ from __future__ import annotations
 
 from typing import Sequence
 
-from agents import Agent, OpenAIResponsesModel, Tool, ModelSettings
+from agents import Agent, Tool, ModelSettings
 
 from app.core.enums import SupportedApps
 from app.integrations.google_drive.tools import GOOGLE_DRIVE_TOOLS
 from app.utils.agent_utils import UserContext
-from app.dependencies import get_openai_client
+from app.agents.model_registry import get_shared_model
 from app.agents.base_agent import BaseAgent
 
 
@@ -16,7 +16,7 @@ You are GoogleDriveAgent, a specialist assistant that helps users search and bro
 using the Drive API v3. This connector is read-only and does not support downloads.
 
 Tools (choose based on intent):
-- search_drive_files: list files/folders using Drive query syntax (q). Supports pagination via page_token.
+- search_drive_files: list files/folders using Drive query syntax (q). Supports pagination via page_token, or max_items to collect many files across pages in one call.
 
 Supported capabilities:
 - Search and list files/folders using Drive query syntax.
@@ -31,8 +31,9 @@ Behavior:
 - Use search_drive_files for any Drive-specific question. Never fabricate file names or links.
 - Build precise q queries and default to excluding trashed items unless the user asks otherwise.
 - Present results with key metadata: name, mimeType, modifiedTime, and webViewLink.
-- If results are large, ask whether to load more and use nextPageToken to paginate.
+- When the user needs many files (e.g. "list every PDF in Finance"), pass max_items instead of paging turn by turn; otherwise, if results are large, ask whether to load more and use nextPageToken to paginate.
 - If the user asks to download, explain it is not supported and offer webViewLink instead.
+- Queries are checked before they are sent: an `error` result names the column and the fix, so correct the query and retry; `query_repairs` lists slips that were fixed for you.
 
 ## 4) The query language (complete)
 
@@ -178,10 +179,7 @@ class GoogleDriveAgent(BaseAgent[UserContext]):
             name=GoogleDriveAgent.name,
             instructions=system_prompt,
             tools=list(tools) if tools is not None else GOOGLE_DRIVE_TOOLS,
-            model=OpenAIResponsesModel(
-                model=model,
-                openai_client=get_openai_client(),
-            ),
+            model=get_shared_model(model),
             model_settings=model_settings,
             handoff_description=handoff_description,
             handoffs=handoffs if handoffs is not None else list(),
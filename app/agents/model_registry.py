@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import hashlib
+
+from agents import ModelSettings, OpenAIResponsesModel
+
+from app.dependencies import get_openai_client
+
+# Prefix for provider prompt-cache keys; bump to invalidate every agent's cached prefixes at once.
+PROMPT_CACHE_KEY_PREFIX = "omicron"
+
+_shared_models: dict[tuple[str | None, int], OpenAIResponsesModel] = {}
+
+
+def get_shared_model(model: str | None) -> OpenAIResponsesModel:
+    """Return the process-wide Responses model for `model` on the current OpenAI client.
+
+    OpenAIResponsesModel only holds the model name and client, so every agent (and every
+    request's agent graph) using the same model name can share one instance.
+    """
+    openai_client = get_openai_client()
+    key = (model, id(openai_client))
+    shared_model = _shared_models.get(key)
+    if shared_model is None:
+        shared_model = OpenAIResponsesModel(model=model, openai_client=openai_client)
+        _shared_models[key] = shared_model
+    return shared_model
+
+
+def clear_shared_models() -> None:
+    _shared_models.clear()
+
+
+def build_prompt_cache_key(agent_name: str, static_instructions: str) -> str:
+    """Stable per-agent key so requests sharing a prompt prefix land on the same provider cache.
+
+    The hash of the agent's static instructions rotates the key whenever the prompt changes.
+    """
+    prompt_version = hashlib.sha256(static_instructions.encode("utf-8")).hexdigest()[:12]
+    return f"{PROMPT_CACHE_KEY_PREFIX}:{agent_name}:{prompt_version}"
+
+
+def build_agent_model_settings(
+    *,
+    agent_name: str,
+    static_instructions: str,
+    reasoning_effort: str,
+    reasoning_summary: str,
+) -> ModelSettings:
+    return ModelSettings(
+        reasoning={
+            "effort": reasoning_effort,
+            "summary": reasoning_summary,
+        },
+        extra_args={"prompt_cache_key": build_prompt_cache_key(agent_name, static_instructions)},
+    )
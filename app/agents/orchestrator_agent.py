@@ -2,11 +2,11 @@ from __future__ import annotations
 
 from typing import Sequence
 
-from agents import ModelSettings, OpenAIResponsesModel, Tool, Agent
+from agents import ModelSettings, Tool, Agent
 from agents.tool import WebSearchTool
 
 from app.agents.base_agent import BaseAgent
-from app.dependencies import get_openai_client
+from app.agents.model_registry import get_shared_model
  
 
 # ORCHESTRATOR_SYSTEM_PROMPT = """# Role and Objective
@@ -180,10 +180,7 @@ class OrchestratorAgent(BaseAgent):
             name=OrchestratorAgent.name,
             instructions=system_prompt,
             tools=agent_tools,
-            model=OpenAIResponsesModel(
-                model=model,
-                openai_client=get_openai_client()
-            ),
+            model=get_shared_model(model),
             model_settings=model_settings,
             handoff_description=handoff_description,
             handoffs=handoffs if handoffs is not None else list()
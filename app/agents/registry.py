@@ -1,13 +1,15 @@
 from typing import Any, Callable, List, TypedDict
 
-from agents import Handoff, ModelSettings, Tool
+from agents import Handoff, Tool
+from agents.mcp import MCPServer
 
 from app.agents.base_agent import BaseAgent
-from app.agents.browser_agent import BrowserAgent
-from app.agents.gmail_agent import GmailAgent
-from app.agents.google_drive_agent import GoogleDriveAgent
-from app.agents.orchestrator_agent import OrchestratorAgent
-from app.agents.whatsapp_agent import WhatsAppAgent
+from app.agents.browser_agent import BROWSER_SYSTEM_PROMPT, BrowserAgent
+from app.agents.gmail_agent import GMAIL_SYSTEM_PROMPT, GmailAgent
+from app.agents.google_drive_agent import GOOGLE_DRIVE_SYSTEM_PROMPT, GoogleDriveAgent
+from app.agents.model_registry import build_agent_model_settings
+from app.agents.orchestrator_agent import ORCHESTRATOR_SYSTEM_PROMPT, OrchestratorAgent
+from app.agents.whatsapp_agent import WHATSAPP_SYSTEM_PROMPT, WhatsAppAgent
 from app.browser_sessions.lazy_mcp_server import LazyBrowserSessionMCPServer
 from app.core.enums import SupportedApps
 from app.core.settings import (
@@ -28,6 +30,8 @@ class AgentAttributes(TypedDict):
     handoff_enabled: bool
     can_gather_user_data: bool
     verify_connected: bool = False
+    # Builds fresh per-run MCP servers; agents with one are cloned per request from templates.
+    mcp_server_factory: Callable[[], list[MCPServer]] | None
 
 
 
@@ -40,16 +44,57 @@ orch_agent_settings = get_orchestrator_agent_settings()
 
 
 
+def build_browser_mcp_servers() -> list[MCPServer]:
+    return [
+        LazyBrowserSessionMCPServer(
+            default_mcp_url=browser_agent_settings.playwright_mcp_url or "",
+            mcp_timeout=browser_agent_settings.playwright_mcp_timeout,
+            mcp_sse_read_timeout=browser_agent_settings.playwright_mcp_sse_read_timeout,
+            client_session_timeout_seconds=browser_agent_settings.playwright_mcp_client_session_timeout_seconds,
+            max_retry_attempts=browser_agent_settings.playwright_mcp_max_retry_attempts,
+        )
+    ]
+
+
+def build_whatsapp_mcp_servers() -> list[MCPServer]:
+    return [
+        LazyWhatsAppMCPServer(
+            session_provider=get_whatsapp_session_provider(),
+            default_mcp_url=whatsapp_agent_settings.whatsapp_mcp_url or "",
+            mcp_audience=whatsapp_agent_settings.whatsapp_mcp_jwt_audience,
+            bridge_audience=whatsapp_session_settings.bridge_jwt_audience,
+            jwt_subject=whatsapp_agent_settings.whatsapp_mcp_jwt_subject,
+            jwt_scopes=whatsapp_agent_settings.whatsapp_mcp_jwt_scopes,
+            mcp_timeout=whatsapp_agent_settings.whatsapp_mcp_timeout,
+            mcp_sse_read_timeout=whatsapp_agent_settings.whatsapp_mcp_sse_read_timeout,
+            client_session_timeout_seconds=whatsapp_agent_settings.whatsapp_mcp_client_session_timeout_seconds,
+            max_retry_attempts=whatsapp_agent_settings.whatsapp_mcp_max_retry_attempts,
+        )
+    ]
+
+
+def get_model_settings_fingerprint() -> tuple[tuple[str, str, str], ...]:
+    """Model/reasoning config of every agent; part of the agent-graph template cache key."""
+    return tuple(
+        (settings.model, settings.reasoning_effort, settings.reasoning_summary)
+        for settings in (
+            orch_agent_settings,
+            gmail_agent_settings,
+            google_drive_agent_settings,
+            browser_agent_settings,
+            whatsapp_agent_settings,
+        )
+    )
+
+
 def init_gmail_agent() -> GmailAgent:
     return GmailAgent(
         model=gmail_agent_settings.model,
-        model_settings=ModelSettings(
-            **{
-                "reasoning": {
-                    "effort": gmail_agent_settings.reasoning_effort,
-                    "summary": gmail_agent_settings.reasoning_summary,
-                }
-            }
+        model_settings=build_agent_model_settings(
+            agent_name=GmailAgent.name,
+            static_instructions=GMAIL_SYSTEM_PROMPT,
+            reasoning_effort=gmail_agent_settings.reasoning_effort,
+            reasoning_summary=gmail_agent_settings.reasoning_summary,
         ),
     )
 
@@ -57,13 +102,11 @@ def init_gmail_agent() -> GmailAgent:
 def init_google_drive_agent() -> GoogleDriveAgent:
     return GoogleDriveAgent(
         model=google_drive_agent_settings.model,
-        model_settings=ModelSettings(
-            **{
-                "reasoning": {
-                    "effort": google_drive_agent_settings.reasoning_effort,
-                    "summary": google_drive_agent_settings.reasoning_summary,
-                }
-            }
+        model_settings=build_agent_model_settings(
+            agent_name=GoogleDriveAgent.name,
+            static_instructions=GOOGLE_DRIVE_SYSTEM_PROMPT,
+            reasoning_effort=google_drive_agent_settings.reasoning_effort,
+            reasoning_summary=google_drive_agent_settings.reasoning_summary,
         ),
     )
 
@@ -75,53 +118,27 @@ def init_browser_agent(
     return BrowserAgent(
         browser_credential_secret_refs=browser_credential_secret_refs,
         model=browser_agent_settings.model,
-        model_settings=ModelSettings(
-            **{
-                "reasoning": {
-                    "effort": browser_agent_settings.reasoning_effort,
-                    "summary": browser_agent_settings.reasoning_summary,
-                }
-            }
+        model_settings=build_agent_model_settings(
+            agent_name=BrowserAgent.name,
+            static_instructions=BROWSER_SYSTEM_PROMPT,
+            reasoning_effort=browser_agent_settings.reasoning_effort,
+            reasoning_summary=browser_agent_settings.reasoning_summary,
         ),
-        mcp_servers=[
-            LazyBrowserSessionMCPServer(
-                default_mcp_url=browser_agent_settings.playwright_mcp_url or "",
-                mcp_timeout=browser_agent_settings.playwright_mcp_timeout,
-                mcp_sse_read_timeout=browser_agent_settings.playwright_mcp_sse_read_timeout,
-                client_session_timeout_seconds=browser_agent_settings.playwright_mcp_client_session_timeout_seconds,
-                max_retry_attempts=browser_agent_settings.playwright_mcp_max_retry_attempts,
-            )
-        ],
+        mcp_servers=build_browser_mcp_servers(),
         handoffs=handoffs,
     )
 
 
 def init_whatsapp_agent() -> WhatsAppAgent:
-    session_provider = get_whatsapp_session_provider()
     return WhatsAppAgent(
         model=whatsapp_agent_settings.model,
-        model_settings=ModelSettings(
-            **{
-                "reasoning": {
-                    "effort": whatsapp_agent_settings.reasoning_effort,
-                    "summary": whatsapp_agent_settings.reasoning_summary,
-                }
-            }
+        model_settings=build_agent_model_settings(
+            agent_name=WhatsAppAgent.name,
+            static_instructions=WHATSAPP_SYSTEM_PROMPT,
+            reasoning_effort=whatsapp_agent_settings.reasoning_effort,
+            reasoning_summary=whatsapp_agent_settings.reasoning_summary,
         ),
-        mcp_servers=[
-            LazyWhatsAppMCPServer(
-                session_provider=session_provider,
-                default_mcp_url=whatsapp_agent_settings.whatsapp_mcp_url or "",
-                mcp_audience=whatsapp_agent_settings.whatsapp_mcp_jwt_audience,
-                bridge_audience=whatsapp_session_settings.bridge_jwt_audience,
-                jwt_subject=whatsapp_agent_settings.whatsapp_mcp_jwt_subject,
-                jwt_scopes=whatsapp_agent_settings.whatsapp_mcp_jwt_scopes,
-                mcp_timeout=whatsapp_agent_settings.whatsapp_mcp_timeout,
-                mcp_sse_read_timeout=whatsapp_agent_settings.whatsapp_mcp_sse_read_timeout,
-                client_session_timeout_seconds=whatsapp_agent_settings.whatsapp_mcp_client_session_timeout_seconds,
-                max_retry_attempts=whatsapp_agent_settings.whatsapp_mcp_max_retry_attempts,
-            )
-        ],
+        mcp_servers=build_whatsapp_mcp_servers(),
     )
 
 
@@ -131,12 +148,12 @@ def init_orchestrator_agent(
 ) -> OrchestratorAgent:
     return OrchestratorAgent(
         model=orch_agent_settings.model,
-        model_settings=ModelSettings(**{
-            "reasoning": {
-                "effort": orch_agent_settings.reasoning_effort,
-                "summary": orch_agent_settings.reasoning_summary,
-            }
-        }),
+        model_settings=build_agent_model_settings(
+            agent_name=OrchestratorAgent.name,
+            static_instructions=ORCHESTRATOR_SYSTEM_PROMPT,
+            reasoning_effort=orch_agent_settings.reasoning_effort,
+            reasoning_summary=orch_agent_settings.reasoning_summary,
+        ),
         tools=tools,
         handoffs=handoffs,
     )
@@ -168,6 +185,7 @@ registered_agents: List[AgentAttributes] = [
         handoff_enabled=GmailAgent.HANDOFF_ENABLED,
         can_gather_user_data=GmailAgent.CAN_GATHER_USER_DATA,
         verify_connected=True,
+        mcp_server_factory=None,
     ),
     AgentAttributes(
         name=SupportedApps.GOOGLE_DRIVE.value,
@@ -175,6 +193,7 @@ registered_agents: List[AgentAttributes] = [
         handoff_enabled=GoogleDriveAgent.HANDOFF_ENABLED,
         can_gather_user_data=GoogleDriveAgent.CAN_GATHER_USER_DATA,
         verify_connected=True,
+        mcp_server_factory=None,
     ),
     AgentAttributes(
         name=SupportedApps.BROWSER.value,
@@ -182,6 +201,7 @@ registered_agents: List[AgentAttributes] = [
         handoff_enabled=BrowserAgent.HANDOFF_ENABLED,
         can_gather_user_data=BrowserAgent.CAN_GATHER_USER_DATA,
         verify_connected=True,
+        mcp_server_factory=build_browser_mcp_servers,
     ),
     AgentAttributes(
         name=SupportedApps.WHATSAPP.value,
@@ -189,12 +209,14 @@ registered_agents: List[AgentAttributes] = [
         handoff_enabled=WhatsAppAgent.HANDOFF_ENABLED,
         can_gather_user_data=WhatsAppAgent.CAN_GATHER_USER_DATA,
         verify_connected=True,
+        mcp_server_factory=build_whatsapp_mcp_servers,
     ),
     AgentAttributes(
         name=OrchestratorAgent.name, 
         initializer=init_orchestrator_agent,
         handoff_enabled=OrchestratorAgent.HANDOFF_ENABLED,
         can_gather_user_data=OrchestratorAgent.CAN_GATHER_USER_DATA,
-        verify_connected=False
+        verify_connected=False,
+        mcp_server_factory=None,
     )
 ]
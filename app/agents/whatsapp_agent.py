@@ -2,12 +2,12 @@ from __future__ import annotations
 
 from typing import Sequence
 
-from agents import ModelSettings, OpenAIResponsesModel, Tool
+from agents import ModelSettings, Tool
 from agents.mcp import MCPServer
 
 from app.agents.base_agent import BaseAgent
 from app.core.enums import SupportedApps
-from app.dependencies import get_openai_client
+from app.agents.model_registry import get_shared_model
 
 
 WHATSAPP_SYSTEM_PROMPT = """Role:
@@ -62,10 +62,7 @@ class WhatsAppAgent(BaseAgent):
             name=WhatsAppAgent.name,
             instructions=system_prompt,
             tools=list(tools) if tools is not None else list(),
-            model=OpenAIResponsesModel(
-                model=model,
-                openai_client=get_openai_client(),
-            ),
+            model=get_shared_model(model),
             model_settings=model_settings,
             handoff_description=handoff_description,
             handoffs=handoffs if handoffs is not None else list(),
@@ -1,9 +1,22 @@
+import copy
+import inspect
+from contextvars import ContextVar
+from dataclasses import dataclass
 from typing import Any, Callable
 
+from agents import AgentToolStreamEvent, Tool
+
 from app.agents.base_agent import BaseAgent
+from app.agents.browser_agent import build_browser_system_prompt
 from app.agents.orchestrator_agent import OrchestratorAgent
-from app.agents.registry import init_orchestrator_agent, registered_agents
+from app.agents.registry import (
+    AgentAttributes,
+    get_model_settings_fingerprint,
+    init_orchestrator_agent,
+    registered_agents,
+)
 from app.core.enums import SupportedApps
+from app.dependencies import get_openai_client
 from app.utils.agent_utils import UserContext
 from app.utils.browser_agent_utils import resolve_browser_credential_secret_refs
 
@@ -45,11 +58,118 @@ from app.utils.browser_agent_utils import resolve_browser_credential_secret_refs
 #     )
 
 
+# as_tool() wrappers are shared across requests, so the per-run stream callback is looked up
+# from the run's context instead of being closed over at template build time.
+_tool_stream_callback: ContextVar[Callable[..., Any] | None] = ContextVar(
+    "tool_stream_callback",
+    default=None,
+)
+
+
+async def _dispatch_tool_stream(event: AgentToolStreamEvent) -> None:
+    callback = _tool_stream_callback.get()
+    if callback is None:
+        return
+    maybe_result = callback(event)
+    if inspect.isawaitable(maybe_result):
+        await maybe_result
+
+
+def _as_tool(agent: BaseAgent) -> Tool:
+    return agent.as_tool(
+        tool_name=None,
+        tool_description=None,
+        on_stream=_dispatch_tool_stream,
+        # session=session,
+        max_turns=100,
+    )
+
+
+def _has_per_user_parts(agent_attrs: AgentAttributes) -> bool:
+    # Handoff agents are rewired to the per-request orchestrator, so they are always cloned.
+    return agent_attrs["mcp_server_factory"] is not None or agent_attrs["handoff_enabled"]
+
+
+@dataclass(frozen=True)
+class _AgentSlot:
+    attrs: AgentAttributes
+    template: BaseAgent
+    shared_tool: Tool | None = None
+
+
+@dataclass(frozen=True)
+class AgentGraphTemplate:
+    """Immutable agents, models and as_tool wrappers for one (connected-app set, model settings)."""
+
+    tool_slots: tuple[_AgentSlot, ...]
+    handoff_slots: tuple[_AgentSlot, ...]
+    orchestrator: OrchestratorAgent
+
+
+_graph_templates: dict[tuple[Any, ...], AgentGraphTemplate] = {}
+
+
+def clear_agent_graph_templates() -> None:
+    _graph_templates.clear()
+
+
+def _build_graph_template(available_agents: list[AgentAttributes]) -> AgentGraphTemplate:
+    tool_slots: list[_AgentSlot] = []
+    handoff_slots: list[_AgentSlot] = []
+    for agent_attrs in available_agents:
+        if agent_attrs["name"] == OrchestratorAgent.name:
+            continue
+        if agent_attrs["can_gather_user_data"]:
+            template = agent_attrs["initializer"]()
+            shared_tool = None if _has_per_user_parts(agent_attrs) else _as_tool(template)
+            tool_slots.append(_AgentSlot(attrs=agent_attrs, template=template, shared_tool=shared_tool))
+        if agent_attrs["handoff_enabled"]:
+            handoff_slots.append(_AgentSlot(attrs=agent_attrs, template=agent_attrs["initializer"]()))
+
+    return AgentGraphTemplate(
+        tool_slots=tuple(tool_slots),
+        handoff_slots=tuple(handoff_slots),
+        orchestrator=init_orchestrator_agent(),
+    )
+
+
+def get_agent_graph_template(available_agents: list[AgentAttributes]) -> AgentGraphTemplate:
+    key = (
+        frozenset(agent["name"] for agent in available_agents),
+        get_model_settings_fingerprint(),
+        # Templates hold model objects bound to the OpenAI client; a new client means a new graph.
+        id(get_openai_client()),
+    )
+    template = _graph_templates.get(key)
+    if template is None:
+        template = _build_graph_template(available_agents)
+        _graph_templates[key] = template
+    return template
+
+
+def _instantiate_agent(slot: _AgentSlot, browser_credential_secret_refs: list[str]) -> BaseAgent:
+    agent_attrs = slot.attrs
+    if not _has_per_user_parts(agent_attrs):
+        return slot.template
+
+    # Shallow copy keeps the shared model, model settings and static tools.
+    agent = copy.copy(slot.template)
+    if agent_attrs["mcp_server_factory"] is not None:
+        agent.mcp_servers = agent_attrs["mcp_server_factory"]()
+    if agent_attrs["name"] == SupportedApps.BROWSER.value:
+        agent.instructions = build_browser_system_prompt(
+            browser_credential_secret_refs=browser_credential_secret_refs,
+        )
+    agent.handoffs = list(slot.template.handoffs)
+    return agent
+
+
 async def create_agent_workflow(
         connected_apps: list[SupportedApps] | None = None, 
         tool_on_stream: Callable[..., Any] | None = None,
         session: Any | None = None,
         user_ctx: UserContext | None = None,
+        browser_credential_secret_refs: list[str] | None = None,
 ):
     """
     Agent Arch: 
@@ -62,6 +182,9 @@ async def create_agent_workflow(
     2. Handoff Agents: 
         1. Can perform Auxilary fucntions for Users Like Web Browsing, etc. 
         2. Need to hand control back to Main Agent to interact with User Connectd Apps.
+
+    The immutable part of the graph comes from a template cached per connected-app set; only
+    MCP servers, the browser secret-ref prompt section and the stream callback are per request.
     """
     available_agents = registered_agents.copy()
     if connected_apps is not None:
@@ -69,46 +192,30 @@ async def create_agent_workflow(
             agent for agent in available_agents if (not agent['verify_connected']) or (agent['verify_connected'] and agent['name'] in {app.value for app in connected_apps})
         ]
 
-    browser_credential_secret_refs = await resolve_browser_credential_secret_refs(
-        user_ctx=user_ctx,
-    )
-
-    def _init_agent(agent_attrs: dict[str, Any]) -> BaseAgent:
-        if agent_attrs["name"] == SupportedApps.BROWSER.value:
-            return agent_attrs["initializer"](
-                browser_credential_secret_refs=browser_credential_secret_refs,
-            )
-        return agent_attrs["initializer"]()
-
-    tool_agents = [
-        _init_agent(agent)
-        for agent in available_agents
-        if agent['can_gather_user_data']
-    ]
-
-    agent_as_tools = [
-        tool_agent.as_tool(
-            tool_name=None, 
-            tool_description=None,
-            on_stream=tool_on_stream,
-            # session=session,
-            max_turns=100
+    # Callers that resolve refs concurrently with other preamble I/O can pass them in directly.
+    if browser_credential_secret_refs is None:
+        browser_credential_secret_refs = await resolve_browser_credential_secret_refs(
+            user_ctx=user_ctx,
         )
-        for tool_agent in tool_agents
-    ]
 
+    _tool_stream_callback.set(tool_on_stream)
+    template = get_agent_graph_template(available_agents)
+
+    tool_agents: list[BaseAgent] = []
+    agent_as_tools: list[Tool] = []
+    for slot in template.tool_slots:
+        tool_agent = _instantiate_agent(slot, browser_credential_secret_refs)
+        tool_agents.append(tool_agent)
+        agent_as_tools.append(slot.shared_tool or _as_tool(tool_agent))
 
     agent_as_handoffs = [
-        _init_agent(agent)
-        for agent in available_agents
-        if agent['handoff_enabled']
-        if agent['name'] != OrchestratorAgent.name
+        _instantiate_agent(slot, browser_credential_secret_refs)
+        for slot in template.handoff_slots
     ]
 
-    main_agent = init_orchestrator_agent(
-        tools=agent_as_tools,
-        handoffs=agent_as_handoffs,
-    )
+    main_agent = copy.copy(template.orchestrator)
+    main_agent.tools = [*template.orchestrator.tools, *agent_as_tools]
+    main_agent.handoffs = list(agent_as_handoffs)
     setattr(main_agent, "_cleanup_sub_agents", [*tool_agents, *agent_as_handoffs])
 
     for agent in agent_as_handoffs: 
@@ -120,4 +227,3 @@ async def create_agent_workflow(
 
     print(main_agent.handoffs)
     return main_agent
-    
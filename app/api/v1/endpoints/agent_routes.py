@@ -1,8 +1,9 @@
 import asyncio
 import json
 from datetime import datetime, timezone
+import time
 import traceback
-from typing import AsyncIterator, Any
+from typing import AsyncIterator, Any, Awaitable, TypeVar
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
@@ -21,6 +22,7 @@ from openai.types.responses import ResponseReasoningSummaryTextDeltaEvent, Respo
 from app.auth import AuthContext, get_auth_context
 from app.browser_sessions.lazy_mcp_server import LazyBrowserSessionMCPServer
 from app.core.enums import SupportedApps
+from app.core.settings import get_settings
 from app.dependencies import get_openai_client
 from app.whatsapp_sessions.lazy_mcp_server import LazyWhatsAppMCPServer
 from app.utils.agent_utils import UserContext
@@ -33,6 +35,14 @@ from app.db.onboarding_sql import get_connected_apps_status
 from app.schemas.endpoint_schemas.agent import AgentRunPayload
 from app.agents.workflow import create_agent_workflow
 from app.agents.registry import is_browser_connected, is_whatsapp_connected
+from app.utils.browser_agent_utils import resolve_browser_credential_secret_refs
+from app.utils.run_finalization_utils import submit_run_finalization
+from app.utils.sse_utils import (
+    DeltaCoalescer,
+    StreamEventBus,
+    drain_sse_events,
+    format_sse_frame,
+)
 
 
 
@@ -46,6 +56,8 @@ _SSE_HEADERS = {
 
 _STREAM_END_SENTINEL = 'STREAM_END'
 
+_T = TypeVar("_T")
+
 
 def _extract_tool_name(raw_item: Any) -> str | None:
     if isinstance(raw_item, dict):
@@ -53,6 +65,44 @@ def _extract_tool_name(raw_item: Any) -> str | None:
     return getattr(raw_item, "name", None) or getattr(raw_item, "tool_name", None)
 
 
+def _cached_ratio(cached_tokens: int, input_tokens: int) -> float:
+    return round(cached_tokens / input_tokens, 4) if input_tokens else 0.0
+
+
+def _format_usage(usage: Any) -> dict[str, Any] | None:
+    if usage is None:
+        return None
+    input_tokens = getattr(usage, "input_tokens", 0) or 0
+    input_details = getattr(usage, "input_tokens_details", None)
+    cached_tokens = getattr(input_details, "cached_tokens", 0) or 0
+    return {
+        "type": "usage",
+        "input_tokens": input_tokens,
+        "cached_tokens": cached_tokens,
+        "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+        "cached_ratio": _cached_ratio(cached_tokens, input_tokens),
+    }
+
+
+class _CachedTokenTally:
+    """Per-run input/cached token totals by agent, attached to each `usage` frame."""
+
+    def __init__(self) -> None:
+        self._totals: dict[str, tuple[int, int]] = {}
+
+    def record(self, payload_data: dict[str, Any]) -> None:
+        if payload_data.get("type") != "usage":
+            return
+        agent_name = payload_data.get("agent") or "main"
+        input_tokens, cached_tokens = self._totals.get(agent_name, (0, 0))
+        input_tokens += payload_data["input_tokens"]
+        cached_tokens += payload_data["cached_tokens"]
+        self._totals[agent_name] = (input_tokens, cached_tokens)
+        payload_data["agent_input_tokens"] = input_tokens
+        payload_data["agent_cached_tokens"] = cached_tokens
+        payload_data["agent_cached_ratio"] = _cached_ratio(cached_tokens, input_tokens)
+
+
 def _format_event(event: StreamEvent) -> dict[str, Any] | None:
     if event.type == "raw_response_event":
         # print(type(event.data))
@@ -64,6 +114,8 @@ def _format_event(event: StreamEvent) -> dict[str, Any] | None:
             return {"type": "reasoning_delta", "text": event.data.delta}
         if isinstance(event.data, ResponseReasoningSummaryTextDoneEvent): 
             return {"type": "reasoning_done"}
+        if event_type == "response.completed":
+            return _format_usage(getattr(event.data.response, "usage", None))
         return None
     if event.type == "agent_updated_stream_event":
         return {"type": "agent_updated", "agent": event.new_agent.name}
@@ -99,50 +151,149 @@ async def _get_user_connected_apps(*, user_id: str, user_jwt: str) -> list[Suppo
     return connected_apps
 
 
-@router.post('/run-agent')
-async def run_agent(
-    payload: AgentRunPayload,
-    auth_ctx: AuthContext = Depends(get_auth_context),
-):
-    connected_apps = await _get_user_connected_apps(user_id=auth_ctx.user_id, user_jwt=auth_ctx.token)
-    now_iso = datetime.now(timezone.utc).isoformat()
-    event_queue: asyncio.Queue[str | None] = asyncio.Queue()
+class _PreambleTimings:
+    """Wall-clock duration of each run-agent preamble stage, reported as one SSE frame."""
+
+    def __init__(self) -> None:
+        self._started_at = time.perf_counter()
+        self.stages_ms: dict[str, float] = {}
+
+    async def run(self, stage: str, awaitable: Awaitable[_T]) -> _T:
+        stage_started_at = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.stages_ms[stage] = round((time.perf_counter() - stage_started_at) * 1000, 2)
+
+    def as_event(self) -> dict[str, Any]:
+        total_ms = round((time.perf_counter() - self._started_at) * 1000, 2)
+        return {"type": "preamble_timings", "timings_ms": {**self.stages_ms, "total": total_ms}}
 
-    # Canonical session key for the product is Supabase chat_sessions.id (UUID).
-    effective_session_id: str | None = None
-    conversation_id: str | None = None
-    should_set_title = False
 
-    # Get or Create Session ID in Supabase
+async def _resolve_chat_session(
+    *,
+    payload: AgentRunPayload,
+    auth_ctx: AuthContext,
+    now_iso: str,
+) -> tuple[str, str | None, bool]:
+    """Return (chat_sessions.id, OpenAI conversation_id, should_set_title)."""
     if payload.session_id:
-        effective_session_id = payload.session_id
         session_row = await get_chat_session(
             user_id=auth_ctx.user_id,
             user_jwt=auth_ctx.token,
-            session_id=effective_session_id,
+            session_id=payload.session_id,
         )
         if not session_row:
             raise HTTPException(status_code=404, detail="Session not found")
-        conversation_id = session_row.get("conversation_id")
-    else:
-        effective_session_id = await create_chat_session_stub(
+        return payload.session_id, session_row.get("conversation_id"), False
+
+    session_id = await create_chat_session_stub(
+        user_id=auth_ctx.user_id,
+        user_jwt=auth_ctx.token,
+        title=payload.query,
+        last_message_at=now_iso,
+    )
+    return session_id, None, True
+
+
+async def _finalize_chat_session(
+    *,
+    session: OpenAIConversationsSession,
+    session_id: str,
+    auth_ctx: AuthContext,
+    title: str | None,
+    last_message_at: str,
+) -> None:
+    openai_conversation_id = await session._get_session_id()
+    await update_chat_session_by_id(
+        session_id=session_id,
+        user_id=auth_ctx.user_id,
+        user_jwt=auth_ctx.token,
+        conversation_id=openai_conversation_id,
+        title=title,
+        last_message_at=last_message_at,
+    )
+
+
+async def _cleanup_run_mcp_servers(agent: Any) -> None:
+    # Best-effort: clean up per-run MCP client sessions.
+    cleanup_agents = list(getattr(agent, "_cleanup_sub_agents", []) or [])
+    if not cleanup_agents:
+        cleanup_agents = list(getattr(agent, "handoffs", []) or [])
+    for sub_agent in cleanup_agents:
+        for server in getattr(sub_agent, "mcp_servers", []) or []:
+            if isinstance(server, (LazyWhatsAppMCPServer)):
+                await server.cleanup()
+
+
+def _build_delta_coalescer(payload: AgentRunPayload) -> DeltaCoalescer | None:
+    settings = get_settings()
+    coalesce_deltas = payload.coalesce_deltas
+    if coalesce_deltas is None:
+        coalesce_deltas = settings.sse_coalesce_deltas
+    if not coalesce_deltas:
+        return None
+    return DeltaCoalescer(
+        window_seconds=settings.sse_coalesce_window_ms / 1000,
+        max_bytes=settings.sse_coalesce_max_bytes,
+    )
+
+
+async def _resolve_browser_refs(*, auth_ctx: AuthContext) -> list[str]:
+    # Browser availability is config-driven, so refs can load without waiting on connected-apps.
+    return await resolve_browser_credential_secret_refs(
+        user_ctx=UserContext(
             user_id=auth_ctx.user_id,
             user_jwt=auth_ctx.token,
-            title=payload.query,
-            last_message_at=now_iso,
+            connected_apps=[SupportedApps.BROWSER] if is_browser_connected() else [],
+        ),
+    )
+
+
+@router.post('/run-agent')
+async def run_agent(
+    payload: AgentRunPayload,
+    auth_ctx: AuthContext = Depends(get_auth_context),
+):
+    now_iso = datetime.now(timezone.utc).isoformat()
+    settings = get_settings()
+    # Bounded so a slow client cannot make per-stream memory grow while the model keeps producing.
+    event_queue = StreamEventBus(
+        capacity=settings.sse_event_queue_capacity,
+        overflow_policy=settings.sse_event_queue_overflow_policy,
+        end_sentinel=_STREAM_END_SENTINEL,
+    )
+    timings = _PreambleTimings()
+    usage_tally = _CachedTokenTally()
+
+    # Preamble dependency graph: connected-apps, browser refs and the chat session row are
+    # independent I/O and start together; the workflow only waits on the first two.
+    connected_apps_task = asyncio.create_task(
+        timings.run(
+            "connected_apps",
+            _get_user_connected_apps(user_id=auth_ctx.user_id, user_jwt=auth_ctx.token),
         )
-        should_set_title = True
+    )
+    browser_refs_task = asyncio.create_task(
+        timings.run("browser_credential_refs", _resolve_browser_refs(auth_ctx=auth_ctx))
+    )
+
+    # Canonical session key for the product is Supabase chat_sessions.id (UUID).
+    try:
+        effective_session_id, conversation_id, should_set_title = await timings.run(
+            "chat_session",
+            _resolve_chat_session(payload=payload, auth_ctx=auth_ctx, now_iso=now_iso),
+        )
+    except BaseException:
+        connected_apps_task.cancel()
+        browser_refs_task.cancel()
+        raise
 
     if not effective_session_id:
+        connected_apps_task.cancel()
+        browser_refs_task.cancel()
         raise HTTPException(status_code=500, detail="Failed to resolve session_id")
 
-    user_ctx = UserContext(
-        user_id=auth_ctx.user_id,
-        user_jwt=auth_ctx.token,
-        session_id=effective_session_id,
-        connected_apps=connected_apps,
-    )
-
     session = OpenAIConversationsSession(
         conversation_id=conversation_id,
         openai_client=get_openai_client(),
@@ -153,34 +304,73 @@ async def run_agent(
         if payload_data is not None:
             payload_data["scope"] = "tool"
             payload_data["agent"] = event["agent"].name
-            data = json.dumps(payload_data, default=str)
-            await event_queue.put(f"data: {data}\n\n")
-
-    agent = await create_agent_workflow(
-        connected_apps=user_ctx.connected_apps, 
-        tool_on_stream=sub_agent_stream, 
-        session=session,
-        user_ctx=user_ctx,
-    )
+            usage_tally.record(payload_data)
+            await event_queue.put(payload_data)
 
-    result = Runner.run_streamed(
-        agent,
-        payload.query,
-        context=user_ctx,
-        max_turns=100,
-        session=session,
-        run_config=RunConfig(
-            nest_handoff_history=False
-        ),
-    )
+    async def build_workflow() -> tuple[Any, UserContext]:
+        connected_apps, browser_credential_secret_refs = await asyncio.gather(
+            connected_apps_task,
+            browser_refs_task,
+        )
+        user_ctx = UserContext(
+            user_id=auth_ctx.user_id,
+            user_jwt=auth_ctx.token,
+            session_id=effective_session_id,
+            connected_apps=connected_apps,
+        )
+        agent = await create_agent_workflow(
+            connected_apps=user_ctx.connected_apps,
+            tool_on_stream=sub_agent_stream,
+            session=session,
+            user_ctx=user_ctx,
+            browser_credential_secret_refs=browser_credential_secret_refs,
+        )
+        return agent, user_ctx
 
     async def event_stream() -> AsyncIterator[str]:
         # Some proxies buffer small chunks; a comment preamble helps force an early flush.
         yield ":" + (" " * 2048) + "\n\n"
 
-        # Emit Supabase chat_sessions.id early so the frontend can persist it immediately.
+        # Emit Supabase chat_sessions.id as soon as it is known, before the agent graph is built.
         yield f"data: {json.dumps({'type': 'session_id', 'session_id': effective_session_id})}\n\n"
 
+        try:
+            agent, user_ctx = await timings.run("workflow", build_workflow())
+        except asyncio.CancelledError:
+            connected_apps_task.cancel()
+            browser_refs_task.cancel()
+            raise
+        except Exception:
+            # The 200 stream has already started, so report the failure in-band and end cleanly.
+            connected_apps_task.cancel()
+            browser_refs_task.cancel()
+            print(f"agent workflow build failed: {traceback.format_exc()}")
+            last_message_at = datetime.now(timezone.utc).isoformat()
+            submit_run_finalization(
+                "chat_session_update",
+                lambda: _finalize_chat_session(
+                    session=session,
+                    session_id=effective_session_id,
+                    auth_ctx=auth_ctx,
+                    title=payload.query if should_set_title else None,
+                    last_message_at=last_message_at,
+                ),
+            )
+            yield format_sse_frame({"type": "error", "message": "Failed to start the agent run"})
+            yield "data: [DONE]\n\n"
+            return
+
+        result = Runner.run_streamed(
+            agent,
+            payload.query,
+            context=user_ctx,
+            max_turns=100,
+            session=session,
+            run_config=RunConfig(
+                nest_handoff_history=False
+            ),
+        )
+        yield format_sse_frame(timings.as_event())
 
         async def main_agent_stream() -> None:
             curr_agent = 'main'
@@ -190,25 +380,26 @@ async def run_agent(
                     if payload_data is not None:
                         curr_agent = payload_data['agent'] if payload_data['type'] == 'agent_updated' else curr_agent
                         payload_data['agent'] = curr_agent
-                        data = json.dumps(payload_data, default=str)
-                        await event_queue.put(f"data: {data}\n\n")
+                        usage_tally.record(payload_data)
+                        await event_queue.put(payload_data)
             finally:
                 # Wake the SSE loop once the main stream is fully stopped/cleaned up.
-                await event_queue.put(_STREAM_END_SENTINEL)
+                event_queue.close()
 
         main_agent_stream_task = asyncio.create_task(main_agent_stream())
         try:
-            while True:
-                msg = await event_queue.get()
-                # print(msg)
-                # print('--------\n')
-                if msg == _STREAM_END_SENTINEL:
-                    break
+            async for msg in drain_sse_events(
+                event_queue,
+                end_sentinel=_STREAM_END_SENTINEL,
+                coalescer=_build_delta_coalescer(payload),
+            ):
                 yield msg
         except asyncio.CancelledError:
             main_agent_stream_task.cancel()
             raise
         finally:
+            # Release producers blocked on a full bus before waiting for the stream task.
+            event_queue.close()
             if not main_agent_stream_task.done():
                 main_agent_stream_task.cancel()
             try:
@@ -218,30 +409,19 @@ async def run_agent(
             except Exception as exc:
                 print(f"agent stream task failed: {traceback.format_exc()}")
         
-        openai_conversation_id = await session._get_session_id()
-        try:
-            await update_chat_session_by_id(
+        # Bookkeeping runs on the finalization worker so [DONE] is not held behind DB/MCP I/O.
+        last_message_at = datetime.now(timezone.utc).isoformat()
+        submit_run_finalization(
+            "chat_session_update",
+            lambda: _finalize_chat_session(
+                session=session,
                 session_id=effective_session_id,
-                user_id=auth_ctx.user_id,
-                user_jwt=auth_ctx.token,
-                conversation_id=openai_conversation_id,
+                auth_ctx=auth_ctx,
                 title=payload.query if should_set_title else None,
-                last_message_at=datetime.now(timezone.utc).isoformat(),
-            )
-        except Exception as exc:
-            print(f"Failed to update chat session: {exc}")
-
-        # Best-effort: clean up per-run MCP client sessions.
-        try:
-            cleanup_agents = list(getattr(agent, "_cleanup_sub_agents", []) or [])
-            if not cleanup_agents:
-                cleanup_agents = list(getattr(agent, "handoffs", []) or [])
-            for sub_agent in cleanup_agents:
-                for server in getattr(sub_agent, "mcp_servers", []) or []:
-                    if isinstance(server, (LazyWhatsAppMCPServer)):
-                        await server.cleanup()
-        except Exception as exc:
-            print(f"MCP cleanup failed: {exc}")
+                last_message_at=last_message_at,
+            ),
+        )
+        submit_run_finalization("mcp_cleanup", lambda: _cleanup_run_mcp_servers(agent))
 
         # Backwards-compatible: also emit session_id at the end.
         # yield f"data: {json.dumps({'type': 'session_id', 'session_id': effective_session_id})}\n\n"
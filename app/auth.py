@@ -1,19 +1,25 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 import contextlib
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
+import hashlib
 import inspect
+import time
 from typing import Any, Callable
 
 from fastapi import Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 import jwt
-from jwt import PyJWTError
+from jwt import PyJWKClient, PyJWKClientError, PyJWTError
 
 from app.core.settings import get_settings
 
 _bearer_scheme = HTTPBearer(auto_error=False)
 
+_ASYMMETRIC_JWT_ALGORITHMS = ("RS256", "ES256", "EdDSA")
+
 
 @dataclass(frozen=True)
 class AuthContext:
@@ -29,6 +35,113 @@ class _TokenValidationUnavailableError(RuntimeError):
     """Raised when no trusted token validator is available at runtime."""
 
 
+@dataclass
+class TokenCacheMetrics:
+    hits: int = 0
+    misses: int = 0
+    local_verifications: int = 0
+    native_verifications: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class _VerifiedTokenCache:
+    """Bounded TTL cache of verified bearer tokens, keyed by a SHA-256 of the token.
+
+    Entries live for at most `revocation_lag_seconds` and never past the token's own `exp`. The
+    lag only bounds how long a cached Supabase `auth.get_user` answer is reused: local signature
+    verification checks the signature and `exp` alone, so with it a logged-out or revoked session
+    is accepted until the token expires.
+    """
+
+    def __init__(self, *, max_entries: int, revocation_lag_seconds: float) -> None:
+        self._max_entries = max_entries
+        self._revocation_lag_seconds = revocation_lag_seconds
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self.metrics = TokenCacheMetrics()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> str | None:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.metrics.misses += 1
+            return None
+        user_id, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.metrics.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.metrics.hits += 1
+        return user_id
+
+    def put(self, token: str, user_id: str, *, token_exp: float | None) -> None:
+        if self._max_entries <= 0 or self._revocation_lag_seconds <= 0:
+            return
+        ttl = self._revocation_lag_seconds
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+        key = self._key(token)
+        self._entries[key] = (user_id, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.metrics.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_token_cache: _VerifiedTokenCache | None = None
+_jwks_client: PyJWKClient | None = None
+
+
+def _get_token_cache() -> _VerifiedTokenCache:
+    global _token_cache
+    if _token_cache is None:
+        settings = get_settings()
+        _token_cache = _VerifiedTokenCache(
+            max_entries=settings.auth_token_cache_max_entries,
+            revocation_lag_seconds=settings.auth_token_revocation_lag_seconds,
+        )
+    return _token_cache
+
+
+def get_auth_token_cache_metrics() -> dict[str, int]:
+    return _get_token_cache().metrics.as_dict()
+
+
+def _get_jwks_client() -> PyJWKClient | None:
+    global _jwks_client
+    settings = get_settings()
+    if not settings.supabase_jwks_enabled or not settings.supabase_url:
+        return None
+    if _jwks_client is None:
+        _jwks_client = PyJWKClient(
+            f"{settings.supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json",
+            cache_jwk_set=True,
+            lifespan=settings.supabase_jwks_cache_ttl_seconds,
+        )
+    return _jwks_client
+
+
+def _read_unverified_exp(token: str) -> float | None:
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except PyJWTError:
+        return None
+    exp = claims.get("exp")
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
 def _extract_user_id(payload: Any) -> str | None:
     if payload is None:
         return None
@@ -118,6 +231,50 @@ def _validate_token_with_signed_jwt(token: str, jwt_secret: str) -> str:
     return str(user_id)
 
 
+async def _validate_token_with_jwks(token: str, jwks_client: PyJWKClient) -> str:
+    try:
+        signing_key = await run_in_threadpool(jwks_client.get_signing_key_from_jwt, token)
+    except PyJWKClientError as exc:
+        raise _TokenValidationUnavailableError("Supabase JWKS is unavailable") from exc
+    except PyJWTError as exc:
+        raise _TokenInvalidError("Invalid token") from exc
+
+    try:
+        payload = jwt.decode(
+            token,
+            signing_key.key,
+            algorithms=list(_ASYMMETRIC_JWT_ALGORITHMS),
+            options={"verify_aud": False},
+        )
+    except PyJWTError as exc:
+        raise _TokenInvalidError("Invalid token") from exc
+
+    user_id = payload.get("sub") or payload.get("user_id")
+    if not user_id:
+        raise _TokenInvalidError("Token missing user id")
+    return str(user_id)
+
+
+async def _validate_token_locally(token: str) -> str:
+    """Verify the token signature in-process via SUPABASE_JWT_SECRET (HS256) or cached JWKS."""
+    try:
+        header = jwt.get_unverified_header(token)
+    except PyJWTError as exc:
+        raise _TokenInvalidError("Invalid token") from exc
+
+    algorithm = header.get("alg")
+    settings = get_settings()
+    jwt_secret = (settings.supabase_jwt_secret or "").strip()
+    if algorithm == "HS256" and jwt_secret:
+        return _validate_token_with_signed_jwt(token, jwt_secret)
+
+    jwks_client = _get_jwks_client()
+    if algorithm in _ASYMMETRIC_JWT_ALGORITHMS and jwks_client is not None:
+        return await _validate_token_with_jwks(token, jwks_client)
+
+    raise _TokenValidationUnavailableError("No local validator for token algorithm")
+
+
 async def get_auth_context(
     credentials: HTTPAuthorizationCredentials | None = Depends(_bearer_scheme),
 ) -> AuthContext:
@@ -129,9 +286,28 @@ async def get_auth_context(
         raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
 
     settings = get_settings()
+    token_cache = _get_token_cache()
+
+    cached_user_id = token_cache.get(token)
+    if cached_user_id is not None:
+        return AuthContext(user_id=cached_user_id, token=token)
+
+    token_exp = _read_unverified_exp(token)
+
+    try:
+        user_id = await _validate_token_locally(token)
+        token_cache.metrics.local_verifications += 1
+        token_cache.put(token, user_id, token_exp=token_exp)
+        return AuthContext(user_id=user_id, token=token)
+    except _TokenInvalidError as exc:
+        raise HTTPException(status_code=401, detail="Invalid token") from exc
+    except _TokenValidationUnavailableError:
+        pass
 
     try:
         user_id = await _validate_token_with_supabase_native(token)
+        token_cache.metrics.native_verifications += 1
+        token_cache.put(token, user_id, token_exp=token_exp)
         return AuthContext(user_id=user_id, token=token)
     except _TokenInvalidError as exc:
         raise HTTPException(status_code=401, detail="Invalid token") from exc
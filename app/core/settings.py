@@ -2,7 +2,7 @@ from __future__ import annotations
 import json
 from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import List
+from typing import List, Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -24,10 +24,138 @@ class Settings(BaseSettings):
     supabase_jwt_secret: str | None = Field(default=None, validation_alias='supabase_jwt_secret')
     google_tokens_encryption_key: str | None = Field(default=None, validation_alias='gmail_tokens_encryption_key')
     supabase_service_role_key: str | None = Field(default=None, validation_alias='supabase_service_role_key')
+    supabase_jwks_enabled: bool = Field(default=False, validation_alias="supabase_jwks_enabled")
+    supabase_jwks_cache_ttl_seconds: int = Field(
+        default=600,
+        validation_alias="supabase_jwks_cache_ttl_seconds",
+    )
+    auth_token_cache_max_entries: int = Field(
+        default=10000,
+        validation_alias="auth_token_cache_max_entries",
+    )
+    auth_token_revocation_lag_seconds: float = Field(
+        default=60.0,
+        validation_alias="auth_token_revocation_lag_seconds",
+    )
+    supabase_pool_max_connections: int = Field(
+        default=50,
+        validation_alias="supabase_pool_max_connections",
+    )
+    supabase_pool_max_keepalive_connections: int = Field(
+        default=20,
+        validation_alias="supabase_pool_max_keepalive_connections",
+    )
+    supabase_pool_keepalive_expiry_seconds: float = Field(
+        default=30.0,
+        validation_alias="supabase_pool_keepalive_expiry_seconds",
+    )
+    supabase_pool_timeout_seconds: float = Field(
+        default=120.0,
+        validation_alias="supabase_pool_timeout_seconds",
+    )
     browser_runner_vault_secret_prefix: str = Field(
         default="browser_secrets_",
         validation_alias="browser_runner_vault_secret_prefix",
     )
+    connected_apps_status_cache_ttl_seconds: float = Field(
+        default=30.0,
+        validation_alias="connected_apps_status_cache_ttl_seconds",
+    )
+    google_service_cache_max_entries: int = Field(
+        default=512,
+        validation_alias="google_service_cache_max_entries",
+    )
+    google_service_cache_idle_ttl_seconds: float = Field(
+        default=1800.0,
+        validation_alias="google_service_cache_idle_ttl_seconds",
+    )
+    google_token_refresh_skew_seconds: float = Field(
+        default=300.0,
+        validation_alias="google_token_refresh_skew_seconds",
+    )
+    google_token_background_refresh_interval_seconds: float = Field(
+        default=60.0,
+        validation_alias="google_token_background_refresh_interval_seconds",
+    )
+    gmail_quota_units_per_second: float = Field(
+        default=250.0,
+        validation_alias="gmail_quota_units_per_second",
+    )
+    drive_quota_requests_per_second: float = Field(
+        default=200.0,
+        validation_alias="drive_quota_requests_per_second",
+    )
+    google_api_max_concurrency_per_user: int = Field(
+        default=8,
+        validation_alias="google_api_max_concurrency_per_user",
+    )
+    google_api_max_retries: int = Field(default=4, validation_alias="google_api_max_retries")
+    google_api_retry_base_seconds: float = Field(
+        default=1.0,
+        validation_alias="google_api_retry_base_seconds",
+    )
+    google_api_retry_max_seconds: float = Field(
+        default=32.0,
+        validation_alias="google_api_retry_max_seconds",
+    )
+    google_api_transport: Literal["httpx", "threadpool"] = Field(
+        default="httpx",
+        validation_alias="google_api_transport",
+    )
+    google_http_max_connections: int = Field(
+        default=100,
+        validation_alias="google_http_max_connections",
+    )
+    google_http_max_keepalive_connections: int = Field(
+        default=20,
+        validation_alias="google_http_max_keepalive_connections",
+    )
+    google_http_keepalive_expiry_seconds: float = Field(
+        default=30.0,
+        validation_alias="google_http_keepalive_expiry_seconds",
+    )
+    google_http_timeout_seconds: float = Field(
+        default=60.0,
+        validation_alias="google_http_timeout_seconds",
+    )
+    google_http2_enabled: bool = Field(default=True, validation_alias="google_http2_enabled")
+    sse_coalesce_deltas: bool = Field(default=False, validation_alias="sse_coalesce_deltas")
+    sse_coalesce_window_ms: float = Field(
+        default=50.0,
+        validation_alias="sse_coalesce_window_ms",
+    )
+    sse_coalesce_max_bytes: int = Field(
+        default=2048,
+        validation_alias="sse_coalesce_max_bytes",
+    )
+    sse_event_queue_capacity: int = Field(
+        default=1024,
+        validation_alias="sse_event_queue_capacity",
+    )
+    sse_event_queue_overflow_policy: Literal["merge_deltas", "drop_reasoning", "block"] = Field(
+        default="merge_deltas",
+        validation_alias="sse_event_queue_overflow_policy",
+    )
+    run_finalization_concurrency: int = Field(
+        default=4,
+        validation_alias="run_finalization_concurrency",
+    )
+    run_finalization_max_attempts: int = Field(
+        default=4,
+        validation_alias="run_finalization_max_attempts",
+    )
+    run_finalization_retry_base_seconds: float = Field(
+        default=0.5,
+        validation_alias="run_finalization_retry_base_seconds",
+    )
+    run_finalization_retry_max_seconds: float = Field(
+        default=10.0,
+        validation_alias="run_finalization_retry_max_seconds",
+    )
+    run_finalization_drain_timeout_seconds: float = Field(
+        default=15.0,
+        validation_alias="run_finalization_drain_timeout_seconds",
+    )
 
 
     model_config = settings_config
@@ -74,6 +202,20 @@ class GmailAuthSettings(GoogleAuthSettings):
     scopes: List[str] = Field(validation_alias='gmail_scopes')
     redirect_uri: str = Field(validation_alias='gmail_redirect_uri')
     post_connect_redirect: str = Field(validation_alias='gmail_post_connect_redirect')
+    batch_max_size: int = Field(default=50, validation_alias='gmail_batch_max_size')
+    batch_max_attempts: int = Field(default=3, validation_alias='gmail_batch_max_attempts')
+    batch_retry_base_seconds: float = Field(default=0.5, validation_alias='gmail_batch_retry_base_seconds')
+    body_max_tokens: int = Field(default=2000, validation_alias='gmail_body_max_tokens')
+    search_and_read_max_results: int = Field(default=25, validation_alias='gmail_search_and_read_max_results')
+    message_cache_max_bytes: int = Field(default=32 * 1024 * 1024, validation_alias='gmail_message_cache_max_bytes')
+    message_cache_label_ttl_seconds: float = Field(default=60.0, validation_alias='gmail_message_cache_label_ttl_seconds')
+    message_cache_disk_path: str | None = Field(default=None, validation_alias='gmail_message_cache_disk_path')
+    message_cache_disk_max_bytes: int = Field(default=256 * 1024 * 1024, validation_alias='gmail_message_cache_disk_max_bytes')
+    mirror_path: str | None = Field(default=None, validation_alias='gmail_mirror_path')
+    mirror_seed_max_messages: int = Field(default=1000, validation_alias='gmail_mirror_seed_max_messages')
+    mirror_sync_interval_seconds: float = Field(default=30.0, validation_alias='gmail_mirror_sync_interval_seconds')
+    auto_paginate_max_items: int = Field(default=500, validation_alias='gmail_auto_paginate_max_items')
+    auto_paginate_max_bytes: int = Field(default=64 * 1024, validation_alias='gmail_auto_paginate_max_bytes')
 
     model_config = settings_config
 
@@ -82,6 +224,16 @@ class GoogleDriveSettings(GoogleAuthSettings):
     scopes: List[str] = Field(validation_alias='google_drive_scopes')
     redirect_uri: str = Field(validation_alias='google_drive_redirect_uri')
     post_connect_redirect: str = Field(validation_alias='google_drive_post_connect_redirect')
+    search_cache_max_entries: int = Field(default=2048, validation_alias='google_drive_search_cache_max_entries')
+    changes_poll_interval_seconds: float = Field(default=10.0, validation_alias='google_drive_changes_poll_interval_seconds')
+    index_path: str | None = Field(default=None, validation_alias='google_drive_index_path')
+    index_max_files: int = Field(default=100000, validation_alias='google_drive_index_max_files')
+    index_sync_interval_seconds: float = Field(default=30.0, validation_alias='google_drive_index_sync_interval_seconds')
+    folder_cache_max_entries: int = Field(default=10000, validation_alias='google_drive_folder_cache_max_entries')
+    folder_cache_ttl_seconds: float = Field(default=600.0, validation_alias='google_drive_folder_cache_ttl_seconds')
+    query_auto_repair: bool = Field(default=True, validation_alias='google_drive_query_auto_repair')
+    auto_paginate_max_items: int = Field(default=500, validation_alias='google_drive_auto_paginate_max_items')
+    auto_paginate_max_bytes: int = Field(default=64 * 1024, validation_alias='google_drive_auto_paginate_max_bytes')
 
     model_config = settings_config
     
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
-from app.dependencies import create_supabase_user_client
+from app.dependencies import supabase_user_client
 
 
 @dataclass(frozen=True)
@@ -30,8 +30,7 @@ async def upsert_chat_session(
 ) -> str | None:
     if not conversation_id:
         raise ValueError("conversation_id is required")
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         existing_resp = await (
             client.table("chat_sessions")
             .select("id, title, metadata, last_message_at, status")
@@ -72,8 +71,6 @@ async def upsert_chat_session(
             .execute()
         )
         return id_resp.data.get("id") if id_resp and id_resp.data else None
-    finally:
-        await client.postgrest.aclose()
 
 
 async def create_chat_session_stub(
@@ -90,8 +87,7 @@ async def create_chat_session_stub(
     `conversation_id` is nullable in the DB schema, so we can create a stub and later attach
     `conversation_id` when the run creates/uses a conversation.
     """
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         payload = {
             "user_id": user_id,
             "title": title,
@@ -114,8 +110,6 @@ async def create_chat_session_stub(
         if not session_id:
             raise RuntimeError("Failed to create chat session stub")
         return str(session_id)
-    finally:
-        await client.postgrest.aclose()
 
 
 async def update_chat_session_by_id(
@@ -129,8 +123,7 @@ async def update_chat_session_by_id(
     last_message_at: str | None = None,
     status: str | None = None,
 ) -> None:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         payload: dict = {}
         if conversation_id is not None:
             payload["conversation_id"] = conversation_id
@@ -152,8 +145,6 @@ async def update_chat_session_by_id(
             .eq("user_id", user_id)
             .execute()
         )
-    finally:
-        await client.postgrest.aclose()
 
 
 async def get_chat_session_by_conversation_id(
@@ -162,8 +153,7 @@ async def get_chat_session_by_conversation_id(
     user_jwt: str,
     conversation_id: str,
 ):
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         response = await (
             client.table("chat_sessions")
             .select("*")
@@ -173,13 +163,10 @@ async def get_chat_session_by_conversation_id(
             .execute()
         )
         return response.data if response else None
-    finally:
-        await client.postgrest.aclose()
 
 
 async def list_active_sessions(user_jwt: str, limit: int = 100):
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         response = await (
             client.table("chat_sessions")
             .select("id, title, metadata, last_message_at, created_at, updated_at, status")
@@ -189,8 +176,6 @@ async def list_active_sessions(user_jwt: str, limit: int = 100):
             .execute()
         )
         return response.data if response else []
-    finally:
-        await client.postgrest.aclose()
 
 
 async def get_chat_session(
@@ -199,8 +184,7 @@ async def get_chat_session(
     user_jwt: str,
     session_id: str,
 ):
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         response = await (
             client.table("chat_sessions")
             .select("*")
@@ -210,8 +194,6 @@ async def get_chat_session(
             .execute()
         )
         return response.data if response else None
-    finally:
-        await client.postgrest.aclose()
 
 
 async def delete_chat_session(
@@ -220,8 +202,7 @@ async def delete_chat_session(
     user_jwt: str,
     session_id: str,
 ):
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         response = await (
             client.table("chat_sessions")
             .delete()
@@ -230,5 +211,3 @@ async def delete_chat_session(
             .execute()
         )
         return response.data if response else []
-    finally:
-        await client.postgrest.aclose()
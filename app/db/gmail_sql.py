@@ -3,8 +3,14 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any
 
+from fastapi.concurrency import run_in_threadpool
+
+from app.utils.google_utils import invalidate_google_services
 from app.utils.encryption_utils import encrypt_token, decrypt_token
-from app.dependencies import create_supabase_service_client, create_supabase_user_client
+from app.db.onboarding_sql import invalidate_connected_apps_status
+from app.utils.gmail_message_cache_utils import purge_gmail_message_cache
+from app.utils.gmail_mirror_utils import purge_gmail_mailbox_mirror
+from app.dependencies import supabase_service_client, supabase_user_client
 
 
 @dataclass(frozen=True)
@@ -12,6 +18,7 @@ class GmailCreds:
     access_token: str | None
     refresh_token: str | None
     status: str | None
+    access_token_expires_at: str | None = None
 
 
 def _utc_now_iso() -> str:
@@ -30,8 +37,7 @@ async def upsert_gmail_connection(
     status: str = "active",
     revoked_at: str | None = None,
 ) -> None:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         await _upsert_gmail_connection_with_client(
             client=client,
             user_id=user_id,
@@ -43,8 +49,6 @@ async def upsert_gmail_connection(
             status=status,
             revoked_at=revoked_at,
         )
-    finally:
-        await client.postgrest.aclose()
 
 
 async def upsert_gmail_connection_service(
@@ -58,8 +62,7 @@ async def upsert_gmail_connection_service(
     status: str = "active",
     revoked_at: str | None = None,
 ) -> None:
-    client = await create_supabase_service_client()
-    try:
+    async with supabase_service_client() as client:
         await _upsert_gmail_connection_with_client(
             client=client,
             user_id=user_id,
@@ -71,8 +74,6 @@ async def upsert_gmail_connection_service(
             status=status,
             revoked_at=revoked_at,
         )
-    finally:
-        await client.postgrest.aclose()
 
 
 async def _upsert_gmail_connection_with_client(
@@ -129,14 +130,40 @@ async def _upsert_gmail_connection_with_client(
         "status": status,
     }
     await client.table("gmail_connections").upsert(payload, on_conflict="user_id").execute()
+    invalidate_connected_apps_status(user_id)
+
+
+async def update_gmail_access_token_service(
+    *,
+    user_id: str,
+    access_token: str | None,
+    access_token_expires_at: str | None,
+) -> bool:
+    """Store a refreshed access token; False when the connection is no longer active."""
+    async with supabase_service_client() as client:
+        response = await (
+            client.table("gmail_connections")
+            .update(
+                {
+                    "access_token": encrypt_token(access_token, service="gmail"),
+                    "access_token_expires_at": access_token_expires_at,
+                }
+            )
+            .eq("user_id", user_id)
+            .eq("status", "active")
+            .execute()
+        )
+    data = response.data if response else None
+    if isinstance(data, list):
+        return len(data) > 0
+    return bool(data)
 
 
 async def get_gmail_creds(user_id: str, user_jwt: str) -> GmailCreds | None:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         response = await (
             client.table("gmail_connections")
-            .select("access_token, refresh_token_encrypted, status")
+            .select("access_token, refresh_token_encrypted, access_token_expires_at, status")
             .eq("user_id", user_id)
             .maybe_single()
             .execute()
@@ -148,23 +175,18 @@ async def get_gmail_creds(user_id: str, user_jwt: str) -> GmailCreds | None:
             access_token=decrypt_token(data.get("access_token"), service="gmail"),
             refresh_token=decrypt_token(data.get("refresh_token_encrypted"), service="gmail"),
             status=data.get("status"),
+            access_token_expires_at=data.get("access_token_expires_at"),
         )
-    finally:
-        await client.postgrest.aclose()
 
 
 async def list_gmail_users(user_jwt: str, limit: int = 100):
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         response = await client.table("gmail_connections").select("*").limit(limit).execute()
         return response.data if response else []
-    finally:
-        await client.postgrest.aclose()
 
 
 async def disconnect_gmail_connection(*, user_id: str, user_jwt: str) -> bool:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         response = await (
             client.table("gmail_connections")
             .update(
@@ -179,9 +201,11 @@ async def disconnect_gmail_connection(*, user_id: str, user_jwt: str) -> bool:
             .eq("user_id", user_id)
             .execute()
         )
+        invalidate_connected_apps_status(user_id)
+        await run_in_threadpool(purge_gmail_message_cache, user_id)
+        await run_in_threadpool(purge_gmail_mailbox_mirror, user_id)
+        invalidate_google_services(user_id)
         data = response.data if response else None
         if isinstance(data, list):
             return len(data) > 0
         return bool(data)
-    finally:
-        await client.postgrest.aclose()
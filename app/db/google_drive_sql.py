@@ -3,7 +3,12 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any
 
-from app.dependencies import create_supabase_service_client, create_supabase_user_client
+from app.db.onboarding_sql import invalidate_connected_apps_status
+from app.dependencies import supabase_service_client, supabase_user_client
+from app.utils.drive_folder_cache_utils import purge_drive_folder_cache
+from app.utils.drive_index_utils import purge_google_drive_metadata_index
+from app.utils.drive_search_cache_utils import purge_drive_search_cache
+from app.utils.google_utils import invalidate_google_services
 from app.utils.encryption_utils import decrypt_token, encrypt_token
 
 
@@ -12,6 +17,7 @@ class GoogleDriveCreds:
     access_token: str | None
     refresh_token: str | None
     status: str | None
+    access_token_expires_at: str | None = None
 
 
 def _utc_now_iso() -> str:
@@ -30,8 +36,7 @@ async def upsert_google_drive_connection(
     status: str = "active",
     revoked_at: str | None = None,
 ) -> None:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         await _upsert_google_drive_connection_with_client(
             client=client,
             user_id=user_id,
@@ -43,8 +48,6 @@ async def upsert_google_drive_connection(
             status=status,
             revoked_at=revoked_at,
         )
-    finally:
-        await client.postgrest.aclose()
 
 
 async def upsert_google_drive_connection_service(
@@ -58,8 +61,7 @@ async def upsert_google_drive_connection_service(
     status: str = "active",
     revoked_at: str | None = None,
 ) -> None:
-    client = await create_supabase_service_client()
-    try:
+    async with supabase_service_client() as client:
         await _upsert_google_drive_connection_with_client(
             client=client,
             user_id=user_id,
@@ -71,8 +73,6 @@ async def upsert_google_drive_connection_service(
             status=status,
             revoked_at=revoked_at,
         )
-    finally:
-        await client.postgrest.aclose()
 
 
 async def _upsert_google_drive_connection_with_client(
@@ -129,14 +129,40 @@ async def _upsert_google_drive_connection_with_client(
         "status": status,
     }
     await client.table("google_drive_connections").upsert(payload, on_conflict="user_id").execute()
+    invalidate_connected_apps_status(user_id)
+
+
+async def update_google_drive_access_token_service(
+    *,
+    user_id: str,
+    access_token: str | None,
+    access_token_expires_at: str | None,
+) -> bool:
+    """Store a refreshed access token; False when the connection is no longer active."""
+    async with supabase_service_client() as client:
+        response = await (
+            client.table("google_drive_connections")
+            .update(
+                {
+                    "access_token": encrypt_token(access_token, service="google_drive"),
+                    "access_token_expires_at": access_token_expires_at,
+                }
+            )
+            .eq("user_id", user_id)
+            .eq("status", "active")
+            .execute()
+        )
+    data = response.data if response else None
+    if isinstance(data, list):
+        return len(data) > 0
+    return bool(data)
 
 
 async def get_google_drive_creds(user_id: str, user_jwt: str) -> GoogleDriveCreds | None:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         response = await (
             client.table("google_drive_connections")
-            .select("access_token, refresh_token_encrypted, status")
+            .select("access_token, refresh_token_encrypted, access_token_expires_at, status")
             .eq("user_id", user_id)
             .maybe_single()
             .execute()
@@ -149,23 +175,18 @@ async def get_google_drive_creds(user_id: str, user_jwt: str) -> GoogleDriveCred
             access_token=decrypt_token(data.get("access_token"), service="google_drive"),
             refresh_token=decrypt_token(data.get("refresh_token_encrypted"), service="google_drive"),
             status=data.get("status"),
+            access_token_expires_at=data.get("access_token_expires_at"),
         )
-    finally:
-        await client.postgrest.aclose()
 
 
 async def list_google_drive_users(user_jwt: str, limit: int = 100):
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         response = await client.table("google_drive_connections").select("*").limit(limit).execute()
         return response.data if response else []
-    finally:
-        await client.postgrest.aclose()
 
 
 async def disconnect_google_drive_connection(*, user_id: str, user_jwt: str) -> bool:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         response = await (
             client.table("google_drive_connections")
             .update(
@@ -180,9 +201,12 @@ async def disconnect_google_drive_connection(*, user_id: str, user_jwt: str) ->
             .eq("user_id", user_id)
             .execute()
         )
+        invalidate_connected_apps_status(user_id)
+        purge_drive_search_cache(user_id)
+        purge_google_drive_metadata_index(user_id)
+        purge_drive_folder_cache(user_id)
+        invalidate_google_services(user_id)
         data = response.data if response else None
         if isinstance(data, list):
             return len(data) > 0
         return bool(data)
-    finally:
-        await client.postgrest.aclose()
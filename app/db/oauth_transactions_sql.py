@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import Any
 
-from app.dependencies import create_supabase_service_client
+from app.dependencies import supabase_service_client
 
 
 OAUTH_PROVIDER_GMAIL = "gmail"
@@ -59,8 +59,7 @@ async def create_oauth_transaction(
     return_to: str,
     expires_at: str,
 ) -> dict[str, Any]:
-    client = await create_supabase_service_client()
-    try:
+    async with supabase_service_client() as client:
         response = await (
             client.table("oauth_transactions")
             .insert(
@@ -80,13 +79,10 @@ async def create_oauth_transaction(
         if not row:
             raise RuntimeError("Failed to create oauth transaction")
         return row
-    finally:
-        await client.postgrest.aclose()
 
 
 async def get_oauth_transaction(*, transaction_id: str) -> dict[str, Any] | None:
-    client = await create_supabase_service_client()
-    try:
+    async with supabase_service_client() as client:
         response = await (
             client.table("oauth_transactions")
             .select("*")
@@ -95,8 +91,6 @@ async def get_oauth_transaction(*, transaction_id: str) -> dict[str, Any] | None
             .execute()
         )
         return _extract_single_row(response)
-    finally:
-        await client.postgrest.aclose()
 
 
 async def get_oauth_transaction_for_user(
@@ -105,8 +99,7 @@ async def get_oauth_transaction_for_user(
     provider: str,
     transaction_id: str,
 ) -> dict[str, Any] | None:
-    client = await create_supabase_service_client()
-    try:
+    async with supabase_service_client() as client:
         response = await (
             client.table("oauth_transactions")
             .select("*")
@@ -117,8 +110,6 @@ async def get_oauth_transaction_for_user(
             .execute()
         )
         return _extract_single_row(response)
-    finally:
-        await client.postgrest.aclose()
 
 
 async def consume_pending_transaction(
@@ -129,8 +120,7 @@ async def consume_pending_transaction(
 ) -> dict[str, Any] | None:
     lock_time = consumed_at or _utc_now_iso()
 
-    client = await create_supabase_service_client()
-    try:
+    async with supabase_service_client() as client:
         response = await (
             client.table("oauth_transactions")
             .update({"completed_at": lock_time})
@@ -142,8 +132,6 @@ async def consume_pending_transaction(
             .execute()
         )
         return _extract_single_row(response)
-    finally:
-        await client.postgrest.aclose()
 
 
 async def mark_transaction_connected(
@@ -152,8 +140,7 @@ async def mark_transaction_connected(
     provider: str,
     completed_at_lock: str,
 ) -> dict[str, Any] | None:
-    client = await create_supabase_service_client()
-    try:
+    async with supabase_service_client() as client:
         response = await (
             client.table("oauth_transactions")
             .update(
@@ -169,8 +156,6 @@ async def mark_transaction_connected(
             .execute()
         )
         return _extract_single_row(response)
-    finally:
-        await client.postgrest.aclose()
 
 
 async def mark_transaction_error(
@@ -182,8 +167,7 @@ async def mark_transaction_error(
     completed_at_lock: str | None = None,
 ) -> dict[str, Any] | None:
     completed_at = _utc_now_iso()
-    client = await create_supabase_service_client()
-    try:
+    async with supabase_service_client() as client:
         query = (
             client.table("oauth_transactions")
             .update(
@@ -205,8 +189,6 @@ async def mark_transaction_error(
         row = _extract_single_row(response)
         if row:
             return row
-    finally:
-        await client.postgrest.aclose()
 
     return await get_oauth_transaction(transaction_id=transaction_id)
 
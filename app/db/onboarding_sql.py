@@ -1,14 +1,15 @@
 from __future__ import annotations
 
 import json
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any
 
 from app.core.settings import get_settings
 from app.dependencies import (
-    create_supabase_service_client,
-    create_supabase_user_client,
+    supabase_service_client,
+    supabase_user_client,
 )
 
 
@@ -53,8 +54,7 @@ def get_browser_credentials_secret_name(user_id: str) -> str:
 
 
 async def get_user_profile(*, user_id: str, user_jwt: str) -> dict[str, Any] | None:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         response = await (
             client.table("user_profiles")
             .select("user_id, name, city, age, gender, created_at, updated_at")
@@ -63,8 +63,6 @@ async def get_user_profile(*, user_id: str, user_jwt: str) -> dict[str, Any] | N
             .execute()
         )
         return response.data if response else None
-    finally:
-        await client.postgrest.aclose()
 
 
 async def upsert_user_profile(
@@ -76,8 +74,7 @@ async def upsert_user_profile(
     age: int | None = None,
     gender: str | None = None,
 ) -> dict[str, Any]:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         payload: dict[str, Any] = {
             "user_id": user_id,
             "name": name,
@@ -97,13 +94,10 @@ async def upsert_user_profile(
         if not profile:
             raise RuntimeError("Failed to load user profile after upsert")
         return profile
-    finally:
-        await client.postgrest.aclose()
 
 
 async def get_user_onboarding(*, user_id: str, user_jwt: str) -> dict[str, Any] | None:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         response = await (
             client.table("user_onboarding")
             .select("user_id, onboarding_completed_at, onboarding_version, created_at, updated_at")
@@ -112,8 +106,6 @@ async def get_user_onboarding(*, user_id: str, user_jwt: str) -> dict[str, Any]
             .execute()
         )
         return response.data if response else None
-    finally:
-        await client.postgrest.aclose()
 
 
 async def upsert_user_onboarding(
@@ -123,8 +115,7 @@ async def upsert_user_onboarding(
     onboarding_completed_at: str | None = None,
     onboarding_version: int = 1,
 ) -> dict[str, Any]:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         payload: dict[str, Any] = {
             "user_id": user_id,
             "onboarding_version": onboarding_version,
@@ -142,8 +133,6 @@ async def upsert_user_onboarding(
         if not row:
             raise RuntimeError("Failed to load user onboarding row after upsert")
         return row
-    finally:
-        await client.postgrest.aclose()
 
 
 async def mark_user_onboarding_completed(
@@ -160,62 +149,118 @@ async def mark_user_onboarding_completed(
     )
 
 
-async def get_connected_apps_status(*, user_id: str, user_jwt: str) -> ConnectedAppsStatus:
-    client = await create_supabase_user_client(user_jwt)
+class _ConnectedAppsStatusCache:
+    """Per-user TTL cache for connected-apps status.
+
+    Every write to a connection table calls `invalidate`, and a per-user generation counter
+    stops a read that raced with an invalidation from storing its (now stale) result.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[str, tuple[ConnectedAppsStatus, float]] = {}
+        self._generations: dict[str, int] = {}
+
+    def get(self, user_id: str) -> ConnectedAppsStatus | None:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        status, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(user_id, None)
+            return None
+        return status
+
+    def generation(self, user_id: str) -> int:
+        return self._generations.get(user_id, 0)
+
+    def put(
+        self,
+        user_id: str,
+        status: ConnectedAppsStatus,
+        *,
+        generation: int,
+        ttl_seconds: float,
+    ) -> None:
+        if ttl_seconds <= 0 or generation != self.generation(user_id):
+            return
+        self._entries[user_id] = (status, time.monotonic() + ttl_seconds)
+
+    def invalidate(self, user_id: str) -> None:
+        self._generations[user_id] = self.generation(user_id) + 1
+        self._entries.pop(user_id, None)
+
+
+_connected_apps_status_cache = _ConnectedAppsStatusCache()
+
+
+def invalidate_connected_apps_status(user_id: str) -> None:
+    _connected_apps_status_cache.invalidate(user_id)
+
+
+async def _read_table_status(client: Any, table: str, *, user_id: str) -> str | None:
+    response = await (
+        client.table(table)
+        .select("status")
+        .eq("user_id", user_id)
+        .maybe_single()
+        .execute()
+    )
+    return response.data.get("status") if response and isinstance(response.data, dict) else None
+
+
+async def _read_connected_apps_status_row(client: Any, *, user_id: str) -> dict[str, Any]:
+    row = {
+        "gmail_status": await _read_table_status(client, "gmail_connections", user_id=user_id),
+        "google_drive_status": await _read_table_status(
+            client, "google_drive_connections", user_id=user_id
+        ),
+    }
     try:
-        gmail_resp = await (
-            client.table("gmail_connections")
-            .select("status")
-            .eq("user_id", user_id)
-            .maybe_single()
-            .execute()
-        )
-        drive_resp = await (
-            client.table("google_drive_connections")
-            .select("status")
-            .eq("user_id", user_id)
-            .maybe_single()
-            .execute()
+        row["whatsapp_status"] = await _read_table_status(
+            client, "whatsapp_connections", user_id=user_id
         )
+    except Exception:
+        row["whatsapp_status"] = None
+    return row
+
+
+async def get_connected_apps_status(*, user_id: str, user_jwt: str) -> ConnectedAppsStatus:
+    cached = _connected_apps_status_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    generation = _connected_apps_status_cache.generation(user_id)
+    async with supabase_user_client(user_jwt) as client:
         try:
-            whatsapp_resp = await (
-                client.table("whatsapp_connections")
-                .select("status")
-                .eq("user_id", user_id)
-                .maybe_single()
-                .execute()
+            response = await (
+                client.rpc("get_connected_apps_status", {"p_user_id": user_id}).execute()
             )
-        except Exception:
-            whatsapp_resp = None
-    finally:
-        await client.postgrest.aclose()
-
-    gmail_status = (
-        gmail_resp.data.get("status")
-        if gmail_resp and isinstance(gmail_resp.data, dict)
-        else None
-    )
-    drive_status = (
-        drive_resp.data.get("status")
-        if drive_resp and isinstance(drive_resp.data, dict)
-        else None
-    )
-    whatsapp_status = (
-        whatsapp_resp.data.get("status")
-        if whatsapp_resp and isinstance(whatsapp_resp.data, dict)
-        else None
+        except Exception as exc:
+            # Deployments that have not applied connected_apps_status_function.sql yet.
+            print(f"get_connected_apps_status RPC failed, reading tables instead: {exc}")
+            row = await _read_connected_apps_status_row(client, user_id=user_id)
+        else:
+            data = response.data if response else None
+            row = data[0] if isinstance(data, list) and data else data
+            row = row if isinstance(row, dict) else {}
+
+    status = ConnectedAppsStatus(
+        gmail=row.get("gmail_status") == "active",
+        google_drive=row.get("google_drive_status") == "active",
+        whatsapp=row.get("whatsapp_status") == "connected",
     )
-    return ConnectedAppsStatus(
-        gmail=gmail_status == "active",
-        google_drive=drive_status == "active",
-        whatsapp=whatsapp_status == "connected",
+    _connected_apps_status_cache.put(
+        user_id,
+        status,
+        generation=generation,
+        ttl_seconds=get_settings().connected_apps_status_cache_ttl_seconds,
     )
+    return status
 
 
 async def get_browser_credentials_secret(*, user_id: str) -> str | None:
     secret_name = get_browser_credentials_secret_name(user_id)
-    client = await create_supabase_service_client()
-    try:
+    async with supabase_service_client() as client:
         response = await (
             client.rpc("get_vault_secret", {"secret_name": secret_name}).execute()
         )
@@ -223,8 +268,6 @@ async def get_browser_credentials_secret(*, user_id: str) -> str | None:
         if secret is None:
             return None
         return str(secret)
-    finally:
-        await client.postgrest.aclose()
 
 
 async def upsert_browser_credentials_secret(
@@ -236,8 +279,7 @@ async def upsert_browser_credentials_secret(
     secret_value = (
         json.dumps(secret_payload) if isinstance(secret_payload, dict) else secret_payload
     )
-    client = await create_supabase_service_client()
-    try:
+    async with supabase_service_client() as client:
         await (
             client.rpc(
                 "upsert_vault_secret",
@@ -250,5 +292,3 @@ async def upsert_browser_credentials_secret(
             .execute()
         )
         return secret_name
-    finally:
-        await client.postgrest.aclose()
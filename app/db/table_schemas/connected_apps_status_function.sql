@@ -0,0 +1,31 @@
+-- Single round-trip connected-apps lookup used by the agent run preamble and onboarding reads.
+-- SECURITY INVOKER keeps the per-table RLS policies in force: callers only see their own rows.
+
+CREATE OR REPLACE FUNCTION public.get_connected_apps_status(p_user_id uuid)
+RETURNS TABLE (
+    gmail_status text,
+    google_drive_status text,
+    whatsapp_status text
+)
+LANGUAGE plpgsql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+AS $$
+BEGIN
+    SELECT gc.status INTO gmail_status
+    FROM public.gmail_connections gc WHERE gc.user_id = p_user_id;
+    SELECT dc.status INTO google_drive_status
+    FROM public.google_drive_connections dc WHERE dc.user_id = p_user_id;
+    -- WhatsApp is optional: deployments without the table report it as not connected.
+    IF to_regclass('public.whatsapp_connections') IS NOT NULL THEN
+        EXECUTE 'SELECT wc.status FROM public.whatsapp_connections wc WHERE wc.user_id = $1'
+            INTO whatsapp_status
+            USING p_user_id;
+    END IF;
+    RETURN NEXT;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.get_connected_apps_status(uuid) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.get_connected_apps_status(uuid) TO authenticated;
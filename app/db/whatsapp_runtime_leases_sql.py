@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import Any
 
-from app.dependencies import create_supabase_user_client
+from app.dependencies import supabase_user_client
 
 
 def _utc_now_iso() -> str:
@@ -22,8 +22,7 @@ async def get_whatsapp_runtime_lease(
     user_id: str,
     user_jwt: str,
 ) -> dict[str, Any] | None:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         response = await (
             client.table("whatsapp_runtime_leases")
             .select(_LEASE_SELECT_COLUMNS)
@@ -32,8 +31,6 @@ async def get_whatsapp_runtime_lease(
             .execute()
         )
         return response.data if response else None
-    finally:
-        await client.postgrest.aclose()
 
 
 async def upsert_whatsapp_runtime_lease(
@@ -51,8 +48,7 @@ async def upsert_whatsapp_runtime_lease(
     last_error_code: str | None = None,
     last_error_at: str | None = None,
 ) -> dict[str, Any]:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         payload: dict[str, Any] = {
             "user_id": user_id,
             "runtime_id": runtime_id,
@@ -82,8 +78,6 @@ async def upsert_whatsapp_runtime_lease(
         if not row:
             raise RuntimeError("Failed to load whatsapp_runtime_leases row after upsert")
         return row
-    finally:
-        await client.postgrest.aclose()
 
 
 async def touch_whatsapp_runtime_lease(
@@ -93,8 +87,7 @@ async def touch_whatsapp_runtime_lease(
     lease_expires_at: str,
     controller_state: str | None = None,
 ) -> dict[str, Any]:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         patch: dict[str, Any] = {
             "lease_expires_at": lease_expires_at,
             "last_touched_at": _utc_now_iso(),
@@ -119,8 +112,6 @@ async def touch_whatsapp_runtime_lease(
         if not row:
             raise RuntimeError("Failed to load whatsapp_runtime_leases row after touch")
         return row
-    finally:
-        await client.postgrest.aclose()
 
 
 async def update_whatsapp_runtime_lease_state(
@@ -132,8 +123,7 @@ async def update_whatsapp_runtime_lease_state(
     last_error_code: str | None = None,
     last_error_at: str | None = None,
 ) -> dict[str, Any] | None:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         patch: dict[str, Any] = {
             "controller_state": controller_state,
             "last_touched_at": _utc_now_iso(),
@@ -157,8 +147,6 @@ async def update_whatsapp_runtime_lease_state(
             .execute()
         )
         return response.data if response else None
-    finally:
-        await client.postgrest.aclose()
 
 
 async def delete_whatsapp_runtime_lease(
@@ -166,8 +154,7 @@ async def delete_whatsapp_runtime_lease(
     user_id: str,
     user_jwt: str,
 ) -> list[dict[str, Any]]:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         response = await (
             client.table("whatsapp_runtime_leases")
             .delete()
@@ -175,5 +162,3 @@ async def delete_whatsapp_runtime_lease(
             .execute()
         )
         return response.data if response else []
-    finally:
-        await client.postgrest.aclose()
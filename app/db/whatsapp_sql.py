@@ -3,7 +3,8 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import Any
 
-from app.dependencies import create_supabase_user_client
+from app.db.onboarding_sql import invalidate_connected_apps_status
+from app.dependencies import supabase_user_client
 
 
 def _utc_now_iso() -> str:
@@ -11,8 +12,7 @@ def _utc_now_iso() -> str:
 
 
 async def get_whatsapp_connection(*, user_id: str, user_jwt: str) -> dict[str, Any] | None:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         response = await (
             client.table("whatsapp_connections")
             .select(
@@ -24,8 +24,6 @@ async def get_whatsapp_connection(*, user_id: str, user_jwt: str) -> dict[str, A
             .execute()
         )
         return response.data if response else None
-    finally:
-        await client.postgrest.aclose()
 
 
 async def upsert_whatsapp_connection(
@@ -40,8 +38,7 @@ async def upsert_whatsapp_connection(
     disconnected_at: str | None,
     last_seen_at: str | None = None,
 ) -> dict[str, Any]:
-    client = await create_supabase_user_client(user_jwt)
-    try:
+    async with supabase_user_client(user_jwt) as client:
         payload: dict[str, Any] = {
             "user_id": user_id,
             "runtime_id": runtime_id,
@@ -53,6 +50,7 @@ async def upsert_whatsapp_connection(
             "last_seen_at": last_seen_at or _utc_now_iso(),
         }
         await client.table("whatsapp_connections").upsert(payload, on_conflict="user_id").execute()
+        invalidate_connected_apps_status(user_id)
         response = await (
             client.table("whatsapp_connections")
             .select(
@@ -67,5 +65,3 @@ async def upsert_whatsapp_connection(
         if not row:
             raise RuntimeError("Failed to load WhatsApp connection row after upsert")
         return row
-    finally:
-        await client.postgrest.aclose()
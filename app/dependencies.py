@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator
+
+import httpx
 from agents import set_tracing_export_api_key
 from fastapi import FastAPI
 from openai import AsyncOpenAI
+from postgrest import AsyncPostgrestClient
 
 from supabase import ClientOptions, create_async_client, AsyncClient
 
@@ -11,17 +17,23 @@ from app.core.settings import (
     get_settings,
     validate_startup_security_configuration,
 )
+from app.utils.google_async_http_utils import close_google_async_http
+from app.utils.google_utils import close_google_token_refresher, init_google_token_refresher
+from app.utils.run_finalization_utils import (
+    close_run_finalization_worker,
+    init_run_finalization_worker,
+)
 
 _openai_client: AsyncOpenAI | None = None
 _supabase_client: AsyncClient | None = None
+_supabase_client_pool: SupabaseClientPool | None = None
 
 
 async def init_google_tokens_encryption_key() -> None:
     settings = get_settings()
     if settings.google_tokens_encryption_key:
         return
-    vault_client = await create_supabase_service_client()
-    try:
+    async with supabase_service_client() as vault_client:
         response = await (
             vault_client.rpc(
                 "get_vault_secret",
@@ -29,8 +41,6 @@ async def init_google_tokens_encryption_key() -> None:
             )
             .execute()
         )
-    finally:
-        await vault_client.postgrest.aclose()
 
     secret = response.data if response else None
     if not secret:
@@ -119,14 +129,195 @@ async def create_supabase_service_client() -> AsyncClient:
     )
 
 
+def _strip_bearer_prefix(user_jwt: str) -> str:
+    token = user_jwt.strip()
+    if token.lower().startswith("bearer "):
+        token = token.split(None, 1)[1]
+    return token
+
+
+@dataclass
+class SupabaseClientPoolMetrics:
+    handles_issued: int = 0
+    pool_hits: int = 0
+    pool_misses: int = 0
+    requests_sent: int = 0
+    connections_opened: int = 0
+
+    @property
+    def connections_reused(self) -> int:
+        return max(self.requests_sent - self.connections_opened, 0)
+
+    def as_dict(self) -> dict[str, int]:
+        return {**asdict(self), "connections_reused": self.connections_reused}
+
+
+class _MeteredTransport(httpx.AsyncHTTPTransport):
+    """Counts requests and freshly opened TCP connections on the shared transport."""
+
+    def __init__(self, *, metrics: SupabaseClientPoolMetrics, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._metrics.requests_sent += 1
+        upstream_trace = request.extensions.get("trace")
+
+        async def _trace(event_name: str, info: dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                self._metrics.connections_opened += 1
+            if upstream_trace is not None:
+                await upstream_trace(event_name, info)
+
+        request.extensions["trace"] = _trace
+        return await super().handle_async_request(request)
+
+
+class SupabaseClientPool:
+    """Long-lived keep-alive transport shared by all per-request PostgREST handles.
+
+    Handles only differ by their Authorization header, so issuing one is a dict copy
+    instead of a new AsyncClient, httpx pool and TLS handshake.
+    """
+
+    def __init__(
+        self,
+        *,
+        supabase_url: str,
+        supabase_api_key: str,
+        service_role_key: str | None,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry_seconds: float,
+        timeout_seconds: float,
+    ) -> None:
+        self._rest_url = f"{supabase_url.rstrip('/')}/rest/v1"
+        self._supabase_api_key = supabase_api_key
+        self._service_role_key = service_role_key
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_seconds,
+        )
+        self._timeout = httpx.Timeout(timeout_seconds)
+        self._http_client: httpx.AsyncClient | None = None
+        self.metrics = SupabaseClientPoolMetrics()
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None or self._http_client.is_closed:
+            self.metrics.pool_misses += 1
+            self._http_client = httpx.AsyncClient(
+                transport=_MeteredTransport(
+                    metrics=self.metrics,
+                    http2=True,
+                    limits=self._limits,
+                ),
+                timeout=self._timeout,
+                follow_redirects=True,
+            )
+        else:
+            self.metrics.pool_hits += 1
+        return self._http_client
+
+    def _issue_handle(self, *, api_key: str, bearer_token: str) -> AsyncPostgrestClient:
+        http_client = self._get_http_client()
+        self.metrics.handles_issued += 1
+        return AsyncPostgrestClient(
+            self._rest_url,
+            headers={
+                "apiKey": api_key,
+                "Authorization": f"Bearer {bearer_token}",
+            },
+            http_client=http_client,
+        )
+
+    def user_handle(self, user_jwt: str) -> AsyncPostgrestClient:
+        if not user_jwt:
+            raise RuntimeError("User JWT is required for per-request Supabase access")
+        return self._issue_handle(
+            api_key=self._supabase_api_key,
+            bearer_token=_strip_bearer_prefix(user_jwt),
+        )
+
+    def service_handle(self) -> AsyncPostgrestClient:
+        if not self._service_role_key:
+            raise RuntimeError(
+                "SUPABASE_SERVICE_ROLE_KEY is required for service-role Supabase access"
+            )
+        return self._issue_handle(
+            api_key=self._service_role_key,
+            bearer_token=self._service_role_key,
+        )
+
+    async def aclose(self) -> None:
+        client = self._http_client
+        self._http_client = None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+
+def init_supabase_client_pool(_: FastAPI | None = None) -> None:
+    global _supabase_client_pool
+    if _supabase_client_pool is None:
+        settings = get_settings()
+        _supabase_client_pool = SupabaseClientPool(
+            supabase_url=settings.supabase_url,
+            supabase_api_key=settings.supabase_api_key,
+            service_role_key=settings.supabase_service_role_key,
+            max_connections=settings.supabase_pool_max_connections,
+            max_keepalive_connections=settings.supabase_pool_max_keepalive_connections,
+            keepalive_expiry_seconds=settings.supabase_pool_keepalive_expiry_seconds,
+            timeout_seconds=settings.supabase_pool_timeout_seconds,
+        )
+
+
+async def close_supabase_client_pool(_: FastAPI | None = None) -> None:
+    global _supabase_client_pool
+    pool = _supabase_client_pool
+    if pool is not None:
+        await pool.aclose()
+    _supabase_client_pool = None
+
+
+def get_supabase_client_pool() -> SupabaseClientPool:
+    # Lazily created so scripts and tests that skip app startup still get pooled handles.
+    if _supabase_client_pool is None:
+        init_supabase_client_pool()
+    return _supabase_client_pool
+
+
+def get_supabase_client_pool_metrics() -> dict[str, int]:
+    return get_supabase_client_pool().metrics.as_dict()
+
+
+@asynccontextmanager
+async def supabase_user_client(user_jwt: str) -> AsyncIterator[AsyncPostgrestClient]:
+    """Yield a user-scoped PostgREST handle backed by the shared keep-alive transport."""
+    yield get_supabase_client_pool().user_handle(user_jwt)
+
+
+@asynccontextmanager
+async def supabase_service_client() -> AsyncIterator[AsyncPostgrestClient]:
+    """Yield a service-role PostgREST handle backed by the shared keep-alive transport."""
+    yield get_supabase_client_pool().service_handle()
+
+
 async def startup():
     validate_startup_security_configuration()
     init_openai_client()
     await init_supabase_client()
+    init_supabase_client_pool()
+    init_run_finalization_worker()
     await init_google_tokens_encryption_key()
+    init_google_token_refresher()
 
 
-async def shutdown(): 
+async def shutdown():
+    # Drain first: queued finalization jobs still need the OpenAI and Supabase clients.
+    await close_google_token_refresher()
+    await close_run_finalization_worker()
     await close_openai_client()
     await close_supabase_client()
+    await close_supabase_client_pool()
+    await close_google_async_http()
     
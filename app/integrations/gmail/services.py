@@ -1,14 +1,53 @@
 from typing import List, Literal
 
 from fastapi.concurrency import run_in_threadpool
+from googleapiclient.errors import HttpError
 
-from app.utils.gmail_utils import gmail_api, get_gmail_client_for_user
-from app.schemas.integration_schemas.gmail import GmailMessage, GmailSearchMessagesResponse, BatchedGmailMessages
+from app.core.enums import GoogleApps
+from app.core.settings import get_gmail_auth_settings
+from app.utils.email_text_utils import extract_message_text, token_budget_window
+from app.utils.gmail_message_cache_utils import get_gmail_message_cache
+from app.utils.gmail_mirror_utils import (
+    MIRROR_PAGE_TOKEN_PREFIX,
+    MIRROR_TAIL_PAGE_TOKEN_PREFIX,
+    MirroredMessage,
+    get_gmail_mailbox_mirror,
+    parse_mirror_query,
+)
+from app.utils.google_async_http_utils import execute_google_api_batch, execute_google_request
+from app.utils.pagination_utils import PagePipeline, PaginationBudget
+from app.utils.google_rate_limit_utils import (
+    GMAIL_QUOTA_UNITS,
+    get_google_rate_limiter,
+    is_rate_limit_error,
+    retry_after_seconds,
+)
+from app.utils.gmail_utils import (
+    GMAIL_BATCH_LIMIT,
+    get_gmail_client_for_user,
+    gmail_api,
+    is_retryable_gmail_error,
+)
+from app.schemas.integration_schemas.gmail import (
+    BatchedGmailMessages,
+    GmailMailboxSearchResponse,
+    GmailMessage,
+    GmailMessageRef,
+    GmailSearchAndReadResponse,
+    GmailSearchMessagesResponse,
+)
 
 import asyncio
 import base64
+import dataclasses
+import time
+from functools import partial
 from html import escape as html_escape
 
+settings = get_gmail_auth_settings()
+# messages.list page size while auto-paginating; Gmail allows up to 500 per page.
+_AUTO_PAGINATE_PAGE_SIZE = 100
+
 
 async def list_unread_messages(
     user_id: str,
@@ -25,7 +64,7 @@ async def list_unread_messages(
     )
 
 
-@gmail_api
+@gmail_api(quota_units=GMAIL_QUOTA_UNITS["messages.list"])
 async def search_messages(
     user_id: str,
     user_jwt: str,
@@ -34,8 +73,8 @@ async def search_messages(
     page_token: str | None = None,
 ) -> GmailSearchMessagesResponse:
     service = await get_gmail_client_for_user(user_id=user_id, user_jwt=user_jwt)
-    resp = await run_in_threadpool(
-        lambda: service.users()
+    resp = await execute_google_request(
+        service.users()
         .messages()
         .list(
             userId="me",
@@ -43,26 +82,57 @@ async def search_messages(
             maxResults=max_results,
             pageToken=page_token,
         )
-        .execute()
     )
     return GmailSearchMessagesResponse.model_validate(resp)
 
 
-@gmail_api
-async def read_message_compact(user_id: str, user_jwt: str, message_id: str) -> GmailMessage: 
-    service = await get_gmail_client_for_user(user_id, user_jwt)
-    message: dict = await run_in_threadpool(
-        lambda: service.users()
-        .messages()
-        .get(
-            userId="me", 
-            id=message_id, 
-            format="metadata", 
-            metadataHeaders=["From", "To", "Subject", "Date"], 
-            fields="id,threadId,labelIds,snippet,payload(headers)"
-        )
-        .execute()
+async def search_messages_paginated(
+    user_id: str,
+    user_jwt: str,
+    query: str,
+    max_items: int,
+    max_bytes: int | None = None,
+    page_token: str | None = None,
+) -> GmailSearchMessagesResponse:
+    """
+    Follow `nextPageToken` server-side and return up to `max_items` de-duplicated refs at once.
+
+    Pages of `messages.list` are fetched one after another (nothing runs between them to overlap,
+    so a prefetch would only spend quota past the budget; see `PagePipeline`) and capped at
+    `GMAIL_AUTO_PAGINATE_MAX_ITEMS` refs and `GMAIL_AUTO_PAGINATE_MAX_BYTES` of JSON; the
+    returned `page_token` resumes right after the last returned ref.
+    """
+    async def fetch_page(token: str | None, page_size: int) -> tuple[list[GmailMessageRef], str | None]:
+        page = await search_messages(user_id, user_jwt, query, max_results=page_size, page_token=token)
+        return page.messages, page.page_token
+
+    max_bytes = settings.auto_paginate_max_bytes if max_bytes is None else max_bytes
+    result = await PagePipeline(
+        fetch_page=fetch_page,
+        key=lambda ref: ref.id,
+        size=lambda ref: len(ref.model_dump_json()),
+        budget=PaginationBudget(
+            max_items=max(1, min(max_items, settings.auto_paginate_max_items)),
+            max_bytes=max_bytes or None,
+        ),
+        page_size=_AUTO_PAGINATE_PAGE_SIZE,
+        page_token=page_token,
+        prefetch=False,
+    ).collect()
+    return GmailSearchMessagesResponse(messages=result.items, page_token=result.next_page_token)
+
+
+def _compact_message_request(messages_resource, message_id: str):
+    return messages_resource.get(
+        userId="me", 
+        id=message_id, 
+        format="metadata", 
+        metadataHeaders=["From", "To", "Subject", "Date"], 
+        fields="id,threadId,labelIds,snippet,payload(headers)"
     )
+
+
+def _parse_compact_message(message: dict) -> GmailMessage:
     headers = message.pop('payload').get('headers', [])
     [message.update({h['name']: h['value']}) for h in headers]
     return GmailMessage(
@@ -77,24 +147,15 @@ async def read_message_compact(user_id: str, user_jwt: str, message_id: str) ->
     )
 
 
-@gmail_api
-async def read_message_full(
-    user_id: str,
-    user_jwt: str,
-    message_id: str,
-) -> GmailMessage:
-    service = await get_gmail_client_for_user(user_id, user_jwt)
-    message = await run_in_threadpool(
-        lambda: service.users()
-        .messages()
-        .get(
-            userId="me", 
-            id=message_id, 
-            format="full", 
-        )
-        .execute()
+def _full_message_request(messages_resource, message_id: str):
+    return messages_resource.get(
+        userId="me", 
+        id=message_id, 
+        format="full", 
     )
 
+
+def _parse_raw_message(message: dict) -> GmailMessage:
     def decode_body(data: str) -> str:
         padded = data + "=" * (-len(data) % 4)
         return base64.urlsafe_b64decode(padded.encode("utf-8")).decode("utf-8", errors="replace")
@@ -112,7 +173,6 @@ async def read_message_full(
         return None
     
     payload = message.get("payload") or {}
-    headers = {h.get("name", "").lower(): h.get("value") for h in payload.get("headers", [])}
     html_body = extract_part(payload, "text/html")
     if html_body is not None:
         msg_body = html_body
@@ -122,6 +182,16 @@ async def read_message_full(
             msg_body = f"<pre>{html_escape(text_body)}</pre>"
         else:
             msg_body = ""
+    return _full_message_with_body(message, msg_body)
+
+
+def _parse_text_message(message: dict) -> GmailMessage:
+    return _full_message_with_body(message, extract_message_text(message.get("payload") or {}))
+
+
+def _full_message_with_body(message: dict, msg_body: str) -> GmailMessage:
+    payload = message.get("payload") or {}
+    headers = {h.get("name", "").lower(): h.get("value") for h in payload.get("headers", [])}
     return GmailMessage(
         id=message.get("id"),
         thread_id=message.get("threadId"),
@@ -134,20 +204,582 @@ async def read_message_full(
     )
 
 
+def _label_ids_request(messages_resource, message_id: str):
+    return messages_resource.get(userId="me", id=message_id, format="minimal", fields="id,labelIds")
+
+
+_MESSAGE_FORMATS = {
+    'compact': (_compact_message_request, _parse_compact_message),
+    'full': (_full_message_request, _parse_text_message),
+    'raw': (_full_message_request, _parse_raw_message),
+}
+
+
+def _is_not_found(exc: BaseException) -> bool:
+    return isinstance(exc, HttpError) and getattr(exc.resp, "status", None) == 404
+
+
+@gmail_api
+async def _fetch_message(user_id: str, user_jwt: str, message_id: str, format: str) -> GmailMessage:
+    build_request, parse_message = _MESSAGE_FORMATS[format]
+    service = await get_gmail_client_for_user(user_id, user_jwt)
+    message: dict = await execute_google_request(build_request(service.users().messages(), message_id))
+    return parse_message(message)
+
+
+@gmail_api
+async def _fetch_label_ids(user_id: str, user_jwt: str, message_id: str) -> list[str]:
+    service = await get_gmail_client_for_user(user_id, user_jwt)
+    message: dict = await execute_google_request(_label_ids_request(service.users().messages(), message_id))
+    return message.get("labelIds") or []
+
+
+async def _read_message(user_id: str, user_jwt: str, message_id: str, format: str) -> GmailMessage:
+    cache = get_gmail_message_cache()
+    cached = await run_in_threadpool(cache.get, user_id, message_id, format) if cache.enabled else None
+    if cached is None:
+        message = await _fetch_message(user_id, user_jwt, message_id, format)
+        if cache.enabled:
+            await run_in_threadpool(cache.put, user_id, format, message)
+        return message
+    message, labels_fresh = cached
+    if labels_fresh:
+        return message
+    try:
+        label_ids = await _fetch_label_ids(user_id, user_jwt, message_id)
+    except HttpError as exc:
+        if _is_not_found(exc):
+            await run_in_threadpool(cache.discard, user_id, message_id)
+        raise
+    await run_in_threadpool(cache.update_labels, user_id, message_id, label_ids)
+    message.label_ids = label_ids
+    return message
+
+
+async def read_message_compact(user_id: str, user_jwt: str, message_id: str) -> GmailMessage: 
+    return await _read_message(user_id, user_jwt, message_id, 'compact')
+
+
+async def read_message_full(
+    user_id: str,
+    user_jwt: str,
+    message_id: str,
+    max_tokens: int | None = None,
+    cursor: int = 0,
+) -> GmailMessage:
+    """
+    Read the body as compact text: text/plain preferred, HTML converted, quoted history and
+    signatures dropped, capped at `max_tokens` (`GMAIL_BODY_MAX_TOKENS` by default). When the
+    text is cut, `body_cursor` is the `cursor` that reads the next window.
+    """
+    message = await _read_message(user_id, user_jwt, message_id, 'full')
+    return _body_window(message, max_tokens=max_tokens, cursor=cursor)
+
+
+async def read_message_raw(user_id: str, user_jwt: str, message_id: str) -> GmailMessage:
+    """The decoded HTML body as Gmail stores it (plain text is wrapped in <pre>)."""
+    return await _read_message(user_id, user_jwt, message_id, 'raw')
+
+
+def _body_window(message: GmailMessage, *, max_tokens: int | None = None, cursor: int = 0) -> GmailMessage:
+    window = token_budget_window(
+        message.msg_body,
+        cursor=cursor,
+        max_tokens=settings.body_max_tokens if max_tokens is None else max_tokens,
+    )
+    message.msg_body = window.text
+    message.body_cursor = window.next_cursor
+    return message
+
+
+async def _execute_batches(
+    user_id: str,
+    service,
+    message_ids: list[str],
+    build_request,
+) -> tuple[dict[str, dict], dict[str, BaseException]]:
+    """
+    Run `build_request` for every id through Gmail multipart batch calls (`GMAIL_BATCH_MAX_SIZE`
+    ids per call), returning raw responses and the last error of each id that never succeeded.
+
+    Each call is charged to the user's Gmail quota bucket per sub-request. Items that fail with
+    a retryable error (429, 403 rate limit, 5xx, transport) are re-sent in later rounds with
+    exponential backoff, stretched to any Retry-After.
+    """
+    # Resolving the resource walks the discovery tree; do it once, not per message.
+    messages_resource = await run_in_threadpool(lambda: service.users().messages())
+    build_message_request = partial(build_request, messages_resource)
+    batch_size = max(1, min(settings.batch_max_size, GMAIL_BATCH_LIMIT))
+    limiter = get_google_rate_limiter()
+
+    async def _execute_chunk(chunk: list[str]):
+        async with limiter.limit(user_id, GoogleApps.GMAIL.value, len(chunk) * GMAIL_QUOTA_UNITS["messages.get"]):
+            return await execute_google_api_batch(service, chunk, build_message_request, limit=GMAIL_BATCH_LIMIT)
+
+    fetched: dict[str, dict] = {}
+    failures: dict[str, BaseException] = {}
+    pending = list(dict.fromkeys(message_ids))
+    retry_after = 0.0
+    for attempt in range(max(1, settings.batch_max_attempts)):
+        if not pending:
+            break
+        if attempt:
+            await asyncio.sleep(max(settings.batch_retry_base_seconds * 2 ** (attempt - 1), retry_after))
+        chunks = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+        outcomes = await asyncio.gather(*(_execute_chunk(chunk) for chunk in chunks), return_exceptions=True)
+        retry: list[str] = []
+        retry_after = 0.0
+
+        def _note_retryable(exc: BaseException) -> None:
+            nonlocal retry_after
+            if is_rate_limit_error(exc):
+                limiter.metrics.rate_limited_responses += 1
+                retry_after = max(retry_after, retry_after_seconds(exc) or 0.0)
+
+        for chunk, outcome in zip(chunks, outcomes):
+            if isinstance(outcome, BaseException):
+                failures.update(dict.fromkeys(chunk, outcome))
+                if is_retryable_gmail_error(outcome):
+                    _note_retryable(outcome)
+                    retry.extend(chunk)
+                else:
+                    print(f"[gmail] batch read failed for {len(chunk)} messages: {outcome}")
+                continue
+            responses, errors = outcome
+            fetched.update(responses)
+            for message_id, exc in errors.items():
+                failures[message_id] = exc
+                if is_retryable_gmail_error(exc):
+                    _note_retryable(exc)
+                    retry.append(message_id)
+                else:
+                    print(f"[gmail] read failed for message {message_id}: {exc}")
+        pending = retry
+
+    return fetched, {message_id: exc for message_id, exc in failures.items() if message_id not in fetched}
+
+
 async def batch_read_messages(
     user_id: str,
     user_jwt: str,
     messages_ids: List[str],
-    format: Literal['compact', 'full'] = 'compact',
+    format: Literal['compact', 'full', 'raw'] = 'compact',
 ) -> BatchedGmailMessages: 
-    fn = read_message_compact if format == 'compact' else read_message_full
-    tasks = [fn(user_id, user_jwt, message_id) for message_id in messages_ids]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    """
+    Read messages through the message cache, then Gmail multipart batch calls for the rest.
+
+    `full` bodies are compact text capped at `GMAIL_BODY_MAX_TOKENS` each (see `read_message_full`).
+    Cached messages whose labels are past `GMAIL_MESSAGE_CACHE_LABEL_TTL_SECONDS` only have their
+    label ids re-read. Ids that still fail after the batch retry rounds end up in `error_messages`.
+    """
+    build_request, parse_message = _MESSAGE_FORMATS[format]
+    cache = get_gmail_message_cache()
+    unique_ids = list(dict.fromkeys(messages_ids))
+    cached = await run_in_threadpool(cache.get_many, user_id, unique_ids, format) if cache.enabled else {}
+    fetched: dict[str, GmailMessage] = {
+        message_id: message for message_id, (message, labels_fresh) in cached.items() if labels_fresh
+    }
+    stale = {message_id: message for message_id, (message, labels_fresh) in cached.items() if not labels_fresh}
+    missing = [message_id for message_id in unique_ids if message_id not in cached]
+
+    if stale or missing:
+        try:
+            service = await get_gmail_client_for_user(user_id, user_jwt)
+        except Exception as exc:
+            print(f"[gmail] batch read could not get a client for user {user_id}: {exc}")
+            service = None
+        if service is not None:
+            (responses, _), (label_responses, label_failures) = await asyncio.gather(
+                _execute_batches(user_id, service, missing, build_request),
+                _execute_batches(user_id, service, list(stale), _label_ids_request),
+            )
+            parsed: list[GmailMessage] = []
+            for message_id, message in responses.items():
+                try:
+                    parsed.append(parse_message(message))
+                except Exception as exc:
+                    print(f"[gmail] could not parse message {message_id}: {exc}")
+            for message in parsed:
+                fetched[message.id] = message
+            for message_id, message in stale.items():
+                if message_id in label_responses:
+                    message.label_ids = label_responses[message_id].get("labelIds") or []
+                    fetched[message_id] = message
+                elif not _is_not_found(label_failures.get(message_id)):
+                    # Content is still valid; serve the last known labels rather than an error.
+                    fetched[message_id] = message
+            if cache.enabled:
+                await run_in_threadpool(
+                    _store_batch_in_cache, cache, user_id, format, parsed, label_responses, label_failures
+                )
+
+    if format == 'full':
+        fetched = {message_id: _body_window(message) for message_id, message in fetched.items()}
+
+    clean_results = []
     error_msg_ids = []
-    clean_results = []  
-    for idx, res in enumerate(results): 
-        if isinstance(res, Exception): 
-            error_msg_ids.append(messages_ids[idx])
-        else: 
-            clean_results.append(res)
+    for message_id in messages_ids:
+        if message_id in fetched:
+            clean_results.append(fetched[message_id])
+        else:
+            error_msg_ids.append(message_id)
     return BatchedGmailMessages(messages=clean_results, error_messages=error_msg_ids)
+
+
+def _store_batch_in_cache(
+    cache,
+    user_id: str,
+    format: str,
+    messages: list[GmailMessage],
+    label_responses: dict[str, dict],
+    label_failures: dict[str, BaseException],
+) -> None:
+    cache.put_many(user_id, format, messages)
+    for message_id, message in label_responses.items():
+        cache.update_labels(user_id, message_id, message.get("labelIds") or [])
+    for message_id, exc in label_failures.items():
+        if _is_not_found(exc):
+            cache.discard(user_id, message_id)
+
+
+def _mirror_message_request(messages_resource, message_id: str):
+    return messages_resource.get(
+        userId="me",
+        id=message_id,
+        format="metadata",
+        metadataHeaders=["From", "To", "Subject", "Date"],
+        fields="id,threadId,labelIds,snippet,internalDate,payload(headers)",
+    )
+
+
+def _parse_mirror_message(message: dict) -> MirroredMessage:
+    internal_date = int(message.get("internalDate") or 0)
+    return MirroredMessage(message=_parse_compact_message(message), internal_date=internal_date)
+
+
+@gmail_api(quota_units=GMAIL_QUOTA_UNITS["getProfile"])
+async def _get_history_id(user_id: str, user_jwt: str) -> str:
+    service = await get_gmail_client_for_user(user_id, user_jwt)
+    profile = await execute_google_request(service.users().getProfile(userId="me"))
+    return str(profile["historyId"])
+
+
+@gmail_api(quota_units=GMAIL_QUOTA_UNITS["messages.list"])
+async def _list_message_ids(
+    user_id: str,
+    user_jwt: str,
+    max_results: int,
+    page_token: str | None = None,
+) -> tuple[list[str], str | None]:
+    service = await get_gmail_client_for_user(user_id, user_jwt)
+    resp = await execute_google_request(
+        service.users()
+        .messages()
+        .list(userId="me", maxResults=max_results, pageToken=page_token, fields="messages(id),nextPageToken")
+    )
+    return [message["id"] for message in resp.get("messages", [])], resp.get("nextPageToken")
+
+
+@gmail_api(quota_units=GMAIL_QUOTA_UNITS["history.list"])
+async def _list_history(
+    user_id: str,
+    user_jwt: str,
+    start_history_id: str,
+    page_token: str | None = None,
+) -> dict:
+    service = await get_gmail_client_for_user(user_id, user_jwt)
+    return await execute_google_request(
+        service.users()
+        .history()
+        .list(
+            userId="me",
+            startHistoryId=start_history_id,
+            historyTypes=["messageAdded", "messageDeleted", "labelAdded", "labelRemoved"],
+            maxResults=500,
+            pageToken=page_token,
+        )
+    )
+
+
+async def _fetch_mirror_messages(
+    user_id: str,
+    user_jwt: str,
+    message_ids: list[str],
+) -> tuple[list[MirroredMessage], list[str]]:
+    """Fetch mirror rows; also returns the ids that still failed (messages gone since listing are not failures)."""
+    if not message_ids:
+        return [], []
+    service = await get_gmail_client_for_user(user_id, user_jwt)
+    responses, failures = await _execute_batches(user_id, service, message_ids, _mirror_message_request)
+    failed = [message_id for message_id, exc in failures.items() if not _is_not_found(exc)]
+    return [_parse_mirror_message(message) for message in responses.values()], failed
+
+
+async def seed_mailbox_mirror(user_id: str, user_jwt: str) -> int:
+    """
+    Load the newest `GMAIL_MIRROR_SEED_MAX_MESSAGES` messages into the mirror; returns how many.
+
+    When the cap cuts the listing short, the mirror records the second after its oldest message
+    as its coverage bound: everything from there on is mirrored, older mail is only in Gmail.
+    """
+    mirror = get_gmail_mailbox_mirror()
+    if mirror is None:
+        return 0
+    # Taken before listing so changes made while seeding are replayed by the first history sync.
+    history_id = await _get_history_id(user_id, user_jwt)
+    message_ids: list[str] = []
+    page_token = None
+    while len(message_ids) < settings.mirror_seed_max_messages:
+        page, page_token = await _list_message_ids(
+            user_id, user_jwt, min(500, settings.mirror_seed_max_messages - len(message_ids)), page_token
+        )
+        message_ids.extend(page)
+        if not page_token:
+            break
+    messages, failed = await _fetch_mirror_messages(user_id, user_jwt, message_ids)
+    if failed:
+        # A seed with holes would silently leave those messages out of every local answer.
+        raise RuntimeError(f"mirror seed could not fetch {len(failed)} of {len(message_ids)} messages")
+    covered_from_ms = None
+    if page_token and messages:
+        # Rounded up to whole seconds: the live tail uses before:<epoch seconds>.
+        covered_from_ms = (min(item.internal_date for item in messages) // 1000 + 1) * 1000
+    await run_in_threadpool(mirror.replace, user_id, messages, history_id, covered_from_ms)
+    print(f"[gmail] mirror seeded for user {user_id}: {len(messages)} messages")
+    return len(messages)
+
+
+async def sync_mailbox_mirror(user_id: str, user_jwt: str, start_history_id: str) -> bool:
+    """
+    Apply `users.history.list` changes since `start_history_id`; False when the mirror cannot answer.
+
+    An expired history id purges the mirror so it is reseeded. When added messages cannot all be
+    fetched nothing is applied, so the next sync replays the same changes from the same history id.
+    """
+    mirror = get_gmail_mailbox_mirror()
+    if mirror is None:
+        return False
+    added: dict[str, None] = {}
+    deleted: set[str] = set()
+    labels: dict[str, list[str]] = {}
+    history_id = start_history_id
+    page_token = None
+    while True:
+        try:
+            resp = await _list_history(user_id, user_jwt, start_history_id, page_token)
+        except HttpError as exc:
+            if _is_not_found(exc):
+                # startHistoryId is too old for Gmail to replay; only a reseed can catch up.
+                await run_in_threadpool(mirror.purge_user, user_id)
+                return False
+            raise
+        for record in resp.get("history", []):
+            for item in record.get("messagesAdded", []):
+                added[item["message"]["id"]] = None
+                deleted.discard(item["message"]["id"])
+            for item in record.get("messagesDeleted", []):
+                deleted.add(item["message"]["id"])
+                added.pop(item["message"]["id"], None)
+            for item in record.get("labelsAdded", []) + record.get("labelsRemoved", []):
+                labels[item["message"]["id"]] = item["message"].get("labelIds") or []
+        history_id = str(resp.get("historyId") or history_id)
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            break
+    upserts, failed = await _fetch_mirror_messages(user_id, user_jwt, list(added))
+    if failed:
+        print(f"[gmail] mirror sync for user {user_id} could not fetch {len(failed)} messages, retrying next sync")
+        return False
+    label_updates = {message_id: label_ids for message_id, label_ids in labels.items() if message_id not in added}
+    await run_in_threadpool(
+        partial(
+            mirror.apply,
+            user_id,
+            upserts=upserts,
+            deletions=sorted(deleted),
+            label_updates=label_updates,
+            history_id=history_id,
+        )
+    )
+    return True
+
+
+_mirror_tasks: dict[str, asyncio.Task] = {}
+
+
+def _mirror_task(user_id: str, start) -> asyncio.Task:
+    """One seed or sync per user at a time; later callers join the running one."""
+    task = _mirror_tasks.get(user_id)
+    if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(start())
+        _mirror_tasks[user_id] = task
+
+        def _settle(done: asyncio.Task) -> None:
+            if _mirror_tasks.get(user_id) is done:
+                del _mirror_tasks[user_id]
+            if not done.cancelled() and done.exception() is not None:
+                print(f"[gmail] mirror update failed for user {user_id}: {done.exception()}")
+
+        task.add_done_callback(_settle)
+    return task
+
+
+async def _mirror_ready(user_id: str, user_jwt: str) -> bool:
+    mirror = get_gmail_mailbox_mirror()
+    state = await run_in_threadpool(mirror.state, user_id)
+    if state is None:
+        # Seeding costs thousands of quota units; run it in the background and go live meanwhile.
+        _mirror_task(user_id, lambda: seed_mailbox_mirror(user_id, user_jwt))
+        return False
+    if time.time() - state.synced_at < settings.mirror_sync_interval_seconds:
+        return True
+    task = _mirror_task(user_id, lambda: sync_mailbox_mirror(user_id, user_jwt, state.history_id))
+    try:
+        return bool(await asyncio.shield(task))
+    except Exception:
+        return False
+
+
+async def _search_mailbox_live(
+    user_id: str,
+    user_jwt: str,
+    query: str,
+    max_results: int,
+    page_token: str | None,
+) -> tuple[list[GmailMessage], str | None]:
+    refs = await search_messages(
+        user_id=user_id,
+        user_jwt=user_jwt,
+        query=query,
+        max_results=max_results,
+        page_token=page_token,
+    )
+    batch = await batch_read_messages(user_id, user_jwt, [ref.id for ref in refs.messages])
+    return batch.messages, refs.page_token
+
+
+async def _search_mirror_tail(
+    user_id: str,
+    user_jwt: str,
+    query: str,
+    bound_seconds: int,
+    max_results: int,
+    page_token: str | None,
+    messages: list[GmailMessage],
+) -> GmailMailboxSearchResponse:
+    """Fill the page with live matches older than the mirror's coverage bound."""
+    if len(messages) >= max_results:
+        return GmailMailboxSearchResponse(
+            messages=messages,
+            page_token=f"{MIRROR_TAIL_PAGE_TOKEN_PREFIX}{bound_seconds}:",
+            source="mirror",
+        )
+    older, next_token = await _search_mailbox_live(
+        user_id, user_jwt, f"{query} before:{bound_seconds}", max_results - len(messages), page_token
+    )
+    return GmailMailboxSearchResponse(
+        messages=messages + older,
+        page_token=f"{MIRROR_TAIL_PAGE_TOKEN_PREFIX}{bound_seconds}:{next_token}" if next_token else None,
+        source="live",
+    )
+
+
+async def search_mailbox(
+    user_id: str,
+    user_jwt: str,
+    query: str,
+    max_results: int = 10,
+    page_token: str | None = None,
+) -> GmailMailboxSearchResponse:
+    """
+    Search with compact results, answered from the local mailbox mirror when it can be.
+
+    Queries the mirror cannot translate (see `parse_mirror_query`), users whose mirror is still
+    being seeded, and Gmail page tokens go to `users.messages.list` plus a batch read. A mirror
+    seeded only down to a coverage bound answers queries whose `after:` lies inside it; for any
+    other query its matches come first and, once they run out, paging continues live with
+    `before:<bound>`.
+    """
+    if page_token and page_token.startswith(MIRROR_TAIL_PAGE_TOKEN_PREFIX):
+        bound_seconds, _, gmail_token = page_token[len(MIRROR_TAIL_PAGE_TOKEN_PREFIX):].partition(":")
+        return await _search_mirror_tail(
+            user_id, user_jwt, query, int(bound_seconds), max_results, gmail_token or None, []
+        )
+    mirror = get_gmail_mailbox_mirror()
+    mirror_query = parse_mirror_query(query) if mirror is not None else None
+    is_mirror_page = page_token is None or page_token.startswith(MIRROR_PAGE_TOKEN_PREFIX)
+    if mirror_query is not None and is_mirror_page and await _mirror_ready(user_id, user_jwt):
+        state = await run_in_threadpool(mirror.state, user_id)
+        covered_from_ms = state.covered_from_ms if state is not None else None
+        partial_cover = covered_from_ms is not None and (
+            mirror_query.after_ms is None or mirror_query.after_ms < covered_from_ms
+        )
+        if partial_cover:
+            mirror_query = dataclasses.replace(mirror_query, after_ms=covered_from_ms)
+        offset = int(page_token[len(MIRROR_PAGE_TOKEN_PREFIX):]) if page_token else 0
+        messages, has_more = await run_in_threadpool(
+            partial(mirror.search, user_id, mirror_query, limit=max_results, offset=offset)
+        )
+        if partial_cover and not has_more:
+            return await _search_mirror_tail(
+                user_id, user_jwt, query, covered_from_ms // 1000, max_results, None, messages
+            )
+        return GmailMailboxSearchResponse(
+            messages=messages,
+            page_token=f"{MIRROR_PAGE_TOKEN_PREFIX}{offset + max_results}" if has_more else None,
+            source="mirror",
+        )
+    messages, next_token = await _search_mailbox_live(
+        user_id,
+        user_jwt,
+        query,
+        max_results,
+        None if page_token and page_token.startswith(MIRROR_PAGE_TOKEN_PREFIX) else page_token,
+    )
+    return GmailMailboxSearchResponse(messages=messages, page_token=next_token, source="live")
+
+
+_SEARCH_AND_READ_MAX_PAGES = 5
+
+
+async def search_and_read_messages(
+    user_id: str,
+    user_jwt: str,
+    query: str,
+    max_results: int | None = None,
+    dedupe_threads: bool = True,
+    page_token: str | None = None,
+) -> GmailSearchAndReadResponse:
+    """
+    Run `query` and return compact messages in one call, newest first.
+
+    Pages through `search_mailbox` (mirror or live + batch read) until `max_results` messages
+    are collected, capped at `GMAIL_SEARCH_AND_READ_MAX_RESULTS` and a few pages. With
+    `dedupe_threads`, only the newest match per thread is kept and `collapsed_threads` counts
+    the hidden ones. Each page asks for exactly the remaining budget, so `page_token` always
+    resumes right after the last returned message.
+    """
+    budget = max(1, min(max_results or settings.search_and_read_max_results, settings.search_and_read_max_results))
+    messages: list[GmailMessage] = []
+    collapsed_threads: dict[str, int] = {}
+    seen_threads: set[str] = set()
+    source = "mirror"
+    for _ in range(_SEARCH_AND_READ_MAX_PAGES):
+        page = await search_mailbox(user_id, user_jwt, query, max_results=budget - len(messages), page_token=page_token)
+        if page.source == "live":
+            source = "live"
+        for message in page.messages:
+            if dedupe_threads and message.thread_id in seen_threads:
+                collapsed_threads[message.thread_id] = collapsed_threads.get(message.thread_id, 0) + 1
+                continue
+            seen_threads.add(message.thread_id)
+            messages.append(message)
+        page_token = page.page_token
+        if not page_token or len(messages) >= budget:
+            break
+    return GmailSearchAndReadResponse(
+        messages=messages,
+        collapsed_threads=collapsed_threads,
+        page_token=page_token,
+        source=source,
+    )
@@ -45,6 +45,7 @@ async def _search_messages_tool(
     query: str,
     max_results: int = 10,
     page_token: str | None = None,
+    max_items: int | None = None,
 ) -> dict[str, Any]:
     """
     Search Gmail using the standard Gmail query syntax.
@@ -56,11 +57,22 @@ async def _search_messages_tool(
         query: Gmail search query string.
         max_results: Max number of message refs to return in this page.
         page_token: Token from a previous response to fetch the next page.
+        max_items: Collect up to this many refs in one call by following pages server-side
+            (max_results is then ignored). Use it when you need many results, e.g. 200.
 
     Returns:
         dict: {"messages": [{"id": "...", "threadId": "..."}], "page_token": "..."}.
         page_token is None when there are no more pages.
     """
+    if max_items:
+        result = await gmail_services.search_messages_paginated(
+            user_id=get_user_id(ctx),
+            user_jwt=get_user_jwt(ctx),
+            query=query,
+            max_items=max_items,
+            page_token=page_token,
+        )
+        return result.model_dump()
     result = await gmail_services.search_messages(
         user_id=get_user_id(ctx),
         user_jwt=get_user_jwt(ctx),
@@ -71,34 +83,107 @@ async def _search_messages_tool(
     return result.model_dump()
 
 
+async def _search_mailbox_tool(
+    ctx: RunContextWrapper[UserContext],
+    query: str,
+    max_results: int = 10,
+    page_token: str | None = None,
+) -> dict[str, Any]:
+    """
+    Search Gmail and return compact messages (headers, labels, snippet) in one step.
+
+    Common queries (from:, to:, subject:, is:unread, in:inbox, after:/before:, newer_than:) are
+    answered from a local mailbox copy in milliseconds. Bare words, "quoted phrases" (matched in
+    message bodies), in:spam/in:trash and other Gmail operators are sent to Gmail.
+
+    Args:
+        query: Gmail search query string.
+        max_results: Max number of messages to return in this page.
+        page_token: Token from a previous response to fetch the next page.
+
+    Returns:
+        dict: {"messages": [GmailMessage dicts, see read_message], "page_token": "...", "source": "mirror" | "live"}.
+        page_token is None when there are no more pages.
+    """
+    result = await gmail_services.search_mailbox(
+        user_id=get_user_id(ctx),
+        user_jwt=get_user_jwt(ctx),
+        query=query,
+        max_results=max_results,
+        page_token=page_token,
+    )
+    return result.model_dump()
+
+
+async def _search_and_read_messages_tool(
+    ctx: RunContextWrapper[UserContext],
+    query: str,
+    max_results: int = 20,
+    page_token: str | None = None,
+) -> dict[str, Any]:
+    """
+    Find and read matching Gmail messages in one call: the default for triage and summaries.
+
+    Returns compact messages (sender, subject, date, labels, snippet), newest first, with only
+    the newest match per thread. Use query="is:unread" for unread mail. Follow up with
+    read_message(format="full") only for messages whose body is needed.
+
+    Args:
+        query: Gmail search query string.
+        max_results: Max number of messages (threads) to return.
+        page_token: Token from a previous response to fetch the next results.
+
+    Returns:
+        dict: {"messages": [GmailMessage dicts, see read_message], "collapsed_threads": {"<threadId>": <older matches hidden>},
+        "page_token": "...", "source": "mirror" | "live"}. page_token is None when there are no more results.
+    """
+    result = await gmail_services.search_and_read_messages(
+        user_id=get_user_id(ctx),
+        user_jwt=get_user_jwt(ctx),
+        query=query,
+        max_results=max_results,
+        page_token=page_token,
+    )
+    return result.model_dump()
+
+
 async def _read_message_tool(
     ctx: RunContextWrapper[UserContext],
     message_id: str,
-    format: Literal['compact', 'full'] = 'compact'
+    format: Literal['compact', 'full', 'raw'] = 'compact',
+    cursor: int | None = None,
 ) -> GmailMessage:
     """
     Fetch a single Gmail message by ID.
 
-    Use format="compact" for a fast metadata+snippet view; use format="full" for full body HTML
-    (or escaped plain text wrapped in <pre> if no HTML part exists).
+    Use format="compact" for a fast metadata+snippet view; use format="full" for the body as
+    compact text (quoted replies and signatures removed). Long bodies are cut to a token budget:
+    when body_cursor is set, call again with cursor=body_cursor to read the next part. Use
+    format="raw" only when the original HTML markup itself is needed.
 
     Args:
         message_id: Gmail message ID.
-        format: "compact" for headers+snippet, "full" for full content.
+        format: "compact" for headers+snippet, "full" for body text, "raw" for the original HTML.
+        cursor: body_cursor from a previous format="full" call, to continue a long body.
 
     Returns:
-        dict with keys: id, thread_id, label_ids, from, to, subject, date, msg_body.
-        msg_body is a snippet for compact, or full message body for full.
+        dict with keys: id, thread_id, label_ids, from, to, subject, date, msg_body, body_cursor.
+        msg_body is a snippet for compact, body text for full, or HTML for raw.
     """
-    fn = gmail_services.read_message_compact if format == 'compact' else gmail_services.read_message_full
-    result = await fn(get_user_id(ctx), get_user_jwt(ctx), message_id)
+    user_id, user_jwt = get_user_id(ctx), get_user_jwt(ctx)
+    if format == 'full':
+        result = await gmail_services.read_message_full(user_id, user_jwt, message_id, cursor=cursor or 0)
+    elif format == 'raw':
+        result = await gmail_services.read_message_raw(user_id, user_jwt, message_id)
+    else:
+        result = await gmail_services.read_message_compact(user_id, user_jwt, message_id)
     return result.model_dump()
 
 
 async def _batch_read_messages_tool(
     ctx: RunContextWrapper[UserContext],
     messages_ids: list[str],
-    format: Literal['compact', 'full'] = 'compact',
+    format: Literal['compact', 'full', 'raw'] = 'compact',
 ) -> dict[str, Any]:
     """
     Fetch multiple Gmail messages by ID in parallel.
@@ -107,7 +192,7 @@ async def _batch_read_messages_tool(
 
     Args:
         messages_ids: List of Gmail message IDs.
-        format: "compact" for headers+snippet, "full" for full content.
+        format: "compact" for headers+snippet, "full" for body text, "raw" for the original HTML.
 
     Returns:
         dict with keys:
@@ -126,6 +211,14 @@ search_messages_tool: FunctionTool = function_tool(
     _search_messages_tool,
     name_override="search_messages",
 )
+search_mailbox_tool: FunctionTool = function_tool(
+    _search_mailbox_tool,
+    name_override="search_mailbox",
+)
+search_and_read_messages_tool: FunctionTool = function_tool(
+    _search_and_read_messages_tool,
+    name_override="search_and_read_messages",
+)
 read_message_tool: FunctionTool = function_tool(
     _read_message_tool,
     name_override="read_message",
@@ -137,8 +230,10 @@ batch_read_messages_tool: FunctionTool = function_tool(
 
 
 GMAIL_TOOLS: list[FunctionTool] = [
+    search_and_read_messages_tool,
     list_unread_messages_tool,
     search_messages_tool,
+    search_mailbox_tool,
     read_message_tool,
     batch_read_messages_tool,
 ]
@@ -1,27 +1,462 @@
+import asyncio
+import time
+from functools import partial
+
 from fastapi.concurrency import run_in_threadpool
+from googleapiclient.errors import HttpError
+
+from app.core.enums import GoogleApps
+from app.core.settings import get_google_drive_settings
+from app.schemas.integration_schemas.google_drive import GoogleDriveFile, GoogleDriveSearchFilesResponse
+from app.utils.drive_folder_cache_utils import DriveFolder, get_drive_folder_cache
+from app.utils.drive_index_utils import (
+    INDEX_PAGE_TOKEN_PREFIX,
+    IndexedDriveFile,
+    get_google_drive_metadata_index,
+    translate_drive_query,
+)
+from app.utils.drive_query_utils import CompiledDriveQuery, compile_drive_query
+from app.utils.drive_search_cache_utils import get_drive_search_cache, normalize_drive_query
+from app.utils.google_async_http_utils import execute_google_api_batch, execute_google_request
+from app.utils.google_drive_utils import (
+    DRIVE_BATCH_LIMIT,
+    get_google_drive_client_for_user,
+    google_drive_api,
+)
+from app.utils.google_rate_limit_utils import DRIVE_QUOTA_UNITS, get_google_rate_limiter
+from app.utils.pagination_utils import PagePipeline, PaginationBudget
 
-from app.schemas.integration_schemas.google_drive import GoogleDriveSearchFilesResponse
-from app.utils.google_drive_utils import get_google_drive_client_for_user, google_drive_api
+_SEARCH_FIELDS = "files(kind,id,name,modifiedTime,mimeType,webViewLink,parents), nextPageToken"
+_CHANGES_PAGE_SIZE = 1000
+_CHANGE_IDS_FIELDS = "nextPageToken,newStartPageToken,changes(fileId)"
+_INDEX_FILE_FIELDS = "id,name,mimeType,parents,modifiedTime,owners(emailAddress),webViewLink,trashed,starred"
+_INDEX_CRAWL_FIELDS = f"nextPageToken,files({_INDEX_FILE_FIELDS})"
+_INDEX_CHANGES_FIELDS = f"nextPageToken,newStartPageToken,changes(fileId,removed,file({_INDEX_FILE_FIELDS}))"
+_CRAWL_PAGE_SIZE = 1000
+# files.list page size while auto-paginating search_drive_files (Drive's default page size).
+_AUTO_PAGINATE_PAGE_SIZE = 100
+# Deeper chains are cut here; Drive folders cannot form cycles, but a bad cache entry could.
+_MAX_FOLDER_DEPTH = 32
+# Drive answers an unusable changes page token with 400 or 404 (410 on very old cursors).
+_EXPIRED_CURSOR_STATUSES = frozenset({400, 404, 410})
 
 
 @google_drive_api
-async def search_files(
+async def _list_files(
         user_id: str,
         user_jwt: str,
-        query: str, 
-        max_results: int = 10,
-        page_token: str | None = None, 
-) -> GoogleDriveSearchFilesResponse:
+        query: str | None,
+        max_results: int,
+        page_token: str | None,
+        fields: str,
+) -> dict:
     service = await get_google_drive_client_for_user(user_id=user_id, user_jwt=user_jwt)
-    resp = await run_in_threadpool(
-        lambda: service.files().list(
-            q=query, 
-            fields="files(kind,id,name,modifiedTime,mimeType,webViewLink), nextPageToken",
-            pageSize=max_results, 
+    return await execute_google_request(
+        service.files().list(
+            q=query,
+            fields=fields,
+            pageSize=max_results,
             spaces="drive",
             pageToken=page_token,
             supportsAllDrives=True,
             includeItemsFromAllDrives=True,
-        ).execute()
+        )
+    )
+
+
+@google_drive_api
+async def _get_changes_start_page_token(user_id: str, user_jwt: str) -> str:
+    service = await get_google_drive_client_for_user(user_id=user_id, user_jwt=user_jwt)
+    resp = await execute_google_request(service.changes().getStartPageToken(supportsAllDrives=True))
+    return resp["startPageToken"]
+
+
+@google_drive_api
+async def _list_changes(user_id: str, user_jwt: str, page_token: str, fields: str = _CHANGE_IDS_FIELDS) -> dict:
+    service = await get_google_drive_client_for_user(user_id=user_id, user_jwt=user_jwt)
+    return await execute_google_request(
+        service.changes().list(
+            pageToken=page_token,
+            pageSize=_CHANGES_PAGE_SIZE,
+            spaces="drive",
+            includeRemoved=True,
+            supportsAllDrives=True,
+            includeItemsFromAllDrives=True,
+            fields=fields,
+        )
+    )
+
+
+async def _poll_changes(user_id: str, user_jwt: str) -> None:
+    """Read the user's changes since the cached cursor and invalidate their results if any."""
+    cache = get_drive_search_cache()
+    cursor = cache.cursor(user_id)
+    if cursor is None:
+        cache.start(user_id, await _get_changes_start_page_token(user_id, user_jwt))
+        return
+    page_token = cursor.page_token
+    changed = False
+    try:
+        while True:
+            resp = await _list_changes(user_id, user_jwt, page_token)
+            changed = changed or bool(resp.get("changes"))
+            get_drive_folder_cache().discard(
+                user_id, [change["fileId"] for change in resp.get("changes", []) if change.get("fileId")]
+            )
+            if resp.get("newStartPageToken"):
+                cache.advance(user_id, resp["newStartPageToken"], changed=changed)
+                return
+            page_token = resp["nextPageToken"]
+    except HttpError as exc:
+        if getattr(exc.resp, "status", None) not in _EXPIRED_CURSOR_STATUSES:
+            raise
+        print(f"[google_drive] change cursor expired for user {user_id}; restarting")
+        cache.start(user_id, await _get_changes_start_page_token(user_id, user_jwt))
+
+
+_change_polls: dict[str, asyncio.Task] = {}
+
+
+async def _changes_checked(user_id: str, user_jwt: str) -> bool:
+    """
+    True when the user's change cursor is current (polled within the interval), so cached
+    results can be served. Concurrent searches join one in-flight poll per user.
+    """
+    cache = get_drive_search_cache()
+    if not cache.poll_due(user_id):
+        return True
+    task = _change_polls.get(user_id)
+    if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_poll_changes(user_id, user_jwt))
+        _change_polls[user_id] = task
+
+        def _settle(done: asyncio.Task) -> None:
+            if _change_polls.get(user_id) is done:
+                del _change_polls[user_id]
+
+        task.add_done_callback(_settle)
+    try:
+        await asyncio.shield(task)
+    except Exception as exc:
+        # Without a current cursor nothing cached can be vouched for.
+        print(f"[google_drive] change poll failed for user {user_id}: {exc}")
+        cache.purge_user(user_id)
+        return False
+    return True
+
+
+async def _search_live(
+        user_id: str,
+        user_jwt: str,
+        query: str,
+        max_results: int,
+        page_token: str | None,
+) -> GoogleDriveSearchFilesResponse:
+    """
+    `files.list` through the per-user result cache. Cached pages are served only while the
+    user's Drive change cursor is current (`GOOGLE_DRIVE_CHANGES_POLL_INTERVAL_SECONDS`); a poll
+    that sees any change drops the user's cached results.
+    """
+    cache = get_drive_search_cache()
+    if not cache.enabled:
+        resp = await _list_files(user_id, user_jwt, query, max_results, page_token, _SEARCH_FIELDS)
+        return GoogleDriveSearchFilesResponse.model_validate(resp)
+    key = (normalize_drive_query(query), max_results, page_token, _SEARCH_FIELDS)
+    if await _changes_checked(user_id, user_jwt):
+        cached = cache.get(user_id, key)
+        if cached is not None:
+            return cached
+    generation = cache.generation(user_id)
+    resp = await _list_files(user_id, user_jwt, query, max_results, page_token, _SEARCH_FIELDS)
+    result = GoogleDriveSearchFilesResponse.model_validate(resp)
+    cache.put(user_id, key, result, generation)
+    return result
+
+
+def _parse_indexed_file(item: dict) -> IndexedDriveFile:
+    return IndexedDriveFile(
+        file=GoogleDriveFile.model_validate(item),
+        parents=item.get("parents") or [],
+        owners=[owner["emailAddress"] for owner in item.get("owners") or [] if owner.get("emailAddress")],
+        trashed=bool(item.get("trashed")),
+        starred=bool(item.get("starred")),
+    )
+
+
+async def crawl_drive_index(user_id: str, user_jwt: str) -> int:
+    """
+    Load all of the user's file metadata into the local index; returns how many files.
+
+    A Drive larger than `GOOGLE_DRIVE_INDEX_MAX_FILES` is recorded without a change cursor, so
+    the user keeps searching through the API instead of a partial index.
+    """
+    index = get_google_drive_metadata_index()
+    if index is None:
+        return 0
+    max_files = get_google_drive_settings().index_max_files
+    # Taken before crawling so changes made meanwhile are replayed by the first sync.
+    start_page_token = await _get_changes_start_page_token(user_id, user_jwt)
+    files: list[IndexedDriveFile] = []
+    page_token = None
+    while True:
+        resp = await _list_files(user_id, user_jwt, None, _CRAWL_PAGE_SIZE, page_token, _INDEX_CRAWL_FIELDS)
+        files.extend(_parse_indexed_file(item) for item in resp.get("files", []))
+        if len(files) > max_files:
+            print(f"[google_drive] index skipped for user {user_id}: more than {max_files} files")
+            await run_in_threadpool(index.replace, user_id, [], None)
+            return 0
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            break
+    await run_in_threadpool(index.replace, user_id, files, start_page_token)
+    print(f"[google_drive] index crawled for user {user_id}: {len(files)} files")
+    return len(files)
+
+
+async def sync_drive_index(user_id: str, user_jwt: str, page_token: str) -> bool:
+    """Apply `changes.list` since `page_token` to the index; False when it must be crawled again."""
+    index = get_google_drive_metadata_index()
+    if index is None:
+        return False
+    upserts: dict[str, IndexedDriveFile] = {}
+    removals: set[str] = set()
+    while True:
+        try:
+            resp = await _list_changes(user_id, user_jwt, page_token, _INDEX_CHANGES_FIELDS)
+        except HttpError as exc:
+            if getattr(exc.resp, "status", None) in _EXPIRED_CURSOR_STATUSES:
+                await run_in_threadpool(index.purge_user, user_id)
+                return False
+            raise
+        for change in resp.get("changes", []):
+            file_id = change.get("fileId")
+            if not file_id:
+                continue  # shared drive changes carry no file
+            if change.get("removed") or change.get("file") is None:
+                removals.add(file_id)
+                upserts.pop(file_id, None)
+            else:
+                upserts[file_id] = _parse_indexed_file(change["file"])
+                removals.discard(file_id)
+        if resp.get("newStartPageToken"):
+            page_token = resp["newStartPageToken"]
+            break
+        page_token = resp["nextPageToken"]
+    get_drive_folder_cache().discard(user_id, [*upserts, *removals])
+    await run_in_threadpool(
+        partial(
+            index.apply,
+            user_id,
+            upserts=list(upserts.values()),
+            removals=sorted(removals),
+            page_token=page_token,
+        )
+    )
+    return True
+
+
+_index_tasks: dict[str, asyncio.Task] = {}
+
+
+def _index_task(user_id: str, start) -> asyncio.Task:
+    """One crawl or sync per user at a time; later callers join the running one."""
+    task = _index_tasks.get(user_id)
+    if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(start())
+        _index_tasks[user_id] = task
+
+        def _settle(done: asyncio.Task) -> None:
+            if _index_tasks.get(user_id) is done:
+                del _index_tasks[user_id]
+            if not done.cancelled() and done.exception() is not None:
+                print(f"[google_drive] index update failed for user {user_id}: {done.exception()}")
+
+        task.add_done_callback(_settle)
+    return task
+
+
+async def _index_ready(user_id: str, user_jwt: str) -> bool:
+    index = get_google_drive_metadata_index()
+    state = await run_in_threadpool(index.state, user_id)
+    if state is None:
+        # A crawl is one files.list per 1000 files; run it in the background and go live meanwhile.
+        _index_task(user_id, lambda: crawl_drive_index(user_id, user_jwt))
+        return False
+    if state.page_token is None:
+        return False
+    if time.time() - state.synced_at < get_google_drive_settings().index_sync_interval_seconds:
+        return True
+    task = _index_task(user_id, lambda: sync_drive_index(user_id, user_jwt, state.page_token))
+    try:
+        return bool(await asyncio.shield(task))
+    except Exception:
+        return False
+
+
+def _folder_request(files_resource, folder_id: str):
+    return files_resource.get(fileId=folder_id, fields="id,name,parents", supportsAllDrives=True)
+
+
+async def _get_folders(user_id: str, user_jwt: str, folder_ids: list[str]) -> dict[str, DriveFolder]:
+    """
+    Read folders through Drive multipart batch calls (`DRIVE_BATCH_LIMIT` per call), each charged
+    to the user's Drive bucket per sub-request. Folders that 403/404 come back nameless; other
+    failures are left out so they are retried by the next resolution.
+    """
+    service = await get_google_drive_client_for_user(user_id=user_id, user_jwt=user_jwt)
+    files_resource = await run_in_threadpool(service.files)
+    build_request = partial(_folder_request, files_resource)
+    limiter = get_google_rate_limiter()
+
+    async def _execute_chunk(chunk: list[str]):
+        async with limiter.limit(user_id, GoogleApps.DRIVE.value, len(chunk) * DRIVE_QUOTA_UNITS):
+            return await execute_google_api_batch(service, chunk, build_request, limit=DRIVE_BATCH_LIMIT)
+
+    chunks = [folder_ids[start:start + DRIVE_BATCH_LIMIT] for start in range(0, len(folder_ids), DRIVE_BATCH_LIMIT)]
+    outcomes = await asyncio.gather(*(_execute_chunk(chunk) for chunk in chunks), return_exceptions=True)
+    folders: dict[str, DriveFolder] = {}
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            print(f"[google_drive] folder batch failed for user {user_id}: {outcome}")
+            continue
+        responses, errors = outcome
+        for folder_id, folder in responses.items():
+            folders[folder_id] = DriveFolder(name=folder.get("name"), parent_id=(folder.get("parents") or [None])[0])
+        for folder_id, exc in errors.items():
+            if getattr(getattr(exc, "resp", None), "status", None) in (403, 404):
+                folders[folder_id] = DriveFolder(name=None, parent_id=None)
+    return folders
+
+
+async def resolve_folder_paths(user_id: str, user_jwt: str, files: list[GoogleDriveFile]) -> None:
+    """
+    Set `folder_path` ("My Drive/Finance/2024") on each file from its first parent.
+
+    Parent chains are walked one level per round, with every folder of the level read in one
+    batch call; folders are kept in the per-user folder cache, so later searches in the same run
+    mostly resolve without any request. A chain stops at a folder the user cannot read.
+    """
+    cache = get_drive_folder_cache()
+    known: dict[str, DriveFolder] = {}
+    pending = {file.parents[0] for file in files if file.parents}
+    for _ in range(_MAX_FOLDER_DEPTH):
+        pending -= known.keys()
+        if not pending:
+            break
+        known.update(cache.get_many(user_id, sorted(pending)))
+        missing = sorted(pending - known.keys())
+        if missing:
+            fetched = await _get_folders(user_id, user_jwt, missing)
+            cache.put_many(user_id, fetched)
+            known.update(fetched)
+        pending = {folder.parent_id for folder in known.values() if folder.parent_id}
+    for file in files:
+        names: list[str] = []
+        folder_id = file.parents[0] if file.parents else None
+        while folder_id in known and known[folder_id].name is not None and len(names) < _MAX_FOLDER_DEPTH:
+            names.append(known[folder_id].name)
+            folder_id = known[folder_id].parent_id
+        file.folder_path = "/".join(reversed(names)) or None
+
+
+async def _search(
+        user_id: str,
+        user_jwt: str,
+        query: CompiledDriveQuery,
+        max_results: int,
+        page_token: str | None,
+) -> GoogleDriveSearchFilesResponse:
+    index = get_google_drive_metadata_index()
+    index_query = translate_drive_query(query) if index is not None else None
+    is_index_page = page_token is None or page_token.startswith(INDEX_PAGE_TOKEN_PREFIX)
+    if index_query is not None and is_index_page and await _index_ready(user_id, user_jwt):
+        offset = int(page_token[len(INDEX_PAGE_TOKEN_PREFIX):]) if page_token else 0
+        files, has_more = await run_in_threadpool(
+            partial(index.search, user_id, index_query, limit=max_results, offset=offset)
+        )
+        return GoogleDriveSearchFilesResponse(
+            files=files,
+            next_page_token=f"{INDEX_PAGE_TOKEN_PREFIX}{offset + max_results}" if has_more else None,
+            source="index",
+        )
+    if page_token and page_token.startswith(INDEX_PAGE_TOKEN_PREFIX):
+        page_token = None
+    return await _search_live(user_id, user_jwt, query.q, max_results, page_token)
+
+
+async def search_files(
+        user_id: str,
+        user_jwt: str,
+        query: str,
+        max_results: int = 10,
+        page_token: str | None = None,
+        include_folder_paths: bool = False,
+) -> GoogleDriveSearchFilesResponse:
+    """
+    Search Drive files, answered from the local metadata index when it can be.
+
+    `query` is compiled first (see `compile_drive_query`): an invalid one raises DriveQueryError
+    without any request, and repaired slips are reported in `query_repairs`. Queries the index
+    cannot translate (see `translate_drive_query`, e.g. `fullText`), users whose index is still
+    being crawled, and Drive page tokens go to `files.list` through the change-cursor result
+    cache. With `include_folder_paths`, each file also gets its resolved `folder_path` (see
+    `resolve_folder_paths`).
+    """
+    compiled = compile_drive_query(query, repair=get_google_drive_settings().query_auto_repair)
+    result = await _search(user_id, user_jwt, compiled, max_results, page_token)
+    result.query_repairs = list(compiled.repairs)
+    if include_folder_paths:
+        await resolve_folder_paths(user_id, user_jwt, result.files)
+    return result
+
+
+async def search_files_paginated(
+        user_id: str,
+        user_jwt: str,
+        query: str,
+        max_items: int,
+        max_bytes: int | None = None,
+        page_token: str | None = None,
+        include_folder_paths: bool = False,
+        prefetch: bool = True,
+) -> GoogleDriveSearchFilesResponse:
+    """
+    `search_files` that follows `nextPageToken` server-side and returns up to `max_items` files.
+
+    Pages are pipelined (see `PagePipeline`): the next page is requested while the current one
+    has its folder paths resolved. Files are de-duplicated by id and capped at
+    `GOOGLE_DRIVE_AUTO_PAGINATE_MAX_ITEMS` and `GOOGLE_DRIVE_AUTO_PAGINATE_MAX_BYTES` of JSON;
+    `next_page_token` resumes right after the last returned file.
+    """
+    settings = get_google_drive_settings()
+    compiled = compile_drive_query(query, repair=settings.query_auto_repair)
+    sources: set[str] = set()
+
+    async def fetch_page(token: str | None, page_size: int) -> tuple[list[GoogleDriveFile], str | None]:
+        page = await _search(user_id, user_jwt, compiled, page_size, token)
+        sources.add(page.source)
+        return page.files, page.next_page_token
+
+    async def on_page(files: list[GoogleDriveFile]) -> None:
+        await resolve_folder_paths(user_id, user_jwt, files)
+
+    max_bytes = settings.auto_paginate_max_bytes if max_bytes is None else max_bytes
+    result = await PagePipeline(
+        fetch_page=fetch_page,
+        key=lambda item: item.id,
+        size=lambda item: len(item.model_dump_json()),
+        budget=PaginationBudget(
+            max_items=max(1, min(max_items, settings.auto_paginate_max_items)),
+            max_bytes=max_bytes or None,
+        ),
+        page_size=_AUTO_PAGINATE_PAGE_SIZE,
+        page_token=page_token,
+        on_page=on_page if include_folder_paths else None,
+        prefetch=prefetch,
+    ).collect()
+    return GoogleDriveSearchFilesResponse(
+        files=result.items,
+        next_page_token=result.next_page_token,
+        source="index" if sources == {"index"} else "live",
+        query_repairs=list(compiled.repairs),
     )
-    return GoogleDriveSearchFilesResponse.model_validate(resp)
@@ -5,6 +5,7 @@ from typing import Any
 from agents import FunctionTool, RunContextWrapper, function_tool
 
 from app.integrations.google_drive import services as drive_services
+from app.utils.drive_query_utils import DriveQueryError
 from app.utils.agent_utils import UserContext, get_user_id, get_user_jwt
 
 
@@ -13,6 +14,8 @@ async def _search_drive_files_tool(
     query: str,
     max_results: int = 10,
     page_token: str | None = None,
+    include_folder_paths: bool = False,
+    max_items: int | None = None,
 ) -> dict[str, Any]:
     """
     Search Google Drive files using Drive query syntax.
@@ -25,17 +28,37 @@ async def _search_drive_files_tool(
         query: Drive query string (q).
         max_results: Max number of files to return in this page.
         page_token: Token from a previous response to fetch the next page.
+        include_folder_paths: Also return each file's folder path (e.g. "My Drive/Finance/2024"),
+            instead of looking up parents with further searches.
+        max_items: Collect up to this many files in one call by following pages server-side
+            (max_results is then ignored). Use it when you need many results, e.g. 200.
 
     Returns:
-        dict: {"files": [...], "nextPageToken": "..."} (raw Drive API response fields).
+        dict: {"files": [...], "nextPageToken": "..."} (raw Drive API response fields), with
+        "query_repairs" listing slips fixed in the query, or {"error": "..."} naming the column
+        and the fix when the query is invalid (nothing was sent to Drive).
     """
-    result = await drive_services.search_files(
-        user_id=get_user_id(ctx),
-        user_jwt=get_user_jwt(ctx),
-        query=query,
-        max_results=max_results,
-        page_token=page_token,
-    )
+    try:
+        if max_items:
+            result = await drive_services.search_files_paginated(
+                user_id=get_user_id(ctx),
+                user_jwt=get_user_jwt(ctx),
+                query=query,
+                max_items=max_items,
+                page_token=page_token,
+                include_folder_paths=include_folder_paths,
+            )
+        else:
+            result = await drive_services.search_files(
+                user_id=get_user_id(ctx),
+                user_jwt=get_user_jwt(ctx),
+                query=query,
+                max_results=max_results,
+                page_token=page_token,
+                include_folder_paths=include_folder_paths,
+            )
+    except DriveQueryError as exc:
+        return {"error": f"Invalid Drive query: {exc}", "query": query}
     return result.model_dump()
 
 
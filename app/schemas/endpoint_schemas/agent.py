@@ -3,3 +3,5 @@ from pydantic import BaseModel
 class AgentRunPayload(BaseModel): 
     query: str
     session_id: str | None = None
+    # Merge consecutive delta events into fewer SSE frames; None uses SSE_COALESCE_DELTAS.
+    coalesce_deltas: bool | None = None
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Literal
+
 from pydantic import BaseModel, ConfigDict, Field
 
 
@@ -14,6 +16,7 @@ class GmailMessage(BaseModel):
     subject: str | None = None
     date: str | None = None
     msg_body: str
+    body_cursor: int | None = None
 
 
 class GmailMessageRef(BaseModel):
@@ -35,3 +38,20 @@ class BatchedGmailMessages(BaseModel):
 
     messages: list[GmailMessage] = Field(default_factory=list)
     error_messages: list[str] = Field(default_factory=list)
+
+
+class GmailMailboxSearchResponse(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    messages: list[GmailMessage] = Field(default_factory=list)
+    page_token: str | None = None
+    source: Literal["mirror", "live"]
+
+
+class GmailSearchAndReadResponse(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    messages: list[GmailMessage] = Field(default_factory=list)
+    collapsed_threads: dict[str, int] = Field(default_factory=dict)
+    page_token: str | None = None
+    source: Literal["mirror", "live"]
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Literal
+
 from pydantic import BaseModel, ConfigDict, Field
 
 
@@ -12,6 +14,8 @@ class GoogleDriveFile(BaseModel):
     mime_type: str | None = Field(default=None, alias="mimeType")
     web_view_link: str | None = Field(default=None, alias="webViewLink")
     modified_time: str | None = Field(default=None, alias="modifiedTime")
+    parents: list[str] | None = None
+    folder_path: str | None = None
 
 
 class GoogleDriveSearchFilesResponse(BaseModel):
@@ -19,3 +23,5 @@ class GoogleDriveSearchFilesResponse(BaseModel):
 
     files: list[GoogleDriveFile] = Field(default_factory=list)
     next_page_token: str | None = Field(default=None, validation_alias="nextPageToken")
+    source: Literal["live", "index"] = "live"
+    query_repairs: list[str] = Field(default_factory=list)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from app.core.settings import get_google_drive_settings
+
+
+@dataclass(frozen=True)
+class DriveFolder:
+    name: str | None  # None: the folder could not be read (not found or not shared with the user)
+    parent_id: str | None
+
+
+@dataclass
+class DriveFolderCacheMetrics:
+    hits: int = 0
+    misses: int = 0
+    discards: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class DriveFolderCache:
+    """LRU of Drive folder id -> (name, first parent) per user, for resolving folder paths.
+
+    Entries expire after `ttl_seconds`; folders seen in a `changes.list` poll are discarded
+    right away, so a rename or move is picked up by the next search that resolves paths.
+    """
+
+    def __init__(self, *, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple[str, str], tuple[float, DriveFolder]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = DriveFolderCacheMetrics()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get_many(self, user_id: str, folder_ids: list[str]) -> dict[str, DriveFolder]:
+        found: dict[str, DriveFolder] = {}
+        now = time.monotonic()
+        with self._lock:
+            for folder_id in folder_ids:
+                entry = self._entries.get((user_id, folder_id))
+                if entry is None or now - entry[0] >= self.ttl_seconds:
+                    self._entries.pop((user_id, folder_id), None)
+                    self.metrics.misses += 1
+                    continue
+                self._entries.move_to_end((user_id, folder_id))
+                self.metrics.hits += 1
+                found[folder_id] = entry[1]
+        return found
+
+    def put_many(self, user_id: str, folders: dict[str, DriveFolder]) -> None:
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for folder_id, folder in folders.items():
+                self._entries[(user_id, folder_id)] = (now, folder)
+                self._entries.move_to_end((user_id, folder_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.metrics.evictions += 1
+
+    def discard(self, user_id: str, folder_ids: list[str]) -> None:
+        with self._lock:
+            for folder_id in folder_ids:
+                if self._entries.pop((user_id, folder_id), None) is not None:
+                    self.metrics.discards += 1
+
+    def purge_user(self, user_id: str) -> None:
+        with self._lock:
+            for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == user_id]:
+                del self._entries[entry_key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_folder_cache: DriveFolderCache | None = None
+
+
+def get_drive_folder_cache() -> DriveFolderCache:
+    global _folder_cache
+    if _folder_cache is None:
+        settings = get_google_drive_settings()
+        _folder_cache = DriveFolderCache(
+            max_entries=settings.folder_cache_max_entries,
+            ttl_seconds=settings.folder_cache_ttl_seconds,
+        )
+    return _folder_cache
+
+
+def get_drive_folder_cache_metrics() -> dict[str, int]:
+    return get_drive_folder_cache().metrics.as_dict()
+
+
+def purge_drive_folder_cache(user_id: str) -> None:
+    get_drive_folder_cache().purge_user(user_id)
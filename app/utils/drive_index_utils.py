@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+from app.core.settings import get_google_drive_settings
+from app.schemas.integration_schemas.google_drive import GoogleDriveFile
+from app.utils.drive_query_utils import (
+    CompiledDriveQuery,
+    DriveQueryError,
+    DriveQueryGroup,
+    DriveQueryNode,
+    DriveQueryNot,
+    compile_drive_query,
+)
+
+INDEX_PAGE_TOKEN_PREFIX = "index:"
+
+_TEXT_COLUMNS = {"name": "name", "mimeType": "mime_type"}
+_FLAG_COLUMNS = {"trashed": "trashed", "starred": "starred"}
+_LIST_COLUMNS = {"parents": "parents", "owners": "owners"}
+
+
+class _Unsupported(Exception):
+    """The query uses something the index cannot answer; the caller goes to the API."""
+
+
+@dataclass(frozen=True)
+class DriveIndexQuery:
+    """A Drive `q` compiled to a SQLite WHERE clause over the `files` table."""
+
+    where: str
+    params: tuple[object, ...] = ()
+
+
+def rfc3339_ms(value: str | None) -> int | None:
+    """Epoch milliseconds for a Drive RFC 3339 timestamp; naive values are UTC, as Drive reads them."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def _clause(node: DriveQueryNode, params: list[object]) -> str:
+    if isinstance(node, DriveQueryGroup):
+        clauses = [_clause(operand, params) for operand in node.operands]
+        return f"({f' {node.operator.upper()} '.join(clauses)})"
+    if isinstance(node, DriveQueryNot):
+        return f"NOT ({_clause(node.operand, params)})"
+    if node.field in _LIST_COLUMNS:
+        params.append(f" {node.value.lower() if node.field == 'owners' else node.value} ")
+        return f"instr({_LIST_COLUMNS[node.field]}, ?) > 0"
+    if node.field in _TEXT_COLUMNS:
+        column = _TEXT_COLUMNS[node.field]
+        if node.operator == "contains" and column == "name":
+            # LIKE narrows cheaply in C; the function applies Drive's word-prefix rule.
+            params.extend([f"%{_like_escape(node.value)}%", node.value])
+            return "(name LIKE ? ESCAPE '\\' AND drive_name_contains(name, ?))"
+        params.append(node.value)
+        if node.operator == "contains":
+            return f"instr({column}, ?) > 0"
+        return f"{column} {node.operator} ?"
+    if node.field == "modifiedTime":
+        params.append(rfc3339_ms(node.value))
+        return f"modified_ms {node.operator} ?"
+    if node.field in _FLAG_COLUMNS:
+        params.append(int(node.value))
+        return f"{_FLAG_COLUMNS[node.field]} {node.operator} ?"
+    raise _Unsupported
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def translate_drive_query(query: CompiledDriveQuery) -> DriveIndexQuery | None:
+    """
+    Compile a parsed Drive `q` to SQL over the index, or return None so the caller uses the API.
+
+    Supported: `name` and `mimeType` with contains/=/!=, `modifiedTime` comparisons,
+    `trashed`/`starred` =/!=, `'<id>' in parents`, `'<email>' in owners`, and/or/not. Anything
+    else (`fullText`, `sharedWithMe`, `properties has`, other times and people) is left to Drive.
+    """
+    if query.root is None:
+        return DriveIndexQuery(where="1")
+    params: list[object] = []
+    try:
+        where = _clause(query.root, params)
+    except _Unsupported:
+        return None
+    return DriveIndexQuery(where=where, params=tuple(params))
+
+
+def parse_drive_index_query(query: str) -> DriveIndexQuery | None:
+    """`translate_drive_query` for a raw `q`; a query Drive would reject is never answered locally."""
+    try:
+        return translate_drive_query(compile_drive_query(query))
+    except DriveQueryError:
+        return None
+
+
+def _drive_name_contains(name: str | None, needle: str) -> bool:
+    """Drive matches `name contains` on word prefixes: 'report' finds 'Q3 report', not 'Qreport'."""
+    if not name:
+        return False
+    name, needle = name.lower(), needle.lower()
+    start = name.find(needle)
+    while start >= 0:
+        if start == 0 or not name[start - 1].isalnum():
+            return True
+        start = name.find(needle, start + 1)
+    return False
+
+
+@dataclass(frozen=True)
+class IndexedDriveFile:
+    file: GoogleDriveFile
+    parents: list[str] = field(default_factory=list)
+    owners: list[str] = field(default_factory=list)  # email addresses
+    trashed: bool = False
+    starred: bool = False
+
+
+@dataclass(frozen=True)
+class DriveIndexState:
+    page_token: str | None  # None: the crawl hit GOOGLE_DRIVE_INDEX_MAX_FILES; the user stays on the API
+    synced_at: float
+
+
+class GoogleDriveMetadataIndex:
+    """Per-user copy of Drive file metadata in SQLite, queried through `parse_drive_index_query`.
+
+    The caller crawls a user's files once (`replace`) and then applies `changes.list` pages from
+    the stored page token (`apply`). Rows hold only what search results and the supported query
+    terms need; file content is never indexed, so `fullText` stays on the API.
+    """
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.create_function("drive_name_contains", 2, _drive_name_contains, deterministic=True)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS index_state (
+                user_id TEXT PRIMARY KEY,
+                page_token TEXT,
+                synced_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                file_id TEXT NOT NULL,
+                name TEXT,
+                mime_type TEXT,
+                parents TEXT NOT NULL,
+                owners TEXT NOT NULL,
+                modified_time TEXT,
+                modified_ms INTEGER,
+                web_view_link TEXT,
+                trashed INTEGER NOT NULL,
+                starred INTEGER NOT NULL,
+                UNIQUE (user_id, file_id)
+            );
+            CREATE INDEX IF NOT EXISTS files_user_modified ON files (user_id, modified_ms DESC);
+            """
+        )
+
+    def state(self, user_id: str) -> DriveIndexState | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_token, synced_at FROM index_state WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return DriveIndexState(page_token=row[0], synced_at=row[1]) if row else None
+
+    def replace(self, user_id: str, files: list[IndexedDriveFile], page_token: str | None) -> None:
+        """Crawl result: drop whatever is stored for the user and load a fresh snapshot."""
+        with self._lock, self._transaction():
+            self._conn.execute("DELETE FROM files WHERE user_id = ?", (user_id,))
+            self._upsert(user_id, files)
+            self._set_state(user_id, page_token)
+
+    def apply(
+        self,
+        user_id: str,
+        *,
+        upserts: list[IndexedDriveFile],
+        removals: list[str],
+        page_token: str,
+    ) -> None:
+        with self._lock, self._transaction():
+            self._upsert(user_id, upserts)
+            self._conn.executemany(
+                "DELETE FROM files WHERE user_id = ? AND file_id = ?",
+                [(user_id, file_id) for file_id in removals],
+            )
+            self._set_state(user_id, page_token)
+
+    def search(
+        self,
+        user_id: str,
+        query: DriveIndexQuery,
+        *,
+        limit: int,
+        offset: int = 0,
+    ) -> tuple[list[GoogleDriveFile], bool]:
+        """Most recently modified matches first; the flag says whether more rows follow."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT file_id, name, mime_type, web_view_link, modified_time, parents "
+                f"FROM files WHERE user_id = ? AND {query.where} "
+                "ORDER BY modified_ms DESC, name, file_id LIMIT ? OFFSET ?",
+                (user_id, *query.params, limit + 1, offset),
+            ).fetchall()
+        files = [
+            GoogleDriveFile(
+                kind="drive#file",
+                id=file_id,
+                name=name,
+                mime_type=mime_type,
+                web_view_link=web_view_link,
+                modified_time=modified_time,
+                parents=parents.split(),
+            )
+            for file_id, name, mime_type, web_view_link, modified_time, parents in rows[:limit]
+        ]
+        return files, len(rows) > limit
+
+    def purge_user(self, user_id: str) -> None:
+        with self._lock, self._transaction():
+            self._conn.execute("DELETE FROM files WHERE user_id = ?", (user_id,))
+            self._conn.execute("DELETE FROM index_state WHERE user_id = ?", (user_id,))
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self._conn.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _upsert(self, user_id: str, files: list[IndexedDriveFile]) -> None:
+        self._conn.executemany(
+            """
+            INSERT INTO files (
+                user_id, file_id, name, mime_type, parents, owners, modified_time, modified_ms,
+                web_view_link, trashed, starred
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (user_id, file_id) DO UPDATE SET
+                name = excluded.name,
+                mime_type = excluded.mime_type,
+                parents = excluded.parents,
+                owners = excluded.owners,
+                modified_time = excluded.modified_time,
+                modified_ms = excluded.modified_ms,
+                web_view_link = excluded.web_view_link,
+                trashed = excluded.trashed,
+                starred = excluded.starred
+            """,
+            [
+                (
+                    user_id,
+                    item.file.id,
+                    item.file.name,
+                    item.file.mime_type,
+                    _list_column(item.parents),
+                    _list_column([owner.lower() for owner in item.owners]),
+                    item.file.modified_time,
+                    rfc3339_ms(item.file.modified_time),
+                    item.file.web_view_link,
+                    int(item.trashed),
+                    int(item.starred),
+                )
+                for item in files
+            ],
+        )
+
+    def _set_state(self, user_id: str, page_token: str | None) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO index_state (user_id, page_token, synced_at) VALUES (?, ?, ?)",
+            (user_id, page_token, time.time()),
+        )
+
+
+def _list_column(values: list[str]) -> str:
+    # Space-padded so `'x' in parents` is an instr() on ' x ' without partial-id matches.
+    return f" {' '.join(values)} "
+
+
+_metadata_index: GoogleDriveMetadataIndex | None = None
+_metadata_index_configured = False
+_metadata_index_lock = threading.Lock()
+
+
+def get_google_drive_metadata_index() -> GoogleDriveMetadataIndex | None:
+    """The process-wide index, or None when `GOOGLE_DRIVE_INDEX_PATH` is not configured."""
+    global _metadata_index, _metadata_index_configured
+    if not _metadata_index_configured:
+        with _metadata_index_lock:
+            if not _metadata_index_configured:
+                path = get_google_drive_settings().index_path
+                _metadata_index = GoogleDriveMetadataIndex(Path(path)) if path else None
+                _metadata_index_configured = True
+    return _metadata_index
+
+
+def purge_google_drive_metadata_index(user_id: str) -> None:
+    index = get_google_drive_metadata_index()
+    if index is not None:
+        index.purge_user(user_id)
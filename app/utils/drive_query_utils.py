@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import difflib
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Literal, Union
+
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_.]*")
+_RFC3339_RE = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{1,9})?(Z|[+-]\d{2}:\d{2})?")
+_DATE_RE = re.compile(r"(\d{4})[-/](\d{2})[-/](\d{2})")
+_COMPARISONS = frozenset({"<", "<=", "=", "!=", ">", ">="})
+_EQUALITY = frozenset({"=", "!="})
+_WORD_OPERATORS = frozenset({"contains", "in", "has"})
+
+FieldKind = Literal["text", "time", "bool", "member", "property"]
+
+# The query terms of GOOGLE_DRIVE_SYSTEM_PROMPT section 4.3: field -> (value kind, operators).
+DRIVE_QUERY_FIELDS: dict[str, tuple[FieldKind, frozenset[str]]] = {
+    "name": ("text", frozenset({"contains", "=", "!="})),
+    "fullText": ("text", frozenset({"contains"})),
+    "mimeType": ("text", frozenset({"contains", "=", "!="})),
+    "modifiedTime": ("time", _COMPARISONS),
+    "viewedByMeTime": ("time", _COMPARISONS),
+    "createdTime": ("time", _COMPARISONS),
+    "trashed": ("bool", _EQUALITY),
+    "starred": ("bool", _EQUALITY),
+    "sharedWithMe": ("bool", _EQUALITY),
+    "parents": ("member", frozenset({"in"})),
+    "owners": ("member", frozenset({"in"})),
+    "writers": ("member", frozenset({"in"})),
+    "readers": ("member", frozenset({"in"})),
+    "properties": ("property", frozenset({"has"})),
+    "appProperties": ("property", frozenset({"has"})),
+    "visibility": ("text", _EQUALITY),
+    "shortcutDetails.targetId": ("text", _EQUALITY),
+}
+_FIELDS_BY_LOWER = {name.lower(): name for name in DRIVE_QUERY_FIELDS}
+
+
+class DriveQueryError(ValueError):
+    """A Drive `q` that Drive would reject; `column` is 1-based in the original query."""
+
+    def __init__(self, message: str, column: int | None = None) -> None:
+        self.message = message
+        self.column = column
+        super().__init__(f"{message} (column {column})" if column else message)
+
+
+@dataclass(frozen=True)
+class DriveQueryTerm:
+    field: str
+    operator: str
+    value: str | bool | tuple[str, str]  # tuple: (key, value) of a `properties has` term
+
+
+@dataclass(frozen=True)
+class DriveQueryNot:
+    operand: DriveQueryNode
+
+
+@dataclass(frozen=True)
+class DriveQueryGroup:
+    operator: Literal["and", "or"]
+    operands: tuple[DriveQueryNode, ...]
+
+
+DriveQueryNode = Union[DriveQueryTerm, DriveQueryNot, DriveQueryGroup]
+
+
+@dataclass(frozen=True)
+class CompiledDriveQuery:
+    root: DriveQueryNode | None  # None for an empty query (every file)
+    q: str  # what is sent to Drive: canonical spelling, source order, explicit grouping
+    cache_key: str  # `q` with and/or operands sorted and deduplicated
+    repairs: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class _Token:
+    kind: str  # string, op, word, or the bracket character itself
+    text: str  # unescaped value for strings
+    column: int
+
+
+def _scan_string(query: str, start: int, repairs: list[str]) -> tuple[str, int]:
+    quote = query[start]
+    chars: list[str] = []
+    position = start + 1
+    while position < len(query):
+        char = query[position]
+        if char == "\\" and position + 1 < len(query):
+            chars.append(query[position + 1])
+            position += 2
+            continue
+        if char == quote:
+            # A quote between letters ("Valentine's") is an apostrophe the writer forgot to escape.
+            follows = query[position + 1:position + 2]
+            if quote == "'" and chars and chars[-1].isalnum() and follows.isalnum() and "'" in query[position + 1:]:
+                repairs.append(f"escaped the apostrophe at column {position + 1}")
+                chars.append(char)
+                position += 1
+                continue
+            if quote == '"':
+                repairs.append(f"changed the double-quoted string at column {start + 1} to single quotes")
+            return "".join(chars), position + 1
+        chars.append(char)
+        position += 1
+    raise DriveQueryError(
+        f"unterminated string; close it with {quote} and escape quotes inside it as \\'",
+        start + 1,
+    )
+
+
+def _tokenize(query: str, repairs: list[str]) -> list[_Token]:
+    tokens: list[_Token] = []
+    position = 0
+    while position < len(query):
+        char = query[position]
+        column = position + 1
+        if char.isspace():
+            position += 1
+        elif char in "'\"":
+            value, position = _scan_string(query, position, repairs)
+            tokens.append(_Token("string", value, column))
+        elif query.startswith(("<=", ">=", "!=", "=="), position):
+            operator = query[position:position + 2]
+            if operator == "==":
+                repairs.append(f"replaced '==' with '=' at column {column}")
+                operator = "="
+            tokens.append(_Token("op", operator, column))
+            position += 2
+        elif char in "=<>":
+            tokens.append(_Token("op", char, column))
+            position += 1
+        elif char in "(){}":
+            tokens.append(_Token(char, char, column))
+            position += 1
+        else:
+            match = _WORD_RE.match(query, position)
+            if match is None:
+                raise DriveQueryError(f"unexpected character {char!r}; quote values as 'text'", column)
+            tokens.append(_Token("word", match.group(), column))
+            position = match.end()
+    return tokens
+
+
+def _canonical_field(token: _Token) -> str:
+    field_name = _FIELDS_BY_LOWER.get(token.text.lower())
+    if field_name is None:
+        suggestion = difflib.get_close_matches(token.text, DRIVE_QUERY_FIELDS, n=1)
+        hint = f"; did you mean {suggestion[0]}?" if suggestion else f"; use one of {', '.join(DRIVE_QUERY_FIELDS)}"
+        raise DriveQueryError(f"unknown query term {token.text!r}{hint}", token.column)
+    return field_name
+
+
+def _timestamp(field_name: str, token: _Token, repairs: list[str]) -> str:
+    value = token.text.strip()
+    date = _DATE_RE.fullmatch(value)
+    if date:
+        value = f"{date.group(1)}-{date.group(2)}-{date.group(3)}T00:00:00Z"
+    else:
+        value = re.sub(r"^(\d{4})/(\d{2})/(\d{2})", r"\1-\2-\3", value)
+        value = re.sub(r"^(\d{4}-\d{2}-\d{2})[ t](?=\d)", r"\1T", value)
+        if value.endswith("z"):
+            value = value[:-1] + "Z"
+    valid = _RFC3339_RE.fullmatch(value) is not None
+    if valid:
+        try:
+            datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            valid = False
+    if not valid:
+        raise DriveQueryError(
+            f"{field_name} needs an RFC 3339 timestamp such as '2026-01-01T00:00:00Z', got {token.text!r}",
+            token.column,
+        )
+    if value != token.text:
+        repairs.append(f"rewrote {field_name} value {token.text!r} as {value!r}")
+    return value
+
+
+class _Parser:
+    def __init__(self, tokens: list[_Token], repairs: list[str]) -> None:
+        self.tokens = tokens
+        self.position = 0
+        self.repairs = repairs
+
+    def peek(self) -> _Token | None:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def next(self, expected: str) -> _Token:
+        token = self.peek()
+        if token is None:
+            raise DriveQueryError(f"query ends early; expected {expected}")
+        self.position += 1
+        return token
+
+    def at_keyword(self, *keywords: str) -> bool:
+        token = self.peek()
+        return token is not None and token.kind == "word" and token.text.lower() in keywords
+
+    def parse(self) -> DriveQueryNode:
+        node = self.expression()
+        token = self.peek()
+        if token is not None:
+            if token.kind == ")":
+                raise DriveQueryError("unmatched ')'", token.column)
+            raise DriveQueryError(f"unexpected {token.text!r}; join terms with and/or", token.column)
+        return node
+
+    def expression(self) -> DriveQueryNode:
+        operands = [self.conjunction()]
+        while self.at_keyword("or"):
+            self.position += 1
+            operands.append(self.conjunction())
+        return operands[0] if len(operands) == 1 else DriveQueryGroup("or", tuple(operands))
+
+    def conjunction(self) -> DriveQueryNode:
+        operands = [self.unary()]
+        while True:
+            if self.at_keyword("and"):
+                self.position += 1
+            elif self._starts_term():
+                token = self.peek()
+                self.repairs.append(f"inserted 'and' before column {token.column}")
+            else:
+                break
+            operands.append(self.unary())
+        return operands[0] if len(operands) == 1 else DriveQueryGroup("and", tuple(operands))
+
+    def _starts_term(self) -> bool:
+        token = self.peek()
+        if token is None:
+            return False
+        if token.kind == "word":
+            return token.text.lower() == "not" or token.text.lower() in _FIELDS_BY_LOWER
+        return token.kind in ("string", "(")
+
+    def unary(self) -> DriveQueryNode:
+        if self.at_keyword("not"):
+            self.position += 1
+            return DriveQueryNot(self.unary())
+        token = self.next("a query term")
+        if token.kind == "(":
+            node = self.expression()
+            closing = self.peek()
+            if closing is None or closing.kind != ")":
+                raise DriveQueryError("'(' is never closed", token.column)
+            self.position += 1
+            return node
+        if token.kind == "string":
+            return self.membership(token)
+        if token.kind == "word":
+            return self.comparison(token)
+        raise DriveQueryError(f"expected a query term, got {token.text!r}", token.column)
+
+    def membership(self, value: _Token) -> DriveQueryTerm:
+        keyword = self.next("'in' after a quoted value")
+        if keyword.kind != "word" or keyword.text.lower() != "in":
+            raise DriveQueryError(f"expected 'in' after {value.text!r}, e.g. '<id>' in parents", keyword.column)
+        field_token = self.next("parents, owners, writers or readers")
+        field_name = _canonical_field(field_token)
+        if DRIVE_QUERY_FIELDS[field_name][0] != "member":
+            raise DriveQueryError(
+                f"'in' only works with parents, owners, writers and readers, not {field_name}",
+                field_token.column,
+            )
+        return DriveQueryTerm(field_name, "in", value.text)
+
+    def comparison(self, field_token: _Token) -> DriveQueryTerm:
+        field_name = _canonical_field(field_token)
+        kind, operators = DRIVE_QUERY_FIELDS[field_name]
+        operator_token = self.peek()
+        if kind == "bool" and (operator_token is None or operator_token.kind == ")" or self.at_keyword("and", "or")):
+            self.repairs.append(f"read bare {field_name} as {field_name} = true")
+            return DriveQueryTerm(field_name, "=", True)
+        operator_token = self.next(f"an operator after {field_name}")
+        operator = operator_token.text.lower() if operator_token.kind == "word" else operator_token.text
+        if operator_token.kind not in ("op", "word") or (
+            operator_token.kind == "word" and operator not in _WORD_OPERATORS
+        ):
+            raise DriveQueryError(f"expected an operator after {field_name}, got {operator_token.text!r}", operator_token.column)
+        if kind == "member" and operator in ("=", "contains", "in"):
+            value = self.value_token(field_name)
+            self.repairs.append(f"rewrote {field_name} {operator} '{value.text}' as '{value.text}' in {field_name}")
+            return DriveQueryTerm(field_name, "in", value.text)
+        if operator not in operators:
+            allowed = ", ".join(sorted(operators)) if kind != "member" else f"'<value>' in {field_name}"
+            raise DriveQueryError(
+                f"{field_name} does not support {operator!r}; use {allowed}",
+                operator_token.column,
+            )
+        if kind == "bool":
+            return DriveQueryTerm(field_name, operator, self.boolean(field_name))
+        if kind == "property":
+            return DriveQueryTerm(field_name, operator, self.property_filter(field_name))
+        value = self.value_token(field_name)
+        if kind == "time":
+            return DriveQueryTerm(field_name, operator, _timestamp(field_name, value, self.repairs))
+        return DriveQueryTerm(field_name, operator, value.text)
+
+    def value_token(self, field_name: str) -> _Token:
+        token = self.next(f"a quoted value for {field_name}")
+        if token.kind == "string":
+            return token
+        if token.kind == "word" and token.text.lower() not in ("and", "or", "not"):
+            self.repairs.append(f"quoted the {field_name} value {token.text!r}")
+            return token
+        raise DriveQueryError(f"{field_name} needs a quoted value such as 'text', got {token.text!r}", token.column)
+
+    def boolean(self, field_name: str) -> bool:
+        token = self.next(f"true or false for {field_name}")
+        value = token.text.lower()
+        if value in ("true", "false"):
+            if token.kind == "string":
+                self.repairs.append(f"unquoted the {field_name} value {token.text!r}")
+            return value == "true"
+        raise DriveQueryError(f"{field_name} takes true or false, got {token.text!r}", token.column)
+
+    def property_filter(self, field_name: str) -> tuple[str, str]:
+        example = f"{field_name} has {{ key='k' and value='v' }}"
+
+        def expect(kind: str, text: str | None = None) -> _Token:
+            token = self.next(example)
+            if token.kind != kind or (text is not None and token.text.lower() != text):
+                raise DriveQueryError(f"expected {example}", token.column)
+            return token
+
+        expect("{")
+        expect("word", "key")
+        expect("op", "=")
+        key = expect("string").text
+        expect("word", "and")
+        expect("word", "value")
+        expect("op", "=")
+        value = expect("string").text
+        expect("}")
+        return key, value
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _render(node: DriveQueryNode, *, nested: bool = False, canonical: bool = False) -> str:
+    if isinstance(node, DriveQueryTerm):
+        if node.operator == "in":
+            return f"{_quote(node.value)} in {node.field}"
+        if isinstance(node.value, bool):
+            return f"{node.field} {node.operator} {'true' if node.value else 'false'}"
+        if isinstance(node.value, tuple):
+            return f"{node.field} has {{ key={_quote(node.value[0])} and value={_quote(node.value[1])} }}"
+        return f"{node.field} {node.operator} {_quote(node.value)}"
+    if isinstance(node, DriveQueryNot):
+        return f"not {_render(node.operand, nested=True, canonical=canonical)}"
+    parts = [_render(operand, nested=True, canonical=canonical) for operand in node.operands]
+    if canonical:
+        parts = sorted(dict.fromkeys(parts))
+        if len(parts) == 1:
+            return parts[0]
+    text = f" {node.operator} ".join(parts)
+    return f"({text})" if nested else text
+
+
+def compile_drive_query(query: str, *, repair: bool = True) -> CompiledDriveQuery:
+    """
+    Parse a Drive `q` against the query language in GOOGLE_DRIVE_SYSTEM_PROMPT, before any request.
+
+    Raises DriveQueryError with the column and a fix for anything Drive would answer with a 400
+    (bad quoting, unknown terms, operators a term does not support, non-RFC 3339 timestamps,
+    unbalanced parentheses). Slips with one obvious reading are repaired and listed in `repairs`
+    (or raised when `repair` is off): an unescaped apostrophe, double quotes, `==`, an unquoted
+    value, a missing `and`, `parents = 'id'`, bare or quoted booleans and date-only timestamps.
+    """
+    repairs: list[str] = []
+    tokens = _tokenize(query, repairs)
+    if not tokens:
+        return CompiledDriveQuery(root=None, q="", cache_key="")
+    root = _Parser(tokens, repairs).parse()
+    if repairs and not repair:
+        raise DriveQueryError(f"query needs repair and auto-repair is off: {'; '.join(repairs)}")
+    return CompiledDriveQuery(
+        root=root,
+        q=_render(root),
+        cache_key=_render(root, canonical=True),
+        repairs=tuple(repairs),
+    )
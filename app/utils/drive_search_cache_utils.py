@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from app.core.settings import get_google_drive_settings
+from app.schemas.integration_schemas.google_drive import GoogleDriveSearchFilesResponse
+from app.utils.drive_query_utils import DriveQueryError, compile_drive_query
+
+SearchKey = tuple[str, int, str | None, str]  # (normalized q, page size, page token, fields)
+
+_QUOTED_OR_WORD_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\S+")
+_CASE_INSENSITIVE_WORDS = frozenset({"and", "or", "not", "true", "false"})
+
+
+def normalize_drive_query(query: str) -> str:
+    """
+    Cache key for a `q`: the compiled query's `cache_key` (canonical spelling, and/or operands
+    sorted), so equivalent queries share a key. A query that does not compile only has its
+    whitespace and keyword case collapsed outside string literals.
+    """
+    try:
+        return compile_drive_query(query).cache_key
+    except DriveQueryError:
+        pass
+    words = []
+    for word in _QUOTED_OR_WORD_RE.findall(query):
+        words.append(word.lower() if word.lower() in _CASE_INSENSITIVE_WORDS else word)
+    return " ".join(words)
+
+
+@dataclass
+class DriveSearchCacheMetrics:
+    hits: int = 0
+    misses: int = 0
+    change_polls: int = 0
+    invalidations: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class _UserChangeCursor:
+    page_token: str
+    checked_at: float
+    generation: int = 0
+
+
+class DriveSearchCache:
+    """LRU of `files.list` results per user, valid only up to the user's Drive change cursor.
+
+    Each user has a `changes.list` page token. Results are served only while that cursor has
+    been checked within `poll_interval_seconds`; any change seen by a poll drops all of the
+    user's results, since a created, renamed, moved or trashed file can enter or leave any query.
+    A result fetched while a poll was invalidating (generation moved on) is not stored.
+    """
+
+    def __init__(self, *, max_entries: int, poll_interval_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.poll_interval_seconds = poll_interval_seconds
+        self._entries: OrderedDict[tuple[str, SearchKey], GoogleDriveSearchFilesResponse] = OrderedDict()
+        self._cursors: dict[str, _UserChangeCursor] = {}
+        self._lock = threading.Lock()
+        self.metrics = DriveSearchCacheMetrics()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def cursor(self, user_id: str) -> _UserChangeCursor | None:
+        return self._cursors.get(user_id)
+
+    def poll_due(self, user_id: str) -> bool:
+        cursor = self._cursors.get(user_id)
+        return cursor is None or time.monotonic() - cursor.checked_at >= self.poll_interval_seconds
+
+    def generation(self, user_id: str) -> int:
+        cursor = self._cursors.get(user_id)
+        return cursor.generation if cursor is not None else -1
+
+    def start(self, user_id: str, page_token: str) -> None:
+        """Begin tracking from `page_token`; nothing cached before it is kept."""
+        with self._lock:
+            previous = self._cursors.get(user_id)
+            self._drop_user(user_id)
+            self._cursors[user_id] = _UserChangeCursor(
+                page_token=page_token,
+                checked_at=time.monotonic(),
+                generation=previous.generation + 1 if previous is not None else 0,
+            )
+
+    def advance(self, user_id: str, page_token: str, *, changed: bool) -> None:
+        with self._lock:
+            cursor = self._cursors.get(user_id)
+            if cursor is None:
+                return
+            self.metrics.change_polls += 1
+            if changed:
+                self.metrics.invalidations += 1
+                self._drop_user(user_id)
+                cursor.generation += 1
+            cursor.page_token = page_token
+            cursor.checked_at = time.monotonic()
+
+    def get(self, user_id: str, key: SearchKey) -> GoogleDriveSearchFilesResponse | None:
+        with self._lock:
+            result = self._entries.get((user_id, key))
+            if result is None:
+                self.metrics.misses += 1
+                return None
+            self._entries.move_to_end((user_id, key))
+            self.metrics.hits += 1
+        return result.model_copy(deep=True)
+
+    def put(self, user_id: str, key: SearchKey, result: GoogleDriveSearchFilesResponse, generation: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation < 0 or generation != self.generation(user_id):
+                return
+            self._entries[(user_id, key)] = result.model_copy(deep=True)
+            self._entries.move_to_end((user_id, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.metrics.evictions += 1
+
+    def purge_user(self, user_id: str) -> None:
+        with self._lock:
+            self._drop_user(user_id)
+            self._cursors.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._cursors.clear()
+
+    def _drop_user(self, user_id: str) -> None:
+        for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == user_id]:
+            del self._entries[entry_key]
+
+
+_search_cache: DriveSearchCache | None = None
+
+
+def get_drive_search_cache() -> DriveSearchCache:
+    global _search_cache
+    if _search_cache is None:
+        settings = get_google_drive_settings()
+        _search_cache = DriveSearchCache(
+            max_entries=settings.search_cache_max_entries,
+            poll_interval_seconds=settings.changes_poll_interval_seconds,
+        )
+    return _search_cache
+
+
+def get_drive_search_cache_metrics() -> dict[str, int]:
+    return get_drive_search_cache().metrics.as_dict()
+
+
+def purge_drive_search_cache(user_id: str) -> None:
+    get_drive_search_cache().purge_user(user_id)
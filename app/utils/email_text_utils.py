@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import base64
+import codecs
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Iterable, Iterator
+
+# No tokenizer ships with the app; ~4 characters per token is close enough for English email
+# text to size a budget, and it errs on the side of returning slightly less.
+CHARS_PER_TOKEN = 4
+_DECODE_CHUNK = 64 * 1024  # multiple of 4, so every chunk is independently base64-decodable
+
+_SKIPPED_TAGS = frozenset({"head", "style", "script", "title", "noscript", "template", "svg"})
+_BLOCK_TAGS = frozenset(
+    {
+        "address", "article", "aside", "blockquote", "br", "div", "dl", "dt", "dd", "footer",
+        "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "main", "nav", "ol",
+        "p", "pre", "section", "table", "tr", "ul",
+    }
+)
+_VOID_TAGS = frozenset(
+    {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+)
+_QUOTE_CLASSES = ("gmail_quote", "gmail_extra", "yahoo_quoted", "moz-cite-prefix")
+_QUOTE_HEADER_RE = re.compile(
+    r"^\s*(On\b.{0,200}\bwrote:|-{2,}\s*Original Message\s*-{2,}|_{10,}|From:\s.+\s(Sent|Date):\s)",
+    re.IGNORECASE,
+)
+_OUTLOOK_FROM_RE = re.compile(r"^\s*From:\s", re.IGNORECASE)
+_OUTLOOK_FOLLOWUP_RE = re.compile(r"^\s*(Sent|Date):\s", re.IGNORECASE)
+_FORWARDED_RE = re.compile(r"^-{2,}\s*Forwarded message\s*-{2,}", re.IGNORECASE)
+_SIGNATURE_RE = re.compile(r"^(--\s?|Sent from my \w+.*|Get Outlook for \w+.*)$", re.IGNORECASE)
+_SPACES_RE = re.compile("[ \\t\\u00a0\\u200b\\u200c\\u200d\\ufeff]+")
+
+
+def _iter_decoded(data: str) -> Iterator[str]:
+    """Decode Gmail's unpadded urlsafe base64 body in bounded chunks."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for start in range(0, len(data), _DECODE_CHUNK):
+        chunk = data[start:start + _DECODE_CHUNK]
+        chunk += "=" * (-len(chunk) % 4)
+        yield decoder.decode(base64.urlsafe_b64decode(chunk.encode("ascii")))
+    yield decoder.decode(b"", final=True)
+
+
+class _HtmlTextParser(HTMLParser):
+    """Incremental HTML to text: drops head/style/script, images and quoted reply blocks."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._skip_stack: list[str] = []
+        self._pending: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self._skip_stack:
+            if tag not in _VOID_TAGS:
+                self._skip_stack.append(tag)
+            return
+        attributes = dict(attrs)
+        css_class = attributes.get("class") or ""
+        hidden = "display:none" in (attributes.get("style") or "").replace(" ", "").lower()
+        quoted = (tag == "blockquote" and attributes.get("type") == "cite") or any(
+            name in css_class for name in _QUOTE_CLASSES
+        )
+        if tag in _SKIPPED_TAGS or quoted or hidden:
+            if tag not in _VOID_TAGS:
+                self._skip_stack.append(tag)
+            return
+        if tag in _BLOCK_TAGS:
+            self._pending.append("\n")
+        elif tag == "td":
+            self._pending.append(" ")
+        elif tag == "li":
+            self._pending.append("\n- ")
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if not self._skip_stack and tag in ("br", "hr"):
+            self._pending.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._skip_stack:
+            if tag in self._skip_stack:
+                while self._skip_stack and self._skip_stack.pop() != tag:
+                    pass
+            return
+        if tag in _BLOCK_TAGS:
+            self._pending.append("\n")
+
+    def handle_data(self, data: str) -> None:
+        if not self._skip_stack:
+            self._pending.append(data)
+
+    def drain(self) -> str:
+        text = "".join(self._pending)
+        self._pending.clear()
+        return text
+
+
+def _html_to_text(chunks: Iterable[str]) -> Iterator[str]:
+    parser = _HtmlTextParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield parser.drain()
+    parser.close()
+    yield parser.drain()
+
+
+def _lines(chunks: Iterable[str]) -> Iterator[str]:
+    buffered = ""
+    for chunk in chunks:
+        buffered += chunk.replace("\r\n", "\n").replace("\r", "\n")
+        *complete, buffered = buffered.split("\n")
+        yield from complete
+    yield buffered
+
+
+def _compact_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Strip quoted history and signatures, collapse whitespace and blank runs."""
+    previous_blank = True
+    forwarded = False
+    held_from: str | None = None
+    for raw_line in lines:
+        line = _SPACES_RE.sub(" ", raw_line).strip()
+        if line.startswith(">"):
+            continue
+        if _QUOTE_HEADER_RE.match(line) or _SIGNATURE_RE.match(line):
+            return
+        # Outlook reply headers span lines ("From: ..." then "Sent: ..."), so a From: line is held
+        # until the next one. Forwarded messages carry the same block but are content.
+        forwarded = forwarded or bool(_FORWARDED_RE.match(line))
+        if held_from is not None:
+            if _OUTLOOK_FOLLOWUP_RE.match(line):
+                return
+            yield held_from
+            held_from = None
+        if not forwarded and _OUTLOOK_FROM_RE.match(line):
+            held_from = line
+            previous_blank = False
+            continue
+        if not line:
+            if not previous_blank:
+                yield ""
+            previous_blank = True
+            continue
+        previous_blank = False
+        yield line
+    if held_from is not None:
+        yield held_from
+
+
+def _find_part(payload: dict, mime_type: str) -> dict | None:
+    if payload.get("mimeType") == mime_type and (payload.get("body") or {}).get("data"):
+        return payload
+    for part in payload.get("parts", []) or []:
+        found = _find_part(part, mime_type)
+        if found is not None:
+            return found
+    return None
+
+
+def iter_message_text(payload: dict) -> Iterator[str]:
+    """
+    Stream a Gmail `format=full` payload as compact text lines.
+
+    Prefers text/plain and falls back to text/html converted to text; quoted reply history and
+    signatures are dropped. Nothing after the consumer stops iterating is decoded or parsed.
+    """
+    part = _find_part(payload, "text/plain")
+    if part is not None:
+        chunks: Iterable[str] = _iter_decoded(part["body"]["data"])
+    else:
+        part = _find_part(payload, "text/html")
+        if part is None:
+            return
+        chunks = _html_to_text(_iter_decoded(part["body"]["data"]))
+    lines = _compact_lines(_lines(chunks))
+    # Drop trailing blank lines left by a cut-off quote or signature.
+    blanks = 0
+    for line in lines:
+        if not line:
+            blanks += 1
+            continue
+        yield from [""] * blanks
+        blanks = 0
+        yield line
+
+
+def extract_message_text(payload: dict) -> str:
+    return "\n".join(iter_message_text(payload))
+
+
+@dataclass(frozen=True)
+class TextWindow:
+    text: str
+    next_cursor: int | None  # character offset to pass back for the rest, None when complete
+
+
+def token_budget_window(text: str, *, cursor: int = 0, max_tokens: int | None = None) -> TextWindow:
+    """Slice `text` from `cursor` to roughly `max_tokens`, ending on a line or word boundary."""
+    cursor = max(0, min(cursor, len(text)))
+    if max_tokens is None or max_tokens <= 0:
+        return TextWindow(text=text[cursor:], next_cursor=None)
+    end = cursor + max_tokens * CHARS_PER_TOKEN
+    if end >= len(text):
+        return TextWindow(text=text[cursor:], next_cursor=None)
+    floor = cursor + (end - cursor) // 2
+    boundary = text.rfind("\n", floor, end)
+    if boundary < 0:
+        boundary = text.rfind(" ", floor, end)
+    if boundary > cursor:
+        end = boundary
+    next_cursor = end
+    while next_cursor < len(text) and text[next_cursor] in " \n":
+        next_cursor += 1
+    return TextWindow(text=text[cursor:end].rstrip(), next_cursor=next_cursor if next_cursor < len(text) else None)
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from app.core.settings import get_gmail_auth_settings
+from app.schemas.integration_schemas.gmail import GmailMessage
+
+CacheKey = tuple[str, str, str]  # (user_id, message_id, format)
+MESSAGE_FORMATS = ("compact", "full", "raw")
+
+
+@dataclass
+class GmailMessageCacheMetrics:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stale_labels: int = 0
+    evictions: int = 0
+    purges: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class _CachedMessage:
+    # Message JSON without label_ids: content is immutable for a given id, labels are not.
+    content: bytes
+    label_ids: list[str]
+    labels_checked_at: float
+
+    @property
+    def size(self) -> int:
+        return len(self.content) + sum(len(label) for label in self.label_ids)
+
+
+def _encode(message: GmailMessage) -> bytes:
+    return message.model_dump_json(exclude={"label_ids"}).encode("utf-8")
+
+
+def _decode(entry: _CachedMessage) -> GmailMessage:
+    message = GmailMessage.model_validate_json(entry.content)
+    message.label_ids = list(entry.label_ids)
+    return message
+
+
+class _SqliteMessageStore:
+    """On-disk tier: one SQLite file, trimmed to `max_bytes` by least recent access."""
+
+    def __init__(self, path: Path, *, max_bytes: int) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS gmail_messages (
+                user_id TEXT NOT NULL,
+                message_id TEXT NOT NULL,
+                format TEXT NOT NULL,
+                content BLOB NOT NULL,
+                label_ids TEXT NOT NULL,
+                labels_checked_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (user_id, message_id, format)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS gmail_messages_accessed_at ON gmail_messages (accessed_at)"
+        )
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM gmail_messages"
+        ).fetchone()[0]
+
+    def get(self, key: CacheKey) -> _CachedMessage | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, label_ids, labels_checked_at FROM gmail_messages "
+                "WHERE user_id = ? AND message_id = ? AND format = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE gmail_messages SET accessed_at = ? WHERE user_id = ? AND message_id = ? AND format = ?",
+                (time.time(), *key),
+            )
+        content, label_ids, labels_checked_at = row
+        return _CachedMessage(
+            content=content,
+            label_ids=label_ids.split(",") if label_ids else [],
+            # Disk entries may outlive the process; labels_checked_at is wall-clock here.
+            labels_checked_at=labels_checked_at,
+        )
+
+    def put(self, key: CacheKey, entry: _CachedMessage) -> int:
+        """Store `entry`; returns how many rows were evicted to stay within budget."""
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM gmail_messages WHERE user_id = ? AND message_id = ? AND format = ?",
+                key,
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO gmail_messages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, entry.content, ",".join(entry.label_ids), entry.labels_checked_at, entry.size, time.time()),
+            )
+            self._total_bytes += entry.size - (previous[0] if previous else 0)
+            return self._trim()
+
+    def update_labels(self, user_id: str, message_id: str, label_ids: list[str], checked_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE gmail_messages SET label_ids = ?, labels_checked_at = ? WHERE user_id = ? AND message_id = ?",
+                (",".join(label_ids), checked_at, user_id, message_id),
+            )
+
+    def discard(self, user_id: str, message_id: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM gmail_messages WHERE user_id = ? AND message_id = ?",
+                (user_id, message_id),
+            )
+            self._recount()
+
+    def purge_user(self, user_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM gmail_messages WHERE user_id = ?", (user_id,))
+            self._recount()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM gmail_messages")
+            self._total_bytes = 0
+
+    def _recount(self) -> None:
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM gmail_messages"
+        ).fetchone()[0]
+
+    def _trim(self) -> int:
+        evicted = 0
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT user_id, message_id, format, size FROM gmail_messages ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            for user_id, message_id, format, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute(
+                    "DELETE FROM gmail_messages WHERE user_id = ? AND message_id = ? AND format = ?",
+                    (user_id, message_id, format),
+                )
+                self._total_bytes -= size
+                evicted += 1
+        return evicted
+
+
+class GmailMessageCache:
+    """Two-tier cache of parsed Gmail messages keyed by (user, message id, format).
+
+    Message content never changes for a given id, so entries only leave on eviction, purge or a
+    404. Labels do change: a hit whose labels are older than `label_ttl_seconds` is returned as
+    stale so the caller can re-read just the label ids.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int,
+        label_ttl_seconds: float,
+        disk_path: Path | None = None,
+        disk_max_bytes: int = 0,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.label_ttl_seconds = label_ttl_seconds
+        self._entries: OrderedDict[CacheKey, _CachedMessage] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._disk = (
+            _SqliteMessageStore(disk_path, max_bytes=disk_max_bytes)
+            if disk_path is not None and disk_max_bytes > 0
+            else None
+        )
+        self.metrics = GmailMessageCacheMetrics()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 or self._disk is not None
+
+    def get(self, user_id: str, message_id: str, format: str) -> tuple[GmailMessage, bool] | None:
+        """Return (message, labels_fresh) or None on a miss."""
+        key = (user_id, message_id, format)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.metrics.memory_hits += 1
+        if entry is None and self._disk is not None:
+            entry = self._disk.get(key)
+            if entry is not None:
+                self.metrics.disk_hits += 1
+                self._remember(key, entry)
+        if entry is None:
+            self.metrics.misses += 1
+            return None
+        labels_fresh = time.time() - entry.labels_checked_at < self.label_ttl_seconds
+        if not labels_fresh:
+            self.metrics.stale_labels += 1
+        return _decode(entry), labels_fresh
+
+    def get_many(
+        self,
+        user_id: str,
+        message_ids: list[str],
+        format: str,
+    ) -> dict[str, tuple[GmailMessage, bool]]:
+        found: dict[str, tuple[GmailMessage, bool]] = {}
+        for message_id in message_ids:
+            hit = self.get(user_id, message_id, format)
+            if hit is not None:
+                found[message_id] = hit
+        return found
+
+    def put(self, user_id: str, format: str, message: GmailMessage) -> None:
+        if not self.enabled:
+            return
+        key = (user_id, message.id, format)
+        entry = _CachedMessage(
+            content=_encode(message),
+            label_ids=list(message.label_ids),
+            labels_checked_at=time.time(),
+        )
+        self._remember(key, entry)
+        if self._disk is not None:
+            self.metrics.evictions += self._disk.put(key, entry)
+
+    def put_many(self, user_id: str, format: str, messages: list[GmailMessage]) -> None:
+        for message in messages:
+            self.put(user_id, format, message)
+
+    def update_labels(self, user_id: str, message_id: str, label_ids: list[str]) -> None:
+        checked_at = time.time()
+        with self._lock:
+            for format in MESSAGE_FORMATS:
+                entry = self._entries.get((user_id, message_id, format))
+                if entry is not None:
+                    self._total_bytes += len("".join(label_ids)) - len("".join(entry.label_ids))
+                    entry.label_ids = list(label_ids)
+                    entry.labels_checked_at = checked_at
+        if self._disk is not None:
+            self._disk.update_labels(user_id, message_id, label_ids, checked_at)
+
+    def discard(self, user_id: str, message_id: str) -> None:
+        with self._lock:
+            for format in MESSAGE_FORMATS:
+                entry = self._entries.pop((user_id, message_id, format), None)
+                if entry is not None:
+                    self._total_bytes -= entry.size
+        if self._disk is not None:
+            self._disk.discard(user_id, message_id)
+
+    def purge_user(self, user_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                self._total_bytes -= self._entries.pop(key).size
+            self.metrics.purges += 1
+        if self._disk is not None:
+            self._disk.purge_user(user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+        if self._disk is not None:
+            self._disk.clear()
+
+    def _remember(self, key: CacheKey, entry: _CachedMessage) -> None:
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous.size
+            self._entries[key] = entry
+            self._total_bytes += entry.size
+            while self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.size
+                self.metrics.evictions += 1
+
+
+_message_cache: GmailMessageCache | None = None
+
+
+def get_gmail_message_cache() -> GmailMessageCache:
+    global _message_cache
+    if _message_cache is None:
+        settings = get_gmail_auth_settings()
+        _message_cache = GmailMessageCache(
+            max_bytes=settings.message_cache_max_bytes,
+            label_ttl_seconds=settings.message_cache_label_ttl_seconds,
+            disk_path=Path(settings.message_cache_disk_path) if settings.message_cache_disk_path else None,
+            disk_max_bytes=settings.message_cache_disk_max_bytes,
+        )
+    return _message_cache
+
+
+def get_gmail_message_cache_metrics() -> dict[str, int]:
+    return get_gmail_message_cache().metrics.as_dict()
+
+
+def purge_gmail_message_cache(user_id: str) -> None:
+    get_gmail_message_cache().purge_user(user_id)
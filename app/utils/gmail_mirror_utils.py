@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+from app.core.settings import get_gmail_auth_settings
+from app.schemas.integration_schemas.gmail import GmailMessage
+
+MIRROR_PAGE_TOKEN_PREFIX = "mirror:"
+# "mirror-tail:<bound epoch seconds>:<Gmail page token>": live matches older than the mirror.
+MIRROR_TAIL_PAGE_TOKEN_PREFIX = "mirror-tail:"
+
+_TOKEN_RE = re.compile(r'(?P<op>[a-z_]+):(?P<value>"[^"]*"|\S+)|"(?P<phrase>[^"]*)"|(?P<word>\S+)', re.IGNORECASE)
+_RELATIVE_RE = re.compile(r"^(\d+)([dmy])$")
+_TEXT_COLUMNS = {"from": "sender", "to": "recipients", "subject": "subject"}
+_IS_LABELS = {"unread": "UNREAD", "starred": "STARRED", "important": "IMPORTANT"}
+_SYSTEM_LABELS = {"inbox", "sent", "spam", "trash", "draft", "drafts", "starred", "important", "unread", "chat"}
+_CATEGORIES = {
+    "primary": "CATEGORY_PERSONAL",
+    "social": "CATEGORY_SOCIAL",
+    "promotions": "CATEGORY_PROMOTIONS",
+    "updates": "CATEGORY_UPDATES",
+    "forums": "CATEGORY_FORUMS",
+}
+_RELATIVE_DAYS = {"d": 1, "m": 30, "y": 365}
+
+
+@dataclass
+class MirrorQuery:
+    """A Gmail query reduced to what the mirror can answer: FTS phrases, label and date filters."""
+
+    phrases: list[tuple[str, str]] = field(default_factory=list)  # (FTS column, phrase)
+    with_labels: list[str] = field(default_factory=list)
+    without_labels: list[str] = field(default_factory=list)
+    after_ms: int | None = None
+    before_ms: int | None = None
+
+
+def _system_label(value: str) -> str | None:
+    value = value.lower()
+    if value in _SYSTEM_LABELS:
+        return "DRAFT" if value == "drafts" else value.upper()
+    if value.startswith("category_") and value[len("category_"):] in _CATEGORIES:
+        return _CATEGORIES[value[len("category_"):]]
+    return None
+
+
+def _parse_date_ms(value: str) -> int | None:
+    if value.isdigit():
+        return int(value) * 1000
+    for pattern in ("%Y/%m/%d", "%Y-%m-%d"):
+        try:
+            parsed = datetime.strptime(value, pattern).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        return int(parsed.timestamp() * 1000)
+    return None
+
+
+def _relative_ms(value: str, now: datetime) -> int | None:
+    match = _RELATIVE_RE.match(value.lower())
+    if not match:
+        return None
+    delta = timedelta(days=int(match.group(1)) * _RELATIVE_DAYS[match.group(2)])
+    return int((now - delta).timestamp() * 1000)
+
+
+def parse_mirror_query(query: str, *, now: datetime | None = None) -> MirrorQuery | None:
+    """
+    Translate the common subset of Gmail search syntax, or return None so the caller goes live.
+
+    Supported: from:/to:/subject:, is:unread/read/starred/important, in:/label: with system
+    labels other than spam and trash (the seed lists messages without them), category:, after:/before: (UTC dates or epoch seconds) and newer_than:/older_than:.
+    Anything else (bare words and "quoted phrases", which Gmail also matches in message bodies,
+    OR, negation, braces, has:, filename:, size, user labels, ...) is left to Gmail.
+    """
+    now = now or datetime.now(timezone.utc)
+    parsed = MirrorQuery()
+    for match in _TOKEN_RE.finditer(query.strip()):
+        if match.group("phrase") is not None or match.group("word") is not None:
+            # Gmail matches bare words and phrases against the whole body, which is not mirrored.
+            return None
+        op, value = match.group("op").lower(), match.group("value").strip('"')
+        if not value:
+            return None
+        if op in _TEXT_COLUMNS:
+            parsed.phrases.append((_TEXT_COLUMNS[op], value))
+        elif op == "is":
+            value = value.lower()
+            if value == "read":
+                parsed.without_labels.append("UNREAD")
+            elif value in _IS_LABELS:
+                parsed.with_labels.append(_IS_LABELS[value])
+            else:
+                return None
+        elif op in ("in", "label"):
+            label = _system_label(value)
+            if label is None or label in ("SPAM", "TRASH"):
+                # Only mail moved there after seeding would be mirrored; Gmail has all of it.
+                return None
+            parsed.with_labels.append(label)
+        elif op == "category" and value.lower() in _CATEGORIES:
+            parsed.with_labels.append(_CATEGORIES[value.lower()])
+        elif op in ("after", "newer", "before", "older"):
+            bound = _parse_date_ms(value)
+            if bound is None:
+                return None
+            if op in ("after", "newer"):
+                parsed.after_ms = max(parsed.after_ms or bound, bound)
+            else:
+                parsed.before_ms = min(parsed.before_ms or bound, bound)
+        elif op in ("newer_than", "older_than"):
+            bound = _relative_ms(value, now)
+            if bound is None:
+                return None
+            if op == "newer_than":
+                parsed.after_ms = max(parsed.after_ms or bound, bound)
+            else:
+                parsed.before_ms = min(parsed.before_ms or bound, bound)
+        else:
+            return None
+    # Like Gmail, spam and trash only match when asked for explicitly, which goes live.
+    parsed.without_labels.extend(["SPAM", "TRASH"])
+    return parsed
+
+
+def _fts_phrase(column: str, phrase: str) -> str:
+    quoted = '"' + phrase.replace('"', '""') + '"'
+    return f"{column} : {quoted}"
+
+
+@dataclass(frozen=True)
+class MirroredMessage:
+    message: GmailMessage
+    internal_date: int  # epoch milliseconds, as Gmail's internalDate
+
+
+@dataclass(frozen=True)
+class MirrorState:
+    history_id: str
+    synced_at: float
+    # Every message with internalDate >= this is mirrored; None: the seed reached the oldest message.
+    covered_from_ms: int | None = None
+
+
+class GmailMailboxMirror:
+    """Compact per-user copy of Gmail metadata in SQLite, searchable through an FTS5 index.
+
+    Rows hold what `read_message(format="compact")` returns (headers, labels, snippet); the
+    caller seeds a user once and then applies `users.history.list` deltas from `history_id`.
+    """
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS mirror_state (
+                user_id TEXT PRIMARY KEY,
+                history_id TEXT NOT NULL,
+                synced_at REAL NOT NULL,
+                covered_from_ms INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                message_id TEXT NOT NULL,
+                thread_id TEXT NOT NULL,
+                sender TEXT,
+                recipients TEXT,
+                subject TEXT,
+                date TEXT,
+                internal_date INTEGER NOT NULL,
+                labels TEXT NOT NULL,
+                snippet TEXT,
+                UNIQUE (user_id, message_id)
+            );
+            CREATE INDEX IF NOT EXISTS messages_user_date ON messages (user_id, internal_date DESC);
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                sender, recipients, subject, snippet, content='messages', content_rowid='id'
+            );
+            CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts (rowid, sender, recipients, subject, snippet)
+                VALUES (new.id, new.sender, new.recipients, new.subject, new.snippet);
+            END;
+            CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+                INSERT INTO messages_fts (messages_fts, rowid, sender, recipients, subject, snippet)
+                VALUES ('delete', old.id, old.sender, old.recipients, old.subject, old.snippet);
+            END;
+            CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF sender, recipients, subject, snippet ON messages BEGIN
+                INSERT INTO messages_fts (messages_fts, rowid, sender, recipients, subject, snippet)
+                VALUES ('delete', old.id, old.sender, old.recipients, old.subject, old.snippet);
+                INSERT INTO messages_fts (rowid, sender, recipients, subject, snippet)
+                VALUES (new.id, new.sender, new.recipients, new.subject, new.snippet);
+            END;
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(mirror_state)")}
+        if "covered_from_ms" not in columns:
+            # Mirrors seeded before coverage was tracked have an unknown bound; reseed them.
+            self._conn.execute("ALTER TABLE mirror_state ADD COLUMN covered_from_ms INTEGER")
+            self._conn.execute("DELETE FROM mirror_state")
+
+    def state(self, user_id: str) -> MirrorState | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT history_id, synced_at, covered_from_ms FROM mirror_state WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return MirrorState(history_id=row[0], synced_at=row[1], covered_from_ms=row[2]) if row else None
+
+    def replace(
+        self,
+        user_id: str,
+        messages: list[MirroredMessage],
+        history_id: str,
+        covered_from_ms: int | None = None,
+    ) -> None:
+        """Seed: drop whatever is stored for the user and load a fresh snapshot."""
+        with self._lock, self._transaction():
+            self._conn.execute("DELETE FROM messages WHERE user_id = ?", (user_id,))
+            self._upsert(user_id, messages)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO mirror_state (user_id, history_id, synced_at, covered_from_ms) "
+                "VALUES (?, ?, ?, ?)",
+                (user_id, history_id, time.time(), covered_from_ms),
+            )
+
+    def apply(
+        self,
+        user_id: str,
+        *,
+        upserts: list[MirroredMessage],
+        deletions: list[str],
+        label_updates: dict[str, list[str]],
+        history_id: str,
+    ) -> None:
+        with self._lock, self._transaction():
+            self._upsert(user_id, upserts)
+            self._conn.executemany(
+                "DELETE FROM messages WHERE user_id = ? AND message_id = ?",
+                [(user_id, message_id) for message_id in deletions],
+            )
+            self._conn.executemany(
+                "UPDATE messages SET labels = ? WHERE user_id = ? AND message_id = ?",
+                [(_labels_column(labels), user_id, message_id) for message_id, labels in label_updates.items()],
+            )
+            self._set_state(user_id, history_id)
+
+    def search(
+        self,
+        user_id: str,
+        query: MirrorQuery,
+        *,
+        limit: int,
+        offset: int = 0,
+    ) -> tuple[list[GmailMessage], bool]:
+        """Newest-first matches for `query`; the flag says whether more rows follow."""
+        clauses = ["user_id = ?"]
+        params: list[object] = [user_id]
+        if query.phrases:
+            clauses.append("id IN (SELECT rowid FROM messages_fts WHERE messages_fts MATCH ?)")
+            params.append(" AND ".join(_fts_phrase(column, phrase) for column, phrase in query.phrases))
+        for label in query.with_labels:
+            clauses.append("labels LIKE ?")
+            params.append(f"% {label} %")
+        for label in query.without_labels:
+            clauses.append("labels NOT LIKE ?")
+            params.append(f"% {label} %")
+        if query.after_ms is not None:
+            clauses.append("internal_date >= ?")
+            params.append(query.after_ms)
+        if query.before_ms is not None:
+            clauses.append("internal_date < ?")
+            params.append(query.before_ms)
+        params.extend([limit + 1, offset])
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT message_id, thread_id, labels, sender, recipients, subject, date, snippet "
+                f"FROM messages WHERE {' AND '.join(clauses)} "
+                "ORDER BY internal_date DESC, id DESC LIMIT ? OFFSET ?",
+                params,
+            ).fetchall()
+        messages = [
+            GmailMessage(
+                id=message_id,
+                thread_id=thread_id,
+                label_ids=labels.split(),
+                from_=sender,
+                to=recipients,
+                subject=subject,
+                date=date,
+                msg_body=snippet or "",
+            )
+            for message_id, thread_id, labels, sender, recipients, subject, date, snippet in rows[:limit]
+        ]
+        return messages, len(rows) > limit
+
+    def purge_user(self, user_id: str) -> None:
+        with self._lock, self._transaction():
+            self._conn.execute("DELETE FROM messages WHERE user_id = ?", (user_id,))
+            self._conn.execute("DELETE FROM mirror_state WHERE user_id = ?", (user_id,))
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self._conn.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _upsert(self, user_id: str, messages: list[MirroredMessage]) -> None:
+        self._conn.executemany(
+            """
+            INSERT INTO messages (
+                user_id, message_id, thread_id, sender, recipients, subject, date, internal_date, labels, snippet
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (user_id, message_id) DO UPDATE SET
+                thread_id = excluded.thread_id,
+                sender = excluded.sender,
+                recipients = excluded.recipients,
+                subject = excluded.subject,
+                date = excluded.date,
+                internal_date = excluded.internal_date,
+                labels = excluded.labels,
+                snippet = excluded.snippet
+            """,
+            [
+                (
+                    user_id,
+                    item.message.id,
+                    item.message.thread_id,
+                    item.message.from_,
+                    item.message.to,
+                    item.message.subject,
+                    item.message.date,
+                    item.internal_date,
+                    _labels_column(item.message.label_ids),
+                    item.message.msg_body,
+                )
+                for item in messages
+            ],
+        )
+
+    def _set_state(self, user_id: str, history_id: str) -> None:
+        self._conn.execute(
+            "UPDATE mirror_state SET history_id = ?, synced_at = ? WHERE user_id = ?",
+            (history_id, time.time(), user_id),
+        )
+
+
+def _labels_column(labels: list[str] | None) -> str:
+    # Space-padded so a label filter is a LIKE '% LABEL %' without partial-name matches.
+    return f" {' '.join(labels or [])} "
+
+
+_mailbox_mirror: GmailMailboxMirror | None = None
+_mailbox_mirror_configured = False
+_mailbox_mirror_lock = threading.Lock()
+
+
+def get_gmail_mailbox_mirror() -> GmailMailboxMirror | None:
+    """The process-wide mirror, or None when `GMAIL_MIRROR_PATH` is not configured."""
+    global _mailbox_mirror, _mailbox_mirror_configured
+    if not _mailbox_mirror_configured:
+        with _mailbox_mirror_lock:
+            if not _mailbox_mirror_configured:
+                path = get_gmail_auth_settings().mirror_path
+                _mailbox_mirror = GmailMailboxMirror(Path(path)) if path else None
+                _mailbox_mirror_configured = True
+    return _mailbox_mirror
+
+
+def purge_gmail_mailbox_mirror(user_id: str) -> None:
+    mirror = get_gmail_mailbox_mirror()
+    if mirror is not None:
+        mirror.purge_user(user_id)
@@ -1,18 +1,32 @@
-from app.db.gmail_sql import get_gmail_creds
+import httplib2
+import httpx
+from google.oauth2.credentials import Credentials
+from googleapiclient.errors import HttpError
+
+from app.db.gmail_sql import get_gmail_creds, update_gmail_access_token_service
 from app.core.settings import get_gmail_auth_settings
 from app.core.enums import GoogleApps
-from app.utils.google_utils import google_api, get_google_client_for_user
+from app.utils.google_rate_limit_utils import GMAIL_QUOTA_UNITS, is_rate_limit_error
+from app.utils.google_utils import credentials_expiry_iso, google_api, get_google_client_for_user
 
 settings = get_gmail_auth_settings()
 
 
-def gmail_api(fn=None):
-    decorator = google_api(service_label=GoogleApps.GMAIL.value)
+def gmail_api(fn=None, *, quota_units: int = GMAIL_QUOTA_UNITS["messages.get"]):
+    decorator = google_api(service_label=GoogleApps.GMAIL.value, quota_units=quota_units)
     if fn is None:
         return decorator
     return decorator(fn)
 
 
+async def store_refreshed_gmail_tokens(user_id: str, creds: Credentials) -> bool:
+    return await update_gmail_access_token_service(
+        user_id=user_id,
+        access_token=creds.token,
+        access_token_expires_at=credentials_expiry_iso(creds),
+    )
+
+
 async def get_gmail_client_for_user(user_id: str, user_jwt: str): 
     return await get_google_client_for_user(
         user_id=user_id,
@@ -22,4 +36,18 @@ async def get_gmail_client_for_user(user_id: str, user_jwt: str):
         api_service="gmail",
         api_version="v1",
         service_label=GoogleApps.GMAIL.value,
+        token_writer=store_refreshed_gmail_tokens,
     )
+
+
+# Gmail rejects batches above 100 sub-requests.
+GMAIL_BATCH_LIMIT = 100
+_RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def is_retryable_gmail_error(exc: BaseException) -> bool:
+    if isinstance(exc, HttpError):
+        status = getattr(exc.resp, "status", None)
+        # BatchError (a malformed batch response) carries no status.
+        return status is None or status in _RETRYABLE_STATUSES or is_rate_limit_error(exc)
+    return isinstance(exc, (OSError, httplib2.HttpLib2Error, httpx.TransportError))
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import io
+import urllib.parse
+from dataclasses import asdict, dataclass
+from email.generator import Generator
+from email.mime.multipart import MIMEMultipart
+from email.mime.nonmultipart import MIMENonMultipart
+from email.parser import FeedParser
+from typing import Any, Callable
+
+import httplib2
+import httpx
+from fastapi.concurrency import run_in_threadpool
+from google.auth.transport.requests import Request
+from googleapiclient.errors import BatchError, HttpError
+from googleapiclient.http import MAX_URI_LENGTH, BatchHttpRequest, HttpRequest
+
+from app.core.settings import get_settings
+
+
+@dataclass
+class GoogleAsyncHttpMetrics:
+    requests: int = 0
+    batch_requests: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    credential_refreshes: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class GoogleAsyncHttp:
+    """Sends discovery-built Google requests from the event loop over one pooled HTTP/2 client.
+
+    Requests are still built by googleapiclient (URL, query, headers, response model), so callers
+    get the same dicts back and the same HttpError on non-2xx; only the round trip moves off the
+    threadpool. Credentials come from the request's AuthorizedHttp and are refreshed at most once
+    per call on a 401, like google_auth_httplib2 does.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry_seconds: float,
+        timeout_seconds: float,
+        http2: bool = True,
+    ) -> None:
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_seconds,
+        )
+        self._timeout = httpx.Timeout(timeout_seconds)
+        self._http2 = http2
+        self._http_client: httpx.AsyncClient | None = None
+        self.metrics = GoogleAsyncHttpMetrics()
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                http2=self._http2,
+                limits=self._limits,
+                timeout=self._timeout,
+            )
+        return self._http_client
+
+    async def _send(
+        self,
+        uri: str,
+        *,
+        method: str,
+        body: str | bytes | None,
+        headers: dict[str, str],
+        credentials: Any,
+    ) -> tuple[httplib2.Response, bytes]:
+        """One round trip, returned in httplib2's (response, content) shape."""
+        refreshed = False
+        while True:
+            if credentials is not None:
+                if not credentials.valid:
+                    await self._refresh(credentials)
+                    refreshed = True
+                credentials.apply(headers)
+            self.metrics.requests += 1
+            self.metrics.in_flight += 1
+            self.metrics.peak_in_flight = max(self.metrics.peak_in_flight, self.metrics.in_flight)
+            try:
+                response = await self._get_http_client().request(method, uri, content=body, headers=headers)
+            finally:
+                self.metrics.in_flight -= 1
+            if response.status_code == 401 and credentials is not None and not refreshed:
+                await self._refresh(credentials)
+                refreshed = True
+                continue
+            resp = httplib2.Response({"status": str(response.status_code), **response.headers})
+            resp.reason = response.reason_phrase
+            return resp, response.content
+
+    async def _refresh(self, credentials: Any) -> None:
+        await run_in_threadpool(credentials.refresh, Request())
+        self.metrics.credential_refreshes += 1
+
+    async def execute(self, request: HttpRequest) -> Any:
+        """Async equivalent of `HttpRequest.execute()` for non-resumable requests."""
+        uri, method, body = request.uri, request.method, request.body
+        headers = dict(request.headers)
+        if "content-length" not in headers:
+            headers["content-length"] = str(request.body_size)
+        if len(uri) > MAX_URI_LENGTH and method == "GET":
+            parsed = urllib.parse.urlparse(uri)
+            uri = urllib.parse.urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, None, None))
+            method, body = "POST", parsed.query
+            headers.update(
+                {
+                    "x-http-method-override": "GET",
+                    "content-type": "application/x-www-form-urlencoded",
+                    "content-length": str(len(body)),
+                }
+            )
+        resp, content = await self._send(
+            uri,
+            method=method,
+            body=body,
+            headers=headers,
+            credentials=getattr(request.http, "credentials", None),
+        )
+        if resp.status >= 300:
+            raise HttpError(resp, content, uri=request.uri)
+        return request.postproc(resp, content)
+
+    async def execute_batch(self, batch: BatchHttpRequest) -> None:
+        """Async equivalent of `BatchHttpRequest.execute()`: one multipart POST, then callbacks.
+
+        Serialization and parsing reuse the batch object's own helpers so sub-requests are
+        encoded exactly as googleapiclient would. Sub-requests answered with 401 are re-sent once
+        in a second batch after the credentials are refreshed.
+        """
+        if not batch._order:
+            return
+        credentials = next(
+            (
+                getattr(batch._requests[request_id].http, "credentials", None)
+                for request_id in batch._order
+                if batch._requests[request_id].http is not None
+            ),
+            None,
+        )
+        if credentials is not None and not credentials.valid:
+            await self._refresh(credentials)
+        responses = await self._execute_batch_once(batch, batch._order, credentials)
+        unauthorized = [request_id for request_id in batch._order if responses[request_id][0].status == 401]
+        if unauthorized and credentials is not None:
+            await self._refresh(credentials)
+            responses.update(await self._execute_batch_once(batch, unauthorized, credentials))
+
+        for request_id in batch._order:
+            resp, content = responses[request_id]
+            request = batch._requests[request_id]
+            response = None
+            exception = None
+            try:
+                if resp.status >= 300:
+                    raise HttpError(resp, content, uri=request.uri)
+                response = request.postproc(resp, content)
+            except HttpError as exc:
+                exception = exc
+            callback = batch._callbacks[request_id]
+            if callback is not None:
+                callback(request_id, response, exception)
+            if batch._callback is not None:
+                batch._callback(request_id, response, exception)
+
+    async def _execute_batch_once(
+        self,
+        batch: BatchHttpRequest,
+        order: list[str],
+        credentials: Any,
+    ) -> dict[str, tuple[httplib2.Response, bytes]]:
+        message = MIMEMultipart("mixed")
+        setattr(message, "_write_headers", lambda self: None)
+        for request_id in order:
+            part = MIMENonMultipart("application", "http")
+            part["Content-Transfer-Encoding"] = "binary"
+            part["Content-ID"] = batch._id_to_header(request_id)
+            part.set_payload(batch._serialize_request(batch._requests[request_id]))
+            message.attach(part)
+        fp = io.StringIO()
+        Generator(fp, mangle_from_=False).flatten(message, unixfrom=False)
+
+        self.metrics.batch_requests += 1
+        resp, content = await self._send(
+            batch._batch_uri,
+            method="POST",
+            body=fp.getvalue(),
+            headers={"content-type": f'multipart/mixed; boundary="{message.get_boundary()}"'},
+            credentials=credentials,
+        )
+        if resp.status >= 300:
+            raise HttpError(resp, content, uri=batch._batch_uri)
+
+        text = content.decode("utf-8")
+        parser = FeedParser()
+        parser.feed(f"content-type: {resp['content-type']}\r\n\r\n{text}")
+        mime_response = parser.close()
+        if not mime_response.is_multipart():
+            raise BatchError("Response not in multipart/mixed format.", resp=resp, content=text)
+        responses: dict[str, tuple[httplib2.Response, bytes]] = {}
+        for part in mime_response.get_payload():
+            part_resp, part_content = batch._deserialize_response(part.get_payload())
+            if isinstance(part_content, str):
+                part_content = part_content.encode("utf-8")
+            responses[batch._header_to_id(part["Content-ID"])] = (part_resp, part_content)
+        missing = [request_id for request_id in order if request_id not in responses]
+        if missing:
+            raise BatchError(f"Batch response is missing {len(missing)} sub-responses.", resp=resp, content=text)
+        return responses
+
+    async def aclose(self) -> None:
+        client = self._http_client
+        self._http_client = None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+
+_google_async_http: GoogleAsyncHttp | None = None
+
+
+def get_google_async_http() -> GoogleAsyncHttp:
+    global _google_async_http
+    if _google_async_http is None:
+        settings = get_settings()
+        _google_async_http = GoogleAsyncHttp(
+            max_connections=settings.google_http_max_connections,
+            max_keepalive_connections=settings.google_http_max_keepalive_connections,
+            keepalive_expiry_seconds=settings.google_http_keepalive_expiry_seconds,
+            timeout_seconds=settings.google_http_timeout_seconds,
+            http2=settings.google_http2_enabled,
+        )
+    return _google_async_http
+
+
+def get_google_async_http_metrics() -> dict[str, int]:
+    return get_google_async_http().metrics.as_dict()
+
+
+async def close_google_async_http() -> None:
+    global _google_async_http
+    client, _google_async_http = _google_async_http, None
+    if client is not None:
+        await client.aclose()
+
+
+def _use_async_transport() -> bool:
+    return get_settings().google_api_transport == "httpx"
+
+
+async def execute_google_request(request: HttpRequest) -> Any:
+    """Execute a discovery-built request on the configured transport (`GOOGLE_API_TRANSPORT`)."""
+    if _use_async_transport() and request.resumable is None:
+        return await get_google_async_http().execute(request)
+    return await run_in_threadpool(request.execute)
+
+
+async def execute_google_batch(batch: BatchHttpRequest) -> None:
+    if _use_async_transport():
+        await get_google_async_http().execute_batch(batch)
+    else:
+        await run_in_threadpool(batch.execute)
+
+
+async def execute_google_api_batch(
+    service: Any,
+    request_ids: list[str],
+    build_request: Callable[[str], HttpRequest],
+    *,
+    limit: int,
+) -> tuple[dict[str, dict], dict[str, Exception]]:
+    """Send one multipart batch call of at most `limit` requests; returns (responses, errors) keyed by request id."""
+    if len(request_ids) > limit:
+        raise ValueError(f"Google API batches are limited to {limit} requests")
+    responses: dict[str, dict] = {}
+    errors: dict[str, Exception] = {}
+
+    def _collect(request_id: str, response: dict, exception: Exception | None) -> None:
+        if exception is not None:
+            errors[request_id] = exception
+        else:
+            responses[request_id] = response
+
+    batch = service.new_batch_http_request(callback=_collect)
+    for request_id in request_ids:
+        batch.add(build_request(request_id), request_id=request_id)
+    await execute_google_batch(batch)
+    return responses, errors
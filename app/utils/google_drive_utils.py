@@ -1,16 +1,29 @@
-from app.utils.google_utils import get_google_client_for_user, google_api
+from google.oauth2.credentials import Credentials
+
+from app.utils.google_rate_limit_utils import DRIVE_QUOTA_UNITS
+from app.utils.google_utils import credentials_expiry_iso, get_google_client_for_user, google_api
 from app.core.enums import GoogleApps
 from app.core.settings import get_google_drive_settings
-from app.db.google_drive_sql import get_google_drive_creds
+from app.db.google_drive_sql import get_google_drive_creds, update_google_drive_access_token_service
+
+DRIVE_BATCH_LIMIT = 100
 
 
-def google_drive_api(fn=None):
-    decorator = google_api(service_label=GoogleApps.DRIVE.value)
+def google_drive_api(fn=None, *, quota_units: int = DRIVE_QUOTA_UNITS):
+    decorator = google_api(service_label=GoogleApps.DRIVE.value, quota_units=quota_units)
     if fn is None: 
         return decorator
     return decorator(fn)
 
 
+async def store_refreshed_google_drive_tokens(user_id: str, creds: Credentials) -> bool:
+    return await update_google_drive_access_token_service(
+        user_id=user_id,
+        access_token=creds.token,
+        access_token_expires_at=credentials_expiry_iso(creds),
+    )
+
+
 async def get_google_drive_client_for_user(user_id: str, user_jwt: str): 
     return await get_google_client_for_user(
         user_id=user_id, 
@@ -20,4 +33,5 @@ async def get_google_drive_client_for_user(user_id: str, user_jwt: str):
         api_service='drive', 
         api_version='v3', 
         service_label=GoogleApps.DRIVE.value,
+        token_writer=store_refreshed_google_drive_tokens,
     )
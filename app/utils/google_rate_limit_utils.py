@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+from googleapiclient.errors import HttpError
+
+from app.core.settings import get_settings
+
+# Per-method cost in Gmail quota units (https://developers.google.com/gmail/api/reference/quota).
+# Batch calls are charged per sub-request.
+GMAIL_QUOTA_UNITS: dict[str, int] = {
+    "messages.list": 5,
+    "messages.get": 5,
+    "threads.get": 10,
+    "history.list": 2,
+    "labels.list": 1,
+    "getProfile": 1,
+}
+# Drive quotas count requests, not weighted units.
+DRIVE_QUOTA_UNITS = 1
+
+_RATE_LIMIT_REASONS = frozenset({"rateLimitExceeded", "userRateLimitExceeded"})
+_TRANSIENT_STATUSES = frozenset({429, 500, 502, 503, 504})
+_MAX_TRACKED_LIMITS = 4096
+
+
+@dataclass
+class GoogleRateLimitMetrics:
+    requests: int = 0
+    throttled: int = 0
+    throttle_wait_seconds: float = 0.0
+    concurrency_waits: int = 0
+    rate_limited_responses: int = 0
+    retries: int = 0
+    retry_wait_seconds: float = 0.0
+    exhausted: int = 0
+
+    def as_dict(self) -> dict[str, float]:
+        return asdict(self)
+
+
+class _TokenBucket:
+    def __init__(self, *, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def reserve(self, units: float) -> float:
+        """Take `units` now, going into debt if needed; returns how long the caller must wait.
+
+        Reservations larger than the bucket are charged in full, so oversized batches still
+        average out to the configured rate.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        self._tokens -= units
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+@dataclass
+class _UserApiLimits:
+    bucket: _TokenBucket | None
+    slots: asyncio.Semaphore
+    loop: asyncio.AbstractEventLoop
+
+
+class GoogleRateLimiter:
+    """Per-(user, api) token bucket plus a bound on in-flight requests.
+
+    Buckets are refilled at the API's per-user quota rate and start full, so short bursts up to
+    one second of quota go straight through. Callers that overdraw wait their turn in arrival
+    order instead of being sent to Google and answered with 429s.
+    """
+
+    def __init__(self, *, rates: dict[str, float], max_concurrency: int) -> None:
+        self._rates = rates
+        self._max_concurrency = max(1, max_concurrency)
+        self._limits: OrderedDict[tuple[str, str], _UserApiLimits] = OrderedDict()
+        self.metrics = GoogleRateLimitMetrics()
+
+    def _limits_for(self, user_id: str, api: str) -> _UserApiLimits:
+        key = (user_id, api)
+        loop = asyncio.get_running_loop()
+        limits = self._limits.get(key)
+        if limits is None or limits.loop is not loop:
+            rate = self._rates.get(api, 0.0)
+            limits = _UserApiLimits(
+                bucket=_TokenBucket(rate=rate, capacity=rate) if rate > 0 else None,
+                slots=asyncio.Semaphore(self._max_concurrency),
+                loop=loop,
+            )
+            self._limits[key] = limits
+        self._limits.move_to_end(key)
+        while len(self._limits) > _MAX_TRACKED_LIMITS:
+            self._limits.popitem(last=False)
+        return limits
+
+    @asynccontextmanager
+    async def limit(self, user_id: str, api: str, units: float) -> AsyncIterator[None]:
+        limits = self._limits_for(user_id, api)
+        if limits.bucket is not None:
+            wait_seconds = limits.bucket.reserve(units)
+            if wait_seconds > 0:
+                self.metrics.throttled += 1
+                self.metrics.throttle_wait_seconds += wait_seconds
+                await asyncio.sleep(wait_seconds)
+        if limits.slots.locked():
+            self.metrics.concurrency_waits += 1
+        async with limits.slots:
+            self.metrics.requests += 1
+            yield
+
+
+_rate_limiter: GoogleRateLimiter | None = None
+
+
+def get_google_rate_limiter() -> GoogleRateLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
+        settings = get_settings()
+        _rate_limiter = GoogleRateLimiter(
+            rates={
+                "gmail": settings.gmail_quota_units_per_second,
+                "drive": settings.drive_quota_requests_per_second,
+            },
+            max_concurrency=settings.google_api_max_concurrency_per_user,
+        )
+    return _rate_limiter
+
+
+def get_google_rate_limit_metrics() -> dict[str, float]:
+    return get_google_rate_limiter().metrics.as_dict()
+
+
+def _error_reasons(exc: HttpError) -> set[str]:
+    try:
+        data = json.loads(exc.content.decode("utf-8"))
+        errors = data["error"].get("errors") or []
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return set()
+    return {error.get("reason") for error in errors if isinstance(error, dict)}
+
+
+def retry_after_seconds(exc: HttpError) -> float | None:
+    value = exc.resp.get("retry-after") if exc.resp is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    if not isinstance(exc, HttpError) or exc.resp is None:
+        return False
+    status = exc.resp.status
+    return status == 429 or (status == 403 and bool(_error_reasons(exc) & _RATE_LIMIT_REASONS))
+
+
+def retry_delay_seconds(
+    exc: BaseException,
+    attempt: int,
+    *,
+    base_seconds: float,
+    max_seconds: float,
+) -> float | None:
+    """Backoff before retry number `attempt` (0-based), or None when `exc` should not be retried.
+
+    Honors Retry-After when Google sends it; a Retry-After beyond `max_seconds` is not waited on.
+    """
+    if not isinstance(exc, HttpError) or exc.resp is None:
+        return None
+    if not is_rate_limit_error(exc) and exc.resp.status not in _TRANSIENT_STATUSES:
+        return None
+    retry_after = retry_after_seconds(exc)
+    if retry_after is not None:
+        return retry_after if retry_after <= max_seconds else None
+    return min(max_seconds, base_seconds * 2 ** attempt) + random.uniform(0, base_seconds)
@@ -1,46 +1,75 @@
 from __future__ import annotations
 
+import asyncio
+from collections import OrderedDict
+import contextlib
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+import hashlib
 import inspect
-from functools import wraps
-from typing import Awaitable, Callable, Protocol
+import json
+import threading
+import time
+from functools import partial, wraps
+from typing import Any, Awaitable, Callable, Protocol
 
 from fastapi import HTTPException
 from fastapi.concurrency import run_in_threadpool
+from google.auth.credentials import AnonymousCredentials
 from google.auth.exceptions import RefreshError
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError, UnknownApiNameOrVersion
+from googleapiclient.http import HttpRequest, build_http
 
-from app.core.settings import GoogleAuthSettings
+from app.core.settings import GoogleAuthSettings, get_settings
+from app.utils.google_rate_limit_utils import (
+    get_google_rate_limiter,
+    is_rate_limit_error,
+    retry_delay_seconds,
+)
 
 
 class GoogleCreds(Protocol):
     access_token: str | None
     refresh_token: str | None
+    access_token_expires_at: str | None
 
 
-def google_api(service_label: str):
+# Stores a refreshed access token; False when the connection is no longer active (disconnected).
+TokenWriter = Callable[[str, Credentials], Awaitable[bool]]
+
+
+def google_api(service_label: str, *, quota_units: float = 1):
     """
     Decorator for Google API tool functions.
     Supports usage as @google_api("Gmail") or google_api("Drive")(fn).
+
+    Each call is admitted through the per-user rate limiter, charged `quota_units`, and retried
+    with Retry-After-aware exponential backoff on rate-limit and transient Google errors.
     """
     def decorator(func):
         if inspect.iscoroutinefunction(func):
-            @wraps(func)
-            async def async_wrapper(*args, **kwargs):
-                try:
-                    return await func(*args, **kwargs)
-                except RefreshError as exc:
-                    raise HTTPException(
-                        status_code=401,
-                        detail=f"{service_label} credentials expired",
-                    ) from exc
-            return async_wrapper
+            call = func
+        else:
+            async def call(*args, **kwargs):
+                return await run_in_threadpool(func, *args, **kwargs)
 
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
+            user_id = kwargs.get("user_id", args[0] if args else None)
             try:
-                return await run_in_threadpool(func, *args, **kwargs)
+                return await _call_within_quota(
+                    call,
+                    args,
+                    kwargs,
+                    service_label=service_label,
+                    user_id=user_id,
+                    quota_units=quota_units,
+                )
             except RefreshError as exc:
                 raise HTTPException(
                     status_code=401,
@@ -51,6 +80,303 @@ def google_api(service_label: str):
     return decorator
 
 
+async def _call_within_quota(
+    call: Callable[..., Awaitable[Any]],
+    args: tuple,
+    kwargs: dict,
+    *,
+    service_label: str,
+    user_id: str | None,
+    quota_units: float,
+):
+    settings = get_settings()
+    limiter = get_google_rate_limiter()
+    attempt = 0
+    while True:
+        try:
+            if user_id is None:
+                return await call(*args, **kwargs)
+            async with limiter.limit(str(user_id), service_label, quota_units):
+                return await call(*args, **kwargs)
+        except HttpError as exc:
+            if is_rate_limit_error(exc):
+                limiter.metrics.rate_limited_responses += 1
+            delay = retry_delay_seconds(
+                exc,
+                attempt,
+                base_seconds=settings.google_api_retry_base_seconds,
+                max_seconds=settings.google_api_retry_max_seconds,
+            )
+            if delay is None:
+                raise
+            if attempt >= settings.google_api_max_retries:
+                limiter.metrics.exhausted += 1
+                raise
+            limiter.metrics.retries += 1
+            limiter.metrics.retry_wait_seconds += delay
+            print(
+                f"[google_api] {service_label} call failed with {exc.resp.status}; "
+                f"retry {attempt + 1}/{settings.google_api_max_retries} in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+_discovery_documents: dict[tuple[str, str], dict[str, Any]] = {}
+_discovery_documents_lock = threading.Lock()
+
+
+def _materialize_resources(resource, resource_desc: dict[str, Any]) -> None:
+    for name, child_desc in resource_desc.get("resources", {}).items():
+        _materialize_resources(getattr(resource, name)(), child_desc)
+
+
+def _load_discovery_document(api_service: str, api_version: str) -> dict[str, Any]:
+    """Parse the discovery document bundled with googleapiclient once per process."""
+    key = (api_service, api_version)
+    document = _discovery_documents.get(key)
+    if document is not None:
+        return document
+    with _discovery_documents_lock:
+        document = _discovery_documents.get(key)
+        if document is None:
+            raw_document = get_static_doc(api_service, api_version)
+            if raw_document is None:
+                raise UnknownApiNameOrVersion(f"name: {api_service}  version: {api_version}")
+            document = json.loads(raw_document)
+            # build_from_document fixes up method descriptions in place the first time each
+            # resource is created; do that once here so the shared document is read-only after.
+            _materialize_resources(
+                build_from_document(document, credentials=AnonymousCredentials()),
+                document,
+            )
+            _discovery_documents[key] = document
+    return document
+
+
+def _build_request(http: AuthorizedHttp, *args, **kwargs) -> HttpRequest:
+    # httplib2.Http is not thread-safe and cached resources are shared across threadpool
+    # workers, so each request gets its own transport around the shared credentials.
+    return HttpRequest(AuthorizedHttp(http.credentials, http=build_http()), *args, **kwargs)
+
+
+def _build_service(api_service: str, api_version: str, credentials: Credentials):
+    return build_from_document(
+        _load_discovery_document(api_service, api_version),
+        credentials=credentials,
+        requestBuilder=_build_request,
+    )
+
+
+@dataclass
+class GoogleServiceCacheMetrics:
+    hits: int = 0
+    misses: int = 0
+    builds: int = 0
+    refreshes: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class _CachedGoogleService:
+    service: Any
+    credentials: Credentials
+    tokens_fingerprint: str
+    last_used_at: float
+    token_writer: TokenWriter | None = None
+
+
+class _GoogleServiceCache:
+    """LRU of built discovery resources keyed by (user, api, version).
+
+    An entry is reused only while the stored tokens it was built from are unchanged, and is
+    dropped after `idle_ttl_seconds` without use. Discovery documents are shared by every entry,
+    so the `max_entries` bound caps memory at roughly one resource tree plus credentials each.
+    """
+
+    def __init__(self, *, max_entries: int, idle_ttl_seconds: float) -> None:
+        self._max_entries = max_entries
+        self._idle_ttl_seconds = idle_ttl_seconds
+        self._entries: OrderedDict[tuple[str, str, str], _CachedGoogleService] = OrderedDict()
+        self.metrics = GoogleServiceCacheMetrics()
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0 and self._idle_ttl_seconds > 0
+
+    def get(self, key: tuple[str, str, str], tokens_fingerprint: str) -> _CachedGoogleService | None:
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is None:
+            self.metrics.misses += 1
+            return None
+        if (
+            entry.tokens_fingerprint != tokens_fingerprint
+            or entry.last_used_at + self._idle_ttl_seconds <= now
+        ):
+            del self._entries[key]
+            self.metrics.misses += 1
+            return None
+        entry.last_used_at = now
+        self._entries.move_to_end(key)
+        self.metrics.hits += 1
+        return entry
+
+    def put(self, key: tuple[str, str, str], entry: _CachedGoogleService) -> None:
+        if not self.enabled:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.metrics.evictions += 1
+
+    def invalidate(self, key: tuple[str, str, str]) -> None:
+        self._entries.pop(key, None)
+
+    def items(self) -> list[tuple[tuple[str, str, str], _CachedGoogleService]]:
+        """Entries still inside the idle TTL; idle ones are dropped here as `get` would."""
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if entry.last_used_at + self._idle_ttl_seconds <= now]:
+            del self._entries[key]
+        return list(self._entries.items())
+
+    def invalidate_user(self, user_id: str) -> None:
+        for key in [key for key in self._entries if key[0] == user_id]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_service_cache: _GoogleServiceCache | None = None
+
+
+def _get_service_cache() -> _GoogleServiceCache:
+    global _service_cache
+    if _service_cache is None:
+        settings = get_settings()
+        _service_cache = _GoogleServiceCache(
+            max_entries=settings.google_service_cache_max_entries,
+            idle_ttl_seconds=settings.google_service_cache_idle_ttl_seconds,
+        )
+    return _service_cache
+
+
+def get_google_service_cache_metrics() -> dict[str, int]:
+    return _get_service_cache().metrics.as_dict()
+
+
+def invalidate_google_services(user_id: str) -> None:
+    _get_service_cache().invalidate_user(user_id)
+
+
+def _tokens_fingerprint(access_token: str | None, refresh_token: str | None) -> str:
+    material = f"{access_token or ''}\0{refresh_token or ''}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _parse_token_expiry(value: str | None) -> datetime | None:
+    """Stored ISO timestamp -> naive UTC datetime, as google-auth expects for `expiry`."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def credentials_expiry_iso(credentials: Credentials) -> str | None:
+    expiry = credentials.expiry
+    return expiry.replace(tzinfo=timezone.utc).isoformat() if expiry else None
+
+
+def _needs_refresh(credentials: Credentials, *, skew_seconds: float) -> bool:
+    if not credentials.token:
+        return True
+    if credentials.expiry is None:
+        return False
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return credentials.expiry - timedelta(seconds=skew_seconds) <= now
+
+
+async def _refresh_cached_service(user_id: str, entry: _CachedGoogleService) -> Any:
+    """Refresh the entry's credentials and write the new token back to the token store.
+
+    Once stored, the entry's fingerprint follows the new tokens so the next load still hits it;
+    if the write fails the old fingerprint stays and the next load rebuilds from storage. A
+    writer that finds the connection no longer active raises RefreshError, as Google would for
+    a revoked grant.
+    """
+    credentials = entry.credentials
+    await run_in_threadpool(credentials.refresh, Request())
+    _get_service_cache().metrics.refreshes += 1
+    if entry.token_writer is None:
+        return entry.service
+    try:
+        stored = await entry.token_writer(user_id, credentials)
+    except Exception as exc:
+        print(f"[google_utils] storing refreshed token failed for user {user_id}: {exc}")
+        return entry.service
+    if not stored:
+        raise RefreshError(f"connection for user {user_id} is no longer active")
+    entry.tokens_fingerprint = _tokens_fingerprint(credentials.token, credentials.refresh_token)
+    return entry.service
+
+
+@dataclass
+class CredentialBrokerMetrics:
+    loads: int = 0
+    joins: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class _CredentialBroker:
+    """Single-flight for loading, refreshing and building a user's Google client.
+
+    Concurrent callers for the same (user, api, version) await one in-flight load instead of
+    each reading the token store, decrypting and refreshing. A flight is forgotten as soon as it
+    settles, so later callers start a new load and observe current state.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[tuple[str, str, str], asyncio.Future] = {}
+        self.metrics = CredentialBrokerMetrics()
+
+    async def run(self, key: tuple[str, str, str], load: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None or flight.get_loop() is not asyncio.get_running_loop():
+            flight = asyncio.ensure_future(load())
+            self._flights[key] = flight
+            flight.add_done_callback(partial(self._settle, key))
+            self.metrics.loads += 1
+        else:
+            self.metrics.joins += 1
+        # Shielded so one caller's cancellation does not fail the load for everyone else.
+        return await asyncio.shield(flight)
+
+    def _settle(self, key: tuple[str, str, str], flight: asyncio.Future) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            flight.exception()  # mark retrieved; joined callers re-raise it themselves
+
+
+_credential_broker = _CredentialBroker()
+
+
+def get_credential_broker_metrics() -> dict[str, int]:
+    return _credential_broker.metrics.as_dict()
+
+
 async def get_google_client_for_user(
     *,
     user_id: str,
@@ -60,11 +386,48 @@ async def get_google_client_for_user(
     api_service: str,
     api_version: str,
     service_label: str | None = None,
+    token_writer: TokenWriter | None = None,
+):
+    cache_key = (user_id, api_service, api_version)
+    return await _credential_broker.run(
+        cache_key,
+        partial(
+            _load_google_client,
+            cache_key=cache_key,
+            user_jwt=user_jwt,
+            token_loader=token_loader,
+            settings=settings,
+            service_label=service_label,
+            token_writer=token_writer,
+        ),
+    )
+
+
+async def _load_google_client(
+    *,
+    cache_key: tuple[str, str, str],
+    user_jwt: str,
+    token_loader: Callable[[str, str], Awaitable[GoogleCreds | None]],
+    settings: GoogleAuthSettings,
+    service_label: str | None,
+    token_writer: TokenWriter | None,
 ):
+    user_id, api_service, api_version = cache_key
+    cache = _get_service_cache()
+    skew_seconds = get_settings().google_token_refresh_skew_seconds
     user_tokens = await token_loader(user_id, user_jwt)
     if not user_tokens:
+        cache.invalidate(cache_key)
         label = service_label or api_service
         raise HTTPException(status_code=401, detail=f"{label} credentials not found")
+
+    tokens_fingerprint = _tokens_fingerprint(user_tokens.access_token, user_tokens.refresh_token)
+    cached = cache.get(cache_key, tokens_fingerprint)
+    if cached is not None:
+        if _needs_refresh(cached.credentials, skew_seconds=skew_seconds):
+            return await _refresh_cached_service(user_id, cached)
+        return cached.service
+
     def _build_client():
         creds = Credentials(
             token=user_tokens.access_token,
@@ -73,9 +436,89 @@ async def get_google_client_for_user(
             client_id=settings.client_id,
             client_secret=settings.client_secret,
             scopes=settings.scopes,
+            expiry=_parse_token_expiry(user_tokens.access_token_expires_at),
         )
-        if not creds.valid:
-            creds.refresh(Request())
-        return build(api_service, api_version, credentials=creds)
+        return creds, _build_service(api_service, api_version, creds)
+
+    creds, service = await run_in_threadpool(_build_client)
+    cache.metrics.builds += 1
+    entry = _CachedGoogleService(
+        service=service,
+        credentials=creds,
+        tokens_fingerprint=tokens_fingerprint,
+        last_used_at=time.monotonic(),
+        token_writer=token_writer,
+    )
+    if _needs_refresh(creds, skew_seconds=skew_seconds):
+        await _refresh_cached_service(user_id, entry)
+    cache.put(cache_key, entry)
+    return service
+
+
+class GoogleTokenRefresher:
+    """Refreshes tokens of cached (i.e. recently active) clients before they reach the skew window.
+
+    Every `interval_seconds` it refreshes entries whose token expires within the refresh skew plus
+    one interval, through the credential broker so it never races a request-path refresh.
+    """
+
+    def __init__(self, *, interval_seconds: float, skew_seconds: float) -> None:
+        self._interval_seconds = interval_seconds
+        self._skew_seconds = skew_seconds
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._interval_seconds <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval_seconds)
+            await self.refresh_due()
+
+    async def refresh_due(self) -> int:
+        cache = _get_service_cache()
+        refreshed = 0
+        for key, entry in cache.items():
+            if entry.token_writer is None or not entry.credentials.refresh_token:
+                continue
+            if not _needs_refresh(entry.credentials, skew_seconds=self._skew_seconds + self._interval_seconds):
+                continue
+            try:
+                await _credential_broker.run(key, partial(_refresh_cached_service, key[0], entry))
+                refreshed += 1
+            except RefreshError as exc:
+                print(f"[google_utils] background refresh rejected for user {key[0]} ({key[1]}): {exc}")
+                cache.invalidate(key)
+            except Exception as exc:
+                print(f"[google_utils] background refresh failed for user {key[0]} ({key[1]}): {exc}")
+        return refreshed
+
+
+_token_refresher: GoogleTokenRefresher | None = None
+
+
+def init_google_token_refresher() -> None:
+    global _token_refresher
+    settings = get_settings()
+    _token_refresher = GoogleTokenRefresher(
+        interval_seconds=settings.google_token_background_refresh_interval_seconds,
+        skew_seconds=settings.google_token_refresh_skew_seconds,
+    )
+    _token_refresher.start()
+
 
-    return await run_in_threadpool(_build_client)
+async def close_google_token_refresher() -> None:
+    global _token_refresher
+    refresher, _token_refresher = _token_refresher, None
+    if refresher is not None:
+        await refresher.close()
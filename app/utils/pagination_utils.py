@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Generic, Hashable, Literal, TypeVar
+
+T = TypeVar("T")
+
+# (page_token, page_size) -> (items, next page token or None)
+FetchPage = Callable[[str | None, int], Awaitable[tuple[list[T], str | None]]]
+StopReason = Literal["end", "items", "bytes", "error"]
+
+
+@dataclass(frozen=True)
+class PaginationBudget:
+    max_items: int
+    max_bytes: int | None = None  # None: bounded by items only
+
+
+@dataclass
+class PaginatedResult(Generic[T]):
+    items: list[T]
+    next_page_token: str | None  # resumes exactly after the last returned page
+    pages: int
+    duplicates: int
+    stopped_by: StopReason
+
+
+@dataclass
+class PagePipeline(Generic[T]):
+    """Follows page tokens for one listing, yielding de-duplicated items until a budget is spent.
+
+    Page tokens are opaque and only arrive with the previous page, so pages cannot be fetched
+    side by side; instead, when there is an `on_page` step (e.g. folder path resolution) to
+    overlap, the request for page N+1 is in flight while page N is processed, unless page N
+    already reaches the byte budget. Page sizes are cut to the items left
+    in the budget, and the byte budget is checked a page at a time (the first page is always
+    returned), so `next_page_token` never skips or repeats an item. A failure after the first
+    page ends the listing with the failed page's token; on the first page it is raised.
+
+    Iterate it (`async for`) to stream items, or `collect()` them; the counters are final once
+    iteration ends.
+    """
+
+    fetch_page: FetchPage[T]
+    key: Callable[[T], Hashable]
+    size: Callable[[T], int]
+    budget: PaginationBudget
+    page_size: int
+    page_token: str | None = None
+    on_page: Callable[[list[T]], Awaitable[None]] | None = None
+    prefetch: bool = True
+    next_page_token: str | None = field(default=None, init=False)
+    pages: int = field(default=0, init=False)
+    duplicates: int = field(default=0, init=False)
+    item_bytes: int = field(default=0, init=False)
+    stopped_by: StopReason = field(default="end", init=False)
+
+    def __aiter__(self) -> AsyncIterator[T]:
+        return self._items()
+
+    async def collect(self) -> PaginatedResult[T]:
+        items = [item async for item in self]
+        return PaginatedResult(
+            items=items,
+            next_page_token=self.next_page_token,
+            pages=self.pages,
+            duplicates=self.duplicates,
+            stopped_by=self.stopped_by,
+        )
+
+    def _fetch(self, page_token: str | None, received: int) -> asyncio.Task | None:
+        remaining = self.budget.max_items - received
+        if remaining <= 0:
+            return None
+        return asyncio.create_task(self.fetch_page(page_token, min(self.page_size, remaining)))
+
+    def _bytes_left(self, items: list[T]) -> bool:
+        # Sized before `on_page`, which only adds to items, so a page that already fills the
+        # budget here never gets a prefetch the byte check would then throw away.
+        max_bytes = self.budget.max_bytes
+        return max_bytes is None or self.item_bytes + sum(self.size(item) for item in items) < max_bytes
+
+    async def _items(self) -> AsyncIterator[T]:
+        seen: set[Hashable] = set()
+        page_token, received = self.page_token, 0
+        fetch = self._fetch(page_token, received)
+        try:
+            while fetch is not None:
+                try:
+                    items, next_token = await fetch
+                except Exception as exc:
+                    if not self.pages:
+                        raise
+                    print(f"[pagination] page {self.pages + 1} failed, stopping early: {exc}")
+                    self.next_page_token, self.stopped_by = page_token, "error"
+                    return
+                fetch = None
+                received += len(items)
+                if next_token and self.prefetch and self.on_page is not None and self._bytes_left(items):
+                    fetch = self._fetch(next_token, received)
+                if self.on_page is not None:
+                    await self.on_page(items)
+                fresh = []
+                for item in items:
+                    item_key = self.key(item)
+                    if item_key in seen:
+                        self.duplicates += 1
+                        continue
+                    seen.add(item_key)
+                    fresh.append(item)
+                page_bytes = sum(self.size(item) for item in fresh)
+                max_bytes = self.budget.max_bytes
+                if self.pages and max_bytes is not None and self.item_bytes + page_bytes > max_bytes:
+                    self.next_page_token, self.stopped_by = page_token, "bytes"
+                    return
+                self.pages += 1
+                self.item_bytes += page_bytes
+                for item in fresh:
+                    yield item
+                page_token = next_token
+                if page_token and not self._bytes_left([]):
+                    # Any further result would go over the byte budget; don't spend a request on it.
+                    self.next_page_token, self.stopped_by = page_token, "bytes"
+                    return
+                if page_token and fetch is None:
+                    fetch = self._fetch(page_token, received)
+            self.next_page_token = page_token
+            self.stopped_by = "items" if page_token else "end"
+        finally:
+            if fetch is not None:
+                _discard(fetch)
+
+
+def _discard(fetch: asyncio.Task) -> None:
+    """Drop a prefetched page the listing no longer needs without leaking its result or error."""
+    if not fetch.done():
+        fetch.cancel()
+    elif not fetch.cancelled():
+        fetch.exception()
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+import traceback
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable
+
+from app.core.settings import get_settings
+
+FinalizationAction = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class FinalizationJob:
+    name: str
+    action: FinalizationAction
+    attempts: int = 0
+
+
+@dataclass
+class RunFinalizationMetrics:
+    submitted: int = 0
+    completed: int = 0
+    retried: int = 0
+    failed: int = 0
+    abandoned: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class RunFinalizationWorker:
+    """Runs post-stream bookkeeping (chat-session writes, MCP teardown) off the SSE path.
+
+    Failed jobs are retried with jittered exponential backoff; retries are scheduled on the
+    loop rather than slept on, so one flaky job does not stall the others.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int,
+        max_attempts: int,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+    ) -> None:
+        self._concurrency = max(1, concurrency)
+        self._max_attempts = max(1, max_attempts)
+        self._retry_base_seconds = retry_base_seconds
+        self._retry_max_seconds = retry_max_seconds
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[FinalizationJob] = asyncio.Queue()
+        self._workers: list[asyncio.Task[None]] = []
+        self._retry_handles: dict[int, asyncio.TimerHandle] = {}
+        self._outstanding = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._stopped = False
+        self.metrics = RunFinalizationMetrics()
+
+    @property
+    def outstanding(self) -> int:
+        return self._outstanding
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queue and workers are loop-bound; scripts/tests may run several loops in turn.
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._workers = []
+            self._retry_handles = {}
+            self._outstanding = 0
+            self._idle = asyncio.Event()
+            self._idle.set()
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self._concurrency:
+            self._workers.append(asyncio.create_task(self._run_worker()))
+
+    def submit(self, name: str, action: FinalizationAction) -> None:
+        if self._stopped:
+            raise RuntimeError("Run finalization worker is stopped")
+        self.start()
+        self._outstanding += 1
+        self._idle.clear()
+        self.metrics.submitted += 1
+        self._queue.put_nowait(FinalizationJob(name=name, action=action))
+
+    def _backoff_seconds(self, attempts: int) -> float:
+        delay = min(self._retry_max_seconds, self._retry_base_seconds * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _finish(self) -> None:
+        self._outstanding -= 1
+        if self._outstanding <= 0:
+            self._outstanding = 0
+            self._idle.set()
+
+    def _requeue(self, job: FinalizationJob) -> None:
+        self._retry_handles.pop(id(job), None)
+        self._queue.put_nowait(job)
+
+    async def _run_worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            job.attempts += 1
+            try:
+                await job.action()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                if job.attempts >= self._max_attempts:
+                    self.metrics.failed += 1
+                    print(
+                        f"run finalization job {job.name} failed after {job.attempts} attempts: "
+                        f"{traceback.format_exc()}"
+                    )
+                    self._finish()
+                else:
+                    self.metrics.retried += 1
+                    self._retry_handles[id(job)] = asyncio.get_running_loop().call_later(
+                        self._backoff_seconds(job.attempts),
+                        self._requeue,
+                        job,
+                    )
+            else:
+                self.metrics.completed += 1
+                self._finish()
+            finally:
+                self._queue.task_done()
+
+    async def drain(self, timeout_seconds: float) -> None:
+        """Wait up to `timeout_seconds` for queued and retrying jobs, then stop the workers."""
+        started_at = time.perf_counter()
+        if self._outstanding:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=timeout_seconds)
+            except asyncio.TimeoutError:
+                self.metrics.abandoned += self._outstanding
+                print(
+                    f"run finalization drain timed out after {time.perf_counter() - started_at:.1f}s; "
+                    f"abandoning {self._outstanding} job(s)"
+                )
+        for handle in self._retry_handles.values():
+            handle.cancel()
+        self._retry_handles.clear()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._stopped = True
+
+
+_run_finalization_worker: RunFinalizationWorker | None = None
+
+
+def init_run_finalization_worker() -> None:
+    global _run_finalization_worker
+    if _run_finalization_worker is None:
+        settings = get_settings()
+        _run_finalization_worker = RunFinalizationWorker(
+            concurrency=settings.run_finalization_concurrency,
+            max_attempts=settings.run_finalization_max_attempts,
+            retry_base_seconds=settings.run_finalization_retry_base_seconds,
+            retry_max_seconds=settings.run_finalization_retry_max_seconds,
+        )
+
+
+async def close_run_finalization_worker() -> None:
+    global _run_finalization_worker
+    worker = _run_finalization_worker
+    _run_finalization_worker = None
+    if worker is not None:
+        await worker.drain(get_settings().run_finalization_drain_timeout_seconds)
+
+
+def get_run_finalization_worker() -> RunFinalizationWorker:
+    # Lazily created so scripts and tests that skip app startup still finalize runs.
+    if _run_finalization_worker is None:
+        init_run_finalization_worker()
+    return _run_finalization_worker
+
+
+def submit_run_finalization(name: str, action: FinalizationAction) -> None:
+    get_run_finalization_worker().submit(name, action)
+
+
+def get_run_finalization_metrics() -> dict[str, int]:
+    worker = get_run_finalization_worker()
+    return {**worker.metrics.as_dict(), "outstanding": worker.outstanding}
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import time
+import weakref
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Literal
+
+# Event types whose consecutive payloads can be merged by concatenating their `text`.
+COALESCIBLE_EVENT_TYPES = frozenset({"delta", "reasoning_delta"})
+
+
+OverflowPolicy = Literal["merge_deltas", "drop_reasoning", "block"]
+OVERFLOW_POLICIES: tuple[str, ...] = ("merge_deltas", "drop_reasoning", "block")
+
+
+def format_sse_frame(payload_data: dict[str, Any]) -> str:
+    return f"data: {json.dumps(payload_data, default=str)}\n\n"
+
+
+@dataclass
+class _PendingDelta:
+    key: tuple[Any, ...]
+    payload_data: dict[str, Any]
+    parts: list[str] = field(default_factory=list)
+    size: int = 0
+    started_at: float = 0.0
+
+
+class DeltaCoalescer:
+    """Merges consecutive text deltas from the same (type, agent, scope) into one SSE frame.
+
+    A pending merge is flushed when the flush window elapses, when it reaches `max_bytes`,
+    when a delta for a different key arrives, or when any non-delta event arrives (which is
+    then emitted immediately after it, preserving order).
+    """
+
+    def __init__(self, *, window_seconds: float, max_bytes: int) -> None:
+        self.window_seconds = window_seconds
+        self.max_bytes = max_bytes
+        self._pending: _PendingDelta | None = None
+        self.events_in = 0
+        self.frames_out = 0
+
+    @staticmethod
+    def _key(payload_data: dict[str, Any]) -> tuple[Any, ...]:
+        return (payload_data.get("type"), payload_data.get("agent"), payload_data.get("scope"))
+
+    def push(self, payload_data: dict[str, Any], *, now: float | None = None) -> list[str]:
+        self.events_in += 1
+        frames: list[str] = []
+        if not _is_coalescible(payload_data):
+            frames.extend(self.flush())
+            frames.append(self._emit(payload_data))
+            return frames
+
+        key = self._key(payload_data)
+        if self._pending is not None and self._pending.key != key:
+            frames.extend(self.flush())
+        if self._pending is None:
+            self._pending = _PendingDelta(
+                key=key,
+                payload_data=payload_data,
+                started_at=time.monotonic() if now is None else now,
+            )
+        text = payload_data["text"]
+        self._pending.parts.append(text)
+        self._pending.size += len(text.encode("utf-8"))
+        if self._pending.size >= self.max_bytes:
+            frames.extend(self.flush())
+        return frames
+
+    def time_until_flush(self, *, now: float | None = None) -> float | None:
+        if self._pending is None:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._pending.started_at + self.window_seconds - now)
+
+    def flush(self) -> list[str]:
+        pending = self._pending
+        if pending is None:
+            return []
+        self._pending = None
+        return [self._emit({**pending.payload_data, "text": "".join(pending.parts)})]
+
+    def _emit(self, payload_data: dict[str, Any]) -> str:
+        self.frames_out += 1
+        return format_sse_frame(payload_data)
+
+
+@dataclass
+class StreamEventBusMetrics:
+    enqueued: int = 0
+    dequeued: int = 0
+    merged: int = 0
+    dropped: int = 0
+    producer_waits: int = 0
+    producer_wait_seconds: float = 0.0
+    max_depth: int = 0
+
+    def absorb(self, other: "StreamEventBusMetrics") -> None:
+        self.enqueued += other.enqueued
+        self.dequeued += other.dequeued
+        self.merged += other.merged
+        self.dropped += other.dropped
+        self.producer_waits += other.producer_waits
+        self.producer_wait_seconds += other.producer_wait_seconds
+        self.max_depth = max(self.max_depth, other.max_depth)
+
+
+_closed_bus_metrics = StreamEventBusMetrics()
+_open_buses: "weakref.WeakSet[StreamEventBus]" = weakref.WeakSet()
+
+
+class StreamEventBus:
+    """Bounded FIFO between agent stream producers and the SSE writer.
+
+    When `capacity` events are queued, `put` applies the overflow policy:
+    - merge_deltas: fold the event into adjacent queued deltas with the same key;
+    - drop_reasoning: discard reasoning deltas (incoming first, then the oldest queued);
+    - block: wait for the SSE writer to make room.
+    If a policy cannot make room the producer blocks, so depth never exceeds `capacity`.
+    `close()` enqueues `end_sentinel` past capacity and releases blocked producers.
+    """
+
+    def __init__(
+        self,
+        *,
+        capacity: int,
+        overflow_policy: OverflowPolicy = "merge_deltas",
+        end_sentinel: Any = None,
+    ) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.capacity = capacity
+        self.overflow_policy = overflow_policy
+        self.end_sentinel = end_sentinel
+        self.metrics = StreamEventBusMetrics()
+        self._items: deque[Any] = deque()
+        self._closed = False
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        _open_buses.add(self)
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def _is_full(self) -> bool:
+        return len(self._items) >= self.capacity
+
+    async def put(self, payload_data: dict[str, Any]) -> None:
+        if self._closed:
+            self.metrics.dropped += 1
+            return
+        if self._is_full() and self._relieve_overflow(payload_data):
+            return
+        if self._is_full():
+            self.metrics.producer_waits += 1
+            wait_started_at = time.perf_counter()
+            while self._is_full() and not self._closed:
+                self._not_full.clear()
+                await self._not_full.wait()
+            self.metrics.producer_wait_seconds += time.perf_counter() - wait_started_at
+            if self._closed:
+                self.metrics.dropped += 1
+                return
+        self._items.append(payload_data)
+        self.metrics.enqueued += 1
+        self.metrics.max_depth = max(self.metrics.max_depth, len(self._items))
+        self._not_empty.set()
+
+    def _relieve_overflow(self, payload_data: dict[str, Any]) -> bool:
+        """Apply the overflow policy; True means `payload_data` was absorbed or discarded."""
+        if self.overflow_policy == "merge_deltas":
+            if self._merge_into_tail(payload_data):
+                return True
+            self._compact_deltas()
+            return False
+        if self.overflow_policy == "drop_reasoning":
+            if payload_data.get("type") == "reasoning_delta":
+                self.metrics.dropped += 1
+                return True
+            for index, queued in enumerate(self._items):
+                if isinstance(queued, dict) and queued.get("type") == "reasoning_delta":
+                    del self._items[index]
+                    self.metrics.dropped += 1
+                    break
+        return False
+
+    def _merge_into_tail(self, payload_data: dict[str, Any]) -> bool:
+        if not self._items or not _is_coalescible(payload_data):
+            return False
+        tail = self._items[-1]
+        if not _is_coalescible(tail) or DeltaCoalescer._key(tail) != DeltaCoalescer._key(payload_data):
+            return False
+        self._items[-1] = {**tail, "text": tail["text"] + payload_data["text"]}
+        self.metrics.merged += 1
+        return True
+
+    def _compact_deltas(self) -> None:
+        compacted: deque[Any] = deque()
+        for queued in self._items:
+            previous = compacted[-1] if compacted else None
+            if (
+                previous is not None
+                and _is_coalescible(previous)
+                and _is_coalescible(queued)
+                and DeltaCoalescer._key(previous) == DeltaCoalescer._key(queued)
+            ):
+                compacted[-1] = {**previous, "text": previous["text"] + queued["text"]}
+                self.metrics.merged += 1
+                continue
+            compacted.append(queued)
+        self._items = compacted
+
+    async def get(self) -> Any:
+        while not self._items:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self._pop()
+
+    def get_nowait(self) -> Any:
+        if not self._items:
+            raise asyncio.QueueEmpty
+        return self._pop()
+
+    def _pop(self) -> Any:
+        payload_data = self._items.popleft()
+        self.metrics.dequeued += 1
+        self._not_full.set()
+        return payload_data
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._items.append(self.end_sentinel)
+        self._not_empty.set()
+        self._not_full.set()
+        _open_buses.discard(self)
+        _closed_bus_metrics.absorb(self.metrics)
+
+
+def _is_coalescible(payload_data: Any) -> bool:
+    return (
+        isinstance(payload_data, dict)
+        and payload_data.get("type") in COALESCIBLE_EVENT_TYPES
+        and isinstance(payload_data.get("text"), str)
+    )
+
+
+def get_stream_event_bus_metrics() -> dict[str, Any]:
+    """Process-wide totals across closed streams plus live depth of open ones."""
+    totals = StreamEventBusMetrics()
+    totals.absorb(_closed_bus_metrics)
+    open_buses = list(_open_buses)
+    for bus in open_buses:
+        totals.absorb(bus.metrics)
+    return {
+        **asdict(totals),
+        "open_streams": len(open_buses),
+        "queued_events": sum(bus.qsize() for bus in open_buses),
+    }
+
+
+async def drain_sse_events(
+    event_queue: "asyncio.Queue | StreamEventBus",
+    *,
+    end_sentinel: Any,
+    coalescer: DeltaCoalescer | None = None,
+) -> AsyncIterator[str]:
+    """Yield SSE frames for payload dicts read from `event_queue` until `end_sentinel`.
+
+    Without a coalescer every payload becomes its own frame, as soon as it is read.
+    """
+    if coalescer is None:
+        while True:
+            payload_data = await event_queue.get()
+            if payload_data is end_sentinel:
+                return
+            yield format_sse_frame(payload_data)
+
+    while True:
+        timeout = coalescer.time_until_flush()
+        if timeout == 0:
+            for frame in coalescer.flush():
+                yield frame
+            continue
+        if not event_queue.empty():
+            # Backlogged events are merged without arming a timer per read.
+            payload_data = event_queue.get_nowait()
+        elif timeout is None:
+            payload_data = await event_queue.get()
+        else:
+            try:
+                payload_data = await asyncio.wait_for(event_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                for frame in coalescer.flush():
+                    yield frame
+                continue
+        if payload_data is end_sentinel:
+            for frame in coalescer.flush():
+                yield frame
+            return
+        for frame in coalescer.push(payload_data):
+            yield frame
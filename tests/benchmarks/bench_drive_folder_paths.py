@@ -0,0 +1,123 @@
+"""Model turns and wall-clock for "where are my reports?" with and without resolved folder paths.
+
+The Drive tools run for real (discovery client over DriveStubHttp with a per-round-trip latency;
+result cache and index disabled) over a folder tree `--depth` levels deep. Model turns are counted
+from the tool plan and charged --model-turn-ms each, the one part not reproducible offline:
+
+- walk:  search, then one turn per tree level in which the model issues `'<id>' in parents`
+         searches for every distinct folder of that level (in parallel), then the answer;
+- paths: search_drive_files(include_folder_paths=true), then the answer (2 model turns).
+
+`paths` is run cold (empty folder cache) and warm (a later search in the same run).
+
+Run manually:
+    python -m tests.benchmarks.bench_drive_folder_paths --depth 4 --latency-ms 80 --model-turn-ms 1200
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+
+from tests.benchmarks.standins import DriveStubHttp, configure_bench_environment
+
+configure_bench_environment(Path(tempfile.mkdtemp(prefix="omicron-bench-")))
+
+from app.integrations.google_drive import services as drive_services  # noqa: E402
+from app.utils import google_async_http_utils, google_drive_utils, google_utils  # noqa: E402
+from app.utils.drive_folder_cache_utils import DriveFolderCache  # noqa: E402
+from app.utils.drive_search_cache_utils import DriveSearchCache  # noqa: E402
+from app.utils.google_rate_limit_utils import GoogleRateLimiter  # noqa: E402
+
+_FOLDER = "application/vnd.google-apps.folder"
+QUERY = "name contains 'report'"
+
+
+@dataclass(frozen=True)
+class _Tokens:
+    access_token: str
+    refresh_token: str
+    status: str = "active"
+    access_token_expires_at: str | None = None
+
+
+async def _load_tokens(user_id: str, user_jwt: str) -> _Tokens:
+    return _Tokens(access_token="bench-access", refresh_token="bench-refresh")
+
+
+def _build_tree(stub: DriveStubHttp, depth: int, fanout: int) -> list[str]:
+    stub.add_file("root", "My Drive", mime_type=_FOLDER, parents=[])
+    level = ["root"]
+    for depth_index in range(depth):
+        next_level = []
+        for parent in level:
+            for child in range(fanout):
+                folder_id = f"{parent}-{child}"
+                stub.add_file(folder_id, f"Folder {depth_index}.{child}", mime_type=_FOLDER, parents=[parent])
+                next_level.append(folder_id)
+        level = next_level
+    return level
+
+
+async def _walk(args: argparse.Namespace, stub: DriveStubHttp) -> tuple[float, int, int]:
+    started_at, round_trips = time.perf_counter(), stub.round_trips
+    result = await drive_services.search_files("walk-user", "jwt", QUERY, max_results=args.results)
+    level = {item.parents[0] for item in result.files if item.parents}
+    turns = 1
+    while level:
+        turns += 1
+        await asyncio.gather(
+            *(drive_services.search_files("walk-user", "jwt", f"'{folder}' in parents") for folder in level)
+        )
+        level = {parent for folder in level for parent in stub.files[folder]["parents"]}
+    return time.perf_counter() - started_at, turns + 1, stub.round_trips - round_trips
+
+
+async def _paths(args: argparse.Namespace, stub: DriveStubHttp, user_id: str) -> tuple[float, int, int]:
+    started_at, round_trips = time.perf_counter(), stub.round_trips
+    result = await drive_services.search_files(user_id, "jwt", QUERY, max_results=args.results, include_folder_paths=True)
+    assert all(item.folder_path and item.folder_path.startswith("My Drive/") for item in result.files)
+    return time.perf_counter() - started_at, 2, stub.round_trips - round_trips
+
+
+async def main(args: argparse.Namespace) -> None:
+    stub = DriveStubHttp(latency=args.latency_ms / 1000)
+    leaves = _build_tree(stub, args.depth, args.fanout)
+    for index in range(args.results * 4):
+        stub.add_file(f"f{index}", f"report-{index}.pdf", parents=[leaves[(index * 7) % len(leaves)]])
+    google_drive_utils.get_google_drive_creds = _load_tokens
+    google_utils.build_http = lambda: stub
+    google_async_http_utils.get_google_async_http()._http_client = httpx.AsyncClient(transport=stub.transport())
+    unlimited = GoogleRateLimiter(rates={}, max_concurrency=64)
+    google_utils.get_google_rate_limiter = lambda: unlimited
+    drive_services.get_google_rate_limiter = lambda: unlimited
+    drive_services.get_drive_search_cache = lambda: DriveSearchCache(max_entries=0, poll_interval_seconds=0)
+    drive_services.get_google_drive_metadata_index = lambda: None
+    folder_cache = DriveFolderCache(max_entries=10_000, ttl_seconds=600)
+    drive_services.get_drive_folder_cache = lambda: folder_cache
+
+    runs = {
+        "walk": await _walk(args, stub),
+        "paths_cold": await _paths(args, stub, "paths-user"),
+        "paths_warm": await _paths(args, stub, "paths-user"),
+    }
+    for label, (tool_seconds, turns, round_trips) in runs.items():
+        total_ms = tool_seconds * 1000 + turns * args.model_turn_ms
+        print(
+            f"{label:<11} model_turns={turns} round_trips={round_trips:<3} "
+            f"tools={tool_seconds * 1000:.0f}ms total={total_ms:.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--results", type=int, default=25)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--model-turn-ms", type=float, default=1200.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,108 @@
+"""Drive searches against a large Drive: live files.list vs the local metadata index.
+
+Runs a mix of translatable queries on the real discovery client over DriveStubHttp with a fixed
+latency per round trip. The index is crawled once up front (its cost is reported separately) and
+then synced with changes.list once per `--sync-interval`.
+
+Run manually:
+    python -m tests.benchmarks.bench_drive_metadata_index --files 5000 --latency-ms 80 --sync-interval 30
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+
+from tests.benchmarks.standins import DriveStubHttp, configure_bench_environment
+
+configure_bench_environment(Path(tempfile.mkdtemp(prefix="omicron-bench-")))
+
+from app.integrations.google_drive import services as drive_services  # noqa: E402
+from app.utils import google_async_http_utils, google_drive_utils, google_utils  # noqa: E402
+from app.utils.drive_index_utils import GoogleDriveMetadataIndex  # noqa: E402
+from app.utils.drive_search_cache_utils import DriveSearchCache  # noqa: E402
+from app.utils.google_rate_limit_utils import GoogleRateLimiter  # noqa: E402
+
+QUERIES = [
+    "name contains 'report'",
+    "name contains 'report' and mimeType = 'application/pdf'",
+    "'folder-3' in parents and trashed = false",
+    "modifiedTime > '2024-06-01T00:00:00Z' and name contains 'budget'",
+    "starred = true",
+    "mimeType = 'application/vnd.google-apps.spreadsheet' or name contains 'plan'",
+]
+
+
+@dataclass(frozen=True)
+class _Tokens:
+    access_token: str
+    refresh_token: str
+    status: str = "active"
+    access_token_expires_at: str | None = None
+
+
+async def _load_tokens(user_id: str, user_jwt: str) -> _Tokens:
+    return _Tokens(access_token="bench-access", refresh_token="bench-refresh")
+
+
+async def main(args: argparse.Namespace) -> None:
+    stub = DriveStubHttp(latency=args.latency_ms / 1000)
+    words = ("report", "budget", "plan", "notes")
+    for index in range(args.files):
+        stub.add_file(
+            f"f{index}",
+            f"{words[index % len(words)]}-{index}.pdf",
+            mime_type="application/vnd.google-apps.spreadsheet" if index % 5 == 0 else "application/pdf",
+            parents=[f"folder-{index % 10}"],
+            modified_time=f"2024-{index % 12 + 1:02d}-01T00:00:00Z",
+            starred=index % 50 == 0,
+        )
+    google_drive_utils.get_google_drive_creds = _load_tokens
+    google_utils.build_http = lambda: stub
+    google_async_http_utils.get_google_async_http()._http_client = httpx.AsyncClient(transport=stub.transport())
+    unlimited = GoogleRateLimiter(rates={}, max_concurrency=64)
+    google_utils.get_google_rate_limiter = lambda: unlimited
+    drive_services.get_drive_search_cache = lambda: DriveSearchCache(max_entries=0, poll_interval_seconds=0)
+    drive_services.get_google_drive_settings = lambda: SimpleNamespace(
+        index_max_files=args.files, index_sync_interval_seconds=args.sync_interval, query_auto_repair=True
+    )
+
+    for label in ("live", "index"):
+        index = GoogleDriveMetadataIndex(Path(tempfile.mkdtemp(prefix="omicron-drive-index-")) / "index.sqlite3")
+        drive_services.get_google_drive_metadata_index = lambda index=index, label=label: index if label == "index" else None
+        if label == "index":
+            round_trips_before = stub.round_trips
+            started_at = time.perf_counter()
+            await drive_services.crawl_drive_index("bench-user", "jwt")
+            print(
+                f"crawl   {(time.perf_counter() - started_at) * 1000:.0f}ms "
+                f"round_trips={stub.round_trips - round_trips_before} ({args.files} files)"
+            )
+        samples_ms: list[float] = []
+        round_trips_before = stub.round_trips
+        for _ in range(args.rounds):
+            for query in QUERIES:
+                started_at = time.perf_counter()
+                result = await drive_services.search_files("bench-user", "jwt", query, max_results=25)
+                samples_ms.append((time.perf_counter() - started_at) * 1000)
+                assert result.source == ("index" if label == "index" else "live"), query
+        round_trips = (stub.round_trips - round_trips_before) / (args.rounds * len(QUERIES))
+        print(
+            f"{label:<7} mean={statistics.mean(samples_ms):.1f}ms p50={statistics.median(samples_ms):.1f}ms "
+            f"round_trips/search={round_trips:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--sync-interval", type=float, default=30.0)
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
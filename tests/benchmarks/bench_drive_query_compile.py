@@ -0,0 +1,88 @@
+"""Drive query compiler: cost per query, and the round trips and model turns it saves.
+
+The corpus is fuzzed: valid queries over the whole system-prompt grammar plus one-character
+mutations of them (dropped quotes, stray operators, typos). Without local validation every
+query Drive rejects costs a files.list round trip (--latency-ms) and a model turn to rewrite it
+(--model-turn-ms). With it, repaired queries go through at once and rejected ones come back
+with a column and fix before any request.
+
+Cache keys are compared on reorderings of the same terms: the whitespace/keyword normalization
+used before the compiler keeps one key per ordering; the compiled cache_key keeps one per query.
+
+Run manually:
+    python -m tests.benchmarks.bench_drive_query_compile --queries 5000 --latency-ms 150 --model-turn-ms 1200
+"""
+
+import argparse
+import random
+import re
+import statistics
+import time
+
+from app.utils.drive_query_utils import DriveQueryError, compile_drive_query
+from tests.benchmarks.standins import mutate_drive_query, random_drive_query
+
+_QUOTED_OR_WORD_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\S+")
+
+
+def _whitespace_key(query: str) -> str:
+    words = _QUOTED_OR_WORD_RE.findall(query)
+    return " ".join(word.lower() if word.lower() in {"and", "or", "not", "true", "false"} else word for word in words)
+
+
+def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    corpus = []
+    for _ in range(args.queries):
+        query = random_drive_query(rng)
+        corpus.append(mutate_drive_query(query, rng) if rng.random() < args.mutation_rate else query)
+
+    samples_us: list[float] = []
+    outcomes = {"valid": 0, "repaired": 0, "rejected": 0}
+    for query in corpus:
+        started_at = time.perf_counter()
+        try:
+            compiled = compile_drive_query(query)
+            outcomes["repaired" if compiled.repairs else "valid"] += 1
+        except DriveQueryError:
+            outcomes["rejected"] += 1
+        samples_us.append((time.perf_counter() - started_at) * 1_000_000)
+    samples_us.sort()
+    print(
+        f"compile  p50={statistics.median(samples_us):.0f}us p99={samples_us[int(len(samples_us) * 0.99)]:.0f}us "
+        f"({len(corpus)} queries, mean length {statistics.mean(len(query) for query in corpus):.0f} chars)"
+    )
+    print(f"outcomes {outcomes}")
+
+    # Each repaired or rejected query is counted as one Drive would have answered with a 400.
+    invalid = outcomes["repaired"] + outcomes["rejected"]
+    print(
+        f"saved    round_trips={invalid} ({invalid * args.latency_ms / 1000:.1f}s) "
+        f"model_turns={outcomes['repaired']} ({outcomes['repaired'] * args.model_turn_ms / 1000:.1f}s)"
+    )
+
+    terms = [
+        "trashed = false",
+        "mimeType = 'application/pdf'",
+        "name contains 'invoice'",
+        "modifiedTime > '2024-01-01T00:00:00Z'",
+    ]
+    orderings = []
+    for _ in range(200):
+        rng.shuffle(terms)
+        orderings.append(rng.choice((" and ", " AND ", "  and ")).join(terms))
+    print(
+        f"keys     whitespace={len({_whitespace_key(query) for query in orderings})} "
+        f"compiled={len({compile_drive_query(query).cache_key for query in orderings})} "
+        f"({len(orderings)} reorderings of one query)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--mutation-rate", type=float, default=0.3)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--model-turn-ms", type=float, default=1200.0)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,89 @@
+"""Drive searches while the agent refines `q`: live files.list vs the change-cursor result cache.
+
+Replays a refinement session (near-identical queries that normalize to a few distinct keys) on
+the real discovery client over DriveStubHttp with a fixed latency per round trip. Round trips
+include the changes.getStartPageToken / changes.list polls the cache needs.
+
+Run manually:
+    python -m tests.benchmarks.bench_drive_search_cache --latency-ms 80 --poll-interval 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+
+from tests.benchmarks.standins import DriveStubHttp, configure_bench_environment
+
+configure_bench_environment(Path(tempfile.mkdtemp(prefix="omicron-bench-")))
+
+from app.integrations.google_drive import services as drive_services  # noqa: E402
+from app.utils import google_async_http_utils, google_drive_utils, google_utils  # noqa: E402
+from app.utils.drive_search_cache_utils import DriveSearchCache  # noqa: E402
+from app.utils.google_rate_limit_utils import GoogleRateLimiter  # noqa: E402
+
+SESSION = [
+    "name contains 'report'",
+    "name contains 'report' and mimeType = 'application/pdf'",
+    "name  contains 'report'",
+    "name contains 'report' AND mimeType = 'application/pdf'",
+    "name contains 'report' and mimeType = 'application/pdf' and trashed = false",
+    "name contains 'report' and mimeType = 'application/pdf'",
+    "name contains 'budget'",
+    "name contains 'report' and mimeType = 'application/pdf' and trashed = FALSE",
+    "name contains 'budget'  and trashed = false",
+    "name contains 'report'",
+]
+
+
+@dataclass(frozen=True)
+class _Tokens:
+    access_token: str
+    refresh_token: str
+    status: str = "active"
+    access_token_expires_at: str | None = None
+
+
+async def _load_tokens(user_id: str, user_jwt: str) -> _Tokens:
+    return _Tokens(access_token="bench-access", refresh_token="bench-refresh")
+
+
+async def main(args: argparse.Namespace) -> None:
+    stub = DriveStubHttp(latency=args.latency_ms / 1000)
+    for index in range(200):
+        stub.add_file(f"f{index}", f"{'report' if index % 3 else 'budget'}-{index}.pdf")
+    google_drive_utils.get_google_drive_creds = _load_tokens
+    google_utils.build_http = lambda: stub
+    google_async_http_utils.get_google_async_http()._http_client = httpx.AsyncClient(transport=stub.transport())
+    unlimited = GoogleRateLimiter(rates={}, max_concurrency=64)
+    google_utils.get_google_rate_limiter = lambda: unlimited
+
+    for label, max_entries in (("live", 0), ("cached", 1024)):
+        samples_ms: list[float] = []
+        round_trips_before = stub.round_trips
+        for session in range(args.sessions):
+            cache = DriveSearchCache(max_entries=max_entries, poll_interval_seconds=args.poll_interval)
+            drive_services.get_drive_search_cache = lambda cache=cache: cache
+            user_id = f"bench-user-{label}-{session}"
+            for query in SESSION:
+                started_at = time.perf_counter()
+                await drive_services.search_files(user_id, "jwt", query, max_results=25)
+                samples_ms.append((time.perf_counter() - started_at) * 1000)
+        round_trips = (stub.round_trips - round_trips_before) / args.sessions
+        print(
+            f"{label:<7} mean={statistics.mean(samples_ms):.1f}ms p50={statistics.median(samples_ms):.1f}ms "
+            f"round_trips/session={round_trips:.0f} ({len(SESSION)} searches)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--poll-interval", type=float, default=10.0)
+    parser.add_argument("--sessions", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,100 @@
+"""Benchmark Gmail batch reads against the previous per-message fan-out.
+
+Both paths use the real discovery client over GmailStubHttp, which adds a fixed latency per
+HTTP round trip:
+
+- fanout: one read_message_* call per id under asyncio.gather (the pre-batch behaviour),
+  one round trip each;
+- batch:  batch_read_messages, one multipart call per GMAIL_BATCH_MAX_SIZE ids;
+- cached: batch_read_messages with a warm in-process message cache.
+
+Run manually:
+    python -m tests.benchmarks.bench_gmail_batch_read --messages 100 --latency-ms 40
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+
+from tests.benchmarks.standins import GmailStubHttp, configure_bench_environment
+
+configure_bench_environment(Path(tempfile.mkdtemp(prefix="omicron-bench-")))
+
+from app.integrations.gmail import services as gmail_services  # noqa: E402
+from app.utils import gmail_utils, google_async_http_utils, google_utils  # noqa: E402
+from app.utils.gmail_message_cache_utils import GmailMessageCache  # noqa: E402
+from app.utils.google_rate_limit_utils import GoogleRateLimiter  # noqa: E402
+
+
+@dataclass(frozen=True)
+class _Tokens:
+    access_token: str
+    refresh_token: str
+    status: str = "active"
+    access_token_expires_at: str | None = None
+
+
+async def _load_tokens(user_id: str, user_jwt: str) -> _Tokens:
+    return _Tokens(access_token="bench-access", refresh_token="bench-refresh")
+
+
+async def _fanout(message_ids: list[str], message_format: str) -> int:
+    fn = gmail_services.read_message_compact if message_format == "compact" else gmail_services.read_message_full
+    results = await asyncio.gather(
+        *(fn("bench-user", "jwt", message_id) for message_id in message_ids),
+        return_exceptions=True,
+    )
+    return sum(1 for result in results if not isinstance(result, Exception))
+
+
+async def _batch(message_ids: list[str], message_format: str) -> int:
+    result = await gmail_services.batch_read_messages("bench-user", "jwt", message_ids, message_format)
+    return len(result.messages)
+
+
+async def main(args: argparse.Namespace) -> None:
+    stub = GmailStubHttp(latency=args.latency_ms / 1000)
+    gmail_utils.get_gmail_creds = _load_tokens
+    google_utils.build_http = lambda: stub
+    google_async_http_utils.get_google_async_http()._http_client = httpx.AsyncClient(transport=stub.transport())
+    # Compare transport cost only; the per-user quota bucket would pace both paths equally.
+    unlimited = GoogleRateLimiter(rates={}, max_concurrency=args.messages)
+    gmail_services.get_google_rate_limiter = google_utils.get_google_rate_limiter = lambda: unlimited
+    message_ids = [f"m{index}" for index in range(args.messages)]
+
+    disabled_cache = GmailMessageCache(max_bytes=0, label_ttl_seconds=60)
+    for message_format in ("compact", "full"):
+        warm_cache = GmailMessageCache(max_bytes=64 * 1024 * 1024, label_ttl_seconds=3600)
+        for label, read, cache in (
+            ("fanout", _fanout, disabled_cache),
+            ("batch", _batch, disabled_cache),
+            ("cached", _batch, warm_cache),
+        ):
+            gmail_services.get_gmail_message_cache = lambda cache=cache: cache
+            await read(message_ids if cache is warm_cache else message_ids[:1], message_format)  # warm caches
+            samples_ms: list[float] = []
+            round_trips_before = stub.round_trips
+            for _ in range(args.iterations):
+                started_at = time.perf_counter()
+                fetched = await read(message_ids, message_format)
+                samples_ms.append((time.perf_counter() - started_at) * 1000)
+                assert fetched == len(message_ids), f"{label} fetched {fetched}/{len(message_ids)}"
+            round_trips = (stub.round_trips - round_trips_before) / args.iterations
+            print(
+                f"{message_format:<8}{label:<7} mean={statistics.mean(samples_ms):.1f}ms "
+                f"p50={statistics.median(samples_ms):.1f}ms round_trips={round_trips:.0f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--iterations", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
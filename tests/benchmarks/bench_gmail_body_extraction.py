@@ -0,0 +1,139 @@
+"""Benchmark read_message_full body extraction against the raw HTML body on sample emails.
+
+For each email in a small synthetic corpus (marketing newsletter, Gmail reply chain, Outlook
+reply, plain-text thread, short personal note) it reports the bytes the model would receive:
+
+- raw:    the decoded HTML body as before (format="raw");
+- text:   MIME-to-text extraction, quoted history and signatures removed (format="full");
+- window: text capped at GMAIL_BODY_MAX_TOKENS (default 2000).
+
+Run manually:
+    python -m tests.benchmarks.bench_gmail_body_extraction --iterations 200
+"""
+
+import argparse
+import base64
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from tests.benchmarks.standins import configure_bench_environment
+
+configure_bench_environment(Path(tempfile.mkdtemp(prefix="omicron-bench-")))
+
+from app.integrations.gmail import services as gmail_services  # noqa: E402
+from app.utils.email_text_utils import token_budget_window  # noqa: E402
+
+_PARAGRAPH = (
+    "We shipped the new onboarding flow this week. Activation is up four points and the support "
+    "queue is shorter than it has been all quarter. Next up is the billing migration."
+)
+_STYLE = "font-family:Helvetica,Arial,sans-serif;font-size:14px;line-height:20px;color:#333333;padding:0 24px"
+
+
+def _b64(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _message(name: str, *parts: tuple[str, str]) -> dict:
+    return {
+        "id": name,
+        "threadId": f"t-{name}",
+        "labelIds": ["INBOX"],
+        "payload": {
+            "mimeType": "multipart/alternative",
+            "headers": [{"name": "Subject", "value": name}],
+            "parts": [{"mimeType": mime_type, "body": {"data": _b64(body)}} for mime_type, body in parts],
+        },
+    }
+
+
+def _newsletter() -> dict:
+    css = "".join(f".c{index}{{margin:0;padding:{index}px;color:#{index:06x}}}" for index in range(300))
+    rows = "".join(
+        f'<tr><td style="{_STYLE}"><a href="https://click.example.com/{index}?utm_source=news&amp;u=abc">'
+        f'<img src="https://cdn.example.com/hero{index}.png" width="560" alt=""></a>'
+        f'<h2 style="{_STYLE}">Story {index}</h2><p style="{_STYLE}">{_PARAGRAPH}</p></td></tr>'
+        for index in range(12)
+    )
+    html = (
+        f"<html><head><style>{css}</style></head><body>"
+        f'<div style="display:none;max-height:0">Preview text {"&zwnj;&nbsp;" * 80}</div>'
+        f'<table width="100%" cellpadding="0" cellspacing="0">{rows}</table>'
+        '<img src="https://track.example.com/open.gif" width="1" height="1"></body></html>'
+    )
+    return _message("newsletter", ("text/html", html))
+
+
+def _gmail_reply_chain() -> dict:
+    quoted = "".join(
+        f'<div class="gmail_quote"><div>On Mon, Jan {day}, 2024 at 9:00 AM Person {day} wrote:</div>'
+        f'<blockquote class="gmail_quote" style="margin:0 0 0 .8ex;border-left:1px #ccc solid">'
+        f"<div>{_PARAGRAPH * 2}</div>"
+        for day in range(1, 9)
+    ) + "</blockquote></div>" * 8
+    html = f'<div dir="ltr"><div>Agreed, let us go with option B.</div></div>{quoted}'
+    return _message("gmail-reply", ("text/html", html))
+
+
+def _outlook_reply() -> dict:
+    history = "".join(
+        f'<div style="border:none;border-top:solid #E1E1E1 1.0pt;padding:3.0pt 0in 0in 0in">'
+        f"<p><b>From:</b> Person {index} &lt;p{index}@example.com&gt;<br><b>Sent:</b> Monday<br>"
+        f"<b>Subject:</b> RE: budget</p></div><p>{_PARAGRAPH * 3}</p>"
+        for index in range(6)
+    )
+    html = f'<html><body><div class="WordSection1"><p class="MsoNormal">Approved, thanks.</p>{history}</div></body></html>'
+    return _message("outlook-reply", ("text/html", html))
+
+
+def _plain_thread() -> dict:
+    quoted = "\n".join(f"> {_PARAGRAPH}" for _ in range(40))
+    text = f"Numbers attached below.\n\n{_PARAGRAPH}\n\nOn Tue, Bob wrote:\n{quoted}\n"
+    return _message("plain-thread", ("text/plain", text), ("text/html", f"<pre>{text}</pre>"))
+
+
+def _personal_note() -> dict:
+    text = f"Hi!\n\n{_PARAGRAPH}\n\nSee you Thursday.\n\n-- \nAlice\nSent from my iPhone\n"
+    return _message("personal-note", ("text/plain", text), ("text/html", f"<div>{text}</div>"))
+
+
+CORPUS = [_newsletter(), _gmail_reply_chain(), _outlook_reply(), _plain_thread(), _personal_note()]
+
+
+def _time_ms(fn, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(samples)
+
+
+def main(args: argparse.Namespace) -> None:
+    totals = {"raw": 0, "text": 0, "window": 0}
+    for message in CORPUS:
+        raw = gmail_services._parse_raw_message(dict(message)).msg_body.encode("utf-8")
+        text = gmail_services._parse_text_message(dict(message)).msg_body
+        window = token_budget_window(text, max_tokens=args.max_tokens).text.encode("utf-8")
+        text_bytes = text.encode("utf-8")
+        totals["raw"] += len(raw)
+        totals["text"] += len(text_bytes)
+        totals["window"] += len(window)
+        extract_ms = _time_ms(lambda message=message: gmail_services._parse_text_message(dict(message)), args.iterations)
+        print(
+            f"{message['id']:<14} raw={len(raw):>7}B text={len(text_bytes):>6}B window={len(window):>6}B "
+            f"reduction={1 - len(window) / len(raw):6.1%} extract_p50={extract_ms:.3f}ms"
+        )
+    print(
+        f"{'total':<14} raw={totals['raw']:>7}B text={totals['text']:>6}B window={totals['window']:>6}B "
+        f"reduction={1 - totals['window'] / totals['raw']:6.1%}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--max-tokens", type=int, default=2000)
+    main(parser.parse_args())
@@ -0,0 +1,96 @@
+"""Benchmark search_mailbox answered from the local mirror against the live Gmail path.
+
+Both paths use the real discovery client over GmailStubHttp, which adds a fixed latency per
+HTTP round trip:
+
+- live:   users.messages.list, then one batch read of the matching ids;
+- mirror: an FTS5 query against the seeded SQLite mirror (plus a history.list round trip
+          whenever GMAIL_MIRROR_SYNC_INTERVAL_SECONDS has elapsed; 0 here forces one per call,
+          --sync-interval 60 shows the steady state).
+
+Run manually:
+    python -m tests.benchmarks.bench_gmail_mailbox_mirror --messages 2000 --latency-ms 40
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+
+from tests.benchmarks.standins import GmailStubHttp, configure_bench_environment
+
+bench_dir = Path(tempfile.mkdtemp(prefix="omicron-bench-"))
+configure_bench_environment(bench_dir)
+
+from app.integrations.gmail import services as gmail_services  # noqa: E402
+from app.utils import gmail_utils, google_async_http_utils, google_utils  # noqa: E402
+from app.utils.gmail_message_cache_utils import GmailMessageCache  # noqa: E402
+from app.utils.gmail_mirror_utils import GmailMailboxMirror  # noqa: E402
+from app.utils.google_rate_limit_utils import GoogleRateLimiter  # noqa: E402
+
+_QUERIES = ("from:bob", "subject:invoice is:unread", "newer_than:30d subject:report")
+
+
+@dataclass(frozen=True)
+class _Tokens:
+    access_token: str
+    refresh_token: str
+    status: str = "active"
+    access_token_expires_at: str | None = None
+
+
+async def _load_tokens(user_id: str, user_jwt: str) -> _Tokens:
+    return _Tokens(access_token="bench-access", refresh_token="bench-refresh")
+
+
+async def main(args: argparse.Namespace) -> None:
+    stub = GmailStubHttp(latency=args.latency_ms / 1000)
+    stub.mailbox = [f"m{index}" for index in range(args.messages)]
+    now_ms = int(time.time() * 1000)
+    for index, message_id in enumerate(stub.mailbox):
+        stub.internal_dates[message_id] = now_ms - index * 3_600_000
+        if index % 7 == 0:
+            stub.senders[message_id] = "bob@example.com"
+    gmail_utils.get_gmail_creds = _load_tokens
+    google_utils.build_http = lambda: stub
+    google_async_http_utils.get_google_async_http()._http_client = httpx.AsyncClient(transport=stub.transport())
+    unlimited = GoogleRateLimiter(rates={}, max_concurrency=64)
+    gmail_services.get_google_rate_limiter = google_utils.get_google_rate_limiter = lambda: unlimited
+    disabled_cache = GmailMessageCache(max_bytes=0, label_ttl_seconds=60)
+    gmail_services.get_gmail_message_cache = lambda: disabled_cache
+    gmail_services.settings.mirror_seed_max_messages = args.messages
+    gmail_services.settings.mirror_sync_interval_seconds = args.sync_interval
+
+    started_at = time.perf_counter()
+    mirror = GmailMailboxMirror(bench_dir / "mirror.sqlite3")
+    gmail_services.get_gmail_mailbox_mirror = lambda: mirror
+    await gmail_services.seed_mailbox_mirror("bench-user", "jwt")
+    print(f"seed: {args.messages} messages in {(time.perf_counter() - started_at) * 1000:.0f}ms")
+
+    for label, enabled in (("live", False), ("mirror", True)):
+        gmail_services.get_gmail_mailbox_mirror = (lambda: mirror) if enabled else (lambda: None)
+        for query in _QUERIES:
+            samples_ms: list[float] = []
+            for _ in range(args.iterations):
+                started_at = time.perf_counter()
+                result = await gmail_services.search_mailbox("bench-user", "jwt", query, max_results=10)
+                samples_ms.append((time.perf_counter() - started_at) * 1000)
+                assert result.source == label, result.source
+            print(
+                f"{label:<7}{query:<28} mean={statistics.mean(samples_ms):.2f}ms "
+                f"p50={statistics.median(samples_ms):.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--sync-interval", type=float, default=60.0)
+    asyncio.run(main(parser.parse_args()))
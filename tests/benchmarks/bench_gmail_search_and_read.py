@@ -0,0 +1,95 @@
+"""Model turns and wall-clock for "summarize my unread email" with and without the composite tool.
+
+The Gmail tools run for real (discovery client over GmailStubHttp with a per-round-trip
+latency; message cache and mirror disabled). Model turns are counted from the tool plan each
+prompt leads to and charged --model-turn-ms each, the one part not reproducible offline:
+
+- two_step:  list_unread_messages, then batch_read_messages, then the answer (3 model turns);
+- composite: search_and_read_messages, then the answer (2 model turns).
+
+Run manually:
+    python -m tests.benchmarks.bench_gmail_search_and_read --unread 20 --model-turn-ms 1200
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+
+from tests.benchmarks.standins import GmailStubHttp, configure_bench_environment
+
+configure_bench_environment(Path(tempfile.mkdtemp(prefix="omicron-bench-")))
+
+from app.integrations.gmail import services as gmail_services  # noqa: E402
+from app.utils import gmail_utils, google_async_http_utils, google_utils  # noqa: E402
+from app.utils.gmail_message_cache_utils import GmailMessageCache  # noqa: E402
+from app.utils.google_rate_limit_utils import GoogleRateLimiter  # noqa: E402
+
+
+@dataclass(frozen=True)
+class _Tokens:
+    access_token: str
+    refresh_token: str
+    status: str = "active"
+    access_token_expires_at: str | None = None
+
+
+async def _load_tokens(user_id: str, user_jwt: str) -> _Tokens:
+    return _Tokens(access_token="bench-access", refresh_token="bench-refresh")
+
+
+async def _two_step(limit: int) -> tuple[int, int]:
+    refs = await gmail_services.list_unread_messages("bench-user", "jwt", max_results=limit)
+    batch = await gmail_services.batch_read_messages("bench-user", "jwt", [ref.id for ref in refs.messages])
+    return 2, len(batch.messages)
+
+
+async def _composite(limit: int) -> tuple[int, int]:
+    result = await gmail_services.search_and_read_messages("bench-user", "jwt", "is:unread", max_results=limit)
+    return 1, len(result.messages)
+
+
+async def main(args: argparse.Namespace) -> None:
+    stub = GmailStubHttp(latency=args.latency_ms / 1000)
+    stub.mailbox = [f"m{index}" for index in range(args.unread)]
+    gmail_utils.get_gmail_creds = _load_tokens
+    google_utils.build_http = lambda: stub
+    google_async_http_utils.get_google_async_http()._http_client = httpx.AsyncClient(transport=stub.transport())
+    unlimited = GoogleRateLimiter(rates={}, max_concurrency=64)
+    gmail_services.get_google_rate_limiter = google_utils.get_google_rate_limiter = lambda: unlimited
+    disabled_cache = GmailMessageCache(max_bytes=0, label_ttl_seconds=60)
+    gmail_services.get_gmail_message_cache = lambda: disabled_cache
+    gmail_services.get_gmail_mailbox_mirror = lambda: None
+    gmail_services.settings.search_and_read_max_results = args.unread
+
+    results: dict[str, tuple[int, float]] = {}
+    for label, plan in (("two_step", _two_step), ("composite", _composite)):
+        await plan(args.unread)  # warm the client cache
+        samples_ms: list[float] = []
+        for _ in range(args.iterations):
+            started_at = time.perf_counter()
+            tool_turns, fetched = await plan(args.unread)
+            samples_ms.append((time.perf_counter() - started_at) * 1000)
+            assert fetched == args.unread, f"{label} fetched {fetched}/{args.unread}"
+        model_turns = tool_turns + 1
+        tool_ms = statistics.median(samples_ms)
+        total_ms = tool_ms + model_turns * args.model_turn_ms
+        results[label] = (model_turns, total_ms)
+        print(f"{label:<10} model_turns={model_turns} tool_p50={tool_ms:.1f}ms end_to_end={total_ms:.0f}ms")
+    saved_turns = results["two_step"][0] - results["composite"][0]
+    saved_ms = results["two_step"][1] - results["composite"][1]
+    print(f"saved: {saved_turns} model turn(s), {saved_ms:.0f}ms ({saved_ms / results['two_step'][1]:.0%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--unread", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--model-turn-ms", type=float, default=1200.0)
+    parser.add_argument("--iterations", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,90 @@
+"""Concurrent Gmail reads on the threadpool (httplib2) transport vs the async httpx transport.
+
+Both transports use the real discovery client and GmailStubHttp, which adds a fixed latency per
+round trip (time.sleep on a worker thread vs asyncio.sleep on the loop). The message cache is
+disabled and the per-user limiter unbounded, so the only cap left is the transport: the
+threadpool path can hold at most --thread-limit round trips open (anyio's default limiter is 40,
+shared with every other sync call in the app).
+
+Run manually:
+    python -m tests.benchmarks.bench_google_async_transport --requests 400 --latency-ms 100
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import anyio.to_thread
+import httpx
+
+from tests.benchmarks.standins import GmailStubHttp, configure_bench_environment
+
+configure_bench_environment(Path(tempfile.mkdtemp(prefix="omicron-bench-")))
+
+from app.core.settings import get_settings  # noqa: E402
+from app.integrations.gmail import services as gmail_services  # noqa: E402
+from app.utils import gmail_utils, google_async_http_utils, google_utils  # noqa: E402
+from app.utils.gmail_message_cache_utils import GmailMessageCache  # noqa: E402
+from app.utils.google_rate_limit_utils import GoogleRateLimiter  # noqa: E402
+
+
+@dataclass(frozen=True)
+class _Tokens:
+    access_token: str
+    refresh_token: str
+    status: str = "active"
+    access_token_expires_at: str | None = None
+
+
+async def _load_tokens(user_id: str, user_jwt: str) -> _Tokens:
+    return _Tokens(access_token="bench-access", refresh_token="bench-refresh")
+
+
+async def _read_all(users: int, requests: int) -> int:
+    results = await asyncio.gather(
+        *(
+            gmail_services.read_message_compact(f"bench-user-{index % users}", "jwt", f"m{index}")
+            for index in range(requests)
+        ),
+        return_exceptions=True,
+    )
+    return sum(1 for result in results if not isinstance(result, Exception))
+
+
+async def main(args: argparse.Namespace) -> None:
+    anyio.to_thread.current_default_thread_limiter().total_tokens = args.thread_limit
+    gmail_utils.get_gmail_creds = _load_tokens
+    unlimited = GoogleRateLimiter(rates={}, max_concurrency=args.requests)
+    gmail_services.get_google_rate_limiter = google_utils.get_google_rate_limiter = lambda: unlimited
+    disabled_cache = GmailMessageCache(max_bytes=0, label_ttl_seconds=60)
+    gmail_services.get_gmail_message_cache = lambda: disabled_cache
+    settings = get_settings()
+
+    for transport in ("threadpool", "httpx"):
+        stub = GmailStubHttp(latency=args.latency_ms / 1000)
+        google_utils.build_http = lambda stub=stub: stub
+        google_async_http_utils.get_google_async_http()._http_client = httpx.AsyncClient(transport=stub.transport())
+        settings.google_api_transport = transport
+        await _read_all(args.users, args.users)  # build each user's client once
+        stub.peak_in_flight = 0
+        started_at = time.perf_counter()
+        fetched = await _read_all(args.users, args.requests)
+        elapsed = time.perf_counter() - started_at
+        assert fetched == args.requests, f"{transport} fetched {fetched}/{args.requests}"
+        print(
+            f"{transport:<11} total={elapsed * 1000:.0f}ms throughput={args.requests / elapsed:.0f}/s "
+            f"peak_in_flight={stub.peak_in_flight} (thread limit {args.thread_limit})"
+        )
+    await google_async_http_utils.close_google_async_http()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--thread-limit", type=int, default=40)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,144 @@
+"""Micro-benchmark for per-call Google client overhead in search_messages / search_files.
+
+Runs the real service functions end to end (client lookup, discovery resource, request build,
+response parsing) against an in-process HTTP stub, in three modes:
+
+- legacy:   googleapiclient.discovery.build on every call (the pre-cache behaviour);
+- uncached: service cache disabled, discovery document parsed once per process;
+- cached:   per-(user, api, version) service cache enabled.
+
+Run manually:
+    python -m tests.benchmarks.bench_google_service_cache --iterations 300
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import httplib2
+import httpx
+from google_auth_httplib2 import AuthorizedHttp
+
+from tests.benchmarks.standins import configure_bench_environment
+
+configure_bench_environment(Path(tempfile.mkdtemp(prefix="omicron-bench-")))
+
+from googleapiclient.discovery import build  # noqa: E402
+
+from app.integrations.gmail import services as gmail_services  # noqa: E402
+from app.integrations.google_drive import services as drive_services  # noqa: E402
+from app.utils import gmail_utils, google_async_http_utils, google_drive_utils, google_utils  # noqa: E402
+from app.utils.drive_search_cache_utils import DriveSearchCache  # noqa: E402
+from app.utils.google_rate_limit_utils import GoogleRateLimiter  # noqa: E402
+
+_GMAIL_LIST = {"messages": [{"id": f"m{index}", "threadId": f"t{index}"} for index in range(10)]}
+_DRIVE_LIST = {
+    "files": [
+        {"id": f"f{index}", "name": f"report-{index}.pdf", "mimeType": "application/pdf"}
+        for index in range(10)
+    ]
+}
+
+
+@dataclass(frozen=True)
+class _Tokens:
+    access_token: str
+    refresh_token: str
+    status: str = "active"
+    access_token_expires_at: str | None = None
+
+
+class _StubHttp:
+    """httplib2.Http stand-in answering Gmail/Drive list calls without touching the network."""
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        payload = _GMAIL_LIST if "/gmail/" in uri else _DRIVE_LIST
+        return httplib2.Response({"status": "200"}), json.dumps(payload).encode("utf-8")
+
+
+async def _handle_async(request: httpx.Request) -> httpx.Response:
+    # Requests are executed on the shared async client; answer them like `_StubHttp`.
+    return httpx.Response(200, json=_GMAIL_LIST if "/gmail/" in request.url.path else _DRIVE_LIST)
+
+
+async def _load_tokens(user_id: str, user_jwt: str) -> _Tokens:
+    return _Tokens(access_token="bench-access", refresh_token="bench-refresh")
+
+
+def _legacy_build_service(api_service, api_version, credentials):
+    return build(api_service, api_version, http=AuthorizedHttp(credentials, http=_StubHttp()))
+
+
+async def _time_calls(iterations: int, call) -> list[float]:
+    samples_ms: list[float] = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        await call()
+        samples_ms.append((time.perf_counter() - started_at) * 1000)
+    return samples_ms
+
+
+def _summary(label: str, samples_ms: list[float]) -> str:
+    ordered = sorted(samples_ms)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (
+        f"{label:<26} mean={statistics.mean(ordered):.3f}ms "
+        f"p50={statistics.median(ordered):.3f}ms p95={p95:.3f}ms"
+    )
+
+
+async def main(iterations: int) -> None:
+    gmail_utils.get_gmail_creds = _load_tokens
+    google_drive_utils.get_google_drive_creds = _load_tokens
+    google_utils.build_http = _StubHttp
+    google_async_http_utils.get_google_async_http()._http_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(_handle_async)
+    )
+    unlimited = GoogleRateLimiter(rates={}, max_concurrency=64)
+    google_utils.get_google_rate_limiter = lambda: unlimited
+    gmail_services.get_google_rate_limiter = lambda: unlimited
+    drive_services.get_google_rate_limiter = lambda: unlimited
+    # Measure client overhead only: no quota waits, no Drive result cache (and its change polls) or local index.
+    drive_services.get_drive_search_cache = lambda: DriveSearchCache(max_entries=0, poll_interval_seconds=0)
+    drive_services.get_google_drive_metadata_index = lambda: None
+    build_service = google_utils._build_service
+
+    calls = {
+        "search_messages": lambda: gmail_services.search_messages(
+            user_id="bench-user", user_jwt="jwt", query="from:alice"
+        ),
+        "search_files": lambda: drive_services.search_files(
+            user_id="bench-user", user_jwt="jwt", query="name contains 'report'"
+        ),
+    }
+    modes = {
+        "legacy": (_legacy_build_service, 0),
+        "uncached": (build_service, 0),
+        "cached": (build_service, 512),
+    }
+    means: dict[tuple[str, str], float] = {}
+    for mode, (service_builder, max_entries) in modes.items():
+        google_utils._build_service = service_builder
+        google_utils._service_cache = google_utils._GoogleServiceCache(
+            max_entries=max_entries,
+            idle_ttl_seconds=1800,
+        )
+        for name, call in calls.items():
+            await call()  # warm imports, discovery parsing and (when enabled) the cache
+            samples = await _time_calls(iterations, call)
+            means[(mode, name)] = statistics.mean(samples)
+            print(_summary(f"{mode}:{name}", samples))
+    for name in calls:
+        print(f"{name} speedup vs legacy={means[('legacy', name)] / means[('cached', name)]:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
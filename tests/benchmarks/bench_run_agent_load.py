@@ -0,0 +1,345 @@
+"""Load harness for /v1/run-agent against local stand-ins.
+
+Boots the real FastAPI app under uvicorn on a loopback port, swaps every external dependency
+for the in-process stand-ins in tests/benchmarks/standins.py, then drives N concurrent
+streaming clients and reports:
+
+- TTFB (first byte), first-delta and total latency percentiles (p50/p95/p99);
+- frames/s across the run;
+- RSS growth of the process over the measured requests.
+
+Results can be written to, or compared against, a baseline JSON file:
+
+    python -m tests.benchmarks.bench_run_agent_load --requests 200 --concurrency 20
+    python -m tests.benchmarks.bench_run_agent_load --write-baseline
+    python -m tests.benchmarks.bench_run_agent_load --scenario mix --tolerance 0.3
+
+A comparison exits with status 1 if any metric regressed by more than --tolerance.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from tests.benchmarks.standins import (
+    BENCH_OPENAI_BASE_URL,
+    FakeMCPServer,
+    InMemoryPostgREST,
+    ScriptedResponsesAPI,
+    configure_bench_environment,
+    fake_discovery_build,
+    mint_user_token,
+)
+
+DEFAULT_BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "run_agent_load.json"
+SCENARIOS = ("text", "gmail", "drive", "browser")
+# Metrics where a larger value is worse; everything else in the report is informational.
+_LOWER_IS_BETTER = (
+    "ttfb_ms_p50",
+    "ttfb_ms_p95",
+    "first_delta_ms_p50",
+    "first_delta_ms_p95",
+    "total_ms_p50",
+    "total_ms_p95",
+    "rss_growth_kb_per_request",
+)
+_HIGHER_IS_BETTER = ("frames_per_second",)
+
+
+@dataclass
+class RequestSample:
+    ttfb_ms: float
+    first_delta_ms: float | None
+    total_ms: float
+    frames: int
+    ok: bool
+
+
+@dataclass
+class Standins:
+    responses_api: ScriptedResponsesAPI
+    postgrest: InMemoryPostgREST
+    mcp_servers: list[FakeMCPServer] = field(default_factory=list)
+
+
+def _rss_kb() -> int:
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        # Peak RSS is the closest portable figure (kilobytes on Linux, bytes on macOS).
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percentile / 100 * len(ordered)) - 1))
+    return round(ordered[index], 2)
+
+
+def install_standins(*, users: list[str], answer_tokens: int, token_interval: float, mcp_latency: float) -> Standins:
+    import httpx
+    from agents import set_tracing_disabled
+    from openai import AsyncOpenAI
+
+    from app import dependencies
+    from app.agents import registry, workflow
+    from app.core.enums import SupportedApps
+    from app.core.settings import get_settings
+    from app.utils import google_utils
+
+    set_tracing_disabled(True)
+    standins = Standins(
+        responses_api=ScriptedResponsesAPI(answer_tokens=answer_tokens, token_interval=token_interval),
+        postgrest=InMemoryPostgREST(),
+    )
+    for user_id in users:
+        standins.postgrest.seed_google_connection("gmail_connections", user_id=user_id, service="gmail")
+        standins.postgrest.seed_google_connection(
+            "google_drive_connections",
+            user_id=user_id,
+            service="google_drive",
+        )
+
+    dependencies._openai_client = AsyncOpenAI(
+        api_key="sk-bench",
+        base_url=BENCH_OPENAI_BASE_URL,
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=standins.responses_api.transport()),
+    )
+    dependencies.init_supabase_client_pool()
+    dependencies.get_supabase_client_pool()._http_client = httpx.AsyncClient(
+        transport=standins.postgrest.transport()
+    )
+    google_utils._build_service = fake_discovery_build
+    # The fake services answer in-process; there is no HTTP request for the async transport to send.
+    get_settings().google_api_transport = "threadpool"
+
+    def _build_fake_browser_mcp_servers() -> list[FakeMCPServer]:
+        server = FakeMCPServer(call_latency=mcp_latency)
+        standins.mcp_servers.append(server)
+        return [server]
+
+    for agent_attrs in registry.registered_agents:
+        if agent_attrs["name"] == SupportedApps.BROWSER.value:
+            agent_attrs["mcp_server_factory"] = _build_fake_browser_mcp_servers
+    workflow.clear_agent_graph_templates()
+    return standins
+
+
+async def _run_one(client: Any, *, token: str, query: str) -> RequestSample:
+    started_at = time.perf_counter()
+    ttfb = first_delta = None
+    frames = 0
+    ok = False
+    async with client.stream(
+        "POST",
+        "/v1/run-agent",
+        json={"query": query},
+        headers={"Authorization": f"Bearer {token}"},
+    ) as response:
+        async for line in response.aiter_lines():
+            now = time.perf_counter()
+            if ttfb is None:
+                ttfb = now - started_at
+            if not line.startswith("data: "):
+                continue
+            frames += 1
+            body = line[len("data: "):]
+            if body == "[DONE]":
+                ok = response.status_code == 200
+                continue
+            if first_delta is None and '"type": "delta"' in body:
+                first_delta = now - started_at
+    total = time.perf_counter() - started_at
+    return RequestSample(
+        ttfb_ms=(ttfb if ttfb is not None else total) * 1000,
+        first_delta_ms=first_delta * 1000 if first_delta is not None else None,
+        total_ms=total * 1000,
+        frames=frames,
+        ok=ok,
+    )
+
+
+async def _drive_clients(
+    base_url: str,
+    *,
+    tokens: list[str],
+    queries: list[str],
+    concurrency: int,
+) -> tuple[list[RequestSample], float]:
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+
+        async def _bounded(index: int) -> RequestSample:
+            async with semaphore:
+                return await _run_one(client, token=tokens[index % len(tokens)], query=queries[index])
+
+        started_at = time.perf_counter()
+        samples = await asyncio.gather(*(_bounded(index) for index in range(len(queries))))
+        return list(samples), time.perf_counter() - started_at
+
+
+def _queries(scenario: str, count: int) -> list[str]:
+    if scenario == "mix":
+        return [f"bench {SCENARIOS[index % len(SCENARIOS)]} request {index}" for index in range(count)]
+    return [f"bench {scenario} request {index}" for index in range(count)]
+
+
+def summarize(samples: list[RequestSample], *, wall_seconds: float, rss_growth_kb: int) -> dict[str, Any]:
+    ttfb = [sample.ttfb_ms for sample in samples]
+    first_delta = [sample.first_delta_ms for sample in samples if sample.first_delta_ms is not None]
+    total = [sample.total_ms for sample in samples]
+    frames = sum(sample.frames for sample in samples)
+    report: dict[str, Any] = {
+        "requests": len(samples),
+        "failed": sum(1 for sample in samples if not sample.ok),
+        "wall_seconds": round(wall_seconds, 3),
+        "frames_per_second": round(frames / wall_seconds, 1) if wall_seconds else 0.0,
+        "frames_per_request": round(frames / len(samples), 1) if samples else 0.0,
+        "rss_growth_kb": rss_growth_kb,
+        "rss_growth_kb_per_request": round(rss_growth_kb / len(samples), 2) if samples else 0.0,
+    }
+    for label, values in (("ttfb_ms", ttfb), ("first_delta_ms", first_delta), ("total_ms", total)):
+        for percentile in (50, 95, 99):
+            report[f"{label}_p{percentile}"] = _percentile(values, percentile)
+        report[f"{label}_mean"] = round(statistics.mean(values), 2) if values else 0.0
+    return report
+
+
+def compare_to_baseline(report: dict[str, Any], baseline: dict[str, Any], *, tolerance: float) -> list[str]:
+    regressions = []
+    for metric in (*_LOWER_IS_BETTER, *_HIGHER_IS_BETTER):
+        current, previous = report.get(metric), baseline.get(metric)
+        if not isinstance(current, (int, float)) or not isinstance(previous, (int, float)) or previous <= 0:
+            continue
+        change = (current - previous) / previous
+        worse = change > tolerance if metric in _LOWER_IS_BETTER else change < -tolerance
+        marker = "REGRESSION" if worse else "ok"
+        print(f"  {metric:<28} baseline={previous:<10} current={current:<10} change={change:+.1%} {marker}")
+        if worse:
+            regressions.append(metric)
+    return regressions
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict[str, Any]:
+    import uvicorn
+
+    from app.main import create_app
+
+    users = [f"00000000-0000-4000-8000-{index:012d}" for index in range(args.users)]
+    tokens = [mint_user_token(user_id) for user_id in users]
+    standins = install_standins(
+        users=users,
+        answer_tokens=args.answer_tokens,
+        token_interval=args.token_interval_ms / 1000,
+        mcp_latency=args.mcp_latency_ms / 1000,
+    )
+
+    server = uvicorn.Server(
+        uvicorn.Config(create_app(), host="127.0.0.1", port=0, log_level="warning", lifespan="on")
+    )
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            server_task.result()
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        if args.warmup:
+            await _drive_clients(
+                base_url,
+                tokens=tokens,
+                queries=_queries(args.scenario, args.warmup),
+                concurrency=args.concurrency,
+            )
+        rss_before = _rss_kb()
+        samples, wall_seconds = await _drive_clients(
+            base_url,
+            tokens=tokens,
+            queries=_queries(args.scenario, args.requests),
+            concurrency=args.concurrency,
+        )
+        rss_growth_kb = _rss_kb() - rss_before
+    finally:
+        server.should_exit = True
+        await server_task
+
+    report = summarize(samples, wall_seconds=wall_seconds, rss_growth_kb=rss_growth_kb)
+    report["config"] = {
+        "scenario": args.scenario,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "answer_tokens": args.answer_tokens,
+        "token_interval_ms": args.token_interval_ms,
+        "mcp_latency_ms": args.mcp_latency_ms,
+        "python": platform.python_version(),
+    }
+    report["standins"] = {
+        "responses_requests": standins.responses_api.response_requests,
+        "postgrest_requests": standins.postgrest.requests,
+        "mcp_calls": sum(server.calls for server in standins.mcp_servers),
+    }
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--scenario", choices=(*SCENARIOS, "mix"), default="mix")
+    parser.add_argument("--answer-tokens", type=int, default=120)
+    parser.add_argument("--token-interval-ms", type=float, default=0.0)
+    parser.add_argument("--mcp-latency-ms", type=float, default=0.0)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--write-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    configure_bench_environment(Path(tempfile.mkdtemp(prefix="omicron-bench-")))
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2))
+
+    if args.write_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if report["failed"]:
+        print(f"{report['failed']} request(s) did not finish with [DONE]")
+        return 1
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("config", {}) != {**report["config"], "python": baseline.get("config", {}).get("python")}:
+            print("note: baseline was recorded with a different configuration")
+        print(f"comparison against {args.baseline}:")
+        if compare_to_baseline(report, baseline, tolerance=args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,169 @@
+"""Model turns and wall-clock for "collect N files/messages" with and without server-side pagination.
+
+Gmail and Drive tools run for real (discovery client over GmailStubHttp/DriveStubHttp with a
+per-round-trip latency; Drive result cache and index disabled). Model turns are counted from
+the tool plan and charged --model-turn-ms each, the one part not reproducible offline:
+
+- paged:      search_messages / search_drive_files(max_results=--page-size) once per model turn,
+              following page_token until --items are collected, then the answer;
+- sequential: one call with max_items=--items, each page requested after the previous one was
+              processed (Drive resolves folder paths per page);
+- pipelined:  the same call with the next page requested while the current one is processed
+              (Drive only; Gmail has no per-page work to overlap, so it runs one "auto" row).
+
+Run manually:
+    python -m tests.benchmarks.bench_search_auto_pagination --items 200 --latency-ms 80 --model-turn-ms 1200
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+
+from tests.benchmarks.standins import DriveStubHttp, GmailStubHttp, configure_bench_environment
+
+configure_bench_environment(Path(tempfile.mkdtemp(prefix="omicron-bench-")))
+
+from app.integrations.gmail import services as gmail_services  # noqa: E402
+from app.integrations.google_drive import services as drive_services  # noqa: E402
+from app.utils import gmail_utils, google_async_http_utils, google_drive_utils, google_utils  # noqa: E402
+from app.utils.drive_folder_cache_utils import DriveFolderCache  # noqa: E402
+from app.utils.drive_search_cache_utils import DriveSearchCache  # noqa: E402
+from app.utils.google_rate_limit_utils import GoogleRateLimiter  # noqa: E402
+
+_FOLDER = "application/vnd.google-apps.folder"
+QUERY = "name contains 'report'"
+
+
+@dataclass(frozen=True)
+class _Tokens:
+    access_token: str
+    refresh_token: str
+    status: str = "active"
+    access_token_expires_at: str | None = None
+
+
+async def _load_tokens(user_id: str, user_jwt: str) -> _Tokens:
+    return _Tokens(access_token="bench-access", refresh_token="bench-refresh")
+
+
+class _RoutedStubHttp:
+    """Sends Drive requests to the Drive stub and everything else to the Gmail stub."""
+
+    def __init__(self, gmail: GmailStubHttp, drive: DriveStubHttp) -> None:
+        self.gmail, self.drive = gmail, drive
+
+    def request(self, uri: str, *args, **kwargs):
+        return (self.drive if "/drive/" in uri else self.gmail).request(uri, *args, **kwargs)
+
+    def transport(self) -> httpx.MockTransport:
+        gmail, drive = self.gmail.transport(), self.drive.transport()
+
+        async def handle(request: httpx.Request) -> httpx.Response:
+            target = drive if "/drive/" in request.url.path else gmail
+            return await target.handle_async_request(request)
+
+        return httpx.MockTransport(handle)
+
+
+async def _drive_paged(args: argparse.Namespace, stub: DriveStubHttp) -> tuple[float, int, int]:
+    started_at, round_trips = time.perf_counter(), stub.round_trips
+    files, page_token, turns = [], None, 0
+    while len(files) < args.items:
+        turns += 1
+        page = await drive_services.search_files(
+            "drive-user", "jwt", QUERY, max_results=args.page_size, page_token=page_token, include_folder_paths=True,
+        )
+        files.extend(page.files)
+        page_token = page.next_page_token
+        if not page_token:
+            break
+    return time.perf_counter() - started_at, turns + 1, stub.round_trips - round_trips
+
+
+async def _drive_auto(args: argparse.Namespace, stub: DriveStubHttp, prefetch: bool) -> tuple[float, int, int]:
+    started_at, round_trips = time.perf_counter(), stub.round_trips
+    result = await drive_services.search_files_paginated(
+        "drive-user", "jwt", QUERY, max_items=args.items, max_bytes=0, include_folder_paths=True, prefetch=prefetch,
+    )
+    assert len(result.files) == args.items and all(item.folder_path for item in result.files)
+    return time.perf_counter() - started_at, 2, stub.round_trips - round_trips
+
+
+async def _gmail_paged(args: argparse.Namespace, stub: GmailStubHttp) -> tuple[float, int, int]:
+    started_at, round_trips = time.perf_counter(), stub.round_trips
+    refs, page_token, turns = [], None, 0
+    while len(refs) < args.items:
+        turns += 1
+        page = await gmail_services.search_messages(
+            "gmail-user", "jwt", "is:unread", max_results=args.page_size, page_token=page_token,
+        )
+        refs.extend(page.messages)
+        page_token = page.page_token
+        if not page_token:
+            break
+    return time.perf_counter() - started_at, turns + 1, stub.round_trips - round_trips
+
+
+async def _gmail_auto(args: argparse.Namespace, stub: GmailStubHttp) -> tuple[float, int, int]:
+    started_at, round_trips = time.perf_counter(), stub.round_trips
+    result = await gmail_services.search_messages_paginated(
+        "gmail-user", "jwt", "is:unread", max_items=args.items, max_bytes=0,
+    )
+    assert len(result.messages) == args.items
+    return time.perf_counter() - started_at, 2, stub.round_trips - round_trips
+
+
+def _print(label: str, tool_seconds: float, turns: int, round_trips: int, model_turn_ms: float) -> None:
+    total_ms = tool_seconds * 1000 + turns * model_turn_ms
+    print(
+        f"{label:<17} model_turns={turns:<3} round_trips={round_trips:<3} "
+        f"tools={tool_seconds * 1000:.0f}ms total={total_ms:.0f}ms"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    latency = args.latency_ms / 1000
+    gmail_stub, drive_stub = GmailStubHttp(latency=latency), DriveStubHttp(latency=latency)
+    gmail_stub.mailbox = [f"m{index}" for index in range(args.items * 2)]
+    drive_stub.add_file("root", "My Drive", mime_type=_FOLDER, parents=[])
+    folders = [f"folder-{index}" for index in range(args.folders)]
+    for folder_id in folders:
+        drive_stub.add_file(folder_id, folder_id, mime_type=_FOLDER, parents=["root"])
+    for index in range(args.items * 2):
+        drive_stub.add_file(f"f{index}", f"report-{index}.pdf", parents=[folders[index % len(folders)]])
+
+    stub = _RoutedStubHttp(gmail_stub, drive_stub)
+    gmail_utils.get_gmail_creds = _load_tokens
+    google_drive_utils.get_google_drive_creds = _load_tokens
+    google_utils.build_http = lambda: stub
+    google_async_http_utils.get_google_async_http()._http_client = httpx.AsyncClient(transport=stub.transport())
+    unlimited = GoogleRateLimiter(rates={}, max_concurrency=64)
+    google_utils.get_google_rate_limiter = lambda: unlimited
+    gmail_services.get_google_rate_limiter = lambda: unlimited
+    drive_services.get_google_rate_limiter = lambda: unlimited
+    drive_services.get_drive_search_cache = lambda: DriveSearchCache(max_entries=0, poll_interval_seconds=0)
+    drive_services.get_google_drive_metadata_index = lambda: None
+    # No folder cache: every page resolves its parents with Drive batch calls, as on a cold run.
+    uncached = DriveFolderCache(max_entries=0, ttl_seconds=600)
+    drive_services.get_drive_folder_cache = lambda: uncached
+
+    _print("drive paged", *await _drive_paged(args, drive_stub), args.model_turn_ms)
+    _print("drive sequential", *await _drive_auto(args, drive_stub, prefetch=False), args.model_turn_ms)
+    _print("drive pipelined", *await _drive_auto(args, drive_stub, prefetch=True), args.model_turn_ms)
+    _print("gmail paged", *await _gmail_paged(args, gmail_stub), args.model_turn_ms)
+    _print("gmail auto", *await _gmail_auto(args, gmail_stub), args.model_turn_ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--folders", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--model-turn-ms", type=float, default=1200.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,108 @@
+"""Benchmark of /v1/run-agent SSE framing with and without delta coalescing.
+
+Replays a synthetic response (main-agent text deltas interleaved with a tool call and tool
+deltas) through the same queue -> drain_sse_events path used by agent_routes, and reports
+frames, frames/s and CPU time per response for each mode.
+
+Run manually:
+    python -m tests.benchmarks.bench_sse_coalescing --responses 50 --deltas 2000
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.utils.sse_utils import DeltaCoalescer, drain_sse_events
+
+_END = object()
+
+
+def _synthetic_response(deltas: int) -> list[dict]:
+    events: list[dict] = [{"type": "agent_updated", "agent": "orchestrator_agent"}]
+    events.extend(
+        {"type": "reasoning_delta", "text": "th ", "agent": "orchestrator_agent"}
+        for _ in range(deltas // 4)
+    )
+    events.append({"type": "reasoning_done", "agent": "orchestrator_agent"})
+    events.append({"type": "tool_called", "tool": "gmail", "agent": "orchestrator_agent"})
+    events.extend(
+        {"type": "delta", "text": "mail ", "agent": "gmail", "scope": "tool"}
+        for _ in range(deltas // 4)
+    )
+    events.append({"type": "tool_output", "output": "ok", "agent": "orchestrator_agent"})
+    events.extend(
+        {"type": "delta", "text": "tok ", "agent": "orchestrator_agent"}
+        for _ in range(deltas)
+    )
+    events.append({"type": "message", "text": "done", "agent": "orchestrator_agent"})
+    return events
+
+
+async def _replay(events: list[dict], *, coalesce: bool, token_interval: float) -> tuple[int, int]:
+    queue: asyncio.Queue = asyncio.Queue()
+    coalescer = DeltaCoalescer(window_seconds=0.05, max_bytes=2048) if coalesce else None
+
+    async def _produce() -> None:
+        for index, payload_data in enumerate(events):
+            await queue.put(dict(payload_data))
+            if token_interval and index % 20 == 0:
+                await asyncio.sleep(token_interval * 20)
+        await queue.put(_END)
+
+    producer = asyncio.create_task(_produce())
+    frames = 0
+    written = 0
+    async for frame in drain_sse_events(queue, end_sentinel=_END, coalescer=coalescer):
+        frames += 1
+        written += len(frame)
+    await producer
+    return frames, written
+
+
+async def _run_mode(events: list[dict], *, responses: int, coalesce: bool, token_interval: float) -> str:
+    frames = written = 0
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    for _ in range(responses):
+        response_frames, response_bytes = await _replay(
+            events,
+            coalesce=coalesce,
+            token_interval=token_interval,
+        )
+        frames += response_frames
+        written += response_bytes
+    wall = time.perf_counter() - wall_started
+    cpu = time.process_time() - cpu_started
+    label = "coalesced" if coalesce else "per-delta"
+    return (
+        f"{label:<10} frames/response={frames / responses:.0f} "
+        f"bytes/response={written / responses:.0f} frames/s={frames / wall:.0f} "
+        f"cpu/response={cpu / responses * 1000:.2f}ms"
+    )
+
+
+async def main(responses: int, deltas: int, token_interval: float) -> None:
+    events = _synthetic_response(deltas)
+    print(f"events/response={len(events)}")
+    for coalesce in (False, True):
+        print(
+            await _run_mode(
+                events,
+                responses=responses,
+                coalesce=coalesce,
+                token_interval=token_interval,
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--responses", type=int, default=50)
+    parser.add_argument("--deltas", type=int, default=2000)
+    parser.add_argument(
+        "--token-interval",
+        type=float,
+        default=0.0,
+        help="Simulated seconds between model tokens (0 replays as a burst).",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.responses, args.deltas, args.token_interval))
@@ -0,0 +1,828 @@
+"""Local stand-ins for the external services /v1/run-agent talks to.
+
+Used by the load harness (bench_run_agent_load.py) so the real FastAPI app, auth, agent graph,
+Runner and SSE path run unchanged while every network dependency is served in-process:
+
+- ScriptedResponsesAPI: OpenAI Responses (streamed SSE) + Conversations endpoints.
+- InMemoryPostgREST: the Supabase PostgREST tables/RPCs the run path touches.
+- fake_discovery_build: replaces the discovery-document service builder with Gmail/Drive fakes.
+- GmailStubHttp: transport for the real Gmail discovery client (single and batch calls).
+- DriveStubHttp: the same for the Drive discovery client (files, folders, Changes API).
+- random_drive_query / mutate_drive_query: Drive `q` strings for fuzzing the query compiler.
+- FakeMCPServer: an in-process MCP server for the browser agent.
+
+Nothing here imports `app` at module level, so callers can configure the environment first.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import itertools
+import json
+import os
+import re
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+import httpx
+from agents.mcp import MCPServer
+from mcp.types import CallToolResult, GetPromptResult, ListPromptsResult, TextContent, Tool as MCPTool
+
+BENCH_JWT_SECRET = "bench-jwt-secret"
+BENCH_SUPABASE_URL = "http://supabase.bench"
+BENCH_OPENAI_BASE_URL = "http://openai.bench/v1"
+
+
+def configure_bench_environment(workdir: Path) -> None:
+    """Set the settings the app needs at import time; real values in the environment win."""
+    client_secrets = workdir / "bench_client_secrets.json"
+    client_secrets.write_text(
+        json.dumps(
+            {
+                "web": {
+                    "client_id": "bench-client-id",
+                    "client_secret": "bench-client-secret",
+                    "auth_uri": "http://google.bench/auth",
+                    "token_uri": "http://google.bench/token",
+                }
+            }
+        ),
+        encoding="utf-8",
+    )
+    defaults = {
+        "SESSION_SECRET_KEY": "bench-session-secret",
+        "SUPABASE_URL": BENCH_SUPABASE_URL,
+        "SUPABASE_API_KEY": "bench-anon-key",
+        "SUPABASE_SERVICE_ROLE_KEY": "bench-service-role-key",
+        "SUPABASE_JWT_SECRET": BENCH_JWT_SECRET,
+        "GMAIL_TOKENS_ENCRYPTION_KEY": base64.urlsafe_b64encode(b"b" * 32).decode("ascii"),
+        "OAUTH_STATE_SIGNING_SECRET": "bench-oauth-secret",
+        "OPENAI_API_KEY": "sk-bench",
+        "WHATSAPP_BRIDGE_JWT_SECRET": "bench-bridge-secret",
+        "PLAYWRIGHT_MCP_URL": "http://playwright.bench/mcp",
+        "GOOGLE_CLIENT_SECRETS_FILE": str(client_secrets),
+        "GMAIL_SCOPES": '["https://www.googleapis.com/auth/gmail.readonly"]',
+        "GMAIL_REDIRECT_URI": "http://localhost/gmail/callback",
+        "GMAIL_POST_CONNECT_REDIRECT": "http://localhost/connected",
+        "GOOGLE_DRIVE_SCOPES": '["https://www.googleapis.com/auth/drive.readonly"]',
+        "GOOGLE_DRIVE_REDIRECT_URI": "http://localhost/drive/callback",
+        "GOOGLE_DRIVE_POST_CONNECT_REDIRECT": "http://localhost/connected",
+        "OPENAI_AGENTS_DISABLE_TRACING": "1",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+
+def mint_user_token(user_id: str, *, ttl_seconds: int = 3600) -> str:
+    import jwt
+
+    now = int(time.time())
+    return jwt.encode(
+        {"sub": user_id, "aud": "authenticated", "role": "authenticated", "iat": now, "exp": now + ttl_seconds},
+        BENCH_JWT_SECRET,
+        algorithm="HS256",
+    )
+
+
+# --- OpenAI Responses / Conversations ---------------------------------------------------------
+
+# Tool each agent calls on its first turn; the orchestrator's depends on the scenario in the query.
+_AGENT_SCRIPTED_TOOLS: dict[str, dict[str, Any]] = {
+    "gmail": {"name": "search_messages", "arguments": {"query": "is:unread", "max_results": 5}},
+    "drive": {"name": "search_drive_files", "arguments": {"query": "name contains 'report'"}},
+    "browser": {"name": "browser_navigate", "arguments": {"url": "https://example.com"}},
+}
+_ORCHESTRATOR_SCENARIO_TOOLS: dict[str, dict[str, Any]] = {
+    "gmail": {"name": "gmail", "arguments": {"input": "Summarize my unread email."}},
+    "drive": {"name": "drive", "arguments": {"input": "Find my latest report."}},
+    "browser": {"name": "transfer_to_browser", "arguments": {}},
+}
+
+
+class ScriptedResponsesAPI:
+    """Deterministic Responses API: one scripted tool call per agent, then a streamed answer.
+
+    The agent is identified by its prompt_cache_key ("omicron:<agent>:<hash>"); the first request
+    seen for a key reports 0 cached tokens and later ones report a warm prefix, mimicking the
+    provider's prompt cache.
+    """
+
+    def __init__(self, *, answer_tokens: int = 120, token_interval: float = 0.0) -> None:
+        self.answer_tokens = answer_tokens
+        self.token_interval = token_interval
+        self.response_requests = 0
+        self._ids = itertools.count(1)
+        self._warm_cache_keys: set[str] = set()
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        body = json.loads(request.content) if request.content else {}
+        if request.method == "POST" and path.endswith("/responses"):
+            self.response_requests += 1
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                content=self._stream(body),
+            )
+        if request.method == "POST" and path.endswith("/conversations"):
+            return httpx.Response(
+                200,
+                json={
+                    "id": f"conv_{next(self._ids)}",
+                    "object": "conversation",
+                    "created_at": int(time.time()),
+                    "metadata": {},
+                },
+            )
+        if "/conversations/" in path and path.endswith("/items"):
+            return httpx.Response(
+                200,
+                json={"object": "list", "data": [], "first_id": None, "last_id": None, "has_more": False},
+            )
+        return httpx.Response(404, json={"error": {"message": f"unhandled {request.method} {path}"}})
+
+    @staticmethod
+    def _agent_name(body: dict[str, Any]) -> str:
+        cache_key = body.get("prompt_cache_key") or ""
+        parts = cache_key.split(":")
+        return parts[1] if len(parts) >= 3 else "orchestrator_agent"
+
+    @staticmethod
+    def _input_items(body: dict[str, Any]) -> list[dict[str, Any]]:
+        items = body.get("input")
+        if isinstance(items, str):
+            return [{"role": "user", "content": items}]
+        return [item for item in items or [] if isinstance(item, dict)]
+
+    def _scripted_tool(self, agent_name: str, items: list[dict[str, Any]]) -> dict[str, Any] | None:
+        if agent_name == "orchestrator_agent":
+            query = ""
+            for item in items:
+                if item.get("role") == "user":
+                    content = item.get("content")
+                    query = content if isinstance(content, str) else json.dumps(content)
+            scenario = next((name for name in _ORCHESTRATOR_SCENARIO_TOOLS if name in query), None)
+            tool = _ORCHESTRATOR_SCENARIO_TOOLS.get(scenario) if scenario else None
+        else:
+            tool = _AGENT_SCRIPTED_TOOLS.get(agent_name)
+        if tool is None:
+            return None
+        already_called = any(
+            item.get("type") == "function_call" and item.get("name") == tool["name"] for item in items
+        )
+        return None if already_called else tool
+
+    def _usage(self, body: dict[str, Any], output_tokens: int) -> dict[str, Any]:
+        input_tokens = max(1, len(json.dumps(body)) // 4)
+        cache_key = body.get("prompt_cache_key") or ""
+        cached_tokens = int(input_tokens * 0.8) if cache_key in self._warm_cache_keys else 0
+        self._warm_cache_keys.add(cache_key)
+        return {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": cached_tokens},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    async def _stream(self, body: dict[str, Any]) -> AsyncIterator[bytes]:
+        sequence = itertools.count()
+        response_id = f"resp_{next(self._ids)}"
+        response = {
+            "id": response_id,
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": body.get("model") or "bench-model",
+            "output": [],
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "status": "in_progress",
+        }
+
+        def _frame(event: dict[str, Any]) -> bytes:
+            event["sequence_number"] = next(sequence)
+            return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8")
+
+        yield _frame({"type": "response.created", "response": response})
+
+        agent_name = self._agent_name(body)
+        tool = self._scripted_tool(agent_name, self._input_items(body))
+        if tool is not None:
+            item = {
+                "id": f"fc_{next(self._ids)}",
+                "type": "function_call",
+                "call_id": f"call_{next(self._ids)}",
+                "name": tool["name"],
+                "arguments": json.dumps(tool["arguments"]),
+                "status": "completed",
+            }
+            yield _frame({"type": "response.output_item.added", "output_index": 0, "item": {**item, "arguments": ""}})
+            yield _frame({"type": "response.output_item.done", "output_index": 0, "item": item})
+            output_tokens = 20
+        else:
+            item_id = f"msg_{next(self._ids)}"
+            location = {"item_id": item_id, "output_index": 0, "content_index": 0}
+            tokens = [f"{agent_name[:4]}{index} " for index in range(self.answer_tokens)]
+            text = "".join(tokens)
+            yield _frame(
+                {
+                    "type": "response.output_item.added",
+                    "output_index": 0,
+                    "item": {"id": item_id, "type": "message", "role": "assistant", "status": "in_progress", "content": []},
+                }
+            )
+            yield _frame(
+                {"type": "response.content_part.added", **location, "part": {"type": "output_text", "text": "", "annotations": []}}
+            )
+            for token in tokens:
+                if self.token_interval:
+                    await asyncio.sleep(self.token_interval)
+                yield _frame({"type": "response.output_text.delta", **location, "delta": token, "logprobs": []})
+            yield _frame({"type": "response.output_text.done", **location, "text": text, "logprobs": []})
+            part = {"type": "output_text", "text": text, "annotations": []}
+            yield _frame({"type": "response.content_part.done", **location, "part": part})
+            item = {"id": item_id, "type": "message", "role": "assistant", "status": "completed", "content": [part]}
+            yield _frame({"type": "response.output_item.done", "output_index": 0, "item": item})
+            output_tokens = len(tokens)
+
+        completed = {
+            **response,
+            "status": "completed",
+            "output": [item],
+            "usage": self._usage(body, output_tokens),
+        }
+        yield _frame({"type": "response.completed", "response": completed})
+
+
+# --- Supabase PostgREST -------------------------------------------------------------------------
+
+
+class InMemoryPostgREST:
+    """Minimal PostgREST: eq-filtered select/insert/update on in-memory tables plus named RPCs."""
+
+    def __init__(self) -> None:
+        self.tables: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        self.requests = 0
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def seed_google_connection(self, table: str, *, user_id: str, service: str) -> None:
+        from app.utils.encryption_utils import encrypt_token
+
+        self.tables[table].append(
+            {
+                "user_id": user_id,
+                "status": "active",
+                "access_token": encrypt_token(f"{service}-access-{user_id}", service=service),
+                "refresh_token_encrypted": encrypt_token(f"{service}-refresh-{user_id}", service=service),
+            }
+        )
+
+    @staticmethod
+    def _filters(request: httpx.Request) -> list[tuple[str, str]]:
+        filters = []
+        for key, value in request.url.params.multi_items():
+            if key in {"select", "order", "limit", "offset", "on_conflict", "columns"}:
+                continue
+            if value.startswith("eq."):
+                filters.append((key, value[3:]))
+        return filters
+
+    @staticmethod
+    def _matches(row: dict[str, Any], filters: list[tuple[str, str]]) -> bool:
+        return all(str(row.get(key)) == value for key, value in filters)
+
+    def _respond(self, request: httpx.Request, rows: list[dict[str, Any]], status_code: int = 200) -> httpx.Response:
+        if request.headers.get("accept") == "application/vnd.pgrst.object+json":
+            if len(rows) != 1:
+                return httpx.Response(
+                    406,
+                    json={
+                        "code": "PGRST116",
+                        "message": "JSON object requested, multiple (or no) rows returned",
+                        "details": f"The result contains {len(rows)} rows",
+                        "hint": None,
+                    },
+                )
+            return httpx.Response(status_code, json=rows[0])
+        return httpx.Response(status_code, json=rows)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        path = request.url.path.split("/rest/v1/", 1)[-1]
+        body = json.loads(request.content) if request.content else None
+
+        if path.startswith("rpc/"):
+            return httpx.Response(200, json=self._rpc(path[len("rpc/"):], body or {}))
+
+        table = self.tables[path]
+        filters = self._filters(request)
+        if request.method == "GET":
+            return self._respond(request, [row for row in table if self._matches(row, filters)])
+        if request.method == "POST":
+            now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            inserted = []
+            for row in body if isinstance(body, list) else [body]:
+                stored = {"id": str(uuid.uuid4()), "created_at": now, "updated_at": now, **row}
+                table.append(stored)
+                inserted.append(stored)
+            return self._respond(request, inserted, status_code=201)
+        if request.method == "PATCH":
+            updated = []
+            for row in table:
+                if self._matches(row, filters):
+                    row.update(body or {})
+                    updated.append(row)
+            return self._respond(request, updated)
+        return httpx.Response(405, json={"message": f"unsupported method {request.method}"})
+
+    def _rpc(self, name: str, params: dict[str, Any]) -> Any:
+        if name == "get_connected_apps_status":
+            user_id = params.get("p_user_id")
+            gmail = any(row["user_id"] == user_id for row in self.tables["gmail_connections"])
+            drive = any(row["user_id"] == user_id for row in self.tables["google_drive_connections"])
+            return [
+                {
+                    "gmail_status": "active" if gmail else None,
+                    "google_drive_status": "active" if drive else None,
+                    "whatsapp_status": None,
+                }
+            ]
+        # get_vault_secret and anything else: no stored value.
+        return None
+
+
+# --- Google discovery services ------------------------------------------------------------------
+
+
+class _Call:
+    def __init__(self, result: dict[str, Any]) -> None:
+        self._result = result
+
+    def execute(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return self._result
+
+
+class FakeGmailService:
+    """Stand-in for the discovery-built Gmail v1 resource (users().messages().list/get)."""
+
+    def users(self) -> "FakeGmailService":
+        return self
+
+    def messages(self) -> "FakeGmailService":
+        return self
+
+    def list(self, **kwargs: Any) -> _Call:
+        count = min(int(kwargs.get("maxResults") or 10), 10)
+        return _Call(
+            {
+                "messages": [{"id": f"m{index}", "threadId": f"t{index}"} for index in range(count)],
+                "resultSizeEstimate": count,
+            }
+        )
+
+    def get(self, **kwargs: Any) -> _Call:
+        message_id = kwargs.get("id", "m0")
+        body = base64.urlsafe_b64encode(b"<p>Bench message body</p>").decode("ascii")
+        return _Call(
+            {
+                "id": message_id,
+                "threadId": f"t-{message_id}",
+                "labelIds": ["INBOX", "UNREAD"],
+                "snippet": "Bench message snippet",
+                "payload": {
+                    "mimeType": "text/html",
+                    "headers": [
+                        {"name": "From", "value": self.senders.get(message_id, "alice@example.com")},
+                        {"name": "To", "value": "bench@example.com"},
+                        {"name": "Subject", "value": f"Bench {message_id}"},
+                        {"name": "Date", "value": "Mon, 1 Jan 2024 00:00:00 +0000"},
+                    ],
+                    "body": {"data": body},
+                },
+            }
+        )
+
+
+class FakeDriveService:
+    """Stand-in for the discovery-built Drive v3 resource (files().list, changes() with no changes)."""
+
+    def files(self) -> "FakeDriveService":
+        return self
+
+    def changes(self) -> "FakeDriveService":
+        return self
+
+    def getStartPageToken(self, **kwargs: Any) -> _Call:
+        return _Call({"startPageToken": "1"})
+
+    def list(self, **kwargs: Any) -> _Call:
+        if "q" not in kwargs:
+            return _Call({"changes": [], "newStartPageToken": kwargs.get("pageToken", "1")})
+        return _Call(
+            {
+                "files": [
+                    {
+                        "id": f"f{index}",
+                        "name": f"report-{index}.pdf",
+                        "mimeType": "application/pdf",
+                        "modifiedTime": "2024-01-01T00:00:00Z",
+                    }
+                    for index in range(5)
+                ],
+            }
+        )
+
+
+class _GoogleStubHttp:
+    """Serves a Google API to both transports: httplib2 (`request`) and httpx (`transport()`).
+
+    Each round trip adds `latency` (slept on the worker thread or awaited on the loop); JSON
+    endpoints come from `_route(uri)` and `/batch` calls are answered part by part through it.
+    """
+
+    def __init__(self, *, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.round_trips = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def request(self, uri: str, method: str = "GET", body: Any = None, headers: Any = None, **kwargs: Any):
+        import httplib2
+
+        self.round_trips += 1
+        self._enter()
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        status, response_headers, content = self._respond(uri, body, headers or {})
+        return httplib2.Response({"status": str(status), **response_headers}), content
+
+    def transport(self) -> httpx.MockTransport:
+        """The same endpoints for the async (httpx) Google transport; latency is awaited."""
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.round_trips += 1
+        self._enter()
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        status, response_headers, content = self._respond(
+            str(request.url),
+            request.content.decode("utf-8"),
+            dict(request.headers),
+        )
+        return httpx.Response(status, headers=response_headers, content=content)
+
+    def _enter(self) -> None:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _respond(self, uri: str, body: Any, headers: dict[str, str]) -> tuple[int, dict[str, str], bytes]:
+        if "/batch" not in uri.split("?", 1)[0]:
+            status, payload = self._route(uri)
+            return status, {"content-type": "application/json; charset=UTF-8"}, json.dumps(payload).encode("utf-8")
+        return self._batch(body, headers)
+
+    def _route(self, uri: str) -> tuple[int, dict[str, Any]]:
+        raise NotImplementedError
+
+    def _batch(self, body: str, headers: dict[str, str]) -> tuple[int, dict[str, str], bytes]:
+        import email.parser
+
+        content_type = headers.get("content-type") or headers.get("Content-Type")
+        request = email.parser.Parser().parsestr(f"content-type: {content_type}\r\n\r\n{body}")
+        boundary = f"batch_{uuid.uuid4().hex}"
+        parts: list[str] = []
+        for part in request.get_payload():
+            content_id = part["Content-ID"][1:-1]
+            request_line = part.get_payload().split("\n", 1)[0]
+            status, payload = self._route(request_line.split(" ")[1])
+            parts.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                "Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{json.dumps(payload)}\r\n"
+            )
+        content = "".join(parts) + f"--{boundary}--\r\n"
+        return 200, {"content-type": f"multipart/mixed; boundary={boundary}"}, content.encode("utf-8")
+
+
+class GmailStubHttp(_GoogleStubHttp):
+    """httplib2.Http stand-in for the real Gmail discovery client, including multipart batch calls.
+
+    Serves users.messages.get for any id, with optional per-call latency (one network round trip),
+    ids that 404, and ids that fail with 503 a given number of times before succeeding. Label ids
+    default to INBOX and can be changed per id through `labels` (likewise `senders`, `threads`).
+
+    For mailbox sync it also answers messages.list over `mailbox` (newest first; `before:<epoch
+    seconds>` in q is applied to `internal_dates`, other terms are ignored), getProfile with
+    `history_id`, and history.list with the `history` records newer than startHistoryId.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        missing_ids: set[str] | None = None,
+        flaky_ids: dict[str, int] | None = None,
+    ) -> None:
+        super().__init__(latency=latency)
+        self.missing_ids = missing_ids or set()
+        self.flaky_ids = dict(flaky_ids or {})
+        self.labels: dict[str, list[str]] = {}
+        self.senders: dict[str, str] = {}
+        self.threads: dict[str, str] = {}
+        self.internal_dates: dict[str, int] = {}
+        self.mailbox: list[str] = []
+        self.history_id = 1
+        self.history: list[dict[str, Any]] = []
+        self.history_expired = False
+        self.message_gets = 0
+
+    def _route(self, uri: str) -> tuple[int, dict[str, Any]]:
+        from urllib.parse import parse_qs, urlsplit
+
+        parts = urlsplit(uri)
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        if parts.path.endswith("/profile"):
+            return 200, {"emailAddress": "bench@example.com", "historyId": str(self.history_id)}
+        if parts.path.endswith("/history"):
+            if self.history_expired:
+                return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+            start = int(params["startHistoryId"])
+            records = [record for record in self.history if int(record["id"]) > start]
+            return 200, {"history": records, "historyId": str(self.history_id)}
+        if parts.path.endswith("/messages"):
+            mailbox = self.mailbox
+            for bound in re.findall(r"before:(\d+)", params.get("q", "")):
+                mailbox = [
+                    message_id for message_id in mailbox
+                    if self.internal_dates.get(message_id, 1704067200000) < int(bound) * 1000
+                ]
+            offset = int(params.get("pageToken", 0))
+            limit = int(params.get("maxResults", 100))
+            page = mailbox[offset:offset + limit]
+            payload: dict[str, Any] = {
+                "messages": [
+                    {"id": message_id, "threadId": self.threads.get(message_id, f"thread-{message_id}")}
+                    for message_id in page
+                ]
+            }
+            if offset + limit < len(mailbox):
+                payload["nextPageToken"] = str(offset + limit)
+            return 200, payload
+        return self._get_message(uri)
+
+    def _get_message(self, uri: str) -> tuple[int, dict[str, Any]]:
+        self.message_gets += 1
+        message_id = uri.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]
+        if message_id in self.missing_ids:
+            return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+        if self.flaky_ids.get(message_id, 0) > 0:
+            self.flaky_ids[message_id] -= 1
+            return 503, {"error": {"code": 503, "message": "Backend Error"}}
+        text = base64.urlsafe_b64encode(f"Body of {message_id}".encode("utf-8")).decode("ascii")
+        return 200, {
+            "id": message_id,
+            "threadId": self.threads.get(message_id, f"thread-{message_id}"),
+            "labelIds": self.labels.get(message_id, ["INBOX"]),
+            "snippet": f"Snippet of {message_id}",
+            "internalDate": str(self.internal_dates.get(message_id, 1704067200000)),
+            "payload": {
+                "mimeType": "text/plain",
+                "headers": [
+                    {"name": "From", "value": self.senders.get(message_id, "alice@example.com")},
+                    {"name": "To", "value": "bench@example.com"},
+                    {"name": "Subject", "value": f"Subject {message_id}"},
+                    {"name": "Date", "value": "Mon, 1 Jan 2024 00:00:00 +0000"},
+                ],
+                "body": {"data": text},
+            },
+        }
+
+
+class DriveStubHttp(_GoogleStubHttp):
+    """httplib2.Http stand-in for the real Drive v3 discovery client.
+
+    Serves files.list over `files` (paged by pageToken offsets), files.get (also in `/batch`
+    calls), and the Changes API:
+    `change(file_id)` records a change, changes.getStartPageToken returns the next change number
+    and changes.list replays changes from a token. `q` understands only `name contains`,
+    `mimeType =`, `'<id>' in parents` and `trashed =`, all ANDed; other terms are ignored.
+    """
+
+    def __init__(self, *, latency: float = 0.0) -> None:
+        super().__init__(latency=latency)
+        self.files: dict[str, dict[str, Any]] = {}
+        self.changes: list[dict[str, Any]] = []
+        self.list_calls = 0
+        self.change_polls = 0
+
+    def add_file(
+        self,
+        file_id: str,
+        name: str,
+        *,
+        mime_type: str = "application/pdf",
+        parents: list[str] | None = None,
+        modified_time: str = "2024-01-01T00:00:00.000Z",
+        trashed: bool = False,
+        starred: bool = False,
+    ) -> dict[str, Any]:
+        self.files[file_id] = {
+            "kind": "drive#file",
+            "id": file_id,
+            "name": name,
+            "mimeType": mime_type,
+            "parents": ["root"] if parents is None else parents,
+            "modifiedTime": modified_time,
+            "trashed": trashed,
+            "starred": starred,
+            "owners": [{"emailAddress": "bench@example.com"}],
+            "webViewLink": f"https://drive.google.com/file/d/{file_id}/view",
+        }
+        return self.files[file_id]
+
+    def change(self, file_id: str) -> None:
+        removed = file_id not in self.files
+        change: dict[str, Any] = {"kind": "drive#change", "changeType": "file", "fileId": file_id, "removed": removed}
+        if not removed:
+            change["file"] = self.files[file_id]
+        self.changes.append(change)
+
+    def _route(self, uri: str) -> tuple[int, dict[str, Any]]:
+        from urllib.parse import parse_qs, unquote, urlsplit
+
+        parts = urlsplit(uri)
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        path = parts.path.rstrip("/")
+        if path.endswith("/changes/startPageToken"):
+            return 200, {"startPageToken": str(len(self.changes) + 1)}
+        if path.endswith("/changes"):
+            self.change_polls += 1
+            start = int(params["pageToken"]) - 1
+            if start < 0 or start > len(self.changes):
+                return 404, {"error": {"code": 404, "message": "Page token is not valid."}}
+            limit = int(params.get("pageSize", 100))
+            page = self.changes[start:start + limit]
+            payload: dict[str, Any] = {"changes": page}
+            if start + limit < len(self.changes):
+                payload["nextPageToken"] = str(start + limit + 1)
+            else:
+                payload["newStartPageToken"] = str(len(self.changes) + 1)
+            return 200, payload
+        if path.endswith("/files"):
+            self.list_calls += 1
+            matches = [item for item in self.files.values() if self._matches(item, params.get("q", ""))]
+            offset = int(params.get("pageToken", 0))
+            limit = int(params.get("pageSize", 100))
+            payload = {"files": matches[offset:offset + limit]}
+            if offset + limit < len(matches):
+                payload["nextPageToken"] = str(offset + limit)
+            return 200, payload
+        file_id = unquote(path.rsplit("/", 1)[-1])
+        if file_id not in self.files:
+            return 404, {"error": {"code": 404, "message": f"File not found: {file_id}."}}
+        return 200, self.files[file_id]
+
+    @staticmethod
+    def _matches(item: dict[str, Any], query: str) -> bool:
+        for needle in re.findall(r"name\s+contains\s+'((?:[^'\\]|\\.)*)'", query, re.IGNORECASE):
+            if needle.replace("\\'", "'").lower() not in item["name"].lower():
+                return False
+        for mime_type in re.findall(r"mimeType\s*=\s*'([^']*)'", query):
+            if item["mimeType"] != mime_type:
+                return False
+        for parent in re.findall(r"'([^']*)'\s+in\s+parents", query, re.IGNORECASE):
+            if parent not in item["parents"]:
+                return False
+        for trashed in re.findall(r"trashed\s*=\s*(true|false)", query, re.IGNORECASE):
+            if item["trashed"] != (trashed.lower() == "true"):
+                return False
+        return True
+
+
+def fake_discovery_build(api_service: str, api_version: str, *args: Any, **kwargs: Any) -> Any:
+    if api_service == "gmail":
+        return FakeGmailService()
+    if api_service == "drive":
+        return FakeDriveService()
+    raise ValueError(f"No bench stand-in for Google API {api_service} {api_version}")
+
+
+# --- Drive queries ------------------------------------------------------------------------------
+
+_QUERY_WORDS = ("invoice", "Q3 plan", "Valentine's", "budget_2024", "50%", "back\\slash", "été")
+_QUERY_TIMES = ("2024-01-01T00:00:00Z", "2025-06-30T12:30:00.123+02:00", "2026-01-01T00:00:00")
+
+
+def _drive_literal(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def random_drive_query(rng: Any, depth: int = 0) -> str:
+    """A valid Drive `q` over every term of the system prompt grammar, nested up to 3 levels."""
+    if depth < 3 and rng.random() < 0.35:
+        operator = rng.choice((" and ", " or "))
+        parts = [random_drive_query(rng, depth + 1) for _ in range(rng.randint(2, 3))]
+        return "(" + operator.join(parts) + ")"
+    if depth < 3 and rng.random() < 0.1:
+        return "not " + random_drive_query(rng, depth + 1)
+    word = _drive_literal(rng.choice(_QUERY_WORDS))
+    return rng.choice(
+        (
+            f"name contains {word}",
+            f"name {rng.choice(('=', '!='))} {word}",
+            f"fullText contains {word}",
+            f"mimeType {rng.choice(('=', '!=', 'contains'))} 'application/pdf'",
+            f"{rng.choice(('modifiedTime', 'createdTime', 'viewedByMeTime'))} "
+            f"{rng.choice(('<', '<=', '=', '!=', '>', '>='))} {_drive_literal(rng.choice(_QUERY_TIMES))}",
+            f"{rng.choice(('trashed', 'starred', 'sharedWithMe'))} {rng.choice(('=', '!='))} "
+            f"{rng.choice(('true', 'false'))}",
+            f"'{rng.choice(('root', 'folder_1', 'a-b_c'))}' in {rng.choice(('parents', 'owners', 'writers', 'readers'))}",
+            f"{rng.choice(('properties', 'appProperties'))} has {{ key='dept' and value={word} }}",
+            f"visibility = '{rng.choice(('limited', 'anyoneWithLink'))}'",
+            "shortcutDetails.targetId = 'target-1'",
+        )
+    )
+
+
+def mutate_drive_query(query: str, rng: Any) -> str:
+    """`query` with one random character-level edit: drop, duplicate, swap or insert noise."""
+    if not query:
+        return rng.choice("'\"(){}=<>!")
+    position = rng.randrange(len(query))
+    edit = rng.randrange(4)
+    if edit == 0:
+        return query[:position] + query[position + 1:]
+    if edit == 1:
+        return query[:position] + query[position] + query[position:]
+    if edit == 2 and position + 1 < len(query):
+        return query[:position] + query[position + 1] + query[position] + query[position + 2:]
+    return query[:position] + rng.choice("'\"\\(){}=<>! aZ9_.,-T:") + query[position:]
+
+
+# --- MCP ----------------------------------------------------------------------------------------
+
+
+class FakeMCPServer(MCPServer):
+    """In-process MCP server exposing a single `browser_navigate` tool."""
+
+    def __init__(self, *, name: str = "playwright_bench", call_latency: float = 0.0) -> None:
+        super().__init__()
+        self._name = name
+        self._call_latency = call_latency
+        self.calls = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    async def connect(self) -> None:
+        return None
+
+    async def cleanup(self) -> None:
+        return None
+
+    async def list_tools(self, run_context: Any = None, agent: Any = None) -> list[MCPTool]:
+        return [
+            MCPTool(
+                name="browser_navigate",
+                description="Navigate to a URL.",
+                inputSchema={
+                    "type": "object",
+                    "properties": {"url": {"type": "string"}},
+                    "required": ["url"],
+                },
+            )
+        ]
+
+    async def call_tool(self, tool_name: str, arguments: dict[str, Any] | None) -> CallToolResult:
+        self.calls += 1
+        if self._call_latency:
+            await asyncio.sleep(self._call_latency)
+        url = (arguments or {}).get("url", "")
+        return CallToolResult(content=[TextContent(type="text", text=f"Navigated to {url}")])
+
+    async def list_prompts(self) -> ListPromptsResult:
+        return ListPromptsResult(prompts=[])
+
+    async def get_prompt(self, name: str, arguments: dict[str, Any] | None = None) -> GetPromptResult:
+        raise KeyError(name)
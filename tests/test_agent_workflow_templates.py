@@ -0,0 +1,107 @@
+import asyncio
+import contextvars
+
+from openai import AsyncOpenAI
+
+from app import dependencies
+from app.agents import workflow
+from app.core.enums import SupportedApps
+
+_ALL_APPS = [
+    SupportedApps.GMAIL,
+    SupportedApps.GOOGLE_DRIVE,
+    SupportedApps.WHATSAPP,
+    SupportedApps.BROWSER,
+]
+
+
+def _install_openai_client(monkeypatch) -> None:
+    monkeypatch.setattr(dependencies, "_openai_client", AsyncOpenAI(api_key="test-key"))
+    workflow.clear_agent_graph_templates()
+
+
+def _build(**kwargs):
+    return asyncio.run(
+        workflow.create_agent_workflow(
+            connected_apps=_ALL_APPS,
+            browser_credential_secret_refs=[],
+            **kwargs,
+        )
+    )
+
+
+def _tools_by_name(agent) -> dict:
+    return {tool.name: tool for tool in agent.tools}
+
+
+def test_requests_share_template_but_get_fresh_per_user_parts(monkeypatch) -> None:
+    _install_openai_client(monkeypatch)
+
+    first = asyncio.run(
+        workflow.create_agent_workflow(
+            connected_apps=_ALL_APPS,
+            browser_credential_secret_refs=["SITE_PASSWORD"],
+        )
+    )
+    second = _build()
+
+    assert len(workflow._graph_templates) == 1
+    assert first is not second
+
+    first_tools, second_tools = _tools_by_name(first), _tools_by_name(second)
+    assert list(first_tools) == ["web_search", "gmail", "drive", "whatsapp"]
+    assert first_tools["gmail"] is second_tools["gmail"]
+    assert first_tools["drive"] is second_tools["drive"]
+    assert first_tools["whatsapp"] is not second_tools["whatsapp"]
+
+    first_browser, second_browser = first.handoffs[0], second.handoffs[0]
+    assert first_browser is not second_browser
+    assert first_browser.model is second_browser.model
+    assert first_browser.mcp_servers[0] is not second_browser.mcp_servers[0]
+    assert "SITE_PASSWORD" in first_browser.instructions
+    assert "SITE_PASSWORD" not in second_browser.instructions
+    assert first_browser.handoffs[-1] is first
+    assert second_browser.handoffs[-1] is second
+
+
+def test_connected_app_set_selects_template(monkeypatch) -> None:
+    _install_openai_client(monkeypatch)
+
+    full = _build()
+    gmail_only = asyncio.run(
+        workflow.create_agent_workflow(
+            connected_apps=[SupportedApps.GMAIL],
+            browser_credential_secret_refs=[],
+        )
+    )
+
+    assert len(workflow._graph_templates) == 2
+    assert list(_tools_by_name(gmail_only)) == ["web_search", "gmail"]
+    assert gmail_only.handoffs == []
+    assert _tools_by_name(full)["gmail"] is not _tools_by_name(gmail_only)["gmail"]
+
+
+def test_shared_tools_dispatch_to_the_calling_runs_stream_callback(monkeypatch) -> None:
+    _install_openai_client(monkeypatch)
+    received: dict[str, list] = {"a": [], "b": []}
+
+    async def _build_and_emit(run: str) -> None:
+        async def _on_stream(event) -> None:
+            received[run].append(event)
+
+        await workflow.create_agent_workflow(
+            connected_apps=_ALL_APPS,
+            tool_on_stream=_on_stream,
+            browser_credential_secret_refs=[],
+        )
+        await workflow._dispatch_tool_stream({"run": run})
+
+    async def _run() -> None:
+        await asyncio.gather(
+            asyncio.create_task(_build_and_emit("a"), context=contextvars.Context()),
+            asyncio.create_task(_build_and_emit("b"), context=contextvars.Context()),
+        )
+
+    asyncio.run(_run())
+
+    assert received == {"a": [{"run": "a"}], "b": [{"run": "b"}]}
@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app import auth
+from app.core.settings import get_settings
+
+
+_JWT_SECRET = "test-jwt-secret-with-enough-entropy-for-hs256"
+
+
+@pytest.fixture(autouse=True)
+def _reset_auth_state(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "supabase_jwt_secret", _JWT_SECRET)
+    monkeypatch.setattr(settings, "auth_token_revocation_lag_seconds", 60.0)
+    monkeypatch.setattr(settings, "auth_token_cache_max_entries", 2)
+    monkeypatch.setattr(auth, "_token_cache", None)
+    yield
+    monkeypatch.setattr(auth, "_token_cache", None)
+
+
+def _mint_token(user_id: str, *, exp_in: int = 3600, secret: str = _JWT_SECRET) -> str:
+    return jwt.encode(
+        {"sub": user_id, "aud": "authenticated", "exp": int(time.time()) + exp_in},
+        secret,
+        algorithm="HS256",
+    )
+
+
+def _credentials(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def test_local_verification_is_cached_without_native_call(monkeypatch) -> None:
+    native_calls: list[str] = []
+
+    async def _fake_native(token: str) -> str:
+        native_calls.append(token)
+        return "user-1"
+
+    monkeypatch.setattr(auth, "_validate_token_with_supabase_native", _fake_native)
+    token = _mint_token("user-1")
+
+    first = asyncio.run(auth.get_auth_context(_credentials(token)))
+    second = asyncio.run(auth.get_auth_context(_credentials(token)))
+
+    assert first.user_id == second.user_id == "user-1"
+    assert native_calls == []
+    metrics = auth.get_auth_token_cache_metrics()
+    assert metrics["local_verifications"] == 1
+    assert metrics["hits"] == 1
+    assert metrics["misses"] == 1
+
+
+def test_invalid_signature_is_rejected_and_not_cached(monkeypatch) -> None:
+    token = _mint_token("user-1", secret="some-other-secret-with-enough-entropy")
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(auth.get_auth_context(_credentials(token)))
+
+    assert exc_info.value.status_code == 401
+    assert auth.get_auth_token_cache_metrics()["hits"] == 0
+
+
+def test_native_fallback_when_no_local_validator(monkeypatch) -> None:
+    monkeypatch.setattr(get_settings(), "supabase_jwt_secret", None)
+    native_calls: list[str] = []
+
+    async def _fake_native(token: str) -> str:
+        native_calls.append(token)
+        return "user-2"
+
+    monkeypatch.setattr(auth, "_validate_token_with_supabase_native", _fake_native)
+    token = _mint_token("user-2")
+
+    asyncio.run(auth.get_auth_context(_credentials(token)))
+    asyncio.run(auth.get_auth_context(_credentials(token)))
+
+    assert native_calls == [token]
+    assert auth.get_auth_token_cache_metrics()["native_verifications"] == 1
+
+
+def test_cache_ttl_is_capped_by_token_exp_and_bounded() -> None:
+    cache = auth._VerifiedTokenCache(max_entries=2, revocation_lag_seconds=60.0)
+
+    cache.put("expired", "user-x", token_exp=time.time() - 1)
+    assert cache.get("expired") is None
+
+    cache.put("a", "user-a", token_exp=None)
+    cache.put("b", "user-b", token_exp=None)
+    cache.put("c", "user-c", token_exp=None)
+    assert cache.get("a") is None
+    assert cache.get("c") == "user-c"
+    assert cache.metrics.evictions == 1
@@ -0,0 +1,128 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.db import onboarding_sql
+
+
+class _FakeRpcCall:
+    def __init__(self, client: "_FakeClient") -> None:
+        self._client = client
+
+    async def execute(self):
+        self._client.rpc_calls += 1
+        if self._client.rpc_error is not None:
+            raise self._client.rpc_error
+        if self._client.before_return is not None:
+            self._client.before_return()
+
+        class _Response:
+            data = [dict(self._client.row)]
+
+        return _Response()
+
+
+class _FakeTableQuery:
+    def __init__(self, client: "_FakeClient", table: str) -> None:
+        self._client = client
+        self._table = table
+
+    def select(self, columns: str) -> "_FakeTableQuery":
+        return self
+
+    def eq(self, column: str, value: str) -> "_FakeTableQuery":
+        assert (column, value) == ("user_id", "user-1")
+        return self
+
+    def maybe_single(self) -> "_FakeTableQuery":
+        return self
+
+    async def execute(self):
+        if self._table not in self._client.tables:
+            raise RuntimeError(f'relation "public.{self._table}" does not exist')
+        status = self._client.tables[self._table]
+
+        class _Response:
+            data = {"status": status} if status is not None else None
+
+        return _Response()
+
+
+class _FakeClient:
+    def __init__(self) -> None:
+        self.rpc_calls = 0
+        self.row = {
+            "gmail_status": "active",
+            "google_drive_status": None,
+            "whatsapp_status": "connected",
+        }
+        self.before_return = None
+        self.rpc_error: Exception | None = None
+        self.tables: dict[str, str | None] = {}
+
+    def table(self, name: str) -> "_FakeTableQuery":
+        return _FakeTableQuery(self, name)
+
+    def rpc(self, fn: str, params: dict):
+        assert fn == "get_connected_apps_status"
+        assert params == {"p_user_id": "user-1"}
+        return _FakeRpcCall(self)
+
+
+@pytest.fixture
+def fake_client(monkeypatch) -> _FakeClient:
+    client = _FakeClient()
+
+    @asynccontextmanager
+    async def _fake_supabase_user_client(user_jwt: str):
+        yield client
+
+    monkeypatch.setattr(onboarding_sql, "supabase_user_client", _fake_supabase_user_client)
+    monkeypatch.setattr(onboarding_sql, "_connected_apps_status_cache", onboarding_sql._ConnectedAppsStatusCache())
+    return client
+
+
+def _get_status():
+    return asyncio.run(onboarding_sql.get_connected_apps_status(user_id="user-1", user_jwt="token-1"))
+
+
+def test_single_rpc_and_cached_status(fake_client: _FakeClient) -> None:
+    first = _get_status()
+    second = _get_status()
+
+    assert first == second
+    assert first.connected_app_ids == ["gmail", "whatsapp"]
+    assert fake_client.rpc_calls == 1
+
+
+def test_invalidation_forces_fresh_read(fake_client: _FakeClient) -> None:
+    assert _get_status().gmail is True
+
+    fake_client.row["gmail_status"] = "disconnected"
+    onboarding_sql.invalidate_connected_apps_status("user-1")
+
+    assert _get_status().gmail is False
+    assert fake_client.rpc_calls == 2
+
+
+def test_read_racing_with_invalidation_is_not_cached(fake_client: _FakeClient) -> None:
+    # A disconnect lands while the RPC is in flight; its result must not be cached.
+    fake_client.before_return = lambda: onboarding_sql.invalidate_connected_apps_status("user-1")
+    assert _get_status().gmail is True
+
+    fake_client.before_return = None
+    fake_client.row["gmail_status"] = "disconnected"
+    assert _get_status().gmail is False
+    assert fake_client.rpc_calls == 2
+
+
+def test_missing_rpc_falls_back_to_per_table_reads(fake_client: _FakeClient) -> None:
+    # Migration not applied and no whatsapp_connections table in this deployment.
+    fake_client.rpc_error = RuntimeError("Could not find the function public.get_connected_apps_status")
+    fake_client.tables = {"gmail_connections": "active", "google_drive_connections": "active"}
+
+    status = _get_status()
+
+    assert status.connected_app_ids == ["gmail", "drive"]
+    assert status.whatsapp is False
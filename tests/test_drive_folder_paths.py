@@ -0,0 +1,72 @@
+import asyncio
+
+from app.integrations.google_drive import services as drive_services
+from app.utils.drive_search_cache_utils import DriveSearchCache
+from tests.benchmarks.standins import DriveStubHttp
+from tests.test_drive_search_cache import _install_drive_stub
+
+_FOLDER = "application/vnd.google-apps.folder"
+
+
+def _tree_stub() -> DriveStubHttp:
+    stub = DriveStubHttp()
+    stub.add_file("root", "My Drive", mime_type=_FOLDER, parents=[])
+    stub.add_file("finance", "Finance", mime_type=_FOLDER)
+    stub.add_file("y2024", "2024", mime_type=_FOLDER, parents=["finance"])
+    stub.add_file("f1", "Q3 report.pdf", parents=["y2024"])
+    stub.add_file("f2", "Annual report.pdf", parents=["finance"])
+    stub.add_file("f3", "Shared report.pdf", parents=["not-shared"])
+    return stub
+
+
+def _paths(result) -> dict[str, str | None]:
+    return {item.id: item.folder_path for item in result.files}
+
+
+def test_resolves_paths_one_batch_per_level_and_reuses_folders(monkeypatch) -> None:
+    stub = _tree_stub()
+    _install_drive_stub(monkeypatch, stub, DriveSearchCache(max_entries=0, poll_interval_seconds=0))
+
+    async def _run():
+        first = await drive_services.search_files("user-1", "jwt", "name contains 'report'", include_folder_paths=True)
+        first_round_trips = stub.round_trips
+        again = await drive_services.search_files("user-1", "jwt", "name contains 'Q3'", include_folder_paths=True)
+        plain = await drive_services.search_files("user-1", "jwt", "name contains 'Q3'")
+        return first, first_round_trips, again, plain, stub.round_trips
+
+    first, first_round_trips, again, plain, round_trips = asyncio.run(_run())
+
+    assert _paths(first) == {
+        "f1": "My Drive/Finance/2024",
+        "f2": "My Drive/Finance",
+        "f3": None,
+    }
+    # files.list, then one batch for {2024, Finance, not-shared} and one for {My Drive}.
+    assert first_round_trips == 3
+    assert _paths(again) == {"f1": "My Drive/Finance/2024"}
+    assert _paths(plain) == {"f1": None}
+    assert round_trips == first_round_trips + 2
+
+
+def test_folders_seen_in_a_change_poll_are_read_again(monkeypatch) -> None:
+    stub = _tree_stub()
+    _install_drive_stub(monkeypatch, stub)
+    query = "name contains 'Q3'"
+
+    async def _run():
+        before = await drive_services.search_files("user-1", "jwt", query, include_folder_paths=True)
+        stub.files["finance"]["name"] = "Accounts"
+        stub.change("finance")
+        after = await drive_services.search_files("user-1", "jwt", query, include_folder_paths=True)
+        return before, after
+
+    before, after = asyncio.run(_run())
+
+    assert _paths(before) == {"f1": "My Drive/Finance/2024"}
+    assert _paths(after) == {"f1": "My Drive/Accounts/2024"}
+    assert drive_services.get_drive_folder_cache().metrics.as_dict() == {
+        "hits": 2,
+        "misses": 4,
+        "discards": 1,
+        "evictions": 0,
+    }
@@ -0,0 +1,127 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.integrations.google_drive import services as drive_services
+from app.utils.drive_index_utils import GoogleDriveMetadataIndex, parse_drive_index_query
+from app.utils.drive_search_cache_utils import DriveSearchCache
+from tests.benchmarks.standins import DriveStubHttp
+from tests.test_drive_search_cache import _install_drive_stub
+
+
+def test_translates_the_common_drive_subset_and_rejects_the_rest() -> None:
+    parsed = parse_drive_index_query(
+        "(name contains 'Q3' or mimeType = 'application/pdf') and not trashed = true "
+        "and modifiedTime > '2024-01-01T00:00:00Z' and 'folder_1' in parents"
+    )
+    assert parsed.where == (
+        "(((name LIKE ? ESCAPE '\\' AND drive_name_contains(name, ?)) OR mime_type = ?) "
+        "AND NOT (trashed = ?) AND modified_ms > ? AND instr(parents, ?) > 0)"
+    )
+    assert parsed.params == ("%Q3%", "Q3", "application/pdf", 1, 1704067200000, " folder_1 ")
+
+    for query in (
+        "fullText contains 'budget'",
+        "sharedWithMe",
+        "name contains 'a' and fullText contains 'b'",
+        "modifiedTime > 'yesterday'",
+        "name contains 'unterminated",
+        "(name = 'a'",
+    ):
+        assert parse_drive_index_query(query) is None, query
+
+
+def _install_index(monkeypatch, tmp_path, stub: DriveStubHttp) -> GoogleDriveMetadataIndex:
+    _install_drive_stub(monkeypatch, stub, DriveSearchCache(max_entries=0, poll_interval_seconds=0))
+    index = GoogleDriveMetadataIndex(tmp_path / "drive-index.sqlite3")
+    monkeypatch.setattr(drive_services, "get_google_drive_metadata_index", lambda: index)
+    monkeypatch.setattr(
+        drive_services,
+        "get_google_drive_settings",
+        lambda: SimpleNamespace(index_max_files=1000, index_sync_interval_seconds=0, query_auto_repair=True),
+    )
+    return index
+
+
+def _seeded_stub() -> DriveStubHttp:
+    stub = DriveStubHttp()
+    stub.add_file("f1", "Q3 report.pdf", parents=["folder_1"], modified_time="2024-01-03T00:00:00.000Z")
+    stub.add_file("f2", "Budget.xlsx", mime_type="application/vnd.ms-excel", modified_time="2024-01-02T00:00:00Z")
+    stub.add_file("f3", "Qreport draft.pdf", trashed=True, modified_time="2024-01-01T00:00:00Z")
+    stub.add_file("f4", "Q4 report.pdf", starred=True, parents=["folder_1"], modified_time="2024-01-04T00:00:00Z")
+    return stub
+
+
+def test_crawls_in_background_then_answers_locally_and_applies_changes(monkeypatch, tmp_path) -> None:
+    stub = _seeded_stub()
+    index = _install_index(monkeypatch, tmp_path, stub)
+
+    async def _search(query: str, **kwargs):
+        result = await drive_services.search_files("user-1", "jwt", query, **kwargs)
+        return result.source, [item.id for item in result.files], result.next_page_token
+
+    async def _run():
+        first = await _search("name contains 'report'")
+        await drive_services._index_tasks["user-1"]
+        list_calls_after_crawl = stub.list_calls
+        results = {
+            "report": await _search("name contains 'report'"),
+            "folder": await _search("'folder_1' in parents and not starred = true"),
+            "recent": await _search("modifiedTime >= '2024-01-02T00:00:00' and trashed = false", max_results=1),
+            "spreadsheets": await _search("mimeType contains 'excel' or name = 'nothing'"),
+        }
+        results["recent_next"] = await _search(
+            "modifiedTime >= '2024-01-02T00:00:00' and trashed = false",
+            max_results=1,
+            page_token=results["recent"][2],
+        )
+        stub.files["f1"]["name"] = "Q3 summary.pdf"
+        stub.change("f1")
+        del stub.files["f4"]
+        stub.change("f4")
+        stub.add_file("f5", "Q1 Report.docx", modified_time="2024-02-01T00:00:00Z")
+        stub.change("f5")
+        results["after_sync"] = await _search("name contains 'report'")
+        return first, list_calls_after_crawl, results
+
+    first, list_calls_after_crawl, results = asyncio.run(_run())
+
+    assert first[0] == "live"
+    assert results["report"] == ("index", ["f4", "f1"], None)
+    assert results["folder"][1] == ["f1"]
+    assert results["recent"] == ("index", ["f4"], "index:1")
+    assert results["recent_next"] == ("index", ["f1"], "index:2")
+    assert results["spreadsheets"][1] == ["f2"]
+    assert results["after_sync"] == ("index", ["f5"], None)
+    # Only the crawl listed files; every later search was answered from SQLite.
+    assert stub.list_calls == list_calls_after_crawl
+    assert index.state("user-1").page_token == "4"
+
+
+def test_full_text_oversized_drives_and_expired_cursors_use_the_api(monkeypatch, tmp_path) -> None:
+    stub = _seeded_stub()
+    index = _install_index(monkeypatch, tmp_path, stub)
+
+    async def _run():
+        await drive_services.crawl_drive_index("user-1", "jwt")
+        full_text = await drive_services.search_files("user-1", "jwt", "fullText contains 'report'")
+        await asyncio.to_thread(index.apply, "user-1", upserts=[], removals=[], page_token="99")
+        monkeypatch.setattr(
+            drive_services,
+            "get_google_drive_settings",
+            lambda: SimpleNamespace(index_max_files=2, index_sync_interval_seconds=0, query_auto_repair=True),
+        )
+        expired = await drive_services.search_files("user-1", "jwt", "name contains 'report'")
+        expired_state = index.state("user-1")
+        recrawling = await drive_services.search_files("user-1", "jwt", "name contains 'report'")
+        await drive_services._index_tasks["user-1"]
+        oversized = await drive_services.search_files("user-1", "jwt", "name contains 'report'")
+        return full_text, expired, expired_state, recrawling, oversized
+
+    full_text, expired, expired_state, recrawling, oversized = asyncio.run(_run())
+
+    assert full_text.source == "live"
+    assert expired.source == "live"
+    assert expired_state is None
+    assert recrawling.source == "live"
+    assert oversized.source == "live"
+    assert index.state("user-1").page_token is None
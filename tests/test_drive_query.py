@@ -0,0 +1,108 @@
+import asyncio
+import random
+
+import pytest
+
+from app.integrations.google_drive import services as drive_services
+from app.integrations.google_drive import tools as drive_tools
+from app.utils.drive_query_utils import DriveQueryError, compile_drive_query
+from app.utils.drive_search_cache_utils import DriveSearchCache
+from tests.benchmarks.standins import DriveStubHttp, mutate_drive_query, random_drive_query
+from tests.test_drive_search_cache import _install_drive_stub
+
+
+def test_normalizes_spelling_and_sorts_operands_for_the_cache_key() -> None:
+    compiled = compile_drive_query(
+        "TRASHED=FALSE AND (mimetype='application/pdf' OR name contains 'Q3 plan') and 'f_1' in parents"
+    )
+
+    assert compiled.q == "trashed = false and (mimeType = 'application/pdf' or name contains 'Q3 plan') and 'f_1' in parents"
+    assert compiled.cache_key == (
+        "'f_1' in parents and (mimeType = 'application/pdf' or name contains 'Q3 plan') and trashed = false"
+    )
+    assert compiled.repairs == ()
+    assert compile_drive_query("name contains 'Q3 plan' or mimeType = 'application/pdf'").cache_key == (
+        compile_drive_query("mimeType='application/pdf'  or  name contains 'Q3 plan'").cache_key
+    )
+
+
+def test_repairs_unambiguous_slips_and_reports_them() -> None:
+    compiled = compile_drive_query(
+        'name contains "budget" trashed == False and modifiedTime > \'2024/01/31\' '
+        "and parents = 'f1' and name contains 'Valentine's' and starred"
+    )
+
+    assert compiled.q == (
+        "name contains 'budget' and trashed = false and modifiedTime > '2024-01-31T00:00:00Z' "
+        "and 'f1' in parents and name contains 'Valentine\\'s' and starred = true"
+    )
+    assert compiled.repairs == (
+        "changed the double-quoted string at column 15 to single quotes",
+        "replaced '==' with '=' at column 32",
+        "escaped the apostrophe at column 120",
+        "inserted 'and' before column 24",
+        "rewrote modifiedTime value '2024/01/31' as '2024-01-31T00:00:00Z'",
+        "rewrote parents = 'f1' as 'f1' in parents",
+        "read bare starred as starred = true",
+    )
+    with pytest.raises(DriveQueryError, match="auto-repair is off"):
+        compile_drive_query("trashed == false", repair=False)
+
+
+@pytest.mark.parametrize(
+    ("query", "message"),
+    [
+        ("name contains 'invoice", "unterminated string; close it with ' and escape quotes inside it as \\' (column 15)"),
+        ("nmae contains 'x'", "unknown query term 'nmae'; did you mean name? (column 1)"),
+        ("modifiedTime contains '2024'", "modifiedTime does not support 'contains'; use !=, <, <=, =, >, >= (column 14)"),
+        ("createdTime > 'last week'", "createdTime needs an RFC 3339 timestamp such as '2026-01-01T00:00:00Z', got 'last week' (column 15)"),
+        ("(trashed = false", "'(' is never closed (column 1)"),
+        ("trashed = false)", "unmatched ')' (column 16)"),
+        ("starred = yes", "starred takes true or false, got 'yes' (column 11)"),
+        ("'root' in name", "'in' only works with parents, owners, writers and readers, not name (column 11)"),
+        ("trashed = false and", "query ends early; expected a query term"),
+    ],
+)
+def test_rejects_invalid_queries_with_the_column_and_fix(query: str, message: str) -> None:
+    with pytest.raises(DriveQueryError) as excinfo:
+        compile_drive_query(query)
+    assert str(excinfo.value) == message
+
+
+def test_fuzzed_queries_compile_idempotently_or_fail_with_drive_query_error() -> None:
+    rng = random.Random(2024)
+    rejected = 0
+    for _ in range(2000):
+        query = random_drive_query(rng)
+        compiled = compile_drive_query(query)
+        assert compiled.repairs == (), query
+        assert compile_drive_query(compiled.q).q == compiled.q
+        assert compile_drive_query(compiled.cache_key).cache_key == compiled.cache_key
+
+        mutated = mutate_drive_query(query, rng)
+        try:
+            repaired = compile_drive_query(mutated)
+        except DriveQueryError:
+            rejected += 1
+            continue
+        assert compile_drive_query(repaired.q).q == repaired.q, mutated
+    assert rejected > 100
+
+
+def test_invalid_queries_never_reach_drive(monkeypatch) -> None:
+    stub = DriveStubHttp()
+    stub.add_file("f1", "Q3 report.pdf")
+    _install_drive_stub(monkeypatch, stub, DriveSearchCache(max_entries=0, poll_interval_seconds=0))
+    monkeypatch.setattr(drive_tools, "get_user_id", lambda ctx: "user-1")
+    monkeypatch.setattr(drive_tools, "get_user_jwt", lambda ctx: "jwt")
+
+    invalid = asyncio.run(drive_tools._search_drive_files_tool(None, "name contians 'report'"))
+    repaired = asyncio.run(drive_services.search_files("user-1", "jwt", 'name contains "report"'))
+
+    assert invalid == {
+        "error": "Invalid Drive query: expected an operator after name, got 'contians' (column 6)",
+        "query": "name contians 'report'",
+    }
+    assert [item.id for item in repaired.files] == ["f1"]
+    assert repaired.query_repairs == ["changed the double-quoted string at column 15 to single quotes"]
+    assert stub.round_trips == 1
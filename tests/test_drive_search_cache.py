@@ -0,0 +1,105 @@
+import asyncio
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+import httpx
+
+from app.integrations.google_drive import services as drive_services
+from app.utils import google_async_http_utils, google_drive_utils, google_utils
+from app.utils.drive_folder_cache_utils import DriveFolderCache
+from app.utils.drive_search_cache_utils import DriveSearchCache, normalize_drive_query
+from app.utils.google_rate_limit_utils import GoogleRateLimiter
+from tests.benchmarks.standins import DriveStubHttp
+
+
+@dataclass(frozen=True)
+class _Tokens:
+    access_token: str
+    refresh_token: str
+    status: str = "active"
+    access_token_expires_at: str | None = None
+
+
+async def _load_tokens(_user_id: str, _user_jwt: str) -> _Tokens:
+    return _Tokens(access_token="access", refresh_token="refresh")
+
+
+def _install_drive_stub(monkeypatch, stub: DriveStubHttp, cache: DriveSearchCache | None = None) -> DriveSearchCache:
+    monkeypatch.setattr(google_drive_utils, "get_google_drive_creds", _load_tokens)
+    monkeypatch.setattr(
+        google_drive_utils,
+        "get_google_drive_settings",
+        lambda: SimpleNamespace(token_uri="https://oauth2.googleapis.com/token", client_id="id", client_secret="secret", scopes=[]),
+    )
+    monkeypatch.setattr(google_utils, "build_http", lambda: stub)
+    monkeypatch.setattr(
+        google_utils,
+        "_service_cache",
+        google_utils._GoogleServiceCache(max_entries=8, idle_ttl_seconds=60),
+    )
+    async_http = google_async_http_utils.GoogleAsyncHttp(
+        max_connections=8,
+        max_keepalive_connections=8,
+        keepalive_expiry_seconds=30,
+        timeout_seconds=5,
+    )
+    async_http._http_client = httpx.AsyncClient(transport=stub.transport())
+    monkeypatch.setattr(google_async_http_utils, "_google_async_http", async_http)
+    limiter = GoogleRateLimiter(rates={}, max_concurrency=8)
+    monkeypatch.setattr(google_utils, "get_google_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(drive_services, "get_google_rate_limiter", lambda: limiter)
+    folder_cache = DriveFolderCache(max_entries=64, ttl_seconds=60)
+    monkeypatch.setattr(drive_services, "get_drive_folder_cache", lambda: folder_cache)
+    cache = cache or DriveSearchCache(max_entries=64, poll_interval_seconds=0)
+    monkeypatch.setattr(drive_services, "get_drive_search_cache", lambda: cache)
+    return cache
+
+
+def _search(query: str, **kwargs) -> list[str]:
+    result = asyncio.run(drive_services.search_files("user-1", "jwt", query, **kwargs))
+    return [item.id for item in result.files]
+
+
+def test_normalizes_keywords_and_whitespace_outside_literals() -> None:
+    assert normalize_drive_query("name contains 'Q3  AND plan'   AND  trashed = FALSE") == (
+        "name contains 'Q3  AND plan' and trashed = false"
+    )
+
+
+def test_repeated_queries_are_served_until_a_change_is_seen(monkeypatch) -> None:
+    stub = DriveStubHttp()
+    stub.add_file("f1", "Q3 report.pdf")
+    stub.add_file("f2", "Budget.xlsx")
+    cache = _install_drive_stub(monkeypatch, stub)
+
+    assert _search("name contains 'report'") == ["f1"]
+    assert _search("name  contains 'report'  AND trashed = false") == ["f1"]
+    assert _search("name contains 'report' and trashed = false") == ["f1"]
+    assert stub.list_calls == 2
+
+    stub.add_file("f3", "Q4 report.pdf")
+    stub.change("f3")
+    assert _search("name contains 'report'") == ["f1", "f3"]
+    assert stub.list_calls == 3
+    assert cache.metrics.as_dict() == {
+        "hits": 1,
+        "misses": 3,
+        "change_polls": 3,
+        "invalidations": 1,
+        "evictions": 0,
+    }
+
+
+def test_expired_change_cursor_restarts_and_drops_results(monkeypatch) -> None:
+    stub = DriveStubHttp()
+    stub.add_file("f1", "Q3 report.pdf")
+    cache = _install_drive_stub(monkeypatch, stub)
+
+    assert _search("name contains 'report'") == ["f1"]
+    cache.cursor("user-1").page_token = "999"
+    assert _search("name contains 'report'") == ["f1"]
+    assert stub.list_calls == 2
+    assert cache.cursor("user-1").page_token == "1"
+
+    assert _search("name contains 'report'") == ["f1"]
+    assert stub.list_calls == 2
@@ -0,0 +1,86 @@
+import asyncio
+import base64
+
+from app.integrations.gmail import services as gmail_services
+from app.utils.email_text_utils import extract_message_text, token_budget_window
+from app.utils.gmail_message_cache_utils import GmailMessageCache
+from tests.benchmarks.standins import GmailStubHttp
+from tests.test_gmail_batch_read import _install_stub
+
+
+def _part(mime_type: str, text: str) -> dict:
+    data = base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+    return {"mimeType": mime_type, "body": {"data": data}}
+
+
+def test_prefers_plain_text_and_strips_quotes_and_signature() -> None:
+    plain = (
+        "Hi team,\r\n\r\n\r\nThe   launch moved to Friday.\r\n"
+        "> inline quote from earlier\r\n"
+        "Thanks\r\n"
+        "-- \r\n"
+        "Alice | ACME\r\n"
+    )
+    payload = {
+        "mimeType": "multipart/alternative",
+        "parts": [_part("text/plain", plain), _part("text/html", "<p>ignored</p>")],
+    }
+
+    assert extract_message_text(payload) == "Hi team,\n\nThe launch moved to Friday.\nThanks"
+
+    reply = "Sounds good.\n\nOn Mon, Jan 1, 2024 at 9:00 AM Bob <bob@example.com> wrote:\n> earlier"
+    assert extract_message_text(_part("text/plain", reply)) == "Sounds good."
+
+    outlook = "Approved.\n\nFrom: Bob <bob@example.com>\nSent: Monday\nSubject: RE: budget\n\nold thread"
+    assert extract_message_text(_part("text/plain", outlook)) == "Approved."
+
+    forwarded = "FYI\n---------- Forwarded message ---------\nFrom: Carol\nDate: Tue\n\nOriginal news"
+    assert extract_message_text(_part("text/plain", forwarded)).endswith("Original news")
+
+
+def test_converts_html_to_compact_text() -> None:
+    html = (
+        "<html><head><style>.x{color:red}</style><title>t</title></head><body>"
+        '<div style="display: none">preheader</div>'
+        "<h1>Weekly&nbsp;digest</h1><p>Top   stories &amp; news</p>"
+        "<ul><li>First</li><li>Second</li></ul>"
+        '<table><tr><td>Price</td><td>$5</td></tr></table>'
+        '<img src="https://track.example.com/open.gif" width="1">'
+        '<div class="gmail_quote">On Mon someone wrote:<blockquote>old</blockquote></div>'
+        "</body></html>"
+    )
+
+    assert extract_message_text(_part("text/html", html)) == (
+        "Weekly digest\n\nTop stories & news\n\n- First\n- Second\n\nPrice $5"
+    )
+
+
+def test_budget_windows_reassemble_the_text() -> None:
+    text = "\n".join(f"Line {index} with a few words of body text" for index in range(200))
+    pieces = []
+    cursor = 0
+    while cursor is not None:
+        window = token_budget_window(text, cursor=cursor, max_tokens=100)
+        assert len(window.text) <= 400
+        pieces.append(window.text)
+        cursor = window.next_cursor
+
+    assert "\n".join(pieces) == text
+    assert token_budget_window(text, max_tokens=0).next_cursor is None
+
+
+def test_read_message_full_returns_text_windows_and_raw_stays_available(monkeypatch) -> None:
+    stub = GmailStubHttp()
+    _install_stub(monkeypatch, stub)
+    cache = GmailMessageCache(max_bytes=1 << 20, label_ttl_seconds=60)
+    monkeypatch.setattr(gmail_services, "get_gmail_message_cache", lambda: cache)
+
+    first = asyncio.run(gmail_services.read_message_full("user-1", "jwt", "m1", max_tokens=2))
+    rest = asyncio.run(
+        gmail_services.read_message_full("user-1", "jwt", "m1", max_tokens=2, cursor=first.body_cursor)
+    )
+    raw = asyncio.run(gmail_services.read_message_raw("user-1", "jwt", "m1"))
+
+    assert (first.msg_body, rest.msg_body, rest.body_cursor) == ("Body of", "m1", None)
+    assert raw.msg_body == "<pre>Body of m1</pre>"
+    assert stub.message_gets == 2
@@ -0,0 +1,91 @@
+import asyncio
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+import httpx
+
+from app.integrations.gmail import services as gmail_services
+from app.utils import gmail_utils, google_async_http_utils, google_utils
+from app.utils.gmail_message_cache_utils import GmailMessageCache
+from app.utils.google_rate_limit_utils import GoogleRateLimiter
+from tests.benchmarks.standins import GmailStubHttp
+
+
+@dataclass(frozen=True)
+class _Tokens:
+    access_token: str
+    refresh_token: str
+    status: str = "active"
+    access_token_expires_at: str | None = None
+
+
+async def _load_tokens(_user_id: str, _user_jwt: str) -> _Tokens:
+    return _Tokens(access_token="access", refresh_token="refresh")
+
+
+def _install_stub(monkeypatch, stub: GmailStubHttp) -> None:
+    monkeypatch.setattr(gmail_utils, "get_gmail_creds", _load_tokens)
+    monkeypatch.setattr(
+        gmail_utils,
+        "settings",
+        SimpleNamespace(token_uri="https://oauth2.googleapis.com/token", client_id="id", client_secret="secret", scopes=[]),
+    )
+    monkeypatch.setattr(google_utils, "build_http", lambda: stub)
+    async_http = google_async_http_utils.GoogleAsyncHttp(
+        max_connections=8,
+        max_keepalive_connections=8,
+        keepalive_expiry_seconds=30,
+        timeout_seconds=5,
+    )
+    async_http._http_client = httpx.AsyncClient(transport=stub.transport())
+    monkeypatch.setattr(google_async_http_utils, "_google_async_http", async_http)
+    monkeypatch.setattr(
+        google_utils,
+        "_service_cache",
+        google_utils._GoogleServiceCache(max_entries=8, idle_ttl_seconds=60),
+    )
+    monkeypatch.setattr(
+        gmail_services,
+        "get_google_rate_limiter",
+        lambda: GoogleRateLimiter(rates={}, max_concurrency=8),
+    )
+    monkeypatch.setattr(
+        gmail_services,
+        "get_gmail_message_cache",
+        lambda: GmailMessageCache(max_bytes=0, label_ttl_seconds=60),
+    )
+    monkeypatch.setattr(gmail_services.settings, "batch_max_size", 50)
+    monkeypatch.setattr(gmail_services.settings, "batch_max_attempts", 3)
+    monkeypatch.setattr(gmail_services.settings, "batch_retry_base_seconds", 0)
+
+
+def test_batches_reads_and_retries_only_failed_items(monkeypatch) -> None:
+    stub = GmailStubHttp(missing_ids={"m7"}, flaky_ids={"m3": 1, "m99": 1})
+    _install_stub(monkeypatch, stub)
+    message_ids = [f"m{index}" for index in range(120)]
+
+    result = asyncio.run(gmail_services.batch_read_messages("user-1", "jwt", message_ids))
+
+    assert [message.id for message in result.messages] == [
+        message_id for message_id in message_ids if message_id != "m7"
+    ]
+    assert result.error_messages == ["m7"]
+    assert result.messages[0].subject == "Subject m0"
+    assert result.messages[0].msg_body == "Snippet of m0"
+    # Three batch calls (50 + 50 + 20), then one retry call for the two 503s.
+    assert stub.round_trips == 4
+    assert stub.message_gets == 122
+
+
+def test_raw_format_keeps_duplicates_and_gives_up_after_max_attempts(monkeypatch) -> None:
+    stub = GmailStubHttp(flaky_ids={"stuck": 10})
+    _install_stub(monkeypatch, stub)
+
+    result = asyncio.run(
+        gmail_services.batch_read_messages("user-1", "jwt", ["a", "stuck", "a"], format="raw")
+    )
+
+    assert [message.id for message in result.messages] == ["a", "a"]
+    assert result.messages[0].msg_body == "<pre>Body of a</pre>"
+    assert result.error_messages == ["stuck"]
+    assert stub.round_trips == 3
@@ -0,0 +1,185 @@
+import asyncio
+from datetime import datetime, timezone
+
+from app.integrations.gmail import services as gmail_services
+from app.utils.gmail_message_cache_utils import GmailMessageCache
+from app.utils.gmail_mirror_utils import GmailMailboxMirror, parse_mirror_query
+from tests.benchmarks.standins import GmailStubHttp
+from tests.test_gmail_batch_read import _install_stub
+
+_NOW = datetime(2024, 3, 1, tzinfo=timezone.utc)
+_DAY_MS = 86_400_000
+
+
+def test_translates_common_gmail_queries_and_rejects_the_rest() -> None:
+    parsed = parse_mirror_query('from:alice subject:"quarterly report" is:unread newer_than:7d', now=_NOW)
+
+    assert parsed.phrases == [("sender", "alice"), ("subject", "quarterly report")]
+    assert parsed.with_labels == ["UNREAD"]
+    assert parsed.without_labels == ["SPAM", "TRASH"]
+    assert parsed.after_ms == int(_NOW.timestamp() * 1000) - 7 * _DAY_MS
+
+    in_sent = parse_mirror_query("in:sent before:2024/01/31 category:promotions is:read", now=_NOW)
+    assert in_sent.with_labels == ["SENT", "CATEGORY_PROMOTIONS"]
+    assert in_sent.without_labels == ["UNREAD", "SPAM", "TRASH"]
+    assert in_sent.before_ms == int(datetime(2024, 1, 31, tzinfo=timezone.utc).timestamp() * 1000)
+
+    for query in (
+        "has:attachment", "from:a OR from:b", "-from:alice", "label:receipts", "{a b}", "larger:5M",
+        "invoice", 'from:alice "quarterly report"', "is:unread budget",
+        "in:spam", "in:trash", "label:trash is:unread",
+    ):
+        assert parse_mirror_query(query, now=_NOW) is None, query
+
+
+def _install_mirror(monkeypatch, tmp_path, stub: GmailStubHttp) -> GmailMailboxMirror:
+    _install_stub(monkeypatch, stub)
+    monkeypatch.setattr(
+        gmail_services,
+        "get_gmail_message_cache",
+        lambda: GmailMessageCache(max_bytes=0, label_ttl_seconds=60),
+    )
+    mirror = GmailMailboxMirror(tmp_path / "mirror.sqlite3")
+    monkeypatch.setattr(gmail_services, "get_gmail_mailbox_mirror", lambda: mirror)
+    monkeypatch.setattr(gmail_services.settings, "mirror_seed_max_messages", 1000)
+    monkeypatch.setattr(gmail_services.settings, "mirror_sync_interval_seconds", 0)
+    return mirror
+
+
+def _seeded_stub() -> GmailStubHttp:
+    stub = GmailStubHttp()
+    stub.mailbox = [f"m{index}" for index in range(5)]
+    stub.history_id = 10
+    for index, message_id in enumerate(stub.mailbox):
+        stub.internal_dates[message_id] = 1704067200000 + index * _DAY_MS
+    stub.senders["m3"] = "Bob Builder <bob@example.com>"
+    stub.labels["m1"] = ["INBOX", "UNREAD"]
+    return stub
+
+
+def test_seeds_in_background_then_answers_locally_and_applies_history(monkeypatch, tmp_path) -> None:
+    stub = _seeded_stub()
+    mirror = _install_mirror(monkeypatch, tmp_path, stub)
+
+    async def _run():
+        first = await gmail_services.search_mailbox("user-1", "jwt", "from:bob")
+        await gmail_services._mirror_tasks["user-1"]
+        gets_after_seed = stub.message_gets
+        by_sender = await gmail_services.search_mailbox("user-1", "jwt", "from:bob")
+        page = await gmail_services.search_mailbox("user-1", "jwt", "in:inbox", max_results=2)
+        next_page = await gmail_services.search_mailbox("user-1", "jwt", "in:inbox", max_results=2, page_token=page.page_token)
+
+        stub.history_id = 12
+        stub.history = [
+            {"id": "11", "messagesAdded": [{"message": {"id": "m9", "threadId": "t9"}}]},
+            {"id": "11", "messagesDeleted": [{"message": {"id": "m3"}}]},
+            {"id": "12", "labelsRemoved": [{"message": {"id": "m1", "labelIds": ["INBOX"]}, "labelIds": ["UNREAD"]}]},
+        ]
+        stub.senders["m9"] = "bob@example.com"
+        stub.internal_dates["m9"] = 1704067200000 + 30 * _DAY_MS
+        after_sync = await gmail_services.search_mailbox("user-1", "jwt", "from:bob")
+        unread = await gmail_services.search_mailbox("user-1", "jwt", "is:unread")
+        return first, gets_after_seed, by_sender, page, next_page, after_sync, unread
+
+    first, gets_after_seed, by_sender, page, next_page, after_sync, unread = asyncio.run(_run())
+
+    assert first.source == "live"
+    assert by_sender.source == "mirror"
+    assert [message.id for message in by_sender.messages] == ["m3"]
+    assert by_sender.messages[0].subject == "Subject m3"
+    assert [message.id for message in page.messages] == ["m4", "m3"]
+    assert [message.id for message in next_page.messages] == ["m2", "m1"]
+    assert [message.id for message in after_sync.messages] == ["m9"]
+    assert unread.messages == []
+    # Only the one added message was fetched after seeding; everything else came from SQLite.
+    assert stub.message_gets == gets_after_seed + 1
+    assert mirror.state("user-1").history_id == "12"
+
+
+def test_unsupported_queries_and_expired_history_go_live(monkeypatch, tmp_path) -> None:
+    stub = _seeded_stub()
+    mirror = _install_mirror(monkeypatch, tmp_path, stub)
+
+    async def _run():
+        await gmail_services.seed_mailbox_mirror("user-1", "jwt")
+        unsupported = await gmail_services.search_mailbox("user-1", "jwt", "has:attachment")
+        stub.history_expired = True
+        expired = await gmail_services.search_mailbox("user-1", "jwt", "from:bob")
+        return unsupported, expired
+
+    unsupported, expired = asyncio.run(_run())
+
+    assert unsupported.source == "live"
+    assert [message.id for message in unsupported.messages] == stub.mailbox
+    assert expired.source == "live"
+    assert mirror.state("user-1") is None
+
+
+def test_capped_seed_answers_inside_its_coverage_and_pages_older_mail_live(monkeypatch, tmp_path) -> None:
+    stub = GmailStubHttp()
+    stub.mailbox = [f"n{index}" for index in range(6)]
+    for index, message_id in enumerate(stub.mailbox):
+        stub.internal_dates[message_id] = 1704067200000 - index * _DAY_MS
+    mirror = _install_mirror(monkeypatch, tmp_path, stub)
+    monkeypatch.setattr(gmail_services.settings, "mirror_seed_max_messages", 3)
+    monkeypatch.setattr(gmail_services.settings, "mirror_sync_interval_seconds", 60)
+
+    async def _run():
+        await gmail_services.seed_mailbox_mirror("user-1", "jwt")
+        round_trips = stub.round_trips
+        recent = await gmail_services.search_mailbox("user-1", "jwt", f"after:{(1704067200000 - _DAY_MS) // 1000}")
+        recent_round_trips = stub.round_trips - round_trips
+        pages, page_token = [], None
+        while True:
+            page = await gmail_services.search_mailbox("user-1", "jwt", "in:inbox", max_results=2, page_token=page_token)
+            pages.append(page)
+            page_token = page.page_token
+            if not page_token:
+                break
+        return recent, recent_round_trips, pages
+
+    recent, recent_round_trips, pages = asyncio.run(_run())
+
+    assert mirror.state("user-1").covered_from_ms == 1704067200000 - 2 * _DAY_MS + 1000
+    assert [message.id for message in recent.messages] == ["n0", "n1"]
+    assert (recent.source, recent_round_trips) == ("mirror", 0)
+    assert [[message.id for message in page.messages] for page in pages] == [["n0", "n1"], ["n2", "n3"], ["n4", "n5"]]
+    assert [page.source for page in pages] == ["mirror", "live", "live"]
+
+
+def test_unfetched_messages_keep_the_seed_and_history_id_for_a_retry(monkeypatch, tmp_path) -> None:
+    stub = _seeded_stub()
+    stub.flaky_ids = {"m2": 10}
+    mirror = _install_mirror(monkeypatch, tmp_path, stub)
+    monkeypatch.setattr(gmail_services.settings, "batch_max_attempts", 2)
+    monkeypatch.setattr(gmail_services.settings, "batch_retry_base_seconds", 0)
+
+    async def _run():
+        try:
+            await gmail_services.seed_mailbox_mirror("user-1", "jwt")
+        except RuntimeError:
+            pass
+        unseeded = mirror.state("user-1")
+        stub.flaky_ids = {}
+        await gmail_services.seed_mailbox_mirror("user-1", "jwt")
+
+        stub.history_id = 11
+        stub.history = [{"id": "11", "messagesAdded": [{"message": {"id": "m9", "threadId": "t9"}}]}]
+        stub.internal_dates["m9"] = 1704067200000 + 30 * _DAY_MS
+        stub.flaky_ids = {"m9": 10}
+        failed_sync = await gmail_services.sync_mailbox_mirror("user-1", "jwt", "10")
+        history_after_failure = mirror.state("user-1").history_id
+        stub.flaky_ids = {}
+        retried_sync = await gmail_services.sync_mailbox_mirror("user-1", "jwt", "10")
+        inbox = await gmail_services.search_mailbox("user-1", "jwt", "newer_than:3650d", max_results=10)
+        return unseeded, failed_sync, history_after_failure, retried_sync, inbox
+
+    unseeded, failed_sync, history_after_failure, retried_sync, inbox = asyncio.run(_run())
+
+    assert unseeded is None
+    assert (failed_sync, history_after_failure) == (False, "10")
+    assert retried_sync is True
+    assert mirror.state("user-1").history_id == "11"
+    assert "m9" in [message.id for message in inbox.messages]
+    assert "m2" in [message.id for message in inbox.messages]
+
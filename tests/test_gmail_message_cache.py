@@ -0,0 +1,119 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.db import gmail_sql
+from app.integrations.gmail import services as gmail_services
+from app.utils import gmail_message_cache_utils
+from app.utils.gmail_message_cache_utils import GmailMessageCache
+from tests.benchmarks.standins import GmailStubHttp
+from tests.test_gmail_batch_read import _install_stub
+
+
+def _install_cache(monkeypatch, cache: GmailMessageCache) -> GmailMessageCache:
+    monkeypatch.setattr(gmail_services, "get_gmail_message_cache", lambda: cache)
+    return cache
+
+
+def test_rereads_are_served_from_cache_and_stale_labels_are_refreshed(monkeypatch) -> None:
+    stub = GmailStubHttp()
+    _install_stub(monkeypatch, stub)
+    cache = _install_cache(monkeypatch, GmailMessageCache(max_bytes=1 << 20, label_ttl_seconds=60))
+
+    first = asyncio.run(gmail_services.read_message_full("user-1", "jwt", "m1"))
+    again = asyncio.run(gmail_services.read_message_full("user-1", "jwt", "m1"))
+    asyncio.run(gmail_services.read_message_compact("user-1", "jwt", "m1"))
+
+    assert again == first
+    assert again is not first
+    assert stub.message_gets == 2  # compact and full are cached separately
+    assert cache.metrics.memory_hits == 1
+
+    cache.label_ttl_seconds = 0
+    stub.labels["m1"] = ["INBOX", "STARRED"]
+    refreshed = asyncio.run(gmail_services.read_message_full("user-1", "jwt", "m1"))
+
+    assert refreshed.label_ids == ["INBOX", "STARRED"]
+    assert refreshed.msg_body == first.msg_body
+    assert stub.message_gets == 3
+    cache.label_ttl_seconds = 60
+    assert asyncio.run(gmail_services.read_message_compact("user-1", "jwt", "m1")).label_ids == ["INBOX", "STARRED"]
+    assert stub.message_gets == 3
+
+
+def test_batch_reads_only_fetch_misses_and_drop_deleted_messages(monkeypatch) -> None:
+    stub = GmailStubHttp()
+    _install_stub(monkeypatch, stub)
+    cache = _install_cache(monkeypatch, GmailMessageCache(max_bytes=1 << 20, label_ttl_seconds=60))
+    asyncio.run(gmail_services.batch_read_messages("user-1", "jwt", ["m0", "m1", "m2"]))
+    gets_before = stub.message_gets
+
+    result = asyncio.run(gmail_services.batch_read_messages("user-1", "jwt", ["m1", "m3", "m1", "m4"]))
+
+    assert [message.id for message in result.messages] == ["m1", "m3", "m1", "m4"]
+    assert stub.message_gets - gets_before == 2
+
+    cache.label_ttl_seconds = 0
+    stub.missing_ids.add("m2")
+    result = asyncio.run(gmail_services.batch_read_messages("user-1", "jwt", ["m0", "m2"]))
+
+    assert [message.id for message in result.messages] == ["m0"]
+    assert result.error_messages == ["m2"]
+    assert cache.get("user-1", "m2", "compact") is None
+
+
+def test_disk_tier_survives_restart_within_byte_budget_and_is_purged(tmp_path) -> None:
+    path = tmp_path / "gmail-cache.sqlite3"
+    cache = GmailMessageCache(max_bytes=1 << 20, label_ttl_seconds=60, disk_path=path, disk_max_bytes=1 << 20)
+    message = gmail_services.GmailMessage(
+        id="m1", threadId="t1", labelIds=["INBOX"], subject="Hello", msg_body="x" * 1000
+    )
+    cache.put("user-1", "full", message)
+    cache.put("user-2", "full", message)
+
+    restarted = GmailMessageCache(max_bytes=1 << 20, label_ttl_seconds=60, disk_path=path, disk_max_bytes=2500)
+    hit, labels_fresh = restarted.get("user-1", "m1", "full")
+    assert hit == message and labels_fresh
+    assert restarted.metrics.disk_hits == 1
+
+    restarted.put("user-3", "full", message)  # over the 2500-byte disk budget: oldest row goes
+    assert restarted.metrics.evictions == 1
+    fresh = GmailMessageCache(max_bytes=1 << 20, label_ttl_seconds=60, disk_path=path, disk_max_bytes=2500)
+    assert fresh.get("user-2", "m1", "full") is None
+
+    restarted.purge_user("user-1")
+    fresh = GmailMessageCache(max_bytes=1 << 20, label_ttl_seconds=60, disk_path=path, disk_max_bytes=2500)
+    assert restarted.get("user-1", "m1", "full") is None
+    assert fresh.get("user-1", "m1", "full") is None
+    assert fresh.get("user-3", "m1", "full") is not None
+
+
+def test_disconnect_purges_cached_messages(monkeypatch) -> None:
+    class _Query:
+        def update(self, values):
+            return self
+
+        def eq(self, column, value):
+            return self
+
+        async def execute(self):
+            class _Response:
+                data = [{"user_id": "user-1"}]
+
+            return _Response()
+
+    class _Client:
+        def table(self, name):
+            return _Query()
+
+    @asynccontextmanager
+    async def _fake_supabase_user_client(user_jwt: str):
+        yield _Client()
+
+    cache = GmailMessageCache(max_bytes=1 << 20, label_ttl_seconds=60)
+    cache.put("user-1", "compact", gmail_services.GmailMessage(id="m1", threadId="t1", msg_body="hi"))
+    monkeypatch.setattr(gmail_message_cache_utils, "_message_cache", cache)
+    monkeypatch.setattr(gmail_sql, "supabase_user_client", _fake_supabase_user_client)
+
+    assert asyncio.run(gmail_sql.disconnect_gmail_connection(user_id="user-1", user_jwt="jwt"))
+    assert cache.get("user-1", "m1", "compact") is None
+    assert cache.metrics.purges == 1
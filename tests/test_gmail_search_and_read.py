@@ -0,0 +1,50 @@
+import asyncio
+
+from app.integrations.gmail import services as gmail_services
+from app.utils.gmail_message_cache_utils import GmailMessageCache
+from tests.benchmarks.standins import GmailStubHttp
+from tests.test_gmail_batch_read import _install_stub
+
+
+def _install(monkeypatch, stub: GmailStubHttp) -> None:
+    _install_stub(monkeypatch, stub)
+    cache = GmailMessageCache(max_bytes=1 << 20, label_ttl_seconds=60)
+    monkeypatch.setattr(gmail_services, "get_gmail_message_cache", lambda: cache)
+    monkeypatch.setattr(gmail_services, "get_gmail_mailbox_mirror", lambda: None)
+    monkeypatch.setattr(gmail_services.settings, "search_and_read_max_results", 25)
+
+
+def test_pages_until_budget_and_keeps_newest_message_per_thread(monkeypatch) -> None:
+    stub = GmailStubHttp()
+    stub.mailbox = [f"m{index}" for index in range(12)]
+    stub.threads.update({"m1": "thread-m0", "m2": "thread-m0", "m5": "thread-m4"})
+    _install(monkeypatch, stub)
+
+    first = asyncio.run(gmail_services.search_and_read_messages("user-1", "jwt", "is:unread", max_results=5))
+    rest = asyncio.run(
+        gmail_services.search_and_read_messages(
+            "user-1", "jwt", "is:unread", max_results=5, page_token=first.page_token
+        )
+    )
+
+    assert [message.id for message in first.messages] == ["m0", "m3", "m4", "m6", "m7"]
+    assert first.collapsed_threads == {"thread-m0": 2, "thread-m4": 1}
+    assert first.source == "live"
+    assert [message.id for message in rest.messages] == ["m8", "m9", "m10", "m11"]
+    assert rest.page_token is None
+
+
+def test_budget_is_capped_by_settings_and_dedupe_can_be_disabled(monkeypatch) -> None:
+    stub = GmailStubHttp()
+    stub.mailbox = [f"m{index}" for index in range(40)]
+    stub.threads["m1"] = "thread-m0"
+    _install(monkeypatch, stub)
+    monkeypatch.setattr(gmail_services.settings, "search_and_read_max_results", 10)
+
+    result = asyncio.run(
+        gmail_services.search_and_read_messages("user-1", "jwt", "from:alice", max_results=50, dedupe_threads=False)
+    )
+
+    assert [message.id for message in result.messages] == [f"m{index}" for index in range(10)]
+    assert result.collapsed_threads == {}
+    assert result.page_token is not None
@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+import anyio.to_thread
+
+from app.core.settings import get_settings
+from app.integrations.gmail import services as gmail_services
+from app.utils import google_async_http_utils, google_utils
+from app.utils.google_rate_limit_utils import GoogleRateLimiter
+from tests.benchmarks.standins import GmailStubHttp
+from tests.test_gmail_batch_read import _install_stub
+
+
+def _read_mailbox() -> tuple[dict, dict, dict]:
+    async def _run():
+        search = await gmail_services.search_messages("user-1", "jwt", "is:unread", max_results=5)
+        batch = await gmail_services.batch_read_messages(
+            "user-1", "jwt", [message.id for message in search.messages] + ["gone"], "full"
+        )
+        single = await gmail_services.read_message_compact("user-1", "jwt", "m1")
+        return search.model_dump(), batch.model_dump(), single.model_dump()
+
+    return asyncio.run(_run())
+
+
+def test_async_transport_returns_the_same_models_as_threadpool(monkeypatch) -> None:
+    results = {}
+    for transport in ("threadpool", "httpx"):
+        stub = GmailStubHttp(missing_ids={"gone"})
+        stub.mailbox = [f"m{index}" for index in range(8)]
+        _install_stub(monkeypatch, stub)
+        monkeypatch.setattr(get_settings(), "google_api_transport", transport)
+        results[transport] = _read_mailbox()
+        metrics = google_async_http_utils.get_google_async_http_metrics()
+        assert metrics["requests"] == (3 if transport == "httpx" else 0)
+        assert metrics["batch_requests"] == (1 if transport == "httpx" else 0)
+
+    assert results["httpx"] == results["threadpool"]
+    search, batch, _ = results["httpx"]
+    assert len(search["messages"]) == 5
+    assert batch["error_messages"] == ["gone"]
+
+
+def test_async_transport_is_not_capped_by_the_threadpool(monkeypatch) -> None:
+    stub = GmailStubHttp(latency=0.05)
+    _install_stub(monkeypatch, stub)
+    limiter = GoogleRateLimiter(rates={}, max_concurrency=64)
+    monkeypatch.setattr(google_utils, "get_google_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(get_settings(), "google_api_transport", "httpx")
+
+    async def _run() -> float:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = 4
+        started_at = time.perf_counter()
+        await asyncio.gather(
+            *(gmail_services.read_message_compact("user-1", "jwt", f"m{index}") for index in range(32))
+        )
+        return time.perf_counter() - started_at
+
+    elapsed = asyncio.run(_run())
+
+    assert google_async_http_utils.get_google_async_http_metrics()["peak_in_flight"] == 32
+    # Through 4 worker threads the same reads would take 8 round trips (0.4s).
+    assert elapsed < 0.3
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from app.utils import google_rate_limit_utils, google_utils
+from app.utils.google_rate_limit_utils import GoogleRateLimiter
+
+
+def _http_error(status: int, *, reason: str | None = None, retry_after: str | None = None) -> HttpError:
+    headers = {"status": str(status)}
+    if retry_after is not None:
+        headers["retry-after"] = retry_after
+    errors = [{"reason": reason}] if reason else []
+    content = json.dumps({"error": {"code": status, "errors": errors}}).encode("utf-8")
+    return HttpError(httplib2.Response(headers), content)
+
+
+def _install_limiter(monkeypatch, *, rates: dict[str, float] | None = None, max_concurrency: int = 8) -> GoogleRateLimiter:
+    limiter = GoogleRateLimiter(rates=rates or {}, max_concurrency=max_concurrency)
+    monkeypatch.setattr(google_utils, "get_google_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(
+        google_utils,
+        "get_settings",
+        lambda: SimpleNamespace(
+            google_api_max_retries=2,
+            google_api_retry_base_seconds=0,
+            google_api_retry_max_seconds=5,
+        ),
+    )
+    return limiter
+
+
+def test_token_bucket_throttles_overdraw_and_bounds_concurrency() -> None:
+    limiter = GoogleRateLimiter(rates={"gmail": 100}, max_concurrency=2)
+    in_flight = 0
+    peak = 0
+
+    async def _call() -> None:
+        nonlocal in_flight, peak
+        async with limiter.limit("user-1", "gmail", 25):
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    async def _run() -> None:
+        await asyncio.gather(*(_call() for _ in range(6)))
+
+    started_at = time.monotonic()
+    asyncio.run(_run())
+
+    # The first 100 units pass immediately; the last 50 wait about half a second for refill.
+    assert time.monotonic() - started_at >= 0.45
+    assert limiter.metrics.requests == 6
+    assert limiter.metrics.throttled == 2
+    assert peak == 2
+    assert limiter.metrics.concurrency_waits >= 1
+
+
+def test_reservations_larger_than_the_bucket_are_charged_in_full() -> None:
+    bucket = google_rate_limit_utils._TokenBucket(rate=250, capacity=250)
+
+    # A 100-message batch (500 units) against a 250 units/s quota: the 250 over capacity
+    # must be waited for, and the next reservation queues behind the whole debt.
+    assert bucket.reserve(500) == pytest.approx(1.0, abs=0.05)
+    assert bucket.reserve(250) == pytest.approx(2.0, abs=0.05)
+
+
+def test_decorator_retries_rate_limited_calls_honoring_retry_after(monkeypatch) -> None:
+    limiter = _install_limiter(monkeypatch)
+    failures = [
+        _http_error(429, retry_after="0"),
+        _http_error(403, reason="userRateLimitExceeded"),
+    ]
+    calls: list[str] = []
+
+    @google_utils.google_api("gmail", quota_units=5)
+    def _list(user_id: str) -> str:
+        calls.append(user_id)
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+
+    assert asyncio.run(_list("user-1")) == "ok"
+    assert calls == ["user-1"] * 3
+    assert limiter.metrics.rate_limited_responses == 2
+    assert limiter.metrics.retries == 2
+    assert limiter.metrics.requests == 3
+
+
+def test_decorator_does_not_retry_client_errors_and_stops_after_max_retries(monkeypatch) -> None:
+    limiter = _install_limiter(monkeypatch)
+    calls = 0
+
+    @google_utils.google_api("drive")
+    async def _get(user_id: str, status: int) -> None:
+        nonlocal calls
+        calls += 1
+        raise _http_error(status, reason="notFound" if status == 404 else None)
+
+    with pytest.raises(HttpError):
+        asyncio.run(_get("user-1", 404))
+    assert calls == 1
+
+    calls = 0
+    with pytest.raises(HttpError):
+        asyncio.run(_get(user_id="user-1", status=503))
+    assert calls == 3
+    assert limiter.metrics.exhausted == 1
+    assert limiter.metrics.rate_limited_responses == 0
+
+
+def test_retry_delay_uses_retry_after_and_rejects_waits_beyond_max() -> None:
+    delay = google_rate_limit_utils.retry_delay_seconds
+
+    assert delay(_http_error(429, retry_after="3"), 0, base_seconds=1, max_seconds=10) == 3
+    assert delay(_http_error(429, retry_after="60"), 0, base_seconds=1, max_seconds=10) is None
+    assert 4 <= delay(_http_error(503), 2, base_seconds=1, max_seconds=10) <= 5
+    assert delay(_http_error(403, reason="insufficientPermissions"), 0, base_seconds=1, max_seconds=10) is None
@@ -0,0 +1,372 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils import google_utils
+
+_AUTH_SETTINGS = SimpleNamespace(
+    token_uri="https://oauth2.googleapis.com/token",
+    client_id="client-id",
+    client_secret="client-secret",
+    scopes=["https://www.googleapis.com/auth/gmail.readonly"],
+)
+
+
+@dataclass
+class _Tokens:
+    access_token: str | None
+    refresh_token: str | None
+    access_token_expires_at: str | None = None
+
+
+def _install_cache(monkeypatch, *, max_entries: int = 8) -> google_utils._GoogleServiceCache:
+    cache = google_utils._GoogleServiceCache(max_entries=max_entries, idle_ttl_seconds=60)
+    monkeypatch.setattr(google_utils, "_service_cache", cache)
+    return cache
+
+
+def _get_client(user_id: str, tokens: _Tokens | None, *, api_service: str = "gmail", api_version: str = "v1"):
+    async def _token_loader(_user_id: str, _user_jwt: str):
+        return tokens
+
+    return asyncio.run(
+        google_utils.get_google_client_for_user(
+            user_id=user_id,
+            user_jwt="jwt",
+            token_loader=_token_loader,
+            settings=_AUTH_SETTINGS,
+            api_service=api_service,
+            api_version=api_version,
+        )
+    )
+
+
+def test_reuses_service_until_stored_tokens_change(monkeypatch) -> None:
+    cache = _install_cache(monkeypatch)
+    tokens = _Tokens(access_token="access-1", refresh_token="refresh-1")
+
+    first = _get_client("user-1", tokens)
+    second = _get_client("user-1", tokens)
+    drive = _get_client("user-1", tokens, api_service="drive", api_version="v3")
+    rotated = _get_client("user-1", _Tokens(access_token="access-2", refresh_token="refresh-1"))
+
+    assert first is second
+    assert drive is not first
+    assert rotated is not first
+    assert cache.metrics.as_dict() == {"hits": 1, "misses": 3, "builds": 3, "refreshes": 0, "evictions": 0}
+
+
+def test_missing_credentials_evict_cached_service(monkeypatch) -> None:
+    cache = _install_cache(monkeypatch)
+    tokens = _Tokens(access_token="access-1", refresh_token="refresh-1")
+    _get_client("user-1", tokens)
+
+    with pytest.raises(HTTPException) as exc_info:
+        _get_client("user-1", None)
+
+    assert exc_info.value.status_code == 401
+    assert cache.get(("user-1", "gmail", "v1"), google_utils._tokens_fingerprint(tokens.access_token, tokens.refresh_token)) is None
+
+
+def test_evicts_least_recently_used_entries(monkeypatch) -> None:
+    cache = _install_cache(monkeypatch, max_entries=2)
+    tokens = _Tokens(access_token="access", refresh_token="refresh")
+
+    user_1 = _get_client("user-1", tokens)
+    user_2 = _get_client("user-2", tokens)
+    assert _get_client("user-1", tokens) is user_1
+    _get_client("user-3", tokens)
+
+    assert cache.metrics.evictions == 1
+    assert _get_client("user-1", tokens) is user_1
+    assert _get_client("user-2", tokens) is not user_2
+    assert cache.metrics.builds == 4
+
+
+def test_cached_service_gives_each_request_its_own_transport(monkeypatch) -> None:
+    _install_cache(monkeypatch)
+    service = _get_client("user-1", _Tokens(access_token="access", refresh_token="refresh"))
+
+    first = service.users().messages().list(userId="me", q="from:a")
+    second = service.users().messages().list(userId="me", q="from:b")
+
+    assert first.http is not second.http
+    assert first.http.credentials is second.http.credentials
+    assert "q=from%3Aa" in first.uri
+
+
+def _install_broker(monkeypatch) -> google_utils._CredentialBroker:
+    broker = google_utils._CredentialBroker()
+    monkeypatch.setattr(google_utils, "_credential_broker", broker)
+    return broker
+
+
+def test_concurrent_callers_share_one_load_and_refresh(monkeypatch) -> None:
+    cache = _install_cache(monkeypatch)
+    broker = _install_broker(monkeypatch)
+    loads: list[str] = []
+    refreshes: list[str] = []
+
+    async def _token_loader(user_id: str, _user_jwt: str):
+        loads.append(user_id)
+        await asyncio.sleep(0.01)
+        return _Tokens(access_token=None, refresh_token="refresh-1")
+
+    def _refresh(self, request) -> None:
+        refreshes.append(self.refresh_token)
+        self.token = "refreshed-access"
+
+    monkeypatch.setattr(google_utils.Credentials, "refresh", _refresh)
+
+    async def _run():
+        return await asyncio.gather(
+            *(
+                google_utils.get_google_client_for_user(
+                    user_id="user-1",
+                    user_jwt="jwt",
+                    token_loader=_token_loader,
+                    settings=_AUTH_SETTINGS,
+                    api_service="gmail",
+                    api_version="v1",
+                )
+                for _ in range(20)
+            )
+        )
+
+    services = asyncio.run(_run())
+
+    assert all(service is services[0] for service in services)
+    assert loads == ["user-1"]
+    assert refreshes == ["refresh-1"]
+    assert broker.metrics.as_dict() == {"loads": 1, "joins": 19}
+    assert cache.metrics.builds == 1
+    assert broker._flights == {}
+
+
+def test_failed_load_is_shared_then_retried(monkeypatch) -> None:
+    _install_cache(monkeypatch)
+    broker = _install_broker(monkeypatch)
+    calls = 0
+
+    async def _token_loader(_user_id: str, _user_jwt: str):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return None
+
+    async def _run():
+        return await asyncio.gather(
+            *(
+                google_utils.get_google_client_for_user(
+                    user_id="user-1",
+                    user_jwt="jwt",
+                    token_loader=_token_loader,
+                    settings=_AUTH_SETTINGS,
+                    api_service="gmail",
+                    api_version="v1",
+                    service_label="Gmail",
+                )
+                for _ in range(5)
+            ),
+            return_exceptions=True,
+        )
+
+    first_results = asyncio.run(_run())
+    second_results = asyncio.run(_run())
+
+    assert all(isinstance(result, HTTPException) for result in first_results + second_results)
+    assert first_results[0].detail == "Gmail credentials not found"
+    assert calls == 2
+    assert broker.metrics.as_dict() == {"loads": 2, "joins": 8}
+
+
+def _expires_in(seconds: float) -> str:
+    return (datetime.now(timezone.utc) + timedelta(seconds=seconds)).isoformat()
+
+
+def _install_refresh(monkeypatch, refreshes: list[str]) -> None:
+    def _refresh(self, request) -> None:
+        refreshes.append(self.token)
+        self.token = f"refreshed-{len(refreshes)}"
+        self.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+
+    monkeypatch.setattr(google_utils.Credentials, "refresh", _refresh)
+
+
+def test_refreshes_only_inside_skew_window_and_stores_new_token(monkeypatch) -> None:
+    cache = _install_cache(monkeypatch)
+    _install_broker(monkeypatch)
+    refreshes: list[str] = []
+    _install_refresh(monkeypatch, refreshes)
+    stored = _Tokens(access_token="access-1", refresh_token="refresh-1", access_token_expires_at=_expires_in(3600))
+
+    async def _token_loader(_user_id: str, _user_jwt: str):
+        return stored
+
+    async def _token_writer(_user_id: str, creds) -> bool:
+        nonlocal stored
+        stored = _Tokens(
+            access_token=creds.token,
+            refresh_token=creds.refresh_token,
+            access_token_expires_at=google_utils.credentials_expiry_iso(creds),
+        )
+        return True
+
+    def _get(user_id: str):
+        return asyncio.run(
+            google_utils.get_google_client_for_user(
+                user_id=user_id,
+                user_jwt="jwt",
+                token_loader=_token_loader,
+                settings=_AUTH_SETTINGS,
+                api_service="gmail",
+                api_version="v1",
+                token_writer=_token_writer,
+            )
+        )
+
+    warm = _get("user-1")
+    assert refreshes == []
+
+    stored = _Tokens(access_token="access-2", refresh_token="refresh-1", access_token_expires_at=_expires_in(60))
+    refreshed = _get("user-1")
+    assert refreshes == ["access-2"]
+    assert stored.access_token == "refreshed-1"
+    assert google_utils._parse_token_expiry(stored.access_token_expires_at) > datetime.now(timezone.utc).replace(tzinfo=None)
+
+    assert _get("user-1") is refreshed is not warm
+    assert refreshes == ["access-2"]
+    assert cache.metrics.builds == 2
+
+
+def test_background_refresher_refreshes_tokens_close_to_expiry(monkeypatch) -> None:
+    cache = _install_cache(monkeypatch)
+    _install_broker(monkeypatch)
+    refreshes: list[str] = []
+    _install_refresh(monkeypatch, refreshes)
+    written: list[tuple[str, str]] = []
+
+    async def _token_writer(user_id: str, creds) -> bool:
+        written.append((user_id, creds.token))
+        return True
+
+    async def _run() -> int:
+        for user_id, expires_in in (("soon", 400), ("later", 3600)):
+            tokens = _Tokens(
+                access_token=f"access-{user_id}",
+                refresh_token="refresh",
+                access_token_expires_at=_expires_in(expires_in),
+            )
+
+            async def _token_loader(_user_id: str, _user_jwt: str, tokens=tokens):
+                return tokens
+
+            await google_utils.get_google_client_for_user(
+                user_id=user_id,
+                user_jwt="jwt",
+                token_loader=_token_loader,
+                settings=_AUTH_SETTINGS,
+                api_service="gmail",
+                api_version="v1",
+                token_writer=_token_writer,
+            )
+        refresher = google_utils.GoogleTokenRefresher(interval_seconds=120, skew_seconds=300)
+        return await refresher.refresh_due()
+
+    assert asyncio.run(_run()) == 1
+    assert refreshes == ["access-soon"]
+    assert written == [("soon", "refreshed-1")]
+    entry = dict(cache.items())[("soon", "gmail", "v1")]
+    assert entry.tokens_fingerprint == google_utils._tokens_fingerprint("refreshed-1", "refresh")
+
+
+class _ConnectionsTable:
+    """`gmail_connections` rows behind the update/eq/execute calls gmail_sql makes."""
+
+    def __init__(self, rows: dict[str, dict]) -> None:
+        self.rows = rows
+
+    def table(self, name: str) -> "_ConnectionsTable":
+        self._payload, self._filters = None, {}
+        return self
+
+    def update(self, payload: dict) -> "_ConnectionsTable":
+        self._payload = payload
+        return self
+
+    def eq(self, column: str, value) -> "_ConnectionsTable":
+        self._filters[column] = value
+        return self
+
+    async def execute(self):
+        matched = [
+            row for row in self.rows.values()
+            if all(row.get(column) == value for column, value in self._filters.items())
+        ]
+        for row in matched:
+            row.update(self._payload)
+        return SimpleNamespace(data=[dict(row) for row in matched])
+
+
+def test_background_refresher_never_reconnects_a_disconnected_user(monkeypatch) -> None:
+    from contextlib import asynccontextmanager
+
+    from app.db import gmail_sql
+    from app.utils import gmail_utils
+
+    cache = _install_cache(monkeypatch)
+    _install_broker(monkeypatch)
+    refreshes: list[str] = []
+    _install_refresh(monkeypatch, refreshes)
+    rows = {
+        user_id: {"user_id": user_id, "status": "active", "access_token": f"access-{user_id}"}
+        for user_id in ("here", "elsewhere", "idle")
+    }
+    table = _ConnectionsTable(rows)
+
+    @asynccontextmanager
+    async def _client(*_args):
+        yield table
+
+    monkeypatch.setattr(gmail_sql, "supabase_user_client", _client)
+    monkeypatch.setattr(gmail_sql, "supabase_service_client", _client)
+    monkeypatch.setattr(gmail_sql, "encrypt_token", lambda token, service: token)
+
+    async def _run() -> int:
+        for user_id in rows:
+            tokens = _Tokens(
+                access_token=f"access-{user_id}",
+                refresh_token="refresh",
+                access_token_expires_at=_expires_in(400),
+            )
+
+            async def _token_loader(_user_id: str, _user_jwt: str, tokens=tokens):
+                return tokens
+
+            await google_utils.get_google_client_for_user(
+                user_id=user_id,
+                user_jwt="jwt",
+                token_loader=_token_loader,
+                settings=_AUTH_SETTINGS,
+                api_service="gmail",
+                api_version="v1",
+                token_writer=gmail_utils.store_refreshed_gmail_tokens,
+            )
+        dict(cache.items())[("idle", "gmail", "v1")].last_used_at -= 61
+        # "here" disconnects on this worker; "elsewhere" on another, so its entry is still cached.
+        await gmail_sql.disconnect_gmail_connection(user_id="here", user_jwt="jwt")
+        rows["elsewhere"].update(status="disconnected", access_token=None)
+        refresher = google_utils.GoogleTokenRefresher(interval_seconds=120, skew_seconds=300)
+        return await refresher.refresh_due()
+
+    assert asyncio.run(_run()) == 0
+    assert refreshes == ["access-elsewhere"]
+    assert cache.items() == []
+    assert rows["here"]["status"] == rows["elsewhere"]["status"] == "disconnected"
+    assert rows["here"]["access_token"] is None and rows["elsewhere"]["access_token"] is None
+    assert rows["idle"]["access_token"] == "access-idle"
+
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+from openai import AsyncOpenAI
+
+from app import dependencies
+from app.agents import model_registry
+from app.agents.registry import init_gmail_agent, init_google_drive_agent, init_orchestrator_agent
+from app.api.v1.endpoints import agent_routes as routes
+
+
+def test_agents_share_models_and_send_stable_prompt_cache_keys(monkeypatch) -> None:
+    monkeypatch.setattr(dependencies, "_openai_client", AsyncOpenAI(api_key="test-key"))
+    model_registry.clear_shared_models()
+
+    first_gmail, second_gmail = init_gmail_agent(), init_gmail_agent()
+    drive = init_google_drive_agent()
+    orchestrator = init_orchestrator_agent()
+
+    assert first_gmail.model is second_gmail.model
+    if first_gmail.model.model == drive.model.model:
+        assert first_gmail.model is drive.model
+
+    gmail_key = first_gmail.model_settings.extra_args["prompt_cache_key"]
+    assert gmail_key == second_gmail.model_settings.extra_args["prompt_cache_key"]
+    assert gmail_key.startswith("omicron:gmail:")
+    assert gmail_key != drive.model_settings.extra_args["prompt_cache_key"]
+    assert orchestrator.model_settings.extra_args["prompt_cache_key"].startswith("omicron:orchestrator_agent:")
+
+
+def test_new_openai_client_gets_new_shared_model(monkeypatch) -> None:
+    monkeypatch.setattr(dependencies, "_openai_client", AsyncOpenAI(api_key="test-key"))
+    first = model_registry.get_shared_model("gpt-test")
+    monkeypatch.setattr(dependencies, "_openai_client", AsyncOpenAI(api_key="test-key"))
+
+    assert model_registry.get_shared_model("gpt-test") is not first
+
+
+def test_prompt_cache_key_rotates_with_static_instructions() -> None:
+    assert model_registry.build_prompt_cache_key("drive", "v1") == model_registry.build_prompt_cache_key("drive", "v1")
+    assert model_registry.build_prompt_cache_key("drive", "v1") != model_registry.build_prompt_cache_key("drive", "v2")
+
+
+def test_usage_events_carry_per_agent_cached_ratios() -> None:
+    def _usage(input_tokens: int, cached_tokens: int) -> SimpleNamespace:
+        return SimpleNamespace(
+            input_tokens=input_tokens,
+            output_tokens=10,
+            input_tokens_details=SimpleNamespace(cached_tokens=cached_tokens),
+        )
+
+    tally = routes._CachedTokenTally()
+    first = {**routes._format_usage(_usage(1000, 0)), "agent": "drive"}
+    second = {**routes._format_usage(_usage(1000, 800)), "agent": "drive"}
+    other = {**routes._format_usage(_usage(500, 500)), "agent": "gmail"}
+    for payload_data in (first, second, other):
+        tally.record(payload_data)
+
+    assert second["cached_ratio"] == 0.8
+    assert second["agent_cached_ratio"] == 0.4
+    assert second["agent_input_tokens"] == 2000
+    assert other["agent_cached_ratio"] == 1.0
+    assert routes._format_usage(None) is None
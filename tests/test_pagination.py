@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from app.integrations.gmail import services as gmail_services
+from app.integrations.google_drive import services as drive_services
+from app.utils.pagination_utils import PagePipeline, PaginationBudget
+from tests.benchmarks.standins import DriveStubHttp, GmailStubHttp
+from tests.test_drive_search_cache import _install_drive_stub
+from tests.test_gmail_batch_read import _install_stub as _install_gmail_stub
+
+
+class _Pages:
+    """Offset-token listing over `items` that records each call in `calls` and `events`."""
+
+    def __init__(self, items: list[str], *, fail_at: str | None = None) -> None:
+        self.items = items
+        self.fail_at = fail_at
+        self.calls: list[tuple[str | None, int]] = []
+        self.events: list[str] = []
+
+    async def fetch(self, token: str | None, page_size: int) -> tuple[list[str], str | None]:
+        self.calls.append((token, page_size))
+        self.events.append(f"fetch {token}")
+        if token is not None and token == self.fail_at:
+            raise RuntimeError("backend error")
+        await asyncio.sleep(0)
+        offset = int(token or 0)
+        next_offset = offset + page_size
+        return self.items[offset:next_offset], str(next_offset) if next_offset < len(self.items) else None
+
+
+def _pipeline(pages: _Pages, **kwargs) -> PagePipeline[str]:
+    kwargs.setdefault("budget", PaginationBudget(max_items=100))
+    kwargs.setdefault("page_size", 10)
+    return PagePipeline(fetch_page=pages.fetch, key=lambda item: item, size=len, **kwargs)
+
+
+def test_requests_the_next_page_while_the_current_one_is_processed() -> None:
+    def run(prefetch: bool) -> list[str]:
+        pages = _Pages([f"f{index}" for index in range(30)])
+
+        async def on_page(items: list[str]) -> None:
+            await asyncio.sleep(0.01)
+            pages.events.append(f"processed {items[0]}")
+
+        result = asyncio.run(_pipeline(pages, on_page=on_page, prefetch=prefetch).collect())
+        assert len(result.items) == 30 and result.stopped_by == "end"
+        return pages.events
+
+    assert run(prefetch=True) == [
+        "fetch None", "fetch 10", "processed f0", "fetch 20", "processed f10", "processed f20",
+    ]
+    assert run(prefetch=False) == [
+        "fetch None", "processed f0", "fetch 10", "processed f10", "fetch 20", "processed f20",
+    ]
+
+
+def test_prefetches_only_with_page_work_and_byte_budget_left() -> None:
+    async def on_page(items: list[str]) -> None:
+        await asyncio.sleep(0)
+
+    pages = _Pages([f"f{index}" for index in range(30)])
+    asyncio.run(_pipeline(pages).collect())
+    assert pages.events == ["fetch None", "fetch 10", "fetch 20"]
+
+    # The first page (20 bytes) fills the budget, so no request for page 2 is ever sent.
+    pages = _Pages([f"f{index}" for index in range(30)])
+    budget = PaginationBudget(max_items=100, max_bytes=20)
+    result = asyncio.run(_pipeline(pages, budget=budget, on_page=on_page).collect())
+    assert pages.calls == [(None, 10)]
+    assert (len(result.items), result.next_page_token, result.stopped_by) == (10, "10", "bytes")
+
+
+def test_item_budget_sizes_pages_and_returns_an_exact_resume_token() -> None:
+    pages = _Pages([f"f{index}" for index in range(50)])
+    result = asyncio.run(_pipeline(pages, budget=PaginationBudget(max_items=25)).collect())
+
+    assert pages.calls == [(None, 10), ("10", 10), ("20", 5)]
+    assert result.items == [f"f{index}" for index in range(25)]
+    assert (result.next_page_token, result.stopped_by, result.pages) == ("25", "items", 3)
+
+
+def test_byte_budget_stops_at_a_page_boundary_and_skips_duplicates() -> None:
+    pages = _Pages(["a1", "b1", "a1", "c1", "d1", "e1", "f1", "g1"])
+    budget = PaginationBudget(max_items=100, max_bytes=9)
+    result = asyncio.run(_pipeline(pages, budget=budget, page_size=3).collect())
+
+    # Page 1 keeps a1, b1 (4 bytes); page 2 would add 6 more, over 9, so it is left for the token.
+    assert result.items == ["a1", "b1"]
+    assert (result.next_page_token, result.stopped_by, result.duplicates) == ("3", "bytes", 1)
+
+
+def test_failure_after_the_first_page_keeps_what_was_collected() -> None:
+    pages = _Pages([f"f{index}" for index in range(30)], fail_at="20")
+    result = asyncio.run(_pipeline(pages).collect())
+
+    assert len(result.items) == 20
+    assert (result.next_page_token, result.stopped_by) == ("20", "error")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(_pipeline(_Pages(["f0"], fail_at="0"), page_token="0").collect())
+
+
+def test_drive_search_follows_pages_with_folder_paths(monkeypatch) -> None:
+    stub = DriveStubHttp()
+    stub.add_file("root", "My Drive", mime_type="application/vnd.google-apps.folder", parents=[])
+    for index in range(250):
+        stub.add_file(f"f{index:03d}", f"Report {index}.pdf", parents=["root"])
+    _install_drive_stub(monkeypatch, stub)
+    stub.list_calls = 0
+
+    result = asyncio.run(
+        drive_services.search_files_paginated(
+            "user-1", "jwt", "name contains 'report'", max_items=220, include_folder_paths=True,
+        )
+    )
+
+    assert [item.id for item in result.files] == [f"f{index:03d}" for index in range(220)]
+    assert {item.folder_path for item in result.files} == {"My Drive"}
+    assert result.next_page_token == "220"
+    assert stub.list_calls == 3
+
+
+def test_gmail_search_messages_collects_refs_across_pages(monkeypatch) -> None:
+    stub = GmailStubHttp()
+    stub.mailbox = [f"m{index}" for index in range(130)]
+    _install_gmail_stub(monkeypatch, stub)
+    monkeypatch.setattr(gmail_services.settings, "auto_paginate_max_items", 500)
+    monkeypatch.setattr(gmail_services.settings, "auto_paginate_max_bytes", 0)
+
+    result = asyncio.run(gmail_services.search_messages_paginated("user-1", "jwt", "is:unread", max_items=200))
+
+    assert [ref.id for ref in result.messages] == stub.mailbox
+    assert result.page_token is None
+    assert stub.round_trips == 2
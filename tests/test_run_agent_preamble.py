@@ -0,0 +1,197 @@
+import asyncio
+import json
+
+from app.api.v1.endpoints import agent_routes as routes
+from app.auth import AuthContext
+from app.schemas.endpoint_schemas.agent import AgentRunPayload
+from app.utils import run_finalization_utils
+
+
+class _FakeSession:
+    def __init__(self, conversation_id=None, openai_client=None) -> None:
+        self.conversation_id = conversation_id
+
+    async def _get_session_id(self) -> str:
+        return "conv-1"
+
+
+class _FakeRunResult:
+    async def stream_events(self):
+        return
+        yield
+
+
+class _FakeRunner:
+    @staticmethod
+    def run_streamed(agent, query, **kwargs):
+        return _FakeRunResult()
+
+
+def _install_fakes(monkeypatch, *, stage_delay: float, workflow_gate: asyncio.Event | None = None):
+    started: dict[str, float] = {}
+
+    async def _stage(name: str, value):
+        started[name] = asyncio.get_running_loop().time()
+        await asyncio.sleep(stage_delay)
+        return value
+
+    async def _fake_connected_apps(*, user_id: str, user_jwt: str):
+        return await _stage("connected_apps", [])
+
+    async def _fake_browser_refs(*, auth_ctx: AuthContext):
+        return await _stage("browser_credential_refs", ["SITE_USERNAME"])
+
+    async def _fake_create_stub(**kwargs):
+        return await _stage("chat_session", "session-1")
+
+    async def _fake_create_agent_workflow(**kwargs):
+        assert kwargs["browser_credential_secret_refs"] == ["SITE_USERNAME"]
+        if workflow_gate is not None:
+            await workflow_gate.wait()
+        return object()
+
+    async def _fake_update_chat_session_by_id(**kwargs):
+        return None
+
+    monkeypatch.setattr(routes, "_get_user_connected_apps", _fake_connected_apps)
+    monkeypatch.setattr(routes, "_resolve_browser_refs", _fake_browser_refs)
+    monkeypatch.setattr(routes, "create_chat_session_stub", _fake_create_stub)
+    monkeypatch.setattr(routes, "create_agent_workflow", _fake_create_agent_workflow)
+    monkeypatch.setattr(routes, "update_chat_session_by_id", _fake_update_chat_session_by_id)
+    monkeypatch.setattr(routes, "OpenAIConversationsSession", _FakeSession)
+    monkeypatch.setattr(routes, "get_openai_client", lambda: None)
+    monkeypatch.setattr(routes, "Runner", _FakeRunner)
+    return started
+
+
+def _data_frames(chunks: list[str]) -> list:
+    frames = []
+    for chunk in chunks:
+        if not chunk.startswith("data: "):
+            continue
+        body = chunk[len("data: "):].strip()
+        frames.append(body if body == "[DONE]" else json.loads(body))
+    return frames
+
+
+def test_preamble_stages_run_concurrently_and_report_timings(monkeypatch) -> None:
+    stage_delay = 0.05
+    started = _install_fakes(monkeypatch, stage_delay=stage_delay)
+    auth_ctx = AuthContext(user_id="user-1", token="token-1")
+
+    async def _run() -> list[str]:
+        response = await routes.run_agent(AgentRunPayload(query="hi"), auth_ctx=auth_ctx)
+        return [chunk async for chunk in response.body_iterator]
+
+    frames = _data_frames(asyncio.run(_run()))
+
+    assert set(started) == {"connected_apps", "browser_credential_refs", "chat_session"}
+    assert max(started.values()) - min(started.values()) < stage_delay
+
+    assert frames[0] == {"type": "session_id", "session_id": "session-1"}
+    timings = frames[1]
+    assert timings["type"] == "preamble_timings"
+    assert set(timings["timings_ms"]) == {
+        "connected_apps",
+        "browser_credential_refs",
+        "chat_session",
+        "workflow",
+        "total",
+    }
+    assert frames[-1] == "[DONE]"
+
+
+def test_session_id_frame_is_sent_before_workflow_is_built(monkeypatch) -> None:
+    auth_ctx = AuthContext(user_id="user-1", token="token-1")
+
+    async def _run() -> None:
+        workflow_gate = asyncio.Event()
+        _install_fakes(monkeypatch, stage_delay=0, workflow_gate=workflow_gate)
+        response = await routes.run_agent(AgentRunPayload(query="hi"), auth_ctx=auth_ctx)
+        body = response.body_iterator
+
+        await body.__anext__()  # proxy-flush comment
+        first_frame = _data_frames([await body.__anext__()])[0]
+        assert first_frame["session_id"] == "session-1"
+        assert not workflow_gate.is_set()
+
+        workflow_gate.set()
+        remaining = [chunk async for chunk in body]
+        assert _data_frames(remaining)[-1] == "[DONE]"
+
+    asyncio.run(_run())
+
+
+def test_done_is_sent_before_run_finalization_completes(monkeypatch) -> None:
+    auth_ctx = AuthContext(user_id="user-1", token="token-1")
+    updates: list[dict] = []
+
+    async def _run() -> None:
+        release_update = asyncio.Event()
+        _install_fakes(monkeypatch, stage_delay=0)
+
+        async def _slow_update_chat_session_by_id(**kwargs):
+            await release_update.wait()
+            updates.append(kwargs)
+
+        monkeypatch.setattr(routes, "update_chat_session_by_id", _slow_update_chat_session_by_id)
+        worker = run_finalization_utils.RunFinalizationWorker(
+            concurrency=1,
+            max_attempts=1,
+            retry_base_seconds=0,
+            retry_max_seconds=0,
+        )
+        monkeypatch.setattr(run_finalization_utils, "_run_finalization_worker", worker)
+
+        response = await routes.run_agent(AgentRunPayload(query="hi"), auth_ctx=auth_ctx)
+        frames = _data_frames([chunk async for chunk in response.body_iterator])
+        assert frames[-1] == "[DONE]"
+        assert updates == []
+
+        release_update.set()
+        await worker.drain(timeout_seconds=1)
+
+    asyncio.run(_run())
+
+    assert updates[0]["conversation_id"] == "conv-1"
+    assert updates[0]["title"] == "hi"
+
+
+def test_workflow_build_failure_ends_the_stream_with_an_error_frame(monkeypatch) -> None:
+    auth_ctx = AuthContext(user_id="user-1", token="token-1")
+    updates: list[dict] = []
+
+    async def _run() -> list:
+        _install_fakes(monkeypatch, stage_delay=0)
+
+        async def _failing_create_agent_workflow(**kwargs):
+            raise RuntimeError("MCP server unreachable")
+
+        async def _record_update(**kwargs):
+            updates.append(kwargs)
+
+        monkeypatch.setattr(routes, "create_agent_workflow", _failing_create_agent_workflow)
+        monkeypatch.setattr(routes, "update_chat_session_by_id", _record_update)
+        worker = run_finalization_utils.RunFinalizationWorker(
+            concurrency=1,
+            max_attempts=1,
+            retry_base_seconds=0,
+            retry_max_seconds=0,
+        )
+        monkeypatch.setattr(run_finalization_utils, "_run_finalization_worker", worker)
+
+        response = await routes.run_agent(AgentRunPayload(query="hi"), auth_ctx=auth_ctx)
+        frames = _data_frames([chunk async for chunk in response.body_iterator])
+        await worker.drain(timeout_seconds=1)
+        return frames
+
+    frames = asyncio.run(_run())
+
+    assert frames == [
+        {"type": "session_id", "session_id": "session-1"},
+        {"type": "error", "message": "Failed to start the agent run"},
+        "[DONE]",
+    ]
+    assert updates[0]["session_id"] == "session-1"
+    assert updates[0]["title"] == "hi"
+
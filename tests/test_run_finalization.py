@@ -0,0 +1,79 @@
+import asyncio
+
+from app.utils.run_finalization_utils import RunFinalizationWorker
+
+
+def _worker(**overrides) -> RunFinalizationWorker:
+    options = {
+        "concurrency": 2,
+        "max_attempts": 3,
+        "retry_base_seconds": 0.01,
+        "retry_max_seconds": 0.02,
+    }
+    options.update(overrides)
+    return RunFinalizationWorker(**options)
+
+
+def test_failed_job_is_retried_until_it_succeeds() -> None:
+    calls: list[int] = []
+
+    async def _flaky() -> None:
+        calls.append(len(calls))
+        if len(calls) < 3:
+            raise RuntimeError("transient")
+
+    async def _run() -> RunFinalizationWorker:
+        worker = _worker()
+        worker.submit("flaky", _flaky)
+        await worker.drain(timeout_seconds=1)
+        return worker
+
+    worker = asyncio.run(_run())
+
+    assert len(calls) == 3
+    assert worker.metrics.retried == 2
+    assert worker.metrics.completed == 1
+    assert worker.metrics.failed == 0
+    assert worker.outstanding == 0
+
+
+def test_job_fails_after_max_attempts_without_blocking_other_jobs() -> None:
+    completed: list[str] = []
+
+    async def _always_fails() -> None:
+        raise RuntimeError("permanent")
+
+    async def _ok() -> None:
+        completed.append("ok")
+
+    async def _run() -> RunFinalizationWorker:
+        worker = _worker(concurrency=1)
+        worker.submit("broken", _always_fails)
+        worker.submit("ok", _ok)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        # The healthy job runs while the broken one is waiting out its backoff.
+        assert completed == ["ok"]
+        await worker.drain(timeout_seconds=1)
+        return worker
+
+    worker = asyncio.run(_run())
+
+    assert worker.metrics.failed == 1
+    assert worker.metrics.completed == 1
+
+
+def test_drain_times_out_and_abandons_stuck_jobs() -> None:
+    async def _stuck() -> None:
+        await asyncio.sleep(10)
+
+    async def _run() -> RunFinalizationWorker:
+        worker = _worker()
+        worker.submit("stuck", _stuck)
+        await worker.drain(timeout_seconds=0.05)
+        return worker
+
+    worker = asyncio.run(_run())
+
+    assert worker.metrics.abandoned == 1
+    assert worker.metrics.completed == 0
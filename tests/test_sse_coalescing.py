@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+from app.utils.sse_utils import DeltaCoalescer, drain_sse_events
+
+_END = object()
+
+
+def _payloads(frames: list[str]) -> list[dict]:
+    return [json.loads(frame[len("data: "):]) for frame in frames]
+
+
+def _delta(text: str, *, agent: str = "main", scope: str | None = None, type_: str = "delta") -> dict:
+    payload_data = {"type": type_, "text": text, "agent": agent}
+    if scope is not None:
+        payload_data["scope"] = scope
+    return payload_data
+
+
+def test_coalescer_merges_same_key_and_flushes_on_other_events() -> None:
+    coalescer = DeltaCoalescer(window_seconds=10, max_bytes=1024)
+
+    assert coalescer.push(_delta("Hel"), now=0) == []
+    assert coalescer.push(_delta("lo"), now=0) == []
+    frames = coalescer.push(_delta("x", agent="gmail", scope="tool"), now=0)
+    frames += coalescer.push({"type": "tool_called", "tool": "gmail", "agent": "main"}, now=0)
+
+    assert _payloads(frames) == [
+        {"type": "delta", "text": "Hello", "agent": "main"},
+        {"type": "delta", "text": "x", "agent": "gmail", "scope": "tool"},
+        {"type": "tool_called", "tool": "gmail", "agent": "main"},
+    ]
+    assert coalescer.events_in == 4
+    assert coalescer.frames_out == 3
+
+
+def test_coalescer_flushes_on_byte_threshold_and_window() -> None:
+    coalescer = DeltaCoalescer(window_seconds=0.05, max_bytes=4)
+
+    assert coalescer.push(_delta("ab"), now=0) == []
+    assert _payloads(coalescer.push(_delta("cd"), now=0)) == [_delta("abcd")]
+
+    coalescer.push(_delta("e", type_="reasoning_delta"), now=1.0)
+    assert abs(coalescer.time_until_flush(now=1.02) - 0.03) < 1e-9
+    assert coalescer.time_until_flush(now=2.0) == 0.0
+    assert _payloads(coalescer.flush()) == [_delta("e", type_="reasoning_delta")]
+    assert coalescer.time_until_flush() is None
+
+
+def test_drain_flushes_pending_delta_when_window_elapses() -> None:
+    async def _run() -> list[tuple[float, dict]]:
+        queue: asyncio.Queue = asyncio.Queue()
+        coalescer = DeltaCoalescer(window_seconds=0.02, max_bytes=1024)
+        received: list[tuple[float, dict]] = []
+        loop = asyncio.get_running_loop()
+
+        async def _produce() -> None:
+            await queue.put(_delta("a"))
+            await queue.put(_delta("b"))
+            await asyncio.sleep(0.2)
+            await queue.put({"type": "message", "text": "ab", "agent": "main"})
+            await queue.put(_END)
+
+        producer = asyncio.create_task(_produce())
+        started_at = loop.time()
+        async for frame in drain_sse_events(queue, end_sentinel=_END, coalescer=coalescer):
+            received.append((loop.time() - started_at, _payloads([frame])[0]))
+        await producer
+        return received
+
+    received = asyncio.run(_run())
+
+    assert [payload_data for _, payload_data in received] == [
+        _delta("ab"),
+        {"type": "message", "text": "ab", "agent": "main"},
+    ]
+    # The merged delta is released by the window, not held until the next event.
+    assert received[0][0] < 0.15
+
+
+def test_drain_without_coalescer_emits_one_frame_per_event() -> None:
+    async def _run() -> list[str]:
+        queue: asyncio.Queue = asyncio.Queue()
+        for payload_data in (_delta("a"), _delta("b"), _END):
+            queue.put_nowait(payload_data)
+        return [frame async for frame in drain_sse_events(queue, end_sentinel=_END)]
+
+    assert _payloads(asyncio.run(_run())) == [_delta("a"), _delta("b")]
@@ -0,0 +1,97 @@
+import asyncio
+
+from app.utils import sse_utils
+from app.utils.sse_utils import StreamEventBus, drain_sse_events
+
+_END = "STREAM_END"
+
+
+def _delta(text: str, *, type_: str = "delta", agent: str = "main") -> dict:
+    return {"type": type_, "text": text, "agent": agent}
+
+
+def _drain_now(bus: StreamEventBus) -> list:
+    items = []
+    while not bus.empty():
+        items.append(bus.get_nowait())
+    return items
+
+
+def test_merge_deltas_policy_keeps_depth_bounded() -> None:
+    async def _run() -> StreamEventBus:
+        bus = StreamEventBus(capacity=3, overflow_policy="merge_deltas", end_sentinel=_END)
+        await bus.put(_delta("a"))
+        await bus.put({"type": "tool_called", "tool": "gmail", "agent": "main"})
+        await bus.put(_delta("b"))
+        for text in "cdef":
+            await bus.put(_delta(text))
+        return bus
+
+    bus = asyncio.run(_run())
+
+    assert bus.qsize() == 3
+    assert _drain_now(bus) == [
+        _delta("a"),
+        {"type": "tool_called", "tool": "gmail", "agent": "main"},
+        _delta("bcdef"),
+    ]
+    assert bus.metrics.merged == 4
+    assert bus.metrics.max_depth == 3
+
+
+def test_drop_reasoning_policy_drops_incoming_then_oldest_queued() -> None:
+    async def _run() -> StreamEventBus:
+        bus = StreamEventBus(capacity=2, overflow_policy="drop_reasoning", end_sentinel=_END)
+        await bus.put(_delta("r1", type_="reasoning_delta"))
+        await bus.put(_delta("t1"))
+        await bus.put(_delta("r2", type_="reasoning_delta"))
+        await bus.put(_delta("t2"))
+        return bus
+
+    bus = asyncio.run(_run())
+
+    assert _drain_now(bus) == [_delta("t1"), _delta("t2")]
+    assert bus.metrics.dropped == 2
+
+
+def test_block_policy_waits_for_consumer_and_preserves_order() -> None:
+    async def _run() -> tuple[list[str], StreamEventBus]:
+        bus = StreamEventBus(capacity=2, overflow_policy="block", end_sentinel=_END)
+
+        async def _produce() -> None:
+            for index in range(6):
+                await bus.put({"type": "message", "text": str(index), "agent": "main"})
+                assert bus.qsize() <= 2
+            bus.close()
+
+        producer = asyncio.create_task(_produce())
+        frames = [frame async for frame in drain_sse_events(bus, end_sentinel=_END)]
+        await producer
+        return frames, bus
+
+    frames, bus = asyncio.run(_run())
+
+    assert len(frames) == 6
+    assert [frame.split('"text": "')[1][0] for frame in frames] == list("012345")
+    assert bus.metrics.producer_waits > 0
+    assert bus.metrics.dropped == 0
+
+
+def test_close_releases_blocked_producers_and_reports_metrics() -> None:
+    async def _run() -> StreamEventBus:
+        bus = StreamEventBus(capacity=1, overflow_policy="block", end_sentinel=_END)
+        await bus.put({"type": "message", "text": "kept", "agent": "main"})
+        blocked = asyncio.create_task(bus.put({"type": "message", "text": "late", "agent": "main"}))
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        assert sse_utils.get_stream_event_bus_metrics()["open_streams"] >= 1
+
+        bus.close()
+        await asyncio.wait_for(blocked, timeout=1)
+        return bus
+
+    bus = asyncio.run(_run())
+
+    assert _drain_now(bus) == [{"type": "message", "text": "kept", "agent": "main"}, _END]
+    assert bus.metrics.dropped == 1
+    assert bus not in sse_utils._open_buses
@@ -0,0 +1,71 @@
+import asyncio
+
+import httpx
+
+from app.dependencies import SupabaseClientPool
+
+
+def _build_pool() -> SupabaseClientPool:
+    return SupabaseClientPool(
+        supabase_url="https://project.supabase.test/",
+        supabase_api_key="anon-key",
+        service_role_key="service-key",
+        max_connections=4,
+        max_keepalive_connections=2,
+        keepalive_expiry_seconds=5.0,
+        timeout_seconds=3.0,
+    )
+
+
+def test_user_handles_share_transport_and_swap_authorization() -> None:
+    pool = _build_pool()
+
+    first = pool.user_handle("Bearer token-a")
+    second = pool.user_handle("token-b")
+
+    assert first.session is second.session
+    assert first.headers["Authorization"] == "Bearer token-a"
+    assert second.headers["Authorization"] == "Bearer token-b"
+    assert first.headers["apiKey"] == "anon-key"
+    assert str(first.base_url) == "https://project.supabase.test/rest/v1"
+
+    metrics = pool.metrics.as_dict()
+    assert metrics["handles_issued"] == 2
+    assert metrics["pool_misses"] == 1
+    assert metrics["pool_hits"] == 1
+
+    asyncio.run(pool.aclose())
+
+
+def test_service_handle_uses_service_role_key() -> None:
+    pool = _build_pool()
+    handle = pool.service_handle()
+    assert handle.headers["apiKey"] == "service-key"
+    assert handle.headers["Authorization"] == "Bearer service-key"
+    asyncio.run(pool.aclose())
+
+
+def test_metered_transport_counts_reused_connections(monkeypatch) -> None:
+    pool = _build_pool()
+    opened: list[str] = []
+
+    async def _fake_handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # Only the first request needs a fresh TCP connection; later ones reuse it.
+        if not opened:
+            opened.append(request.url.host)
+            await request.extensions["trace"]("connection.connect_tcp.complete", {})
+        return httpx.Response(200, json=[{"id": "row-1"}], request=request)
+
+    monkeypatch.setattr(httpx.AsyncHTTPTransport, "handle_async_request", _fake_handle_async_request)
+
+    async def _run() -> None:
+        await pool.user_handle("token-a").table("chat_sessions").select("id").execute()
+        await pool.user_handle("token-b").table("chat_sessions").select("id").execute()
+        await pool.service_handle().table("oauth_transactions").select("id").execute()
+        await pool.aclose()
+
+    asyncio.run(_run())
+    metrics = pool.metrics.as_dict()
+    assert metrics["requests_sent"] == 3
+    assert metrics["connections_opened"] == 1
+    assert metrics["connections_reused"] == 2